@@ -35,6 +35,7 @@ CACHE_PATH = os.getenv("CACHE_PATH", default="/tmp/ibacktest_cache")
 CAL_PICKLE_FILE = os.path.expanduser(os.getenv("CAL_PICKLE_FILE", default="/tmp/cal.pkl"))
 BASIC_INFO_PICKLE_FILE = os.path.expanduser(os.getenv("BASIC_INFO_PICKLE_FILE", default="/tmp/basic_info.pkl"))
 DB_CACHE_FILE = os.getenv("DB_CACHE_FILE", default="/tmp/ibacktest_cache.db")
+DB_CACHE_BACKEND = os.getenv("DB_CACHE_BACKEND", default="sqlite").lower()  # sqlite | columnar
 WORKING_PROXY_FILE = os.path.expanduser(os.getenv("WORKING_PROXY_FILE", default="/tmp/working_proxies.txt"))
 
 # Logging setup using centralized configuration
@@ -127,6 +128,7 @@ __all__ = [
     "CAL_PICKLE_FILE",
     "BASIC_INFO_PICKLE_FILE",
     "DB_CACHE_FILE",
+    "DB_CACHE_BACKEND",
     "data_provider",
     "calendar",
     "get_calendar",
@@ -0,0 +1,184 @@
+"""
+Async, cached pipeline for per-candidate LLM analysis (ts_daily).
+
+Each candidate is an AnalysisJob. A prompt job goes through two bounded stages:
+
+1. context: build the prompt (news/search calls) under the search semaphore
+2. completion: hash the prompt content; a cached result for that hash is
+   returned as is, an identical prompt already in flight is awaited instead of
+   sent again, otherwise the LLM is called under the LLM semaphore and the
+   parsed result stored under the hash
+
+A job with an opaque `run` callable (an external analyzer that prompts
+internally) goes through the same two stages: `inputs` gathers, under the
+search semaphore, the content the analysis depends on (history, news, regime),
+and `run` is deduplicated and cached by the hash of that content exactly like
+a prompt, then called under the LLM semaphore. A `run` result of None counts
+as a failure and is not cached. Blocking clients run in worker threads, so the
+pipeline works with the synchronous OpenAI SDK and search clients. Results are
+streamed back as jobs complete.
+
+Usage:
+    pipeline = AnalysisPipeline(complete=llm_complete, parse=parse_decision_json,
+                                cache=PromptResultCache(CACHE_DB_PATH))
+    jobs = [AnalysisJob(key=c['ts_code'], build_prompt=partial(make_prompt, c)) for c in candidates]
+    results = pipeline.run(jobs, on_result=lambda key, result: logger.info(f"{key}: {result['score']}"))
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+from dataclasses import dataclass
+from functools import partial
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional, Tuple
+
+from loguru import logger
+
+LLM_CONCURRENCY = int(os.getenv('LLM_CONCURRENCY', '5'))
+SEARCH_CONCURRENCY = int(os.getenv('SEARCH_CONCURRENCY', '5'))
+
+
+def prompt_hash(prompt: str, namespace: str = '') -> str:
+    """Content hash of a prompt (namespace separates e.g. different model lists)."""
+    return hashlib.sha256(f'{namespace}\x00{prompt}'.encode('utf-8')).hexdigest()
+
+
+class PromptResultCache:
+    """Parsed LLM results keyed by prompt content hash (SQLite, JSON values)."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_prompt_cache (
+                    prompt_hash TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    created_at TEXT
+                )
+            """)
+            conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                row = conn.execute("SELECT result FROM llm_prompt_cache WHERE prompt_hash = ?", (key,)).fetchone()
+        except Exception as e:
+            logger.warning(f"Prompt cache read error: {e}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, result: Dict[str, Any]):
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_prompt_cache (prompt_hash, result, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(result, ensure_ascii=False), datetime.now().isoformat())
+                )
+                conn.commit()
+        except Exception as e:
+            logger.warning(f"Prompt cache write error: {e}")
+
+
+@dataclass
+class AnalysisJob:
+    """One candidate: either `build_prompt` (prompt pipeline) or `run` (opaque analysis call).
+
+    `inputs` returns the content a `run` result depends on; without it a `run`
+    job is neither deduplicated nor cached.
+    """
+    key: str
+    build_prompt: Optional[Callable[[], str]] = None
+    run: Optional[Callable[[], Any]] = None
+    inputs: Optional[Callable[[], str]] = None
+
+
+class AnalysisPipeline:
+    """Bounded-concurrency search + LLM stages with prompt-hash dedup and caching."""
+
+    def __init__(self, complete: Optional[Callable[[str], str]] = None,
+                 parse: Callable[[str], Any] = lambda text: text,
+                 cache: Optional[PromptResultCache] = None,
+                 namespace: str = '',
+                 llm_concurrency: int = LLM_CONCURRENCY,
+                 search_concurrency: int = SEARCH_CONCURRENCY,
+                 fallback: Optional[Callable[[AnalysisJob, Exception], Any]] = None):
+        self.complete = complete
+        self.parse = parse
+        self.cache = cache
+        self.namespace = namespace
+        self.llm_concurrency = max(1, llm_concurrency)
+        self.search_concurrency = max(1, search_concurrency)
+        self.fallback = fallback
+        self.stats = {'jobs': 0, 'llm_calls': 0, 'cache_hits': 0, 'deduplicated': 0, 'errors': 0}
+
+    async def _cached(self, content: str, call: Callable[[], Any]) -> Any:
+        """Result of `call` for `content`: cached, awaited from an identical in-flight job, or computed."""
+        key = prompt_hash(content, self.namespace)
+        if key in self._inflight:
+            self.stats['deduplicated'] += 1
+            return await asyncio.shield(self._inflight[key])
+        cached = self.cache.get(key) if self.cache else None
+        if cached is not None:
+            self.stats['cache_hits'] += 1
+            return cached
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            async with self._llm:
+                self.stats['llm_calls'] += 1
+                result = await asyncio.to_thread(call)
+            if self.cache and result is not None:
+                self.cache.set(key, result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()              # retrieved here; waiters re-raise it
+            raise
+        finally:
+            del self._inflight[key]
+
+    def _complete_and_parse(self, prompt: str) -> Any:
+        return self.parse(self.complete(prompt))
+
+    async def _job(self, job: AnalysisJob) -> Tuple[str, Any]:
+        try:
+            if job.run is not None and job.inputs is None:
+                async with self._llm:
+                    self.stats['llm_calls'] += 1
+                    return job.key, await asyncio.to_thread(job.run)
+            async with self._search:
+                content = await asyncio.to_thread(job.inputs if job.run is not None else job.build_prompt)
+            if job.run is not None:
+                return job.key, await self._cached(content, job.run)
+            return job.key, await self._cached(content, partial(self._complete_and_parse, content))
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Analysis failed for {job.key}: {e}")
+            return job.key, self.fallback(job, e) if self.fallback else None
+
+    async def stream(self, jobs: Iterable[AnalysisJob]) -> AsyncIterator[Tuple[str, Any]]:
+        """Yield (job key, result) as each job completes."""
+        self._llm = asyncio.Semaphore(self.llm_concurrency)
+        self._search = asyncio.Semaphore(self.search_concurrency)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        tasks = [asyncio.ensure_future(self._job(job)) for job in jobs]
+        self.stats['jobs'] += len(tasks)
+        for done in asyncio.as_completed(tasks):
+            yield await done
+
+    def run(self, jobs: Iterable[AnalysisJob],
+            on_result: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+        """Run the jobs to completion from synchronous code; `on_result` sees each result as it arrives."""
+        async def _collect():
+            results = {}
+            async for key, result in self.stream(jobs):
+                results[key] = result
+                if on_result:
+                    on_result(key, result)
+            return results
+        return asyncio.run(_collect())
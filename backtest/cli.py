@@ -25,7 +25,7 @@ from .analysis.pattern_detector import ChinaMarketPatternDetector
 from .strategies.picker import ASharesStockPicker
 from .utils.exceptions import IBacktestError
 
-from . import CONFIG_FILE, data_provider, global_cm
+from . import CONFIG_FILE, DB_CACHE_FILE, data_provider, global_cm
 from .utils.config import ConfigManager
 from .utils.util import convert_trade_date
 from .utils.trading_calendar import get_trading_days_after, get_trading_days_before
@@ -141,6 +141,23 @@ def create_parser() -> argparse.ArgumentParser:
         help='Comma-separated list of symbols currently held (e.g. 000001,600519)'
     )
 
+    # Cache command
+    cache_parser = subparsers.add_parser('cache', help='Manage the market-data cache')
+    cache_subparsers = cache_parser.add_subparsers(dest='cache_action')
+    # Migrate pickled-blob cache to columnar tables
+    migrate_cache_parser = cache_subparsers.add_parser('migrate', help='Migrate blob cache to columnar layout')
+    migrate_cache_parser.add_argument(
+        '--src',
+        type=str,
+        default=DB_CACHE_FILE,
+        help=f'Source blob cache database (default: {DB_CACHE_FILE})'
+    )
+    migrate_cache_parser.add_argument(
+        '--dst',
+        type=str,
+        help='Target database (default: same file as --src)'
+    )
+
     subparsers.add_parser('version', help='Show version information')
 
     return parser
@@ -841,6 +858,16 @@ def main():
             else:
                 parser.print_help()
 
+        elif args.command == 'cache':
+            if args.cache_action == 'migrate':
+                from .data.columnar_cache import migrate_blob_cache
+                stats = migrate_blob_cache(args.src, args.dst)
+                logger.info(f"Migrated {stats['migrated']} rows "
+                            f"(skipped {stats['skipped']}, failed {stats['failed']}); "
+                            f"set DB_CACHE_BACKEND=columnar to use it")
+            else:
+                parser.print_help()
+
         elif args.command == 'version':
             show_version()
 
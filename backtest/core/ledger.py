@@ -0,0 +1,107 @@
+"""
+In-memory portfolio ledger for backtests.
+
+BacktestLedger is a DatabaseManager whose tables (holding_stocks,
+transactions, smart_orders, summary_account, ...) live in one in-process
+SQLite database instead of test_imobile.db. The engine's order execution and
+report queries run unchanged against it, so T+1 handling (available_shares)
+and P&L bookkeeping are identical, but every call reuses one open connection
+and commits touch no disk.
+
+Each connect()/cursor() call runs in its own SAVEPOINT, so nested calls keep
+the per-call transaction boundaries of separate connections: a failing inner
+call rolls back only its own statements, and cursor(commit=False) does not
+commit.
+
+The ledger is loaded from the database file when opened (so a --resume run
+continues from the saved state) and written back with flush() — at the end
+of a run and at the engine's resume checkpoints.
+"""
+
+import sqlite3
+from contextlib import closing, contextmanager
+from typing import Iterator
+
+from loguru import logger
+
+from shared.db.db import DatabaseManager
+
+
+class BacktestLedger(DatabaseManager):
+    """DatabaseManager over an in-memory copy of a backtest database file."""
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        self._conn = None
+        super().__init__(':memory:')
+
+    def _setup_database(self) -> None:
+        """Open the persistent in-memory connection and load the file's current contents."""
+        self._conn = sqlite3.connect(':memory:', **self.connection_kwargs)
+        self._conn.row_factory = sqlite3.Row
+        with closing(sqlite3.connect(self.db_file)) as src:
+            src.backup(self._conn)
+        self._conn.isolation_level = None   # transactions and savepoints are issued explicitly
+        self._depth = 0
+        logger.debug(f"Backtest ledger loaded from {self.db_file}")
+
+    @contextmanager
+    def _scope(self, commit: bool) -> Iterator[sqlite3.Connection]:
+        """
+        One connect()/cursor() call: its own SAVEPOINT inside the ledger transaction.
+
+        On an error only this scope's statements are rolled back (ROLLBACK TO),
+        never an enclosing scope's. The transaction is committed when the last
+        open scope exits with commit=True; a commit=False scope leaves its work
+        pending until a later committing scope or flush().
+        """
+        conn = self._conn
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+        self._depth += 1
+        savepoint = f"ledger_{self._depth}"
+        conn.execute(f"SAVEPOINT {savepoint}")
+        try:
+            yield conn
+        except BaseException as e:
+            conn.execute(f"ROLLBACK TO {savepoint}")
+            conn.execute(f"RELEASE {savepoint}")
+            if isinstance(e, sqlite3.Error):
+                logger.error(f"Ledger error occurred, {savepoint} rolled back: {e}")
+            raise
+        else:
+            conn.execute(f"RELEASE {savepoint}")
+            if commit and self._depth == 1:
+                conn.execute("COMMIT")
+        finally:
+            self._depth -= 1
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        """Yield the ledger connection inside a committing savepoint scope."""
+        with self._scope(commit=True) as conn:
+            yield conn
+
+    @contextmanager
+    def cursor(self, commit: bool = True) -> Iterator[sqlite3.Cursor]:
+        """Yield a ledger cursor inside its own savepoint; commit only when `commit` is True."""
+        with self._scope(commit=commit) as conn:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+
+    def flush(self) -> None:
+        """Write the ledger's tables back to the database file (replaces its contents)."""
+        if self._conn.in_transaction:
+            self._conn.execute("COMMIT")
+        with closing(sqlite3.connect(self.db_file)) as dst:
+            self._conn.backup(dst)
+        logger.info(f"Backtest ledger flushed to {self.db_file}")
+
+    def close(self) -> None:
+        """Discard the in-memory state (anything not flushed is lost)."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
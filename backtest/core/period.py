@@ -0,0 +1,223 @@
+"""
+Set-based period accounting for OrderAnalyzer.generate_period_report().
+
+The period report used to rebuild every trading day from the database: a
+holding_stocks snapshot, two purchase-date queries per held symbol and a
+realized-P&L query per date, plus one market-data lookup per holding per day.
+Here the account history is replayed from ONE read of the transactions table
+and valued against a (dates x symbols) close matrix:
+
+- load_transactions()    one SELECT of the account's transactions up to end_date
+- replay_transactions()  one pass: position after every transaction, realized
+                         P&L per sell, round trips (holding periods)
+- build_period_frames()  daily equity curve / realized / unrealized P&L and
+                         the end-of-period holdings, as DataFrames
+
+Cost accounting follows execute_buy_order()/execute_sell_order(): buys add
+their net amount to the position cost, sells remove the average cost of the
+shares sold, and a sell's realized P&L is the value recorded in its notes.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from backtest.core.portfolio import realized_pnl_from_notes
+from backtest.utils.util import convert_trade_date
+
+TRANSACTION_COLUMNS = ['id', 'date', 'type', 'code', 'name', 'quantity', 'price', 'net_amount', 'notes']
+
+
+@dataclass
+class PeriodFrames:
+    """Result of build_period_frames()."""
+    daily: pd.DataFrame       # one row per trading day (the report timeline columns)
+    holdings: pd.DataFrame    # positions open at the end of the period, index = code
+    trips: pd.DataFrame       # round trips (open -> close) touching the period
+    quantity: pd.DataFrame    # shares held at each day's close (dates x codes)
+    cost: pd.DataFrame        # cost basis held at each day's close (dates x codes)
+
+
+def load_transactions(db, user_id: int, end_date: str) -> pd.DataFrame:
+    """All of the account's transactions up to end_date (inclusive), in execution order."""
+    with db.cursor() as cursor:
+        cursor.execute("""
+            SELECT id, transaction_date, transaction_type, code, name, quantity, price, net_amount, notes
+            FROM transactions
+            WHERE user_id = ?
+            ORDER BY transaction_date, id
+        """, (user_id,))
+        rows = [tuple(r) for r in cursor.fetchall()]
+    txns = pd.DataFrame(rows, columns=TRANSACTION_COLUMNS)
+    if txns.empty:
+        return txns
+    txns['date'] = [convert_trade_date(d) for d in txns['date']]
+    txns = txns[txns['date'] <= convert_trade_date(end_date)]
+    return txns.sort_values(['date', 'id'], kind='stable').reset_index(drop=True)
+
+
+def replay_transactions(txns: pd.DataFrame):
+    """
+    One pass over transactions in execution order.
+
+    Returns:
+        Tuple of (txns with qty_after/cost_after/pnl columns, round-trips DataFrame)
+    """
+    qty_after = np.zeros(len(txns))
+    cost_after = np.zeros(len(txns))
+    pnl = np.full(len(txns), np.nan)
+    positions = {}    # code -> [quantity, cost_total]
+    open_trips = {}   # code -> round-trip record
+    trips: List[dict] = []
+
+    for i, row in enumerate(txns.itertuples(index=False)):
+        qty, cost = positions.get(row.code, (0, 0.0))
+        quantity = int(row.quantity)
+        if row.type == 'buy':
+            if qty <= 0:
+                qty, cost = 0, 0.0
+                open_trips[row.code] = {'code': row.code, 'name': row.name, 'open_date': row.date,
+                                        'close_date': None, 'bought': 0, 'realized_pnl': 0.0}
+            qty += quantity
+            cost += float(row.net_amount)
+            if row.code in open_trips:
+                open_trips[row.code]['bought'] += quantity
+        elif row.type == 'sell':
+            avg_cost = cost / qty if qty > 0 else 0.0
+            sell_pnl = realized_pnl_from_notes(row.notes)
+            if sell_pnl is None:
+                sell_pnl = float(row.net_amount) - avg_cost * quantity
+            pnl[i] = sell_pnl
+            qty -= quantity
+            cost = cost - avg_cost * quantity if qty > 0 else 0.0
+            trip = open_trips.get(row.code)
+            if trip is not None:
+                trip['realized_pnl'] += sell_pnl
+                if qty <= 0:
+                    trip['close_date'] = row.date
+                    trips.append(open_trips.pop(row.code))
+        positions[row.code] = (qty, cost)
+        qty_after[i] = max(qty, 0)
+        cost_after[i] = cost
+
+    trips.extend(open_trips.values())
+    replayed = txns.assign(qty_after=qty_after, cost_after=cost_after, pnl=pnl)
+    trip_columns = ['code', 'name', 'open_date', 'close_date', 'bought', 'realized_pnl']
+    return replayed, pd.DataFrame(trips, columns=trip_columns)
+
+
+def build_period_frames(txns: pd.DataFrame, dates: Sequence[str],
+                        load_closes: Callable[[List[str]], pd.DataFrame],
+                        initial_cash: float, external: Optional[pd.DataFrame] = None) -> PeriodFrames:
+    """
+    Value the replayed account on every trading day of the period.
+
+    Args:
+        txns: load_transactions() output (may include history before the period)
+        dates: Trading days of the period (YYYYMMDD, ascending)
+        load_closes: codes -> close prices (dates x codes) for the codes held during
+                     the period; NaN where unavailable -> valued at cost
+        initial_cash: Starting capital (portfolio value = initial cash + period realized + unrealized)
+        external: Positions without any transaction (e.g. synced from the app):
+                  columns code, name, quantity, cost_total, since (YYYYMMDD)
+    """
+    dates = list(dates)
+    index = pd.Index(dates)
+    replayed, trips = replay_transactions(txns)
+
+    # Each transaction lands on the first report day on/after its date; the
+    # state after a day's last transaction is that day's closing position.
+    replayed['day'] = np.searchsorted(np.asarray(dates), replayed['date'].to_numpy(), side='left')
+    held = replayed.groupby(['day', 'code'], sort=True)[['qty_after', 'cost_after']].last().reset_index()
+    quantity = held.pivot(index='day', columns='code', values='qty_after')
+    cost = held.pivot(index='day', columns='code', values='cost_after')
+    days = pd.RangeIndex(len(dates) + 1)
+    quantity = quantity.reindex(days).ffill().fillna(0.0).iloc[:len(dates)]
+    cost = cost.reindex(days).ffill().fillna(0.0).iloc[:len(dates)]
+    quantity.index = index
+    cost.index = index
+
+    if external is not None and not external.empty:
+        for ext in external.itertuples(index=False):
+            if ext.code in quantity.columns:
+                continue
+            since = index >= ext.since
+            quantity[ext.code] = np.where(since, float(ext.quantity), 0.0)
+            cost[ext.code] = np.where(since, float(ext.cost_total), 0.0)
+
+    held_mask = quantity > 0
+    quantity = quantity.loc[:, held_mask.any(axis=0)]
+    cost = cost[quantity.columns]
+    held_mask = held_mask[quantity.columns]
+    codes = list(quantity.columns)
+    prices = load_closes(codes).reindex(index=index, columns=codes).astype(float)
+    avg_cost = cost.where(quantity > 0).div(quantity.where(quantity > 0))
+    prices = prices.fillna(avg_cost)   # no market data -> valued at cost
+    market_value = (quantity * prices).fillna(0.0)
+
+    # Realized P&L and counts cover the period's own transactions only (earlier
+    # history just determines the positions carried into the period)
+    period = replayed[(replayed['day'] < len(dates)) & (replayed['date'] >= (dates[0] if dates else ''))]
+    sells = period[period['type'] == 'sell']
+    daily_realized = sells.groupby('day')['pnl'].sum().reindex(range(len(dates)), fill_value=0.0).to_numpy()
+    sell_count = sells.groupby('day').size().reindex(range(len(dates)), fill_value=0).to_numpy()
+    txn_count = period.groupby('day').size().reindex(range(len(dates)), fill_value=0).to_numpy()
+
+    held_cost = cost.where(held_mask, 0.0).sum(axis=1).to_numpy()
+    held_value = market_value.where(held_mask, 0.0).sum(axis=1).to_numpy()
+    unrealized = held_value - held_cost
+    cumulative_realized = np.cumsum(daily_realized)
+    total_pnl = cumulative_realized + unrealized
+
+    daily = pd.DataFrame({
+        'date': dates,
+        'executed_orders': txn_count.astype(int),
+        'sell_count': sell_count.astype(int),
+        'daily_realized_pnl': daily_realized,
+        'daily_unrealized_pnl': unrealized,
+        'daily_total_pnl': daily_realized + unrealized,
+        'cumulative_realized_pnl': cumulative_realized,
+        'cumulative_unrealized_pnl': unrealized,
+        'cumulative_total_pnl': total_pnl,
+        'total_held_cost': held_cost,
+        'total_held_market_value': held_value,
+        'portfolio_value': initial_cash + total_pnl,
+        'positions_count': held_mask.sum(axis=1).to_numpy().astype(int),
+    })
+
+    holdings = _final_holdings(quantity, cost, prices, trips, external, dates)
+    trips = trips[trips['close_date'].isna() | (trips['close_date'] >= dates[0])] if dates else trips
+    trips = trips.assign(holding_days=[
+        int(np.searchsorted(dates, close if close else dates[-1], side='right')
+            - np.searchsorted(dates, open_, side='left'))
+        for open_, close in zip(trips['open_date'], trips['close_date'])
+    ]) if dates else trips
+    return PeriodFrames(daily=daily, holdings=holdings, trips=trips.reset_index(drop=True),
+                        quantity=quantity, cost=cost)
+
+
+def _final_holdings(quantity: pd.DataFrame, cost: pd.DataFrame, prices: pd.DataFrame,
+                    trips: pd.DataFrame, external: Optional[pd.DataFrame], dates: List[str]) -> pd.DataFrame:
+    columns = ['name', 'quantity', 'cost_per_share', 'cost_total', 'purchase_date', 'market_price']
+    if not dates or quantity.empty:
+        return pd.DataFrame(columns=columns)
+    last_qty = quantity.iloc[-1]
+    codes = last_qty.index[last_qty > 0]
+    open_trips = trips[trips['close_date'].isna()].set_index('code')
+    ext = external.set_index('code') if external is not None and not external.empty else None
+    rows = []
+    for code in codes:
+        if code in open_trips.index:
+            name, purchase_date = open_trips.at[code, 'name'], open_trips.at[code, 'open_date']
+        else:
+            name, purchase_date = ext.at[code, 'name'], ext.at[code, 'since']
+        qty = float(last_qty[code])
+        cost_total = float(cost.iloc[-1][code])
+        rows.append({
+            'code': code, 'name': name, 'quantity': int(qty), 'cost_per_share': cost_total / qty,
+            'cost_total': cost_total, 'purchase_date': min(purchase_date, dates[-1]),
+            'market_price': float(prices.iloc[-1][code]),
+        })
+    return pd.DataFrame(rows, columns=['code'] + columns).set_index('code')
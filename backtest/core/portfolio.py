@@ -0,0 +1,90 @@
+"""
+Running portfolio state for the backtest / pre-market engine.
+
+PortfolioState keeps realized P&L as a running accumulator (seeded once from
+the transactions table, then fed by every executed sell) and serves the NAV,
+peak NAV and drawdown used by the engine's position sizing and max-drawdown
+de-risking — instead of re-reading and string-parsing every earlier sell's
+notes on each trading day.
+"""
+
+from typing import List, Optional, Tuple
+
+from backtest.utils.util import convert_trade_date
+
+PNL_NOTE_MARKER = 'P&L: ¥'
+
+
+def realized_pnl_from_notes(notes: Optional[str]) -> Optional[float]:
+    """Realized P&L recorded in a sell transaction's notes ("... P&L: ¥123.45 (1.23%)"), or None."""
+    if not notes or PNL_NOTE_MARKER not in notes:
+        return None
+    try:
+        return float(notes.split(PNL_NOTE_MARKER)[1].split(' ')[0])
+    except (IndexError, ValueError):
+        return None
+
+
+class PortfolioState:
+    """Realized P&L, NAV and high-water mark of one account.
+
+    Realized P&L is summed in the order sells were recorded, exactly like
+    summing the transactions table, so NAVs match the previous per-day query.
+    """
+
+    def __init__(self, initial_cash: float):
+        self.initial_cash = float(initial_cash)
+        self.peak_nav = 0.0
+        self._sells: List[Tuple[str, float]] = []   # (YYYYMMDD, pnl) in recorded order
+        self._in_date_order = True
+        # Prefix sum over self._sells[:_prefix_len], all dated before _prefix_date
+        self._prefix_len = 0
+        self._prefix_sum = 0.0
+        self._prefix_date = ''
+
+    @classmethod
+    def from_db(cls, db, user_id: int, initial_cash: float) -> 'PortfolioState':
+        """Seed the accumulator from the sells already in the database (resume / live runs)."""
+        state = cls(initial_cash)
+        with db.cursor() as cursor:
+            cursor.execute("""
+                SELECT transaction_date, notes FROM transactions
+                WHERE user_id=? AND transaction_type='sell'
+                ORDER BY transaction_date, id
+            """, (user_id,))
+            for transaction_date, notes in cursor.fetchall():
+                pnl = realized_pnl_from_notes(notes)
+                if pnl is not None:
+                    state.record_sell(transaction_date, pnl)
+        return state
+
+    def record_sell(self, transaction_date, pnl: float) -> None:
+        """Add one executed sell's realized P&L."""
+        date = convert_trade_date(transaction_date)
+        if self._sells and date < self._sells[-1][0]:
+            self._in_date_order = False
+        self._sells.append((date, float(pnl)))
+
+    def realized_before(self, date) -> float:
+        """Cumulative realized P&L of sells strictly before `date`."""
+        date = convert_trade_date(date)
+        if not self._in_date_order or date < self._prefix_date:
+            return sum((pnl for d, pnl in self._sells if d < date), 0.0)
+        while self._prefix_len < len(self._sells) and self._sells[self._prefix_len][0] < date:
+            self._prefix_sum += self._sells[self._prefix_len][1]
+            self._prefix_len += 1
+        self._prefix_date = date
+        return self._prefix_sum
+
+    @property
+    def realized_total(self) -> float:
+        return sum((pnl for _, pnl in self._sells), 0.0)
+
+    def nav(self, date) -> float:
+        """Start-of-day NAV: initial cash plus realized P&L before `date`."""
+        return self.initial_cash + self.realized_before(date)
+
+    def mark_nav(self, nav: float) -> float:
+        """Raise the high-water mark to `nav` if higher; return the drawdown from it in % (<= 0)."""
+        self.peak_nav = max(self.peak_nav, nav)
+        return (nav / self.peak_nav - 1) * 100 if self.peak_nav > 0 else 0.0
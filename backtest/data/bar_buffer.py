@@ -0,0 +1,87 @@
+"""
+Rolling window of recent daily bars per symbol.
+
+The backtest engine asks for the same trailing window (e.g. 20 trading days
+for the Kaufman ER exit) of a held symbol on consecutive days. RollingBarBuffer
+keeps those bars in memory: each day's bulk-prefetched bars are appended to
+the symbols already buffered, so a symbol's window is fetched from the
+provider once and then only slides forward. Bars older than the window are
+evicted.
+
+Coverage is tracked per symbol as a contiguous [start, end] range of YYYYMMDD
+dates; a window request outside it refetches that symbol's whole window.
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from backtest.utils.util import bare_code, convert_trade_date
+
+FetchFn = Callable[[List[str], str, str], pd.DataFrame]   # (symbols, start, end) -> long frame
+DaysBeforeFn = Callable[[str, int], str]                  # (date, n) -> n trading days before
+
+
+class RollingBarBuffer:
+    """Trailing `days` trading days of bars per symbol, filled by bulk day prefetches."""
+
+    def __init__(self, days: int, fetch: FetchFn, days_before: DaysBeforeFn):
+        self.days = days
+        self._fetch = fetch
+        self._days_before = days_before
+        self._bars: Dict[str, pd.DataFrame] = {}
+        self._coverage: Dict[str, Tuple[str, str]] = {}
+
+    def add_day(self, date: str, symbols: Iterable[str], bars: pd.DataFrame) -> None:
+        """
+        Append one day's bars for `symbols` (a symbol without a row had no bar that day).
+
+        Only symbols already covered up to the previous trading day are extended;
+        others are left to be fetched in full on their first window() request.
+        """
+        date = convert_trade_date(date)
+        prev_day = self._days_before(date, 1)
+        start = self._days_before(date, self.days)
+        # Matched on the bare code: symbols may come as '600000' or '600000.SH'
+        by_code = ({bare_code(code): rows for code, rows in bars.groupby('ts_code')}
+                   if bars is not None and not bars.empty else {})
+        for symbol in symbols:
+            covered = self._coverage.get(symbol)
+            if covered is None or covered[1] >= date:
+                continue
+            if covered[1] < prev_day:
+                self.discard(symbol)
+                continue
+            frame = self._bars[symbol]
+            rows = by_code.get(bare_code(symbol))
+            if rows is not None:
+                frame = pd.concat([frame, rows], ignore_index=True)
+            self._bars[symbol] = frame[frame['trade_date'].astype(str) >= start].reset_index(drop=True)
+            self._coverage[symbol] = (max(covered[0], start), date)
+
+    def window(self, symbol: str, date: str) -> Optional[pd.DataFrame]:
+        """Bars of `symbol` from `days` trading days before `date` through `date`, or None."""
+        date = convert_trade_date(date)
+        start = self._days_before(date, self.days)
+        covered = self._coverage.get(symbol)
+        if covered is None or covered[0] > start or covered[1] < date:
+            df = self._fetch([symbol], start, date)
+            if df is None or df.empty:
+                return None
+            self._bars[symbol] = df.sort_values('trade_date').reset_index(drop=True)
+            self._coverage[symbol] = (start, date)
+        frame = self._bars[symbol]
+        dates = frame['trade_date'].astype(str)
+        window = frame[(dates >= start) & (dates <= date)].reset_index(drop=True)
+        return window if not window.empty else None
+
+    def discard(self, symbol: str) -> None:
+        self._bars.pop(symbol, None)
+        self._coverage.pop(symbol, None)
+
+    def clear(self) -> None:
+        self._bars.clear()
+        self._coverage.clear()
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._coverage
@@ -0,0 +1,572 @@
+"""
+Columnar SQLite cache for financial market data.
+
+Same get/set/invalidate API as SQLiteDataCache, but every (symbol, trade_date)
+row is stored as real typed SQLite columns in one table per data type instead
+of a zlib-compressed pickled one-row DataFrame. A multi-day or whole-market
+read is a single SELECT straight into pandas, with no per-row unpickling.
+"""
+
+from loguru import logger
+import sqlite3
+import time
+import pickle
+import fnmatch
+from typing import Optional, Dict, Any, List, Tuple
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from .sqlite_cache import SQLiteDataCache, SUPPORTED_DATA_TYPES, _chunks, _decompress_blob
+from ..utils.exceptions import DataProviderError
+
+# Bookkeeping columns are underscore-prefixed so they never collide with
+# provider columns (stock_data carries stock_basic's own `symbol` column).
+_KEY_COL = '_symbol'
+_UPDATED_COL = '_updated_at'
+_INTERNAL_COLS = (_KEY_COL, _UPDATED_COL)
+
+
+def _table_name(data_type: str) -> str:
+    """Return the columnar table name for a data type, e.g. 'col_ohlcv_data'."""
+    return f"col_{data_type}"
+
+
+def _quote(name: str) -> str:
+    """Quote an SQL identifier (column names come from provider DataFrames)."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _sql_type(series: pd.Series) -> str:
+    """Map a pandas dtype to an SQLite column affinity."""
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(series):
+        return 'REAL'
+    return 'TEXT'
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_))
+
+
+class ColumnarDataCache(SQLiteDataCache):
+    """SQLite cache storing market data as typed columns, one row per (symbol, trade_date).
+
+    Tables are created per data type (``col_ohlcv_data``, ``col_stock_data`` ...)
+    with a ``(_symbol, trade_date)`` primary key. Provider columns are added on
+    first sight with an affinity inferred from the DataFrame dtype, so new
+    Tushare fields need no schema migration.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Initialize columnar SQLite data cache.
+
+        Args:
+            db_path: Path to SQLite database file (may be the same file as the blob cache)
+        """
+        self._columns: Dict[str, List[str]] = {}
+        super().__init__(db_path)
+
+    def _init_database(self):
+        """Create one columnar table per supported data type."""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                for data_type in SUPPORTED_DATA_TYPES:
+                    table = _table_name(data_type)
+                    conn.execute(f'''
+                        CREATE TABLE IF NOT EXISTS {table} (
+                            {_KEY_COL} TEXT NOT NULL,
+                            trade_date TEXT NOT NULL,
+                            {_UPDATED_COL} REAL NOT NULL,
+                            PRIMARY KEY ({_KEY_COL}, trade_date)
+                        ) WITHOUT ROWID
+                    ''')
+                    conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_date ON {table}(trade_date)')
+                self._init_snapshot_table(conn.cursor())
+                self._init_regime_table(conn.cursor())
+                conn.commit()
+                logger.debug(f"Columnar cache database initialized: {self.db_path}")
+
+        except Exception as e:
+            raise DataProviderError(f"Failed to initialize columnar cache database: {str(e)}")
+
+    # ------------------------- schema helpers -------------------------
+    def _table_columns(self, conn: sqlite3.Connection, data_type: str, refresh: bool = False) -> List[str]:
+        """Return (and memoize) the column names of a data type's table."""
+        if refresh or data_type not in self._columns:
+            rows = conn.execute(f"PRAGMA table_info({_table_name(data_type)})").fetchall()
+            self._columns[data_type] = [row[1] for row in rows]
+        return self._columns[data_type]
+
+    def _ensure_columns(self, conn: sqlite3.Connection, data_type: str, frame: pd.DataFrame):
+        """Add any frame column missing from the table (ALTER TABLE ADD COLUMN)."""
+        known = self._table_columns(conn, data_type)
+        missing = [c for c in frame.columns if c not in known]
+        if not missing:
+            return
+        # Another process may have added them since we memoized the schema
+        known = self._table_columns(conn, data_type, refresh=True)
+        for col in [c for c in missing if c not in known]:
+            try:
+                conn.execute(
+                    f"ALTER TABLE {_table_name(data_type)} ADD COLUMN {_quote(col)} {_sql_type(frame[col])}"
+                )
+            except sqlite3.OperationalError as e:
+                if 'duplicate column' not in str(e):
+                    raise
+        self._table_columns(conn, data_type, refresh=True)
+
+    @staticmethod
+    def _prepare_frame(frame: pd.DataFrame) -> pd.DataFrame:
+        """Normalize a frame for storage: unique columns, str trade_date, SQLite-bindable values."""
+        frame = frame.loc[:, ~frame.columns.duplicated()].copy()
+        frame['trade_date'] = frame['trade_date'].astype(str)
+        # Columns that are entirely null carry no information and would
+        # otherwise be created with a TEXT affinity that later coerces numbers.
+        keep = [c for c in frame.columns if c in _INTERNAL_COLS or c == 'trade_date' or frame[c].notna().any()]
+        frame = frame[keep]
+        for col in frame.columns:
+            series = frame[col]
+            if pd.api.types.is_datetime64_any_dtype(series):
+                frame[col] = series.dt.strftime('%Y%m%d')
+            elif series.dtype == object:
+                non_null = series.dropna()
+                if len(non_null) and non_null.map(_is_number).all():
+                    frame[col] = pd.to_numeric(series, errors='coerce')
+        return frame
+
+    def _upsert_frame(self, conn: sqlite3.Connection, data_type: str, frame: pd.DataFrame) -> int:
+        """Upsert all rows of a frame carrying `_symbol` and `trade_date` in one executemany."""
+        frame = self._prepare_frame(frame)
+        if frame.empty:
+            return 0
+        self._ensure_columns(conn, data_type, frame)
+
+        cols = [c for c in frame.columns if c != _UPDATED_COL]
+        col_sql = ', '.join(_quote(c) for c in cols + [_UPDATED_COL])
+        placeholders = ', '.join('?' * (len(cols) + 1))
+        updates = ', '.join(f"{_quote(c)} = excluded.{_quote(c)}" for c in cols + [_UPDATED_COL]
+                            if c not in (_KEY_COL, 'trade_date'))
+        sql = (
+            f"INSERT INTO {_table_name(data_type)} ({col_sql}) VALUES ({placeholders}) "
+            f"ON CONFLICT({_KEY_COL}, trade_date) DO UPDATE SET {updates}"
+        )
+
+        values = frame[cols].astype(object).where(frame[cols].notna(), None)
+        now = time.time()
+        rows = [(*row, now) for row in values.itertuples(index=False, name=None)]
+        conn.executemany(sql, rows)
+        return len(rows)
+
+    def _read_frame(self, conn: sqlite3.Connection, data_type: str, symbols: Optional[List[str]],
+                    start_date: str, end_date: str) -> pd.DataFrame:
+        """Read a (symbols x date range) block; symbols=None reads the whole market."""
+        table = _table_name(data_type)
+        order = f"ORDER BY {_KEY_COL}, trade_date"
+        if symbols is None:
+            return pd.read_sql_query(
+                f"SELECT * FROM {table} WHERE trade_date BETWEEN ? AND ? {order}",
+                conn, params=[start_date, end_date]
+            )
+        frames = []
+        for chunk in _chunks(list(symbols)):
+            placeholders = ','.join('?' * len(chunk))
+            frames.append(pd.read_sql_query(
+                f"SELECT * FROM {table} WHERE {_KEY_COL} IN ({placeholders}) "
+                f"AND trade_date BETWEEN ? AND ? {order}",
+                conn, params=[*chunk, start_date, end_date]
+            ))
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+    @staticmethod
+    def _strip_internal(df: pd.DataFrame) -> pd.DataFrame:
+        """Drop bookkeeping columns and columns that are all NULL for this slice."""
+        df = df.drop(columns=[c for c in _INTERNAL_COLS if c in df.columns])
+        return df.dropna(axis=1, how='all').reset_index(drop=True)
+
+    # ------------------------- cache API -------------------------
+    def remove(self, key: str) -> bool:
+        """Remove cached data by key."""
+        try:
+            data_type, symbol, start_date, end_date = self._parse_cache_key(key)
+            if data_type not in SUPPORTED_DATA_TYPES:
+                return False
+
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.execute(
+                    f"DELETE FROM {_table_name(data_type)} WHERE {_KEY_COL} = ? AND trade_date BETWEEN ? AND ?",
+                    (symbol, start_date, end_date)
+                )
+                deleted_count = cursor.rowcount
+                conn.commit()
+
+            logger.debug(f"Removed {deleted_count} cache entries for key: {key}")
+            return deleted_count > 0
+
+        except Exception as e:
+            logger.error(f"Failed to remove cache for key {key}: {str(e)}")
+            return False
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Get cached data by key with a single range query."""
+        from ..utils.trading_calendar import get_trading_days_between
+        try:
+            data_type, symbol, start_date, end_date = self._parse_cache_key(key)
+
+            if not symbol or data_type not in SUPPORTED_DATA_TYPES or not start_date or not end_date:
+                logger.debug(f"Cache miss for unsupported data type: {key}")
+                return None
+
+            with sqlite3.connect(self.db_path) as conn:
+                df = self._read_frame(conn, data_type, [symbol], start_date, end_date)
+
+            if df.empty:
+                logger.debug(f"Cache miss: {key}")
+                return None
+
+            if self._is_single_day_request(start_date, end_date):
+                logger.debug(f"Daily cache hit: {key}")
+                return self._strip_internal(df)
+
+            trade_dates = get_trading_days_between(start_date, end_date)
+            if len(df) >= len(trade_dates) * 0.90:  # Allow 10% margin for missing APIs/holidays
+                logger.debug(f"Built from columnar cache: {key} ({len(df)} days)")
+                return self._strip_internal(df)
+
+            logger.debug(f"Partial cache hit for {key} (found {len(df)}, expected {len(trade_dates)}). Forcing cache miss.")
+            return None
+
+        except Exception as e:
+            logger.warning(f"Failed to retrieve cache for key {key}: {str(e)}")
+            return None
+
+    def get_frame(self, data_type: str, start_date: str, end_date: str,
+                  symbols: Optional[List[str]] = None) -> pd.DataFrame:
+        """Read a long (symbol, trade_date) frame in one query.
+
+        Args:
+            data_type: One of SUPPORTED_DATA_TYPES
+            start_date: First trade date, YYYYMMDD
+            end_date: Last trade date, YYYYMMDD
+            symbols: Symbols to read; None reads every cached symbol (whole market)
+
+        Returns:
+            DataFrame sorted by (cache symbol, trade_date) — the symbol rows were stored
+            under, which is also the ts_code fallback; empty if nothing is cached.
+        """
+        if data_type not in SUPPORTED_DATA_TYPES:
+            raise DataProviderError(f"Unsupported data type for columnar cache: {data_type}")
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                df = self._read_frame(conn, data_type, symbols, start_date, end_date)
+        except Exception as e:
+            logger.warning(f"Failed to read {data_type} frame {start_date}-{end_date}: {str(e)}")
+            return pd.DataFrame()
+        if df.empty:
+            return pd.DataFrame()
+        if 'ts_code' not in df.columns:
+            df['ts_code'] = df[_KEY_COL]
+        else:
+            df['ts_code'] = df['ts_code'].fillna(df[_KEY_COL])
+        return self._strip_internal(df)
+
+    def get_many(self, data_type: str, symbols: List[str], start_date: str,
+                 end_date: str) -> Tuple[pd.DataFrame, Dict[str, Dict[str, Any]]]:
+        """Get cached rows for many symbols over a date range (see SQLiteDataCache.get_many)."""
+        from ..utils.trading_calendar import get_trading_days_between
+        symbols = list(dict.fromkeys(symbols))
+        trade_dates = [start_date] if self._is_single_day_request(start_date, end_date) \
+            else get_trading_days_between(start_date, end_date)
+        if data_type not in SUPPORTED_DATA_TYPES or not symbols:
+            return pd.DataFrame(), self._coverage({}, symbols, trade_dates)
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                df = self._read_frame(conn, data_type, symbols, start_date, end_date)
+        except Exception as e:
+            logger.warning(f"Failed to batch-read {data_type} for {len(symbols)} symbols: {str(e)}")
+            return pd.DataFrame(), self._coverage({}, symbols, trade_dates)
+
+        if df.empty:
+            return pd.DataFrame(), self._coverage({}, symbols, trade_dates)
+        found = {sym: set(dates) for sym, dates in df.groupby(_KEY_COL)['trade_date']}
+        df['ts_code'] = df['ts_code'].fillna(df[_KEY_COL]) if 'ts_code' in df.columns else df[_KEY_COL]
+        return self._strip_internal(df), self._coverage(found, symbols, trade_dates)
+
+    def set(self, key: str, data: pd.DataFrame) -> bool:
+        """Set cached data with upsert behavior."""
+        try:
+            if data is None or data.empty:
+                logger.debug(f"Attempted to cache empty data for key: {key}")
+                return False
+
+            data_type, symbol, start_date, end_date = self._parse_cache_key(key)
+
+            if symbol and data_type in SUPPORTED_DATA_TYPES and 'trade_date' in data.columns:
+                frame = data.copy()
+                frame[_KEY_COL] = symbol
+                with sqlite3.connect(self.db_path) as conn:
+                    count = self._upsert_frame(conn, data_type, frame)
+                    conn.commit()
+                logger.debug(f"Cached {count} daily records for {key}")
+                return count > 0
+
+            logger.debug(f"Skipping cache for unsupported data type: {key}")
+            return False
+
+        except Exception as e:
+            logger.error(f"Failed to cache data for key {key}: {str(e)}")
+            return False
+
+    def set_bulk(self, data_type: str, data: pd.DataFrame, symbol_col: str = 'ts_code') -> int:
+        """Upsert a multi-symbol frame in one transaction (see SQLiteDataCache.set_bulk)."""
+        if data is None or data.empty:
+            return 0
+        if data_type not in SUPPORTED_DATA_TYPES or symbol_col not in data.columns or 'trade_date' not in data.columns:
+            logger.debug(f"Skipping bulk cache for {data_type}: unsupported type or missing {symbol_col}/trade_date")
+            return 0
+        try:
+            frame = data[data[symbol_col].notna()].copy()
+            frame[_KEY_COL] = frame[symbol_col].astype(str)
+            with sqlite3.connect(self.db_path) as conn:
+                count = self._upsert_frame(conn, data_type, frame)
+                conn.commit()
+            logger.debug(f"Bulk cached {count} {data_type} rows for {frame[_KEY_COL].nunique()} symbols")
+            return count
+        except Exception as e:
+            logger.error(f"Failed to bulk cache {data_type}: {str(e)}")
+            return 0
+
+    def get_cached_dates(self, data_type: str, symbol: str) -> List[str]:
+        """Get list of cached trade dates for a specific symbol and data type."""
+        if data_type not in SUPPORTED_DATA_TYPES:
+            return []
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.execute(
+                    f"SELECT trade_date FROM {_table_name(data_type)} WHERE {_KEY_COL} = ? ORDER BY trade_date",
+                    (symbol,)
+                )
+                return [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            logger.warning(f"Failed to get cached dates for {data_type}_{symbol}: {str(e)}")
+            return []
+
+    def get_cached_dates_by_symbol(self, data_type: str) -> Dict[str, set]:
+        """Get cached trade dates for every symbol of a data type in one query."""
+        cached: Dict[str, set] = {}
+        if data_type not in SUPPORTED_DATA_TYPES:
+            return cached
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                for symbol, trade_date in conn.execute(f"SELECT {_KEY_COL}, trade_date FROM {_table_name(data_type)}"):
+                    cached.setdefault(symbol, set()).add(trade_date)
+        except Exception as e:
+            logger.warning(f"Failed to get cached dates for {data_type}: {str(e)}")
+        return cached
+
+    def invalidate(self, pattern: str) -> int:
+        """Invalidate cached data matching pattern."""
+        try:
+            total_deleted = 0
+            with sqlite3.connect(self.db_path) as conn:
+                if '_' in pattern and not pattern.endswith('*'):
+                    data_type, symbol, start_date, end_date = self._parse_cache_key(pattern)
+                    if data_type in SUPPORTED_DATA_TYPES:
+                        table = _table_name(data_type)
+                        if symbol:
+                            cursor = conn.execute(f"DELETE FROM {table} WHERE {_KEY_COL} = ?", (symbol,))
+                        else:
+                            cursor = conn.execute(f"DELETE FROM {table}")
+                        total_deleted += cursor.rowcount
+                else:
+                    for data_type in SUPPORTED_DATA_TYPES:
+                        table = _table_name(data_type)
+                        symbols = [row[0] for row in conn.execute(f"SELECT DISTINCT {_KEY_COL} FROM {table}")]
+                        matched = [s for s in symbols if fnmatch.fnmatch(f"{data_type}_{s}_daily", pattern)]
+                        for chunk in _chunks(matched):
+                            placeholders = ','.join('?' * len(chunk))
+                            cursor = conn.execute(f"DELETE FROM {table} WHERE {_KEY_COL} IN ({placeholders})", chunk)
+                            total_deleted += cursor.rowcount
+                conn.commit()
+
+            logger.info(f"Invalidated {total_deleted} cache entries matching pattern: {pattern}")
+            return total_deleted
+
+        except Exception as e:
+            logger.error(f"Failed to invalidate cache with pattern {pattern}: {str(e)}")
+            return 0
+
+    def clear_all(self) -> int:
+        """Clear all cached data."""
+        try:
+            total_deleted = 0
+            with sqlite3.connect(self.db_path) as conn:
+                for data_type in SUPPORTED_DATA_TYPES:
+                    cursor = conn.execute(f"DELETE FROM {_table_name(data_type)}")
+                    total_deleted += cursor.rowcount
+                conn.execute("DELETE FROM market_snapshot")
+                conn.execute("DELETE FROM market_regime")
+                conn.commit()
+                conn.execute("VACUUM")
+
+            logger.info(f"Cleared {total_deleted} cache entries")
+            return total_deleted
+
+        except Exception as e:
+            logger.error(f"Failed to clear cache: {str(e)}")
+            return 0
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                data_type_counts = {}
+                for data_type in SUPPORTED_DATA_TYPES:
+                    count = conn.execute(f"SELECT COUNT(*) FROM {_table_name(data_type)}").fetchone()[0]
+                    if count:
+                        data_type_counts[data_type] = count
+
+                union = ' UNION '.join(f"SELECT {_KEY_COL} FROM {_table_name(dt)}" for dt in SUPPORTED_DATA_TYPES)
+                unique_symbols = conn.execute(f"SELECT COUNT(*) FROM ({union})").fetchone()[0]
+
+                page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+                page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+                db_size_bytes = page_size * page_count
+
+            return {
+                'total_entries': sum(data_type_counts.values()),
+                'unique_symbols': unique_symbols,
+                'data_type_counts': data_type_counts,
+                'db_size_bytes': db_size_bytes,
+                'db_size_mb': round(db_size_bytes / (1024 * 1024), 2),
+                'db_path': self.db_path
+            }
+
+        except Exception as e:
+            logger.error(f"Failed to get cache stats: {str(e)}")
+            return {
+                'total_entries': 0,
+                'unique_symbols': 0,
+                'data_type_counts': {},
+                'db_size_bytes': 0,
+                'db_size_mb': 0,
+                'db_path': self.db_path
+            }
+
+    def get_cache_keys(self, pattern: Optional[str] = None) -> List[str]:
+        """Get list of cache keys, optionally filtered by pattern."""
+        try:
+            keys = []
+            with sqlite3.connect(self.db_path) as conn:
+                for data_type in SUPPORTED_DATA_TYPES:
+                    for (symbol,) in conn.execute(f"SELECT DISTINCT {_KEY_COL} FROM {_table_name(data_type)}"):
+                        keys.append(f"{data_type}_{symbol}_daily")
+
+            if pattern:
+                keys = [key for key in keys if fnmatch.fnmatch(key, pattern)]
+            return keys
+
+        except Exception as e:
+            logger.error(f"Failed to get cache keys: {str(e)}")
+            return []
+
+    def invalidate_recent(self, data_type: str = 'ohlcv_data', days: int = 3):
+        """Remove cached data for the most recent N trading days.
+
+        Args:
+            data_type: Type of data to invalidate (default 'ohlcv_data')
+            days: Number of most recent trading days to purge
+        """
+        if data_type not in SUPPORTED_DATA_TYPES:
+            return 0
+        try:
+            table = _table_name(data_type)
+            with sqlite3.connect(self.db_path) as conn:
+                recent_dates = [row[0] for row in conn.execute(
+                    f"SELECT DISTINCT trade_date FROM {table} ORDER BY trade_date DESC LIMIT ?", (days,)
+                )]
+                if not recent_dates:
+                    logger.info(f"No recent {data_type} entries to invalidate.")
+                    return 0
+
+                placeholders = ','.join('?' * len(recent_dates))
+                cursor = conn.execute(f"DELETE FROM {table} WHERE trade_date IN ({placeholders})", recent_dates)
+                deleted = cursor.rowcount
+                conn.commit()
+                logger.info(
+                    f"Invalidated {deleted} {data_type} cache entries "
+                    f"for {len(recent_dates)} recent trading dates: {recent_dates}"
+                )
+                return deleted
+        except Exception as e:
+            logger.error(f"Failed to invalidate recent cache: {e}")
+            return 0
+
+
+def migrate_blob_cache(src_db_path: str, dst_db_path: Optional[str] = None, batch_rows: int = 50000) -> Dict[str, int]:
+    """One-shot migration of a pickled-blob cache (daily_data table) to the columnar layout.
+
+    The source table is left untouched so the migration can be re-run or rolled
+    back by switching DB_CACHE_BACKEND back to 'sqlite'.
+
+    Args:
+        src_db_path: Existing DB_CACHE_FILE holding the `daily_data` blob table
+        dst_db_path: Target database (defaults to the source file itself)
+        batch_rows: Rows decoded before each bulk write
+
+    Returns:
+        Dict with 'migrated', 'skipped' and 'failed' row counts
+    """
+    dst = ColumnarDataCache(dst_db_path or src_db_path)
+    stats = {'migrated': 0, 'skipped': 0, 'failed': 0}
+
+    with sqlite3.connect(src_db_path) as src:
+        has_table = src.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='daily_data'"
+        ).fetchone()
+        if not has_table:
+            raise DataProviderError(f"No daily_data blob table found in {src_db_path}")
+        total = src.execute("SELECT COUNT(*) FROM daily_data").fetchone()[0]
+        cursor = src.execute("SELECT data_type, symbol, data FROM daily_data ORDER BY data_type, symbol")
+
+        pending: Dict[str, List[Dict[str, Any]]] = {}
+
+        def _flush():
+            with sqlite3.connect(dst.db_path) as conn:
+                for data_type, records in pending.items():
+                    if records:
+                        stats['migrated'] += dst._upsert_frame(conn, data_type, pd.DataFrame(records).infer_objects())
+                conn.commit()
+            pending.clear()
+
+        with tqdm(total=total, desc="Migrating cache", unit="row") as bar:
+            while True:
+                rows = cursor.fetchmany(5000)
+                if not rows:
+                    break
+                for data_type, symbol, blob in rows:
+                    if data_type not in SUPPORTED_DATA_TYPES:
+                        stats['skipped'] += 1
+                        continue
+                    try:
+                        row_df = pickle.loads(_decompress_blob(blob))
+                    except Exception as e:
+                        logger.debug(f"Undecodable cache row {data_type} {symbol}: {e}")
+                        stats['failed'] += 1
+                        continue
+                    for record in row_df.to_dict('records'):
+                        if 'trade_date' not in record:
+                            stats['failed'] += 1
+                            continue
+                        record[_KEY_COL] = symbol
+                        pending.setdefault(data_type, []).append(record)
+                bar.update(len(rows))
+                if sum(len(r) for r in pending.values()) >= batch_rows:
+                    _flush()
+        _flush()
+
+    logger.info(f"Cache migration {src_db_path} -> {dst.db_path}: {stats}")
+    return stats
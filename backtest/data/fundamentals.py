@@ -0,0 +1,194 @@
+"""
+Point-in-time store for quarterly financial indicators (Tushare fina_indicator).
+
+Each report is kept as one row per (ts_code, end_date, ann_date), so a backtest
+date D only sees what had been announced by D (ann_date <= D) — the latest
+known report per stock, never a later one. Rows come from bulk period-level
+pulls (fina_indicator_vip: every stock for one report period) with a
+per-stock fallback (fina_indicator) when the bulk endpoint is unavailable.
+Each pull is recorded with its date: a pull made on or after D already holds
+everything announced by D, so a backtest fetches each period (or stock) once.
+
+Usage:
+    store = PointInTimeFundamentals(DB_CACHE_FILE)
+    store.ensure(codes, '20250630', fetch_period, fetch_stock)
+    fin = store.as_of(codes, '20250630')     # ts_code -> latest known roe, q_dtprofit_yoy ...
+"""
+
+import sqlite3
+import time
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Set
+
+import pandas as pd
+from loguru import logger
+
+from .sqlite_cache import _chunks
+
+FINA_FIELDS = ['q_dtprofit_yoy', 'roe']
+PERIOD_LOOKBACK_QUARTERS = 5   # annual reports are announced up to 4 months after year end
+
+
+def report_periods(date: str, quarters: int = PERIOD_LOOKBACK_QUARTERS) -> List[str]:
+    """Quarter-end report periods (YYYYMMDD) that can have been announced by `date`, newest first."""
+    year, month = int(date[:4]), int(date[4:6])
+    quarter_ends = {3: '0331', 6: '0630', 9: '0930', 12: '1231'}
+    month -= (month % 3) or 3          # last quarter end strictly before this month's quarter
+    periods = []
+    for _ in range(quarters):
+        if month <= 0:
+            year, month = year - 1, month + 12
+        periods.append(f"{year}{quarter_ends[month]}")
+        month -= 3
+    return periods
+
+
+class PointInTimeFundamentals:
+    """fina_indicator rows keyed by (ts_code, end_date, ann_date) with as-of lookups."""
+
+    def __init__(self, db_path: str, fields: Optional[List[str]] = None):
+        self.db_path = db_path
+        self.fields = list(fields or FINA_FIELDS)
+        self._init_database()
+
+    def _init_database(self):
+        columns = ''.join(f'{f} REAL, ' for f in self.fields)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(f'''
+                CREATE TABLE IF NOT EXISTS fina_pit (
+                    ts_code TEXT NOT NULL,
+                    end_date TEXT NOT NULL,
+                    ann_date TEXT NOT NULL,
+                    {columns}
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (ts_code, end_date, ann_date)
+                ) WITHOUT ROWID
+            ''')
+            existing = {row[1] for row in conn.execute('PRAGMA table_info(fina_pit)')}
+            for field in self.fields:
+                if field not in existing:
+                    conn.execute(f'ALTER TABLE fina_pit ADD COLUMN {field} REAL')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_fina_pit_ann ON fina_pit(ann_date)')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS fina_pit_pulls (
+                    pull_key TEXT PRIMARY KEY,
+                    fetched_date TEXT NOT NULL
+                )
+            ''')
+            conn.commit()
+
+    # ---------------- writes -----------------
+    def upsert(self, df: pd.DataFrame) -> int:
+        """Store fina_indicator rows (ts_code, end_date, ann_date + fields); rows without ann_date are skipped."""
+        if df is None or df.empty:
+            return 0
+        df = df.dropna(subset=['ts_code', 'end_date', 'ann_date'])
+        if df.empty:
+            return 0
+        df = df.drop_duplicates(['ts_code', 'end_date', 'ann_date'], keep='last')
+        values = df.reindex(columns=self.fields).astype(float).astype(object)
+        values = values.where(values.notna(), None)
+        now = time.time()
+        rows = [(str(c), str(e), str(a), *vals, now)
+                for c, e, a, vals in zip(df['ts_code'], df['end_date'], df['ann_date'],
+                                         values.itertuples(index=False, name=None))]
+        columns = ', '.join(self.fields)
+        updates = ', '.join(f'{f} = excluded.{f}' for f in self.fields)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                f'''
+                INSERT INTO fina_pit (ts_code, end_date, ann_date, {columns}, updated_at)
+                VALUES (?, ?, ?, {', '.join('?' * len(self.fields))}, ?)
+                ON CONFLICT(ts_code, end_date, ann_date) DO UPDATE SET {updates}, updated_at = excluded.updated_at
+                ''',
+                rows
+            )
+            conn.commit()
+        return len(rows)
+
+    def mark_pulled(self, keys: Iterable[str], fetched_date: Optional[str] = None):
+        fetched_date = fetched_date or datetime.now().strftime('%Y%m%d')
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                '''
+                INSERT INTO fina_pit_pulls (pull_key, fetched_date) VALUES (?, ?)
+                ON CONFLICT(pull_key) DO UPDATE SET fetched_date = excluded.fetched_date
+                ''',
+                [(k, fetched_date) for k in keys]
+            )
+            conn.commit()
+
+    # ---------------- reads -----------------
+    def pulled_since(self, keys: List[str], date: str) -> Set[str]:
+        """Pull keys (e.g. 'period:20250331', 'stock:000001.SZ') fetched on or after `date`."""
+        done = set()
+        with sqlite3.connect(self.db_path) as conn:
+            for chunk in _chunks(list(keys)):
+                placeholders = ','.join('?' * len(chunk))
+                done.update(k for (k,) in conn.execute(
+                    f'SELECT pull_key FROM fina_pit_pulls WHERE pull_key IN ({placeholders}) AND fetched_date >= ?',
+                    [*chunk, date]))
+        return done
+
+    def as_of(self, codes: List[str], date: str) -> pd.DataFrame:
+        """
+        Latest report known on `date` for each code: the newest end_date with
+        ann_date <= date, in its latest version announced by then.
+
+        Returns:
+            DataFrame indexed by ts_code (end_date, ann_date, fields); codes
+            without a known report are absent
+        """
+        frames = []
+        with sqlite3.connect(self.db_path) as conn:
+            for chunk in _chunks(list(codes)):
+                placeholders = ','.join('?' * len(chunk))
+                frames.append(pd.read_sql_query(
+                    f'SELECT ts_code, end_date, ann_date, {", ".join(self.fields)} FROM fina_pit '
+                    f'WHERE ts_code IN ({placeholders}) AND ann_date <= ?',
+                    conn, params=[*chunk, date]))
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame(columns=['end_date', 'ann_date', *self.fields]).rename_axis('ts_code')
+        known = pd.concat(frames, ignore_index=True).sort_values(['ts_code', 'end_date', 'ann_date'])
+        latest = known.drop_duplicates('ts_code', keep='last').set_index('ts_code')
+        latest[self.fields] = latest[self.fields].astype(float)
+        return latest
+
+    # ---------------- fill -----------------
+    def ensure(self, codes: List[str], date: str,
+               fetch_period: Callable[[str], pd.DataFrame],
+               fetch_stock: Callable[[str], pd.DataFrame]) -> None:
+        """
+        Make the store complete for as-of lookups of `codes` on `date`.
+
+        Pulls each report period that can have been announced by `date` with
+        `fetch_period(period)` (all stocks); if the bulk endpoint fails, pulls
+        the codes one by one with `fetch_stock(ts_code)` instead. Periods and
+        stocks already pulled on or after `date` are skipped.
+        """
+        periods = report_periods(date)
+        keys = [f'period:{p}' for p in periods]
+        pending = [p for p, k in zip(periods, keys) if k not in self.pulled_since(keys, date)]
+        try:
+            for period in pending:
+                df = fetch_period(period)
+                self.upsert(df)
+                self.mark_pulled([f'period:{period}'])
+                logger.info(f"[fundamentals] period {period}: {0 if df is None else len(df)} reports")
+            return
+        except Exception as e:
+            logger.warning(f"[fundamentals] bulk period pull unavailable ({e}); pulling per stock")
+
+        # Per-stock pulls cover every period of a stock, so the period pulls above are not needed
+        stock_keys = [f'stock:{c}' for c in codes]
+        done = self.pulled_since(stock_keys, date)
+        missing = [c for c, k in zip(codes, stock_keys) if k not in done]
+        for ts_code in missing:
+            try:
+                self.upsert(fetch_stock(ts_code))
+                self.mark_pulled([f'stock:{ts_code}'])
+            except Exception as e:
+                logger.debug(f"[fundamentals] {ts_code}: {e}")
+        if missing:
+            logger.info(f"[fundamentals] pulled {len(missing)} stocks individually")
@@ -0,0 +1,329 @@
+"""
+Wide-matrix market data for whole-universe screening.
+
+MarketPanel holds OHLCV fields as (dates x symbols) NumPy matrices so rolling
+indicators are computed for every stock in one vectorized pass instead of one
+pandas Series per stock.
+
+Conventions:
+- Rows are trade dates (ascending), columns are ts_codes.
+- A missing bar (suspension, not listed yet) is NaN. Any rolling window that
+  touches a NaN yields NaN, so windowed values are either identical to the
+  per-stock computation or NaN — never silently different. EMA-based
+  indicators (EMA, ADX) skip missing bars exactly as a per-stock series that
+  simply has no row for that day.
+- Indicator functions accept 1-D (one stock) or 2-D (dates x symbols) arrays.
+
+`MarketPanel.from_bars` builds the other layout screeners need: each column
+is one symbol's own bars, right-aligned so the last row is every symbol's
+latest bar. A suspension is then not a NaN row, and every rolling/EWM
+indicator over a column equals the per-stock pandas computation exactly.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from numpy.lib.stride_tricks import sliding_window_view
+
+PANEL_FIELDS = ('open', 'high', 'low', 'close', 'vol', 'amount')
+
+
+# ------------------------- vectorized indicators -------------------------
+
+def _as_2d(values: np.ndarray) -> np.ndarray:
+    arr = np.asarray(values, dtype=float)
+    return arr.reshape(-1, 1) if arr.ndim == 1 else arr
+
+
+def _restore_shape(result: np.ndarray, values: np.ndarray) -> np.ndarray:
+    return result.ravel() if np.ndim(values) == 1 else result
+
+
+def _prev_valid(arr: np.ndarray) -> np.ndarray:
+    """Previous available value per column (last bar before a gap), NaN on the first bar."""
+    filled = pd.DataFrame(arr).ffill().to_numpy()
+    return np.vstack([np.full((1, arr.shape[1]), np.nan), filled[:-1]])
+
+
+def _rolling_apply(values: np.ndarray, window: int, reducer) -> np.ndarray:
+    """Apply `reducer` over trailing windows along axis 0; the first window-1 rows are NaN."""
+    arr = _as_2d(values)
+    out = np.full(arr.shape, np.nan)
+    if window <= 0 or arr.shape[0] < window:
+        return _restore_shape(out, values)
+    windows = sliding_window_view(arr, window, axis=0)  # (T-window+1, N, window), no copy
+    out[window - 1:] = reducer(windows)
+    return _restore_shape(out, values)
+
+
+def rolling_mean(values: np.ndarray, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+    """Simple moving average, same as Series.rolling(window, min_periods=min_periods).mean().
+
+    With `min_periods`, NaNs inside a window are skipped and the mean is taken
+    once at least `min_periods` values are present (including the leading,
+    shorter windows), as pandas does.
+    """
+    if min_periods is None or min_periods >= window:
+        return _rolling_apply(values, window, lambda w: w.mean(axis=-1))
+    arr = _as_2d(values)
+    if window <= 0 or not arr.size:
+        return _restore_shape(np.full(arr.shape, np.nan), values)
+    padded = np.vstack([np.full((window - 1, arr.shape[1]), np.nan), arr])
+    windows = sliding_window_view(padded, window, axis=0)
+    count = (~np.isnan(windows)).sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = np.where(count >= max(min_periods, 1), np.nansum(windows, axis=-1) / count, np.nan)
+    return _restore_shape(out, values)
+
+
+def rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    """Rolling maximum over the trailing `window` rows."""
+    return _rolling_apply(values, window, lambda w: w.max(axis=-1))
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Sample standard deviation (ddof=1), same as Series.rolling(window).std()."""
+    return _rolling_apply(values, window, lambda w: w.std(axis=-1, ddof=1))
+
+
+def rolling_wma(values: np.ndarray, window: int) -> np.ndarray:
+    """Linearly weighted moving average (weights 1..window, newest heaviest)."""
+    weights = np.arange(1, window + 1, dtype=float)
+    return _rolling_apply(values, window, lambda w: w @ weights / weights.sum())
+
+
+def hma(values: np.ndarray, window: int = 20) -> np.ndarray:
+    """Hull moving average: WMA(2*WMA(n/2) - WMA(n), sqrt(n))."""
+    half = rolling_wma(values, int(window / 2))
+    full = rolling_wma(values, window)
+    return rolling_wma(2 * half - full, int(np.sqrt(window)))
+
+
+def ema(values: np.ndarray, span: int) -> np.ndarray:
+    """Exponential moving average, same as Series.ewm(span=span, adjust=False).mean().
+
+    Leading NaNs (not listed yet) are skipped; the recursion starts at each
+    column's first valid value. Interior NaNs carry the previous average.
+    """
+    arr = _as_2d(values)
+    alpha = 2.0 / (span + 1.0)
+    out = np.full(arr.shape, np.nan)
+    prev = np.full(arr.shape[1], np.nan)
+    for t in range(arr.shape[0]):
+        row = arr[t]
+        valid = ~np.isnan(row)
+        start = valid & np.isnan(prev)
+        step = valid & ~start
+        prev = np.where(start, row, prev)
+        prev = np.where(step, alpha * row + (1 - alpha) * prev, prev)
+        out[t] = prev
+    return _restore_shape(out, values)
+
+
+def pct_slope(values: np.ndarray, window: int = 5) -> np.ndarray:
+    """Percent change over `window` rows: (x[t] - x[t-window]) / x[t-window] * 100.
+
+    NaN when any bar in [t-window, t] is missing, since a per-stock series
+    would then reach further back than `window` dates.
+    """
+    arr = _as_2d(values)
+    out = np.full(arr.shape, np.nan)
+    if arr.shape[0] > window:
+        prev = arr[:-window]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[window:] = np.where(prev != 0, (arr[window:] - prev) / prev * 100, np.nan)
+        gaps = _rolling_apply(np.isnan(arr).astype(float), window + 1, lambda w: w.max(axis=-1))
+        out[gaps > 0] = np.nan
+    return _restore_shape(out, values)
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """True range; the first row uses high-low only (no previous close)."""
+    high, low, close = _as_2d(high), _as_2d(low), _as_2d(close)
+    prev_close = _prev_valid(close)
+    ranges = np.stack([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+    tr = np.fmax(np.fmax(ranges[0], ranges[1]), ranges[2])
+    return np.where(np.isnan(high) | np.isnan(low), np.nan, tr)
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int = 14) -> np.ndarray:
+    """Average true range as a simple rolling mean of the true range."""
+    return _restore_shape(rolling_mean(true_range(high, low, close), window), close)
+
+
+def adx(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int = 14) -> Dict[str, np.ndarray]:
+    """ADX with +DI / -DI using EMA smoothing (span=window), as in the ts_96MA/ts_longup helpers."""
+    h, l_ = _as_2d(high), _as_2d(low)
+    up_move = h - _prev_valid(h)
+    down_move = _prev_valid(l_) - l_
+    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+    missing = np.isnan(h)
+    plus_dm[missing] = np.nan
+    minus_dm[missing] = np.nan
+
+    tr_ema = ema(true_range(h, l_, _as_2d(close)), window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plus_di = 100 * ema(plus_dm, window) / tr_ema
+        minus_di = 100 * ema(minus_dm, window) / tr_ema
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di + 1e-10)
+    # Carried EMA values on missing bars must not feed the next smoothing step
+    plus_di[missing] = np.nan
+    minus_di[missing] = np.nan
+    dx[missing] = np.nan
+    result = {'adx': ema(dx, window), 'plus_di': plus_di, 'minus_di': minus_di}
+    return {k: _restore_shape(v, close) for k, v in result.items()}
+
+
+# ------------------------- panel container -------------------------
+
+class MarketPanel:
+    """OHLCV market data as aligned (dates x symbols) matrices.
+
+    Build it from a long frame (`from_long`), the per-stock dict returned by
+    `get_bulk_ohlcv_by_date_range` (`from_frames`), or directly from the data
+    provider (`load`). `from_bars` right-aligns each symbol's own bars instead
+    of aligning by date (rows are bar offsets).
+    """
+
+    def __init__(self, dates: Sequence[str], symbols: Sequence[str], fields: Dict[str, np.ndarray],
+                 lengths: Optional[np.ndarray] = None):
+        self.dates: List[str] = list(dates)
+        self.symbols: List[str] = list(symbols)
+        self._fields = fields
+        self._col = {s: i for i, s in enumerate(self.symbols)}
+        # Bar panels (from_bars): each symbol's full bar count, which may exceed the row count
+        self.lengths = lengths
+
+    @classmethod
+    def from_long(cls, df: pd.DataFrame, key: str = 'ts_code') -> 'MarketPanel':
+        """Pivot a long (ts_code, trade_date, open, high, ...) frame into a panel."""
+        if df is None or df.empty:
+            return cls([], [], {f: np.empty((0, 0)) for f in PANEL_FIELDS})
+        df = df.drop_duplicates([key, 'trade_date'], keep='last')
+        dates = np.sort(df['trade_date'].astype(str).unique())
+        symbols = np.sort(df[key].unique())
+        rows = np.searchsorted(dates, df['trade_date'].astype(str).to_numpy())
+        cols = np.searchsorted(symbols, df[key].to_numpy())
+        fields = {}
+        for field in PANEL_FIELDS:
+            matrix = np.full((len(dates), len(symbols)), np.nan)
+            if field in df.columns:
+                matrix[rows, cols] = pd.to_numeric(df[field], errors='coerce').to_numpy(dtype=float)
+            fields[field] = matrix
+        return cls(dates.tolist(), symbols.tolist(), fields)
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame]) -> 'MarketPanel':
+        """Build a panel from a ts_code -> OHLCV frame mapping."""
+        parts = [f.assign(ts_code=code) for code, f in frames.items() if f is not None and not f.empty]
+        return cls.from_long(pd.concat(parts, ignore_index=True) if parts else pd.DataFrame())
+
+    @classmethod
+    def from_bars(cls, frames: Dict[str, pd.DataFrame], length: Optional[int] = None) -> 'MarketPanel':
+        """Stack each symbol's own bars right-aligned: row -k is its k-th latest bar.
+
+        Row -k is exactly what that symbol's frame, sorted by trade_date, has at
+        iloc[-k], so windows never span a suspension as NaN and indicators over a
+        column match the per-stock computation. Shorter histories are NaN-padded
+        at the top; `lengths` holds every symbol's bar count. Columns keep the
+        order of `frames` (symbols without bars are skipped); `dates` are bar
+        offsets ('-n+1' ... '0'), not calendar dates. A 'volume' column stands in
+        for a missing 'vol'.
+        """
+        codes = [code for code, f in frames.items() if f is not None and not f.empty]
+        if not codes:
+            return cls([], [], {f: np.empty((0, 0)) for f in PANEL_FIELDS}, lengths=np.empty(0, dtype=int))
+        df = pd.concat([frames[code].assign(ts_code=code) for code in codes], ignore_index=True)
+        if 'volume' in df.columns:
+            df['vol'] = df['vol'].fillna(df['volume']) if 'vol' in df.columns else df['volume']
+        df = df.sort_values(['ts_code', 'trade_date'], kind='stable')
+        groups = df.groupby('ts_code', sort=False)
+        back = groups.cumcount(ascending=False).to_numpy()
+        lengths = groups.size().reindex(codes).to_numpy()
+        rows_n = int(lengths.max()) if length is None else int(length)
+        keep = back < rows_n
+        rows = rows_n - 1 - back[keep]
+        col_of = {code: i for i, code in enumerate(codes)}
+        cols = df['ts_code'].map(col_of).to_numpy()[keep]
+        fields = {}
+        for field in PANEL_FIELDS:
+            matrix = np.full((rows_n, len(codes)), np.nan)
+            if field in df.columns:
+                matrix[rows, cols] = pd.to_numeric(df[field], errors='coerce').to_numpy(dtype=float)[keep]
+            fields[field] = matrix
+        return cls([str(i) for i in range(1 - rows_n, 1)], codes, fields, lengths=lengths)
+
+    @classmethod
+    def load(cls, start_date: str, end_date: str, provider=None) -> 'MarketPanel':
+        """Load the whole market for a date range via the (snapshot-cached) bulk provider API."""
+        if provider is None:
+            from .. import data_provider as provider
+        panel = cls.from_frames(provider.get_bulk_ohlcv_by_date_range(start_date, end_date))
+        logger.debug(f"MarketPanel {start_date}-{end_date}: {len(panel.dates)} dates x {len(panel.symbols)} symbols")
+        return panel
+
+    # ---- field access ----
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self._fields[field]
+
+    @property
+    def open(self) -> np.ndarray:
+        return self._fields['open']
+
+    @property
+    def high(self) -> np.ndarray:
+        return self._fields['high']
+
+    @property
+    def low(self) -> np.ndarray:
+        return self._fields['low']
+
+    @property
+    def close(self) -> np.ndarray:
+        return self._fields['close']
+
+    @property
+    def vol(self) -> np.ndarray:
+        return self._fields['vol']
+
+    @property
+    def amount(self) -> np.ndarray:
+        return self._fields['amount']
+
+    @property
+    def shape(self):
+        return len(self.dates), len(self.symbols)
+
+    def bar_counts(self) -> np.ndarray:
+        """Number of non-missing close bars per symbol."""
+        return (~np.isnan(self.close)).sum(axis=0)
+
+    def column(self, symbol: str) -> Optional[int]:
+        return self._col.get(symbol)
+
+    def frame(self, values: np.ndarray) -> pd.DataFrame:
+        """Wrap a (dates x symbols) matrix as a labelled DataFrame."""
+        return pd.DataFrame(values, index=self.dates, columns=self.symbols)
+
+    def latest(self, values: np.ndarray) -> pd.Series:
+        """Last row of a matrix as a Series indexed by symbol."""
+        return pd.Series(values[-1] if len(values) else [], index=self.symbols, dtype=float)
+
+    # ---- indicators on the panel ----
+    def sma(self, window: int, field: str = 'close', min_periods: Optional[int] = None) -> np.ndarray:
+        return rolling_mean(self._fields[field], window, min_periods)
+
+    def hma(self, window: int = 20, field: str = 'close') -> np.ndarray:
+        return hma(self._fields[field], window)
+
+    def slope(self, values: np.ndarray, window: int = 5) -> np.ndarray:
+        return pct_slope(values, window)
+
+    def atr(self, window: int = 14) -> np.ndarray:
+        return atr(self.high, self.low, self.close, window)
+
+    def adx(self, window: int = 14) -> Dict[str, np.ndarray]:
+        return adx(self.high, self.low, self.close, window)
@@ -1,10 +1,13 @@
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from loguru import logger
 import warnings
 import time
 from tqdm import tqdm
 from typing import List, Optional, Dict, Any, Union
 import json
+from datetime import datetime
 import pandas as pd
 
 import tushare as ts
@@ -12,17 +15,21 @@ import akshare as ak  # type: ignore  # noqa: E402
 from pytdx.hq import TdxHq_API
 from tenacity import before_sleep_log, retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
 
-from .sqlite_cache import SQLiteDataCache
+from .sqlite_cache import create_data_cache
 from .validator import DataValidator
 from ..core.interfaces import DataProvider
 from ..utils.exceptions import DataProviderError, TushareAPIError
-from ..utils.util import convert_trade_date, refresh_tdx_config, dfs_concat, _safe_fillna
+from ..utils.util import convert_trade_date, refresh_tdx_config, dfs_concat, split_by_symbol, _safe_fillna
+from ..utils.rate_limiter import rate_limited_pro
 from .. import DB_CACHE_FILE
 
 # Create a standard logging logger for tenacity
 tenacity_logger = logging.getLogger(__name__)
 warnings.filterwarnings("ignore", category=UserWarning, module='py_mini_racer')
 
+# Worker threads for the cache misses of a multi-symbol get_stock_data()
+STOCK_DATA_WORKERS = int(os.getenv('STOCK_DATA_WORKERS', '8'))
+
 class TushareDataProvider(DataProvider):
     """
     Data provider implementation using Tushare Pro API.
@@ -37,15 +44,16 @@ class TushareDataProvider(DataProvider):
 
         Args:
             token: Tushare Pro API token
-            rate_limit_delay: Delay between API calls in seconds
+            rate_limit_delay: Unused; calls are paced by the shared per-endpoint
+                              limiter (backtest/utils/rate_limiter.py)
         """
         self.token = token
         self.rate_limit_delay = rate_limit_delay
-        self.cache = SQLiteDataCache(db_path=DB_CACHE_FILE)
+        self.cache = create_data_cache(db_path=DB_CACHE_FILE)
 
         try:
             ts.set_token(token)
-            self.pro = ts.pro_api()
+            self.pro = rate_limited_pro(ts.pro_api())
             logger.debug("Tushare Pro API initialized successfully")
         except Exception as e:
             raise TushareAPIError(f"Failed to initialize Tushare Pro API: {str(e)}")
@@ -57,18 +65,21 @@ class TushareDataProvider(DataProvider):
         before_sleep=before_sleep_log(tenacity_logger, logging.INFO)
     )
     def _ts_call(self, func, **kwargs) -> pd.DataFrame:
-        """Make Tushare API call with automatic retry using tenacity decorator."""
+        """Make Tushare API call with automatic retry using tenacity decorator.
+
+        `func` is a self.pro endpoint, so every attempt (including the repeat
+        of an empty result) waits for that endpoint's shared quota instead of
+        sleeping a fixed delay.
+        """
         # Convert date formats from 'yyyy-mm-dd' to 'yyyymmdd' for Tushare API compatibility
         for date_param in ['start_date', 'end_date', 'trade_date']:
             if date_param in kwargs and kwargs[date_param]:
                 kwargs[date_param] = convert_trade_date(kwargs[date_param])
 
-        time.sleep(self.rate_limit_delay)
         df = func(**kwargs)
         if df is None or not isinstance(df, pd.DataFrame):
             raise DataProviderError("Invalid response from Tushare API")
         if df.empty:
-            time.sleep(self.rate_limit_delay)
             df = func(**kwargs)
 
         # default trade_date sort is ascending false, not as cache save(start_date to end_date).
@@ -77,6 +88,26 @@ class TushareDataProvider(DataProvider):
         return df
 
 
+    @staticmethod
+    def _ensure_ts_code(symbol: str | None) -> str:
+        """Return ts_code style like 600519.SH for inputs '600519' or '600519.SH'."""
+        if not symbol:
+            raise DataProviderError("Empty symbol")
+        s = symbol.strip().upper()
+        if s.endswith('.SH') or s.endswith('.SZ') or s.endswith('.BJ'):
+            return s
+        # infer exchange by code prefix rules in A-shares
+        if s[0] == '6':
+            return f"{s}.SH"
+        if s[0] in ('0', '3'):
+            return f"{s}.SZ"
+        if s[0] in ('4', '8'):
+            return f"{s}.BJ"
+        # default to SZ if unknown but 6-digit
+        if len(s) == 6 and s.isdigit():
+            return f"{s}.SZ"
+        return s
+
     def get_kline(self, symbol: str | None = None, start_date: str | None = None, end_date: str | None = None, adj: str = "qfq", freq: str = "D") -> pd.DataFrame:
         """ Retrieve k-line(as OHLCV) for specified stock with adj,freq in the specified range."""
         if not symbol:
@@ -116,16 +147,18 @@ class TushareDataProvider(DataProvider):
             "amount"      # Trade sum, Qian_Yuan * 1000
         ]
 
-        cache_key = f"ohlcv_data_{symbol}_{start_date}_{end_date}"
+        # Read and write the cache under one symbol form, whatever the caller passed
+        ts_code = self._ensure_ts_code(symbol)
+        cache_key = f"ohlcv_data_{ts_code}_{start_date}_{end_date}"
         cached_data = self.cache.get(cache_key)
         if cached_data is not None:
-            logger.debug(f"Retrieved ohlcv data from cache for {symbol}")
+            logger.debug(f"Retrieved ohlcv data from cache for {ts_code}")
             return cached_data
 
-        df = self._ts_call(self.pro.daily, ts_code=symbol, start_date=start_date, end_date=end_date, fields=fields)
+        df = self._ts_call(self.pro.daily, ts_code=ts_code, start_date=start_date, end_date=end_date, fields=fields)
 
-        self.cache.set(cache_key, df)
-        logger.debug(f'Retrieved {len(df)} OHLCV records for {symbol}')
+        self.cache.set_bulk('ohlcv_data', df)
+        logger.debug(f'Retrieved {len(df)} OHLCV records for {ts_code}')
         return df
 
 
@@ -229,39 +262,86 @@ class TushareDataProvider(DataProvider):
         logger.debug(f"Retrieved {len(df)} basic information records")
         return df
 
+    def _fetch_market_snapshot(self, kind: str, trade_date: str) -> pd.DataFrame:
+        """Fetch one whole-market snapshot from Tushare and persist it once the session is closed.
+
+        Today's snapshot is never stored: an intraday or pre-publish response
+        would otherwise be served as final data on later runs.
+        """
+        api = self.pro.daily if kind == 'daily' else self.pro.daily_basic
+        df = self._ts_call(api, trade_date=trade_date)
+        if not df.empty and trade_date < datetime.now().strftime('%Y%m%d'):
+            self.cache.set_snapshot(kind, trade_date, df)
+        return df
+
+    def _get_market_snapshot(self, kind: str, trade_date: str) -> pd.DataFrame:
+        """Whole-market `daily` / `daily_basic` for one trade date, snapshot cache first."""
+        trade_date = convert_trade_date(trade_date)
+        cached = self.cache.get_snapshots(kind, [trade_date]).get(trade_date)
+        if cached is not None:
+            return cached
+        return self._fetch_market_snapshot(kind, trade_date)
+
     def get_bulk_daily_by_date(self, trade_date: str) -> pd.DataFrame:
         """Fetch daily OHLCV data for all stocks on a specific trade date."""
         try:
-            df = self._ts_call(self.pro.daily, trade_date=trade_date)
-            return df
+            return self._get_market_snapshot('daily', trade_date)
         except Exception as e:
             logger.error(f"Failed to fetch bulk daily data for {trade_date}: {e}")
             return pd.DataFrame()
 
+    def get_bulk_daily_basic_by_date(self, trade_date: str) -> pd.DataFrame:
+        """Fetch daily_basic (turnover, PE, market cap ...) for all stocks on a specific trade date.
+        https://tushare.pro/document/2?doc_id=32
+        """
+        try:
+            return self._get_market_snapshot('daily_basic', trade_date)
+        except Exception as e:
+            logger.error(f"Failed to fetch bulk daily_basic data for {trade_date}: {e}")
+            return pd.DataFrame()
+
     def get_bulk_ohlcv_by_date_range(self, start_date: str, end_date: str) -> Dict[str, pd.DataFrame]:
-        """Fetch daily OHLCV data for all stocks over a date range."""
+        """Fetch daily OHLCV data for all stocks over a date range.
+
+        Cached market snapshots are read in one query; only missing trade dates
+        hit the API. Returns ts_code -> frame sorted by trade_date, each a slice
+        of one combined frame.
+        """
         from backtest.utils.trading_calendar import get_trading_days_between
-        trading_dates = get_trading_days_between(start_date, end_date)
-        all_data = {}
-        for d in trading_dates:
-            df = self.get_bulk_daily_by_date(d)
-            if df is not None and not df.empty:
-                for _, row in df.iterrows():
-                    ts_code = row['ts_code']
-                    if ts_code not in all_data:
-                        all_data[ts_code] = []
-                    all_data[ts_code].append(row.to_dict())
-        
-        # Convert lists of dicts to DataFrames
-        result = {}
-        for ts_code, records in all_data.items():
-            stock_df = pd.DataFrame(records).sort_values('trade_date').reset_index(drop=True)
-            # Ensure proper types
-            for col in ['open', 'high', 'low', 'close', 'vol', 'amount']:
-                if col in stock_df.columns:
-                    stock_df[col] = pd.to_numeric(stock_df[col], errors='coerce')
-            result[ts_code] = stock_df
-        return result
+        trading_dates = [convert_trade_date(d) for d in get_trading_days_between(start_date, end_date)]
+        snapshots = self.cache.get_snapshots('daily', trading_dates)
+        missing = [d for d in trading_dates if d not in snapshots]
+        if missing:
+            logger.info(f"Fetching {len(missing)}/{len(trading_dates)} uncached daily snapshots from Tushare")
+        for d in missing:
+            try:
+                snapshots[d] = self._fetch_market_snapshot('daily', d)
+            except Exception as e:
+                logger.error(f"Failed to fetch bulk daily data for {d}: {e}")
+
+        frames = [snapshots[d] for d in trading_dates if d in snapshots and not snapshots[d].empty]
+        if not frames:
+            return {}
+        df = pd.concat(frames, ignore_index=True)
+        # Ensure proper types
+        for col in ['open', 'high', 'low', 'close', 'vol', 'amount']:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+        return split_by_symbol(df)
+
+    def _cached_stock_data(self, symbols: List[str], start_date: str, end_date: str) -> Dict[str, pd.DataFrame]:
+        """
+        Cached stock_data frames for many symbols from one batched cache read.
+
+        A symbol counts as a hit under the same rule as a per-symbol cache.get():
+        the single requested day, or at least 90% of the range's trading days.
+        """
+        cached, coverage = self.cache.get_many('stock_data', symbols, start_date, end_date)
+        hits = {sym for sym, cov in coverage.items() if cov['found'] and cov['found'] >= cov['expected'] * 0.90}
+        if cached.empty or not hits:
+            return {}
+        return {sym: frame.reset_index(drop=True)
+                for sym, frame in split_by_symbol(cached[cached['ts_code'].isin(hits)]).items()}
 
     def get_stock_data(self, symbols: Union[str, List[str]], start_date: str | None = None, end_date: str | None = None) -> pd.DataFrame:
         """
@@ -279,6 +359,10 @@ class TushareDataProvider(DataProvider):
             - daily_basic: https://tushare.pro/document/2?doc_id=32
             - stock_basic: https://tushare.pro/document/2?doc_id=25
 
+        A list is served from one batched cache read; the missing symbols are fetched
+        concurrently (STOCK_DATA_WORKERS threads). Symbols that fail are skipped and
+        their errors returned in the frame's attrs['fetch_errors'].
+
         Raises:
             DataProviderError: If data retrieval fails
         """
@@ -289,13 +373,20 @@ class TushareDataProvider(DataProvider):
         if not start_date or not end_date:
             raise DataProviderError("Start date or end date is invalid")
 
-        # Helper to fetch a single symbol with full merge and caching
+        # Freshly merged frames are written in one bulk upsert after fetching
+        fresh_frames: List[pd.DataFrame] = []
+
+        # Helper to fetch a single symbol with full merge (cached under its ts_code,
+        # as set_bulk writes it, so '600000' and '600000.SH' share the entry)
         def _fetch_single(sym: str) -> pd.DataFrame:
+            sym = self._ensure_ts_code(sym)
             cache_key = f"stock_data_{sym}_{start_date}_{end_date}"
             cached = self.cache.get(cache_key)
             if cached is not None:
                 return cached
+            return _fetch_merged(sym)
 
+        def _fetch_merged(sym: str) -> pd.DataFrame:
             df_basic = self.get_basic_information(sym)
             if df_basic.empty:
                 raise DataProviderError(f"No basic information found for symbol: {sym}")
@@ -337,27 +428,51 @@ class TushareDataProvider(DataProvider):
                 except Exception:
                     pass
 
-            self.cache.set(cache_key, merged)
+            fresh_frames.append(merged)
             return merged
 
         try:
             if isinstance(symbols, list):
-                frames = []
-                # Use tqdm for progress tracking when processing multiple symbols
-                symbol_iter = tqdm(symbols, desc="Fetching stock data", unit="stock") if len(symbols) > 1 else symbols
-
-                for sym in symbol_iter:
-                    try:
-                        frames.append(_fetch_single(sym))
-                    except Exception as e:
-                        # Reduce logger output during batch processing
-                        if len(symbols) <= 10:  # Only log for small batches
-                            logger.warning(f"Skipping {sym} due to error: {e}")
+                # Caller symbols ('600000' or '600000.SH') -> the ts_code the cache is keyed by
+                ts_codes = {sym: self._ensure_ts_code(sym) for sym in dict.fromkeys(symbols)}
+                codes = list(dict.fromkeys(ts_codes.values()))
+                # Cache hits for all symbols in one batched read, then the misses
+                # on a bounded worker pool (API calls are paced by the shared limiter)
+                by_symbol = self._cached_stock_data(codes, start_date, end_date)
+                misses = [code for code in codes if code not in by_symbol]
+                errors: Dict[str, str] = {}
+                if misses:
+                    workers = max(1, min(STOCK_DATA_WORKERS, len(misses)))
+                    with ThreadPoolExecutor(max_workers=workers) as pool:
+                        futures = {pool.submit(_fetch_merged, sym): sym for sym in misses}
+                        done = as_completed(futures)
+                        if len(misses) > 1:
+                            done = tqdm(done, total=len(misses), desc="Fetching stock data", unit="stock")
+                        for future in done:
+                            sym = futures[future]
+                            try:
+                                by_symbol[sym] = future.result()
+                            except Exception as e:
+                                errors[sym] = str(e)
+                    logger.debug(f"get_stock_data {start_date}-{end_date}: {len(codes) - len(misses)} cached, "
+                                 f"{len(misses)} fetched with {workers} workers, {len(errors)} failed")
+                if errors:
+                    # Reduce logger output during batch processing
+                    shown = list(errors.items())[:10]
+                    logger.warning(f"Skipping {len(errors)}/{len(codes)} symbols: " + "; ".join(f"{s}: {e}" for s, e in shown))
+                if fresh_frames:
+                    self.cache.set_bulk('stock_data', dfs_concat(fresh_frames, ignore_index=True))
+                frames = [by_symbol[code] for code in codes if code in by_symbol]
                 if not frames:
                     raise DataProviderError("No data retrieved for any symbol")
-                return dfs_concat(frames, ignore_index=True)
+                result = dfs_concat(frames, ignore_index=True)
+                result.attrs['fetch_errors'] = {sym: errors[code] for sym, code in ts_codes.items() if code in errors}
+                return result
             else:
-                return _fetch_single(symbols)
+                df = _fetch_single(symbols)
+                if fresh_frames:
+                    self.cache.set_bulk('stock_data', df)
+                return df
         except TushareAPIError:
             raise
         except Exception as e:
@@ -520,7 +635,7 @@ class AkshareDataProvider(DataProvider):
             rate_limit_delay: Delay between API calls in seconds
         """
         self.rate_limit_delay = rate_limit_delay
-        self.cache = SQLiteDataCache(db_path=DB_CACHE_FILE)
+        self.cache = create_data_cache(db_path=DB_CACHE_FILE)
 
     # ------------------------- helpers -------------------------
     @staticmethod
@@ -846,7 +961,7 @@ class AkshareDataProvider(DataProvider):
         # sort asc by trade_date
         df = df.sort_values('trade_date').reset_index(drop=True)
 
-        self.cache.set(cache_key, df)
+        self.cache.set_bulk('ohlcv_data', df)
         logger.debug(f"Retrieved {len(df)} OHLCV records for {ts_code} via Akshare")
         return df
 
@@ -955,6 +1070,10 @@ class AkshareDataProvider(DataProvider):
         logger.warning("get_bulk_daily_by_date not fully supported in AkshareDataProvider")
         return pd.DataFrame()
 
+    def get_bulk_daily_basic_by_date(self, trade_date: str) -> pd.DataFrame:
+        logger.warning("get_bulk_daily_basic_by_date not supported in AkshareDataProvider")
+        return pd.DataFrame()
+
     def get_bulk_ohlcv_by_date_range(self, start_date: str, end_date: str) -> Dict[str, pd.DataFrame]:
         logger.warning("get_bulk_ohlcv_by_date_range not fully supported in AkshareDataProvider")
         return {}
@@ -963,6 +1082,9 @@ class AkshareDataProvider(DataProvider):
         if not symbols:
             raise DataProviderError("No symbol provided")
 
+        # Freshly merged frames are written in one bulk upsert after fetching
+        fresh_frames: List[pd.DataFrame] = []
+
         def _fetch_single(ts: str) -> pd.DataFrame:
             ts_code = self._ensure_ts_code(ts)
             start = convert_trade_date(start_date)
@@ -1003,7 +1125,7 @@ class AkshareDataProvider(DataProvider):
                 merged = merged.sort_values('trade_date').reset_index(drop=True)
             except Exception:
                 pass
-            self.cache.set(cache_key, merged)
+            fresh_frames.append(merged)
             return merged
 
         if isinstance(symbols, list):
@@ -1018,11 +1140,16 @@ class AkshareDataProvider(DataProvider):
                     # Reduce logger output during batch processing
                     if len(symbols) <= 10:  # Only log for small batches
                         logger.warning(f"Skipping {s} due to error: {e}")
+            if fresh_frames:
+                self.cache.set_bulk('stock_data', dfs_concat(fresh_frames, ignore_index=True))
             if not frames:
                 raise DataProviderError("No data retrieved for any symbol")
             return dfs_concat(frames, ignore_index=True)
         else:
-            return _fetch_single(symbols)
+            df = _fetch_single(symbols)
+            if fresh_frames:
+                self.cache.set_bulk('stock_data', df)
+            return df
 
     def get_index_data(self, index_code: str, start_date: str | None = None, end_date: str | None = None) -> pd.DataFrame:
         if not index_code:
@@ -1141,7 +1268,7 @@ class TdxDataProvider(DataProvider):
             server_config_file: Path to TDX server configuration file
         """
         self.rate_limit_delay = rate_limit_delay
-        self.cache = SQLiteDataCache(db_path=DB_CACHE_FILE)
+        self.cache = create_data_cache(db_path=DB_CACHE_FILE)
         self.server_config_file = server_config_file
         self.servers = self._load_server_config()
         self.current_server_index = 0
@@ -1354,7 +1481,7 @@ class TdxDataProvider(DataProvider):
 
         df = df.sort_values('trade_date').reset_index(drop=True)
 
-        self.cache.set(cache_key, df)
+        self.cache.set_bulk('ohlcv_data', df)
         logger.debug(f"Retrieved {len(df)} OHLCV records for {ts_code} via TDX")
         return df
 
@@ -1649,6 +1776,10 @@ class TdxDataProvider(DataProvider):
         logger.warning("get_bulk_daily_by_date not supported in TDXDataProvider")
         return pd.DataFrame()
 
+    def get_bulk_daily_basic_by_date(self, trade_date: str) -> pd.DataFrame:
+        logger.warning("get_bulk_daily_basic_by_date not supported in TDXDataProvider")
+        return pd.DataFrame()
+
     def get_bulk_ohlcv_by_date_range(self, start_date: str, end_date: str) -> Dict[str, pd.DataFrame]:
         logger.warning("get_bulk_ohlcv_by_date_range not supported in TDXDataProvider")
         return {}
@@ -0,0 +1,116 @@
+"""
+Persistent concept-sector data (THS / DC) for the sector momentum strategy.
+
+Both kinds of data live in the cache's market_snapshot table:
+
+- per-day concept bars: one snapshot per (source, trade_date) holding every
+  sector's bar of that day (ths_daily / dc_daily return the whole day in one
+  call). A backtest walking forward day by day shares most of its lookback
+  window with the previous day, so each new day costs one fetch. Today's bars
+  are never stored, as for the market snapshots.
+- membership snapshots: one per (source, sector) dated with the day it was
+  fetched. A snapshot fetched on or after date D already lists every member
+  that joined by D (and, for THS, when members left), so it serves any as-of
+  date up to its fetch date; it is refetched after MEMBER_TTL_DAYS to pick up
+  new constituents.
+
+The 3-day returns used by the strategy are computed for all sectors / members
+at once with a groupby (see three_day_returns).
+
+Usage:
+    store = SectorStore(cache, src='ts_ths')
+    bars = store.concept_daily(dates, lambda d: PRO.ths_daily(start_date=d, end_date=d))
+    members = store.members('885760.TI', '20250630', lambda code: PRO.ths_member(ts_code=code))
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+import pandas as pd
+from loguru import logger
+
+MEMBER_TTL_DAYS = int(os.getenv('SECTOR_MEMBER_TTL_DAYS', '7'))
+RETURN_LAG = 3          # T vs T-3 close
+
+
+def three_day_returns(bars: pd.DataFrame, lag: int = RETURN_LAG) -> pd.Series:
+    """
+    Close-to-close return (%) of the newest bar vs the bar `lag` bars earlier,
+    per ts_code. Codes with fewer than lag + 1 bars are absent.
+    """
+    if bars is None or bars.empty:
+        return pd.Series(dtype=float, name='return')
+    bars = bars.sort_values(['ts_code', 'trade_date'], ascending=[True, False])
+    position = bars.groupby('ts_code', sort=False).cumcount()
+    latest = bars.loc[position == 0].set_index('ts_code')['close']
+    base = bars.loc[position == lag].set_index('ts_code')['close']
+    returns = (latest.loc[base.index] / base - 1) * 100
+    return returns.astype(float).rename('return')
+
+
+def _valid_members(members: pd.DataFrame, as_of: str) -> pd.DataFrame:
+    """Members in the sector on `as_of` when the snapshot carries in_date / out_date."""
+    if members is None or members.empty:
+        return pd.DataFrame() if members is None else members
+    mask = pd.Series(True, index=members.index)
+    if 'in_date' in members:
+        mask &= members['in_date'].isna() | (members['in_date'].astype(str) <= as_of)
+    if 'out_date' in members:
+        mask &= members['out_date'].isna() | (members['out_date'].astype(str) > as_of)
+    return members[mask].reset_index(drop=True)
+
+
+class SectorStore:
+    """Concept bars and sector membership of one source ('ts_ths' or 'ts_dc') on top of a data cache."""
+
+    def __init__(self, cache, src: str = 'ts_ths'):
+        self.cache = cache
+        self.src = src
+        prefix = 'ths' if src == 'ts_ths' else 'dc'
+        self._daily_kind = f'{prefix}_daily'
+        self._member_kind = f'{prefix}_member'
+
+    def concept_daily(self, dates: List[str], fetch_day: Callable[[str], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Bars of every sector on `dates` (YYYYMMDD), fetching only the days not stored yet.
+
+        Args:
+            dates: trade dates of the window
+            fetch_day: trade_date -> that day's bars of all sectors
+
+        Returns:
+            DataFrame of the window's bars, in date order
+        """
+        days = self.cache.get_snapshots(self._daily_kind, dates)
+        missing = [d for d in dates if d not in days]
+        if missing:
+            logger.info(f"[sectors] fetching {self._daily_kind} for {len(missing)} of {len(dates)} days")
+        today = datetime.now().strftime('%Y%m%d')
+        for date in missing:
+            df = fetch_day(date)
+            if df is None:
+                df = pd.DataFrame()
+            if not df.empty and date < today:
+                self.cache.set_snapshot(self._daily_kind, date, df)
+            days[date] = df
+        frames = [days[d] for d in dates if not days[d].empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def members(self, sector_code: str, as_of: str,
+                fetch_members: Callable[[str], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Members of `sector_code` valid on `as_of`, from a snapshot fetched on or
+        after `as_of` and within MEMBER_TTL_DAYS; otherwise fetched and stored.
+        """
+        kind = f'{self._member_kind}:{sector_code}'
+        now = datetime.now()
+        since = max(as_of, (now - timedelta(days=MEMBER_TTL_DAYS)).strftime('%Y%m%d'))
+        cached = self.cache.get_latest_snapshot(kind, since)
+        if cached is not None:
+            members = cached[1]
+        else:
+            members = fetch_members(sector_code)
+            if members is not None and not members.empty:
+                self.cache.set_snapshot(kind, now.strftime('%Y%m%d'), members)
+        return _valid_members(members, as_of)
@@ -32,6 +32,15 @@ from ..utils.util import convert_trade_date, dfs_concat
 # Cache saved in db, others like trading_calendar, base_info, benchmark use pkl cache at data_cache/.
 SUPPORTED_DATA_TYPES = ['ohlcv_data', 'fundamental_data', 'stock_data', 'index_data']
 
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER on older SQLite builds (999).
+_MAX_SQL_VARS = 900
+
+
+def _chunks(items: List[str], size: int = _MAX_SQL_VARS):
+    """Yield successive slices of `items` small enough for an IN (...) clause."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
 class SQLiteDataCache:
     """SQLite-based caching mechanism for market data with granular daily storage."""
 
@@ -81,12 +90,46 @@ class SQLiteDataCache:
                     ON daily_data(data_type, symbol, trade_date)
                 ''')
 
+                self._init_snapshot_table(cursor)
+                self._init_regime_table(cursor)
                 conn.commit()
                 logger.debug(f"SQLite cache database initialized: {self.db_path}")
 
         except Exception as e:
             raise DataProviderError(f"Failed to initialize SQLite cache database: {str(e)}")
 
+    @staticmethod
+    def _init_snapshot_table(cursor: sqlite3.Cursor):
+        """Create the whole-market snapshot table (one blob per kind and trade_date)."""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS market_snapshot (
+                kind TEXT NOT NULL,
+                trade_date TEXT NOT NULL,
+                data BLOB NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (kind, trade_date)
+            )
+        ''')
+
+    @staticmethod
+    def _init_regime_table(cursor: sqlite3.Cursor):
+        """Create the market-regime table (one row per index, detection mode and trade_date)."""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS market_regime (
+                index_code TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                trade_date TEXT NOT NULL,
+                regime TEXT NOT NULL,
+                close REAL,
+                ma20 REAL,
+                ma60 REAL,
+                ma120 REAL,
+                volatility REAL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (index_code, mode, trade_date)
+            )
+        ''')
+
     def _parse_cache_key(self, key: str) -> Tuple[str, str, str, str]:
         """Parse cache key to extract components.
 
@@ -170,28 +213,21 @@ class SQLiteDataCache:
                         logger.debug(f"Daily cache hit: {key}")
                         return df
 
-            # Multi-day request - build from individual daily records
+            # Multi-day request - one range scan, then check coverage against the calendar
             if start_date and end_date:
-                daily_dfs = []
                 trade_dates = get_trading_days_between(start_date, end_date)
 
                 with sqlite3.connect(self.db_path) as conn:
                     cursor = conn.cursor()
-
-                    for trade_date in trade_dates:
-                        cursor.execute(
-                            """
-                            SELECT data FROM daily_data
-                            WHERE data_type = ? AND symbol = ? AND trade_date = ?
-                            """,
-                            (data_type, symbol, trade_date)
-                        )
-                        result = cursor.fetchone()
-
-                        if result:
-                            data_blob = result[0]
-                            df = pickle.loads(_decompress_blob(data_blob))
-                            daily_dfs.append(df)
+                    cursor.execute(
+                        """
+                        SELECT data FROM daily_data
+                        WHERE data_type = ? AND symbol = ? AND trade_date BETWEEN ? AND ?
+                        ORDER BY trade_date
+                        """,
+                        (data_type, symbol, start_date, end_date)
+                    )
+                    daily_dfs = [pickle.loads(_decompress_blob(row[0])) for row in cursor.fetchall()]
 
                 # Verify we have all required trading days
                 if daily_dfs and len(daily_dfs) >= len(trade_dates) * 0.90:  # Allow 10% margin for missing APIs/holidays
@@ -209,6 +245,95 @@ class SQLiteDataCache:
             logger.warning(f"Failed to retrieve cache for key {key}: {str(e)}")
             return None
 
+    @staticmethod
+    def _coverage(found: Dict[str, set], symbols: List[str], trade_dates: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Per-symbol coverage of the expected trading days."""
+        expected = len(trade_dates)
+        coverage = {}
+        for symbol in symbols:
+            dates = found.get(symbol, set())
+            missing = [d for d in trade_dates if d not in dates]
+            coverage[symbol] = {
+                'found': expected - len(missing),
+                'expected': expected,
+                'ratio': round((expected - len(missing)) / expected, 4) if expected else 0.0,
+                'missing': missing,
+            }
+        return coverage
+
+    def get_many(self, data_type: str, symbols: List[str], start_date: str,
+                 end_date: str) -> Tuple[pd.DataFrame, Dict[str, Dict[str, Any]]]:
+        """Get cached rows for many symbols over a date range in one statement per chunk.
+
+        Unlike get(), no coverage threshold is applied: whatever is cached is
+        returned, together with per-symbol coverage so callers can fetch only
+        the missing days instead of treating a partial hit as a miss.
+
+        Args:
+            data_type: One of SUPPORTED_DATA_TYPES
+            symbols: Symbols (ts_code) to read
+            start_date: First trade date, YYYYMMDD
+            end_date: Last trade date, YYYYMMDD
+
+        Returns:
+            Tuple of (frame sorted by ts_code/trade_date, coverage) where
+            coverage[symbol] = {'found', 'expected', 'ratio', 'missing'}
+        """
+        from ..utils.trading_calendar import get_trading_days_between
+        symbols = list(dict.fromkeys(symbols))
+        trade_dates = [start_date] if self._is_single_day_request(start_date, end_date) \
+            else get_trading_days_between(start_date, end_date)
+        if data_type not in SUPPORTED_DATA_TYPES or not symbols:
+            return pd.DataFrame(), self._coverage({}, symbols, trade_dates)
+
+        frames, found = [], {}
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                for chunk in _chunks(symbols):
+                    placeholders = ','.join('?' * len(chunk))
+                    cursor.execute(
+                        f"""
+                        SELECT symbol, trade_date, data FROM daily_data
+                        WHERE data_type = ? AND symbol IN ({placeholders}) AND trade_date BETWEEN ? AND ?
+                        ORDER BY symbol, trade_date
+                        """,
+                        [data_type, *chunk, start_date, end_date]
+                    )
+                    for symbol, trade_date, blob in cursor.fetchall():
+                        row_df = pickle.loads(_decompress_blob(blob))
+                        if 'ts_code' not in row_df.columns:
+                            row_df['ts_code'] = symbol
+                        frames.append(row_df)
+                        found.setdefault(symbol, set()).add(trade_date)
+        except Exception as e:
+            logger.warning(f"Failed to batch-read {data_type} for {len(symbols)} symbols: {str(e)}")
+            return pd.DataFrame(), self._coverage({}, symbols, trade_dates)
+
+        df = dfs_concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        logger.debug(f"Batch cache read {data_type} {start_date}-{end_date}: {len(found)}/{len(symbols)} symbols, {len(df)} rows")
+        return df, self._coverage(found, symbols, trade_dates)
+
+    def _upsert_rows(self, conn: sqlite3.Connection, data_type: str, symbols: List[str], data: pd.DataFrame) -> int:
+        """Write one pickled row per (symbol, trade_date) with a single executemany upsert."""
+        current_time = time.time()
+        data = data.reset_index(drop=True)
+        trade_dates = data['trade_date'].astype(str).tolist()
+        rows = []
+        for i, (symbol, trade_date) in enumerate(zip(symbols, trade_dates)):
+            data_blob = _compress_blob(pickle.dumps(data.iloc[[i]].reset_index(drop=True)))
+            rows.append((data_type, symbol, trade_date, data_blob, current_time, current_time))
+        conn.executemany(
+            """
+            INSERT INTO daily_data (data_type, symbol, trade_date, data, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(data_type, symbol, trade_date)
+            DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at
+            """,
+            rows
+        )
+        return len(rows)
+
     def set(self, key: str, data: pd.DataFrame) -> bool:
         """Set cached data with upsert behavior."""
         try:
@@ -216,59 +341,14 @@ class SQLiteDataCache:
                 logger.debug(f"Attempted to cache empty data for key: {key}")
                 return False
 
-            current_time = time.time()
-
             data_type, symbol, start_date, end_date = self._parse_cache_key(key)
 
             # Only handle financial data types with symbols and trade_date column
             if (symbol and data_type in SUPPORTED_DATA_TYPES and
                 'trade_date' in data.columns and not data.empty):
 
-                success_count = 0
                 with sqlite3.connect(self.db_path) as conn:
-                    cursor = conn.cursor()
-
-                    # Store each day's data separately with upsert behavior
-                    for _, row in data.iterrows():
-                        trade_date = str(row['trade_date'])
-                        row_df = pd.DataFrame([row])
-                        data_blob = _compress_blob(pickle.dumps(row_df))
-
-                        try:
-                            # Check if record exists
-                            cursor.execute(
-                                """
-                                SELECT id FROM daily_data
-                                WHERE data_type = ? AND symbol = ? AND trade_date = ?
-                                """,
-                                (data_type, symbol, trade_date)
-                            )
-                            exists = cursor.fetchone()
-
-                            if exists:
-                                # Update existing record
-                                cursor.execute(
-                                    """
-                                    UPDATE daily_data
-                                    SET data = ?, updated_at = ?
-                                    WHERE data_type = ? AND symbol = ? AND trade_date = ?
-                                    """,
-                                    (data_blob, current_time, data_type, symbol, trade_date)
-                                )
-                            else:
-                                # Insert new record
-                                cursor.execute(
-                                    """
-                                    INSERT INTO daily_data
-                                    (data_type, symbol, trade_date, data, created_at, updated_at)
-                                    VALUES (?, ?, ?, ?, ?, ?)
-                                    """,
-                                    (data_type, symbol, trade_date, data_blob, current_time, current_time)
-                                )
-                            success_count += 1
-                        except Exception as e:
-                            logger.warning(f"Failed to cache daily data for {symbol} {trade_date}: {e}")
-
+                    success_count = self._upsert_rows(conn, data_type, [symbol] * len(data), data)
                     conn.commit()
 
                 logger.debug(f"Cached {success_count} daily records for {key}")
@@ -282,6 +362,148 @@ class SQLiteDataCache:
             logger.error(f"Failed to cache data for key {key}: {str(e)}")
             return False
 
+    def set_bulk(self, data_type: str, data: pd.DataFrame, symbol_col: str = 'ts_code') -> int:
+        """Upsert a multi-symbol frame in one transaction.
+
+        Args:
+            data_type: One of SUPPORTED_DATA_TYPES
+            data: Rows for any number of symbols; must carry `symbol_col` and `trade_date`
+            symbol_col: Column holding the cache symbol (default 'ts_code')
+
+        Returns:
+            Number of (symbol, trade_date) rows written
+        """
+        if data is None or data.empty:
+            return 0
+        if data_type not in SUPPORTED_DATA_TYPES or symbol_col not in data.columns or 'trade_date' not in data.columns:
+            logger.debug(f"Skipping bulk cache for {data_type}: unsupported type or missing {symbol_col}/trade_date")
+            return 0
+        try:
+            data = data[data[symbol_col].notna()]
+            with sqlite3.connect(self.db_path) as conn:
+                count = self._upsert_rows(conn, data_type, data[symbol_col].astype(str).tolist(), data)
+                conn.commit()
+            logger.debug(f"Bulk cached {count} {data_type} rows for {data[symbol_col].nunique()} symbols")
+            return count
+        except Exception as e:
+            logger.error(f"Failed to bulk cache {data_type}: {str(e)}")
+            return 0
+
+    def get_snapshots(self, kind: str, trade_dates: List[str]) -> Dict[str, pd.DataFrame]:
+        """Get whole-market snapshots (e.g. kind='daily' or 'daily_basic') for many trade dates.
+
+        Returns:
+            Dict trade_date -> DataFrame, only for dates present in the cache
+        """
+        snapshots: Dict[str, pd.DataFrame] = {}
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                for chunk in _chunks(list(trade_dates)):
+                    placeholders = ','.join('?' * len(chunk))
+                    cursor = conn.execute(
+                        f"SELECT trade_date, data FROM market_snapshot WHERE kind = ? AND trade_date IN ({placeholders})",
+                        [kind, *chunk]
+                    )
+                    for trade_date, blob in cursor:
+                        snapshots[trade_date] = pickle.loads(_decompress_blob(blob))
+        except Exception as e:
+            logger.warning(f"Failed to read {kind} snapshots: {str(e)}")
+        return snapshots
+
+    def get_latest_snapshot(self, kind: str, since: str) -> Optional[Tuple[str, pd.DataFrame]]:
+        """Newest snapshot of `kind` dated on or after `since`, as (date, DataFrame), or None."""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                row = conn.execute(
+                    "SELECT trade_date, data FROM market_snapshot WHERE kind = ? AND trade_date >= ? "
+                    "ORDER BY trade_date DESC LIMIT 1",
+                    (kind, since)
+                ).fetchone()
+        except Exception as e:
+            logger.warning(f"Failed to read latest {kind} snapshot: {str(e)}")
+            return None
+        if row is None:
+            return None
+        return row[0], pickle.loads(_decompress_blob(row[1]))
+
+    def set_snapshot(self, kind: str, trade_date: str, data: pd.DataFrame) -> bool:
+        """Store (or replace) the whole-market snapshot of one trade date."""
+        if data is None or data.empty:
+            return False
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute(
+                    """
+                    INSERT INTO market_snapshot (kind, trade_date, data, updated_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(kind, trade_date) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at
+                    """,
+                    (kind, trade_date, _compress_blob(pickle.dumps(data.reset_index(drop=True))), time.time())
+                )
+                conn.commit()
+            logger.debug(f"Cached {kind} snapshot for {trade_date} ({len(data)} rows)")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to cache {kind} snapshot for {trade_date}: {str(e)}")
+            return False
+
+    def get_regimes(self, index_code: str, mode: str, trade_dates: List[str]) -> pd.DataFrame:
+        """Get stored market regimes of `index_code` under detection `mode` for many trade dates.
+
+        Returns:
+            DataFrame indexed by trade_date (regime, close, ma20, ma60, ma120, volatility),
+            only for dates present in the cache
+        """
+        frames = []
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                for chunk in _chunks(list(trade_dates)):
+                    placeholders = ','.join('?' * len(chunk))
+                    frames.append(pd.read_sql_query(
+                        "SELECT trade_date, regime, close, ma20, ma60, ma120, volatility FROM market_regime "
+                        f"WHERE index_code = ? AND mode = ? AND trade_date IN ({placeholders})",
+                        conn, params=[index_code, mode, *chunk]
+                    ))
+        except Exception as e:
+            logger.warning(f"Failed to read {index_code} regimes: {str(e)}")
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame(columns=['regime', 'close', 'ma20', 'ma60', 'ma120', 'volatility'])
+        regimes = pd.concat(frames).set_index('trade_date').sort_index()
+        indicators = ['close', 'ma20', 'ma60', 'ma120', 'volatility']
+        regimes[indicators] = regimes[indicators].astype(float)
+        return regimes
+
+    def set_regimes(self, index_code: str, mode: str, data: pd.DataFrame) -> int:
+        """Store (or replace) market regimes; `data` is indexed by trade_date like get_regimes()."""
+        if data is None or data.empty:
+            return 0
+        now = time.time()
+        rows = [
+            (index_code, mode, trade_date, row['regime'], row['close'], row['ma20'], row['ma60'],
+             row['ma120'], row['volatility'], now)
+            for trade_date, row in data.iterrows()
+        ]
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany(
+                    """
+                    INSERT INTO market_regime
+                        (index_code, mode, trade_date, regime, close, ma20, ma60, ma120, volatility, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(index_code, mode, trade_date) DO UPDATE SET
+                        regime = excluded.regime, close = excluded.close, ma20 = excluded.ma20,
+                        ma60 = excluded.ma60, ma120 = excluded.ma120, volatility = excluded.volatility,
+                        updated_at = excluded.updated_at
+                    """,
+                    rows
+                )
+                conn.commit()
+            logger.debug(f"Cached {len(rows)} {index_code} regimes ({mode})")
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Failed to cache {index_code} regimes: {str(e)}")
+            return 0
+
     def get_cached_dates(self, data_type: str, symbol: str) -> List[str]:
         """Get list of cached trade dates for a specific symbol and data type."""
         try:
@@ -300,6 +522,20 @@ class SQLiteDataCache:
             logger.warning(f"Failed to get cached dates for {data_type}_{symbol}: {str(e)}")
             return []
 
+    def get_cached_dates_by_symbol(self, data_type: str) -> Dict[str, set]:
+        """Get cached trade dates for every symbol of a data type in one query."""
+        cached: Dict[str, set] = {}
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.execute(
+                    "SELECT symbol, trade_date FROM daily_data WHERE data_type = ?", (data_type,)
+                )
+                for symbol, trade_date in cursor:
+                    cached.setdefault(symbol, set()).add(trade_date)
+        except Exception as e:
+            logger.warning(f"Failed to get cached dates for {data_type}: {str(e)}")
+        return cached
+
     def invalidate(self, pattern: str) -> int:
         """Invalidate cached data matching pattern."""
         try:
@@ -362,6 +598,8 @@ class SQLiteDataCache:
 
                 # Delete all data
                 cursor.execute("DELETE FROM daily_data")
+                cursor.execute("DELETE FROM market_snapshot")
+                cursor.execute("DELETE FROM market_regime")
                 conn.commit()
 
                 # Vacuum to reclaim space
@@ -515,20 +753,36 @@ class SQLiteDataCache:
 
         logger.info(f"Processing {len(symbols)} symbols(len({len(indexes)} indexes)) for {len(required_dates)} trade dates")
 
-        # Process each symbol incrementally
+        # Cached dates for every symbol in two queries instead of one per symbol
+        cached_index_dates = self.get_cached_dates_by_symbol('index_data')
+        cached_stock_dates = self.get_cached_dates_by_symbol('stock_data')
+
+        def _missing_ranges(missing_dates_list: List[str]) -> List[Tuple[str, str]]:
+            """Collapse sorted missing dates into continuous ranges to minimize API calls."""
+            date_ranges = []
+            range_start = range_end = missing_dates_list[0]
+            for date in missing_dates_list[1:]:
+                # Check if this date is consecutive to the current range
+                next_trading_day = get_trading_days_between(range_end, date)
+                if len(next_trading_day) <= 2:  # Allow 1 day gap
+                    range_end = date
+                else:
+                    # End current range and start new one
+                    date_ranges.append((range_start, range_end))
+                    range_start = range_end = date
+            date_ranges.append((range_start, range_end))
+            return date_ranges
+
+        # Group stocks by identical missing ranges so each range is fetched as one
+        # multi-symbol get_stock_data call, which writes its rows with set_bulk().
         errors = []
         total_fetched = 0
         total_skipped = 0
+        stock_groups: Dict[Tuple[Tuple[str, str], ...], List[str]] = {}
 
-        for i, stock_code in enumerate(tqdm(symbols, desc="Processing stocks", unit="stock")):
+        for stock_code in tqdm(symbols, desc="Processing stocks", unit="stock"):
             try:
-                # Check what dates are already cached for this symbol
-                if stock_code in indexes:
-                    cached_dates = set(self.get_cached_dates('index_data', stock_code))
-                else:
-                    cached_dates = set(self.get_cached_dates('stock_data', stock_code))
-
-                # Find missing dates
+                cached_dates = (cached_index_dates if stock_code in indexes else cached_stock_dates).get(stock_code, set())
                 missing_dates = required_dates - cached_dates
 
                 if not missing_dates:
@@ -536,45 +790,30 @@ class SQLiteDataCache:
                     total_skipped += 1
                     continue
 
-                # Sort missing dates and fetch in chunks to minimize API calls
-                missing_dates_list = sorted(missing_dates)
-
-                # Find continuous date ranges to minimize API calls
-                date_ranges = []
-                if missing_dates_list:
-                    range_start = missing_dates_list[0]
-                    range_end = missing_dates_list[0]
-
-                    for date in missing_dates_list[1:]:
-                        # Check if this date is consecutive to the current range
-                        next_trading_day = get_trading_days_between(range_end, date)
-                        if len(next_trading_day) <= 2:  # Allow 1 day gap
-                            range_end = date
-                        else:
-                            # End current range and start new one
-                            date_ranges.append((range_start, range_end))
-                            range_start = date
-                            range_end = date
-
-                    # Add the last range
-                    date_ranges.append((range_start, range_end))
+                date_ranges = _missing_ranges(sorted(missing_dates))
+                if stock_code not in indexes:
+                    stock_groups.setdefault(tuple(date_ranges), []).append(stock_code)
+                    continue
 
-                # Fetch data for each date range
                 for range_start, range_end in date_ranges:
                     try:
-                        if stock_code in indexes:
-                            data_provider.get_index_data(stock_code, range_start, range_end)
-                        else:
-                            data_provider.get_stock_data(stock_code, range_start, range_end)
+                        data_provider.get_index_data(stock_code, range_start, range_end)
                         total_fetched += 1
                     except Exception as e:
                         errors.append((stock_code, f"{range_start}-{range_end}", str(e)))
-                        continue
 
             except Exception as e:
                 errors.append((stock_code, "all_dates", str(e)))
                 continue
 
+        for date_ranges, group in stock_groups.items():
+            for range_start, range_end in date_ranges:
+                try:
+                    fetched = data_provider.get_stock_data(group, range_start, range_end)
+                    total_fetched += fetched['ts_code'].nunique() if not fetched.empty else 0
+                except Exception as e:
+                    errors.append((f"{len(group)} stocks", f"{range_start}-{range_end}", str(e)))
+
         logger.info("Incremental population completed:")
         logger.info(f"  - Symbols processed: {len(symbols)}, {len(indexes)} benchmark indexes")
         logger.info(f"  - Symbols with new data fetched: {total_fetched}")
@@ -634,3 +873,25 @@ class SQLiteDataCache:
         except Exception as e:
             logger.error(f"Failed to invalidate recent cache: {e}")
             return 0
+
+
+def create_data_cache(db_path: str, backend: Optional[str] = None) -> SQLiteDataCache:
+    """Build the market-data cache for the configured backend.
+
+    Args:
+        db_path: Path to SQLite database file
+        backend: 'sqlite' (pickled blob rows) or 'columnar'; defaults to DB_CACHE_BACKEND
+
+    Returns:
+        SQLiteDataCache or ColumnarDataCache instance
+    """
+    if backend is None:
+        from .. import DB_CACHE_BACKEND
+        backend = DB_CACHE_BACKEND
+    backend = (backend or 'sqlite').lower()
+    if backend == 'columnar':
+        from .columnar_cache import ColumnarDataCache
+        return ColumnarDataCache(db_path)
+    if backend != 'sqlite':
+        logger.warning(f"Unknown DB_CACHE_BACKEND '{backend}', falling back to sqlite")
+    return SQLiteDataCache(db_path)
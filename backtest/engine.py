@@ -22,7 +22,9 @@ import json
 import re
 import argparse
 import subprocess
+import multiprocessing
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 import time
 import warnings
@@ -40,8 +42,8 @@ from backtest import data_provider
 from backtest.utils.trading_calendar import calendar, convert_trade_date
 from backtest.utils.logging_config import configure_logger
 from backtest.utils.config import ConfigManager
-from backtest.utils.util import convert_to_datetime
-from backtest.utils.market_regime import detect_market_regime
+from backtest.utils.util import bare_code, convert_to_datetime
+from backtest.utils.market_regime import detect_market_regime, regime_series
 from backtest.utils.trailing_stop import calculate_trailing_stop
 from shared.db.db import DBTEST as DB
 
@@ -62,6 +64,27 @@ def _detect_market_regime_cached(date: str) -> dict:
     return _REGIME_CACHE[date]
 
 
+# ── Daily bar prefetch / rolling windows ─────────────────────────────────────
+# generate_daily_report() fetches the day's bars for all order and held symbols
+# in one multi-symbol get_stock_data() call. The same bars slide the trailing
+# 20-day windows used by the ER trend exit (get_market_data_df), which are
+# shared across the per-day OrderAnalyzer instances of a run.
+ER_WINDOW_DAYS = 20
+BAR_WINDOWS = None   # RollingBarBuffer, created on first use
+
+
+def _bar_windows():
+    global BAR_WINDOWS
+    if BAR_WINDOWS is None:
+        from backtest.data.bar_buffer import RollingBarBuffer
+        BAR_WINDOWS = RollingBarBuffer(
+            ER_WINDOW_DAYS,
+            fetch=lambda symbols, start, end: data_provider.get_stock_data(symbols, start, end),
+            days_before=lambda date, n: calendar.get_trading_days_before(date, n),
+        )
+    return BAR_WINDOWS
+
+
 # 1. Load configures from .env, $BACKTEST_PATH/config.json, e.g. REPORT_PATH, initial cash, strategy parameters etc.
 CONFIG_FILE = os.getenv("CONFIG_FILE", default="/backtest/config.json")
 BACKTEST_PATH = os.getenv('BACKTEST_PATH', './backtest')
@@ -86,8 +109,10 @@ TAX = global_cm.get('portfolio_config.tax', 0.0005)  # 10W * 0.005% = 50 # Only
 #   else       -> no intervention (regime-based MAX_POSITIONS unchanged)
 # Uses ONLY the previous day's realized NAV (past data, no lookahead).
 # Update frequency: DAILY (per trading day).
+# NAV, realized P&L and the peak come from PORTFOLIO (backtest/core/portfolio.py),
+# a running accumulator seeded once per run and fed by execute_sell_order().
 # =====================================================================
-PEAK_NAV = 0.0                 # running high-water mark of portfolio NAV
+PORTFOLIO = None               # PortfolioState of the current pick_orders_trading() run
 DRAWDOWN_BUDGET = {
     'force_defensive_dd': -3.5,   # % drawdown -> force defensive cap
     'shrink30_dd': -2.0,          # % drawdown -> scale exposure by 0.7
@@ -96,13 +121,12 @@ DRAWDOWN_BUDGET = {
 }
 
 
-def _drawdown_cap(base_max: int, nav: float) -> int:
-    """Apply max-drawdown de-risking to a base position limit using prior NAV."""
-    global PEAK_NAV
+def _drawdown_cap(base_max: int, portfolio, date: str) -> int:
+    """Apply max-drawdown de-risking to a base position limit using the NAV before `date`."""
+    nav = portfolio.nav(date)
     if nav <= 0:
         return base_max
-    PEAK_NAV = max(PEAK_NAV, nav)
-    dd = (nav / PEAK_NAV - 1) * 100
+    dd = portfolio.mark_nav(nav)
     force_dd = DRAWDOWN_BUDGET['force_defensive_dd']
     shrink_dd = DRAWDOWN_BUDGET['shrink30_dd']
     if dd < force_dd:
@@ -113,9 +137,17 @@ def _drawdown_cap(base_max: int, nav: float) -> int:
         capped = max(int(base_max * DRAWDOWN_BUDGET['shrink_factor']), 1)
         logger.info(f"[dd-risk] NAV ¥{nav:,.0f} dd {dd:+.2f}% < {shrink_dd}% -> shrink exposure to {capped} pos")
         return capped
-    logger.info(f"[dd-risk] NAV ¥{nav:,.0f} dd {dd:+.2f}% peak ¥{PEAK_NAV:,.0f} -> no intervention ({base_max} pos)")
+    logger.info(f"[dd-risk] NAV ¥{nav:,.0f} dd {dd:+.2f}% peak ¥{portfolio.peak_nav:,.0f} -> no intervention ({base_max} pos)")
     return base_max
 
+# Base position limit per market regime (before drawdown de-risking)
+REGIME_MAX_POSITIONS = {
+    'bull': 12,
+    'normal': 10,
+    'volatile': 8,
+    'bear': 5,
+}
+
 # Check report path exist, if not,then create it
 if not os.path.exists(REPORT_PATH):
     os.makedirs(REPORT_PATH)
@@ -175,6 +207,78 @@ def _run_cli_command(*args: str) -> None:
         )
 
 
+def _pick_in_process(src: str, this_date: str, flags: List[str]) -> Optional[List[dict]]:
+    """Run a registered strategy's pick(date, flags) inside this process.
+
+    Returns the selected_stocks records, or None when `src` has no in-process
+    picker or it raised, so the caller falls back to the strategy script.
+    """
+    from backtest.strategies.registry import get_strategy_picker, selected_records
+    try:
+        picker = get_strategy_picker(src)
+        if picker is None:
+            return None
+        selected = selected_records(picker(this_date, flags))
+    except Exception as e:
+        logger.warning(f"[{this_date}] In-process {src} pick failed ({e}); falling back to strategy script")
+        return None
+    logger.debug(f"[{this_date}] {src} picked in-process: {len(selected)} stocks")
+    return selected
+
+
+def _pick_via_script(src: str, this_date: str, flags: List[str]) -> List[dict]:
+    """Run the strategy as a script in a fresh interpreter and read its /tmp/tmp output."""
+    # Strategy dispatch table — maps src to (script, extra_args).
+    # All scripts receive this_date + flags; some get an extra strategy-name arg.
+    _STRATEGY_SCRIPTS = {
+        'ts_longup':        ('backtest/strategies/ts_longup.py', []),
+        'ts_hma':           ('backtest/strategies/ts_hma.py', []),
+        'ts_96MA':           ('backtest/strategies/ts_96MA.py', []),
+        'ts_7AZ_96MA':       ('backtest/strategies/ts_7AZ_96MA.py', []),
+        'ts_7AZ_96MA_flow':  ('backtest/strategies/ts_7AZ_96MA_flow.py', []),
+        'ts_daily':         ('backtest/strategies/ts_daily.py', []),
+        'ts_7AZ':           ('backtest/strategies/ts_7AZ.py', ['ts_7AZ']),
+        'ts_7AZ_grok':      ('backtest/strategies/ts_7AZ_grok.py', ['ts_7AZ_grok']),
+        'ts_ao_er':         ('backtest/strategies/ts_ao_er.py', []),
+        'ts_multi_swing_defensive': ('backtest/strategies/ts_multi_swing_defensive.py', []),
+        'ts_multi_skills':    ('backtest/strategies/ts_multi_skills.py', []),
+    }
+
+    if src in _STRATEGY_SCRIPTS:
+        script, extra_args = _STRATEGY_SCRIPTS[src]
+        _run_strategy_script(script, this_date, *extra_args, *flags)
+    elif src == 'ts_go':
+        # Compile and run the Go stock picker (kept as os.system for shell chaining).
+        # Uses the NEWEST picker variant (pick_stocks_best = enhanced multi-factor
+        # scoring) and only passes Go-native flags (-date/-lookahead), NOT the Python
+        # --no-search/--no-ai flags — passing those makes Go's flag package exit 512.
+        cmd = f'cd utils/go-stock && go build -o pick_stocks ./cmd/pick_stocks_best/main.go && ./pick_stocks -date {this_date} -output /tmp/tmp'
+        logger.info(f"Running Go stock picker: {cmd}")
+        result = os.system(cmd)
+        if result != 0:
+            raise ValueError(f"Go stock picker failed for {this_date} (exit {result}).")
+    else:
+        # Default: ts_ths_dc with src as the strategy name
+        _run_strategy_script('backtest/strategies/ts_ths_dc.py', this_date, src, *flags)
+    # Rename /tmp/tmp to per-date file to allow parallel backtests
+    tmp_file = f'/tmp/tmp_{src}_{this_date}_{os.getpid()}'
+    try:
+        os.rename('/tmp/tmp', tmp_file)
+    except OSError:
+        # ts_7AZ / ts_ao_er fallback paths
+        fallback = '/tmp/ts_7AZ_tmp.json'
+        if not os.path.exists(fallback):
+            fallback = '/tmp/ts_7AZ_grok_tmp.json'
+        if not os.path.exists(fallback):
+            fallback = '/tmp/ts_ao_er_tmp.json'
+        if os.path.exists(fallback):
+            os.rename(fallback, tmp_file)
+        else:
+            pass  # already renamed by another process
+    with open(tmp_file, 'r') as f:
+        return json.load(f)['selected_stocks']
+
+
 def pick_stocks_to_file(this_date: str, src: str = 'ts_7AZ', backtest_search: bool = True, backtest_ai: bool = True) -> str:
     """
     Pick stocks and save to a file for a specific date.
@@ -222,63 +326,22 @@ def pick_stocks_to_file(this_date: str, src: str = 'ts_7AZ', backtest_search: bo
         logger.info(f"backtest_ai=False: Strategy '{src}' requires AI, falling back to 'ts_longup'")
         src = 'ts_longup'
 
-    VENV_PYTHON = sys.executable  # noqa: F811 — keep local ref for clarity
     # Build optional flags for strategy scripts
     _flags = []
     if not backtest_search:
         _flags.append("--no-search")
     if not backtest_ai:
         _flags.append("--no-ai")
-    _flags_str = " ".join(_flags)
-    # Strategy dispatch table — maps src to (script, extra_args).
-    # All scripts receive this_date + flags; some get an extra strategy-name arg.
-    _STRATEGY_SCRIPTS = {
-        'ts_longup':        ('backtest/strategies/ts_longup.py', []),
-        'ts_hma':           ('backtest/strategies/ts_hma.py', []),
-        'ts_96MA':           ('backtest/strategies/ts_96MA.py', []),
-        'ts_7AZ_96MA':       ('backtest/strategies/ts_7AZ_96MA.py', []),
-        'ts_7AZ_96MA_flow':  ('backtest/strategies/ts_7AZ_96MA_flow.py', []),
-        'ts_daily':         ('backtest/strategies/ts_daily.py', []),
-        'ts_7AZ':           ('backtest/strategies/ts_7AZ.py', ['ts_7AZ']),
-        'ts_7AZ_grok':      ('backtest/strategies/ts_7AZ_grok.py', ['ts_7AZ_grok']),
-        'ts_ao_er':         ('backtest/strategies/ts_ao_er.py', []),
-        'ts_multi_swing_defensive': ('backtest/strategies/ts_multi_swing_defensive.py', []),
-        'ts_multi_skills':    ('backtest/strategies/ts_multi_skills.py', []),
-    }
 
-    if src in _STRATEGY_SCRIPTS:
-        script, extra_args = _STRATEGY_SCRIPTS[src]
-        _run_strategy_script(script, this_date, *extra_args, *_flags)
-    elif src == 'ts_go':
-        # Compile and run the Go stock picker (kept as os.system for shell chaining).
-        # Uses the NEWEST picker variant (pick_stocks_best = enhanced multi-factor
-        # scoring) and only passes Go-native flags (-date/-lookahead), NOT the Python
-        # --no-search/--no-ai flags — passing those makes Go's flag package exit 512.
-        cmd = f'cd utils/go-stock && go build -o pick_stocks ./cmd/pick_stocks_best/main.go && ./pick_stocks -date {this_date} -output /tmp/tmp'
-        logger.info(f"Running Go stock picker: {cmd}")
-        result = os.system(cmd)
-        if result != 0:
-            raise ValueError(f"Go stock picker failed for {this_date} (exit {result}).")
-    else:
-        # Default: ts_ths_dc with src as the strategy name
-        _run_strategy_script('backtest/strategies/ts_ths_dc.py', this_date, src, *_flags)
-    # Rename /tmp/tmp to per-date file to allow parallel backtests
-    tmp_file = f'/tmp/tmp_{src}_{this_date}_{os.getpid()}'
-    try:
-        os.rename('/tmp/tmp', tmp_file)
-    except OSError:
-        # ts_7AZ / ts_ao_er fallback paths
-        fallback = '/tmp/ts_7AZ_tmp.json'
-        if not os.path.exists(fallback):
-            fallback = '/tmp/ts_7AZ_grok_tmp.json'
-        if not os.path.exists(fallback):
-            fallback = '/tmp/ts_ao_er_tmp.json'
-        if os.path.exists(fallback):
-            os.rename(fallback, tmp_file)
-        else:
-            pass  # already renamed by another process
-    with open(tmp_file, 'r') as f:
-        strong_stocks = json.load(f)
+    # Registered strategies run in-process (warm provider/calendar caches, no
+    # /tmp/tmp handoff); the strategy script is the fallback.
+    selected_stocks = None
+    if os.getenv('STRATEGY_IN_PROCESS', 'true').lower() in ('true', '1', 'yes'):
+        selected_stocks = _pick_in_process(src, this_date, _flags)
+    if selected_stocks is None:
+        selected_stocks = _pick_via_script(src, this_date, _flags)
+    strong_stocks = {'selected_stocks': selected_stocks}
+
     # Apply CANSLIM score filter from env (SCORE_MIN=5 keeps only top quality)
     _score_min = int(os.getenv('SCORE_MIN', '0'))
     if _score_min > 0:
@@ -304,6 +367,78 @@ def pick_stocks_to_file(this_date: str, src: str = 'ts_7AZ', backtest_search: bo
     return pick_output_file
 
 
+def _precompute_pick(this_date: str, src: str, backtest_search: bool, backtest_ai: bool, report_path: str,
+                     max_positions: Optional[int] = None) -> Optional[str]:
+    """Process-pool worker for the parallel pick phase of pick_orders_trading.
+
+    Picks depend only on market data and the regime position limit, never on
+    portfolio state, so they can be made ahead of the serial order pass.
+    Returns the pick file path, or None when the strategy's pick for this date
+    may read the run's own earlier reports and has to wait for the serial pass.
+    `max_positions` overrides the regime position limit used to truncate picks.
+    """
+    from backtest.strategies.registry import pick_reads_reports
+    global REPORT_PATH, MAX_POSITIONS
+    REPORT_PATH = report_path
+    if pick_reads_reports(src, this_date):
+        return None
+    regime = _detect_market_regime_cached(this_date).get('regime', 'normal')
+    MAX_POSITIONS = max_positions or REGIME_MAX_POSITIONS.get(regime, 10)
+    return pick_stocks_to_file(this_date, src=src, backtest_search=backtest_search, backtest_ai=backtest_ai)
+
+
+def precompute_picks(dates: List[str], src: str, workers: int, backtest_search: bool = True, backtest_ai: bool = True,
+                     max_positions: Optional[int] = None) -> Dict[str, str]:
+    """Write the pick files for `dates` across a process pool.
+
+    Returns {date: pick_file}. Dates that were deferred (see _precompute_pick)
+    or whose worker failed are left out; pick_orders_trading picks those
+    inline, in date order, exactly as in a serial run.
+    """
+    picks: Dict[str, str] = {}
+    if not dates:
+        return picks
+    logger.info(f"Parallel pick phase: {len(dates)} dates across {workers} workers ({src})")
+    # spawn: workers must not inherit open SQLite connections from this process
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        futures = {
+            pool.submit(_precompute_pick, d, src, backtest_search, backtest_ai, REPORT_PATH, max_positions): d
+            for d in dates
+        }
+        for future in as_completed(futures):
+            this_date = futures[future]
+            try:
+                pick_file = future.result()
+            except Exception as e:
+                logger.warning(f"[{this_date}] Parallel pick failed ({e}); will pick in the serial pass")
+                continue
+            if pick_file:
+                picks[this_date] = pick_file
+            else:
+                logger.info(f"[{this_date}] Pick depends on earlier reports; deferred to the serial pass")
+    logger.info(f"Parallel pick phase done: {len(picks)}/{len(dates)} dates precomputed")
+    return picks
+
+
+def _resume_checkpoint_file() -> str:
+    return os.path.join(REPORT_PATH, 'resume_checkpoint.json')
+
+
+def _load_resume_checkpoint() -> Optional[str]:
+    """Last date whose portfolio state is saved in the backtest DB (None for runs without a checkpoint)."""
+    path = _resume_checkpoint_file()
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f).get('date')
+
+
+def _save_resume_checkpoint(this_date: str) -> None:
+    with open(_resume_checkpoint_file(), 'w') as f:
+        json.dump({'date': this_date, 'saved_at': datetime.now().isoformat(timespec='seconds')}, f)
+
+
 def create_smart_orders_from_picks(pick_input_file: str, user_id: int = 1, current_capital: float = 0.0, app_positions: list = None, app_running_orders: list = None, is_live: bool = False) -> str:
     """
     Create smart orders based on picked stocks for a specific date.
@@ -1204,6 +1339,9 @@ def execute_sell_order(user_id: int, symbol: str, name: str,
     if has_exceptions:
         logger.error(f"Failed to execute sell order for {symbol}")
         return False
+    if PORTFOLIO is not None:
+        # Same 2-decimal value as written to the notes, so NAV matches a DB re-seed
+        PORTFOLIO.record_sell(transaction_date, float(f'{pnl:.2f}'))
     return True
 
 def update_available_shares_for_new_day(date: str, user_id: int = 1) -> int:
@@ -1232,6 +1370,26 @@ def update_available_shares_for_new_day(date: str, user_id: int = 1) -> int:
     return updated
 
 
+def period_summary(timeline: List[Dict], benchmark_results: Optional[Dict] = None) -> Dict[str, Any]:
+    """Headline metrics of a period-report timeline (also used to rank sweep variants)."""
+    final_day = timeline[-1]
+    values = pd.Series([day['portfolio_value'] for day in timeline], dtype=float)
+    # Drawdown from the running peak, with the initial capital as the first peak
+    peaks = values.cummax().clip(lower=INITIAL_CASH)
+    max_drawdown_pct = float((values / peaks - 1).min() * 100) if INITIAL_CASH > 0 else 0.0
+    csi300 = (benchmark_results or {}).get('CSI 300', {})
+    return {
+        'total_return_pct': (final_day['cumulative_total_pnl'] / INITIAL_CASH * 100) if INITIAL_CASH > 0 else 0.0,
+        'max_drawdown_pct': min(max_drawdown_pct, 0.0),
+        'realized_pnl': final_day['cumulative_realized_pnl'],
+        'unrealized_pnl': final_day['cumulative_unrealized_pnl'],
+        'final_value': final_day['portfolio_value'],
+        'transactions': sum(day.get('executed_orders', 0) for day in timeline),
+        'sells': sum(day.get('sell_count', 0) for day in timeline),
+        'excess_csi300_pct': csi300['excess'] * 100 if 'excess' in csi300 else None,
+    }
+
+
 class OrderAnalyzer:
     """Analyze smart order execution and performance with T+1 compliance."""
 
@@ -1267,14 +1425,33 @@ class OrderAnalyzer:
     def get_market_data_df(self, symbol: str, date: str) -> Optional[pd.DataFrame]:
         """Get multi-day OHLCV DataFrame for ER calculation (needs 14+ days)."""
         try:
-            start_date = calendar.get_trading_days_before(date, 20)
-            df = data_provider.get_stock_data(symbol, start_date, date)
-            if df.empty:
-                return None
-            return df
+            return _bar_windows().window(symbol, date)
         except Exception:
             return None
 
+    def prefetch_day_bars(self, date: str, symbols: List[str]) -> Dict[str, pd.Series]:
+        """
+        Fetch `date`'s bar for every symbol in one bulk call and slide the shared
+        rolling windows forward with them.
+
+        Returns:
+            Dict mapping each requested symbol, as given ('600000' or '600000.SH'),
+            -> that day's market data row (symbols without a bar are absent)
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+        try:
+            df = data_provider.get_stock_data(symbols, date, date)
+        except Exception as e:
+            logger.warning(f"No market data for {len(symbols)} symbols on {date}: {e}")
+            df = pd.DataFrame()
+        _bar_windows().add_day(date, symbols, df)
+        if df.empty:
+            return {}
+        by_code = {bare_code(code): rows.iloc[-1] for code, rows in df.groupby('ts_code', sort=False)}
+        return {symbol: by_code[bare_code(symbol)] for symbol in symbols if bare_code(symbol) in by_code}
+
     def check_order_execution(self, order: Dict, market_data: Optional[pd.Series],
                              date: str) -> Dict[str, Any]:
         """
@@ -1908,6 +2085,12 @@ class OrderAnalyzer:
         # Update available shares at start of new trading day
         update_available_shares_for_new_day(date=date, user_id=self.user_id)
 
+        # Today's bars for all order and held symbols in one bulk call
+        with DB.cursor() as cursor:
+            cursor.execute("SELECT code FROM holding_stocks WHERE user_id = ?", (self.user_id,))
+            held_symbols = [row[0] for row in cursor.fetchall()]
+        day_bars = self.prefetch_day_bars(date, [order['symbol'] for order in self.orders] + held_symbols)
+
         results = []
         total_invested = 0
         total_pnl = 0
@@ -1918,9 +2101,7 @@ class OrderAnalyzer:
             name = order['name']
 
             # Get market data
-            #market_data = self.get_market_data(symbol, date)
-            md_df = data_provider.get_stock_data(symbol, date, date)
-            market_data = md_df.iloc[-1] if not md_df.empty else None
+            market_data = day_bars.get(symbol)
 
             # Check execution with T+1 compliance
             execution = self.check_order_execution(order, market_data, date)
@@ -2096,6 +2277,12 @@ class OrderAnalyzer:
         - Realized P&L from completed sell transactions
         - Unrealized P&L from current holdings at market close
         - Daily breakdown with both realized and unrealized P&L
+
+        Holdings per day are replayed from the transactions table and valued on
+        a close-price matrix (backtest/core/period.py), so the cost does not
+        grow with the number of days times holdings.
+
+        Returns the headline metrics (see period_summary()).
         """
         start_date = convert_trade_date(start_date) if start_date else None
         end_date = convert_trade_date(end_date) if end_date else None
@@ -2105,202 +2292,21 @@ class OrderAnalyzer:
         trading_dates = calendar.get_trading_days_between(start_date, end_date)
         logger.info(f"Generating period report from {start_date} to {end_date}...")
 
-        timeline: List[Dict[str, Any]] = []
-        cumulative_realized_pnl = 0.0
-
-        def get_holdings_on_date(date: str) -> Dict[str, Dict]:
-            """Get holdings snapshot from database for a specific date."""
-            holdings = {}
-            with DB.cursor() as cursor:
-                # Get holdings updated on or before this date
-                cursor.execute("""
-                    SELECT code, name, holdings, available_shares,
-                           cost_basis_diluted, cost_basis_total, last_updated
-                    FROM holding_stocks
-                    WHERE user_id = ? AND last_updated <= ?
-                """, (self.user_id, convert_to_datetime(date)))
-
-                for row in cursor.fetchall():
-                    symbol = row[0]
-
-                    purchase_date = None
-                    cursor.execute("""
-                        SELECT MAX(transaction_date) FROM transactions
-                        WHERE code=? AND user_id=? AND transaction_type='sell'
-                    """, (symbol, self.user_id))
-                    last_sell = cursor.fetchone()[0]
-                    if last_sell:
-                        cursor.execute("""
-                            SELECT MIN(transaction_date) FROM transactions
-                            WHERE code=? AND user_id=? AND transaction_type='buy' AND transaction_date > ?
-                        """, (symbol, self.user_id, last_sell))
-                    else:
-                        cursor.execute("""
-                            SELECT MIN(transaction_date) FROM transactions
-                            WHERE code=? AND user_id=? AND transaction_type='buy'
-                        """, (symbol, self.user_id))
-                    p_date = cursor.fetchone()[0]
-                    if p_date:
-                        purchase_date = convert_trade_date(p_date)
-                    if not purchase_date:
-                        purchase_date = convert_trade_date(row[6])
-
-                    # Shield: Ensure purchase_date is never after the reporting date (e.g. during date-rescaling anomalies)
-                    if purchase_date and purchase_date > date:
-                        purchase_date = start_date
-
-                    holdings[symbol] = {
-                        'name': row[1],
-                        'quantity': row[2],
-                        'available': row[3],
-                        'cost_per_share': row[4],
-                        'cost_total': row[5],
-                        'purchase_date': purchase_date
-                    }
-            return holdings
-
-        def get_realized_pnl_for_date(date: str) -> tuple[float, int]:
-            """
-            Calculate realized P&L from sell transactions on this date.
-
-            Returns:
-                Tuple of (pnl, number_of_sells)
-            """
-            pnl = 0.0
-            sell_count = 0
-
-            with DB.cursor() as cursor:
-                # Get all sell transactions for this date
-                cursor.execute("""
-                    SELECT code, quantity, price, net_amount, notes
-                    FROM transactions
-                    WHERE user_id = ?
-                      AND transaction_type = 'sell'
-                      AND transaction_date = ?
-                """, (self.user_id, convert_to_datetime(date)))
-
-                sells = cursor.fetchall()
-                sell_count = len(sells)
-
-                for sell in sells:
-                    symbol = sell[0]
-                    quantity = int(sell[1])
-                    _ = float(sell[2]) # sell price per share
-                    net_amount = float(sell[3])
-                    notes = sell[4]
-
-                    # Extract P&L from notes (format: "... P&L: ¥123.45 (12.34%)")
-                    # Prioritize notes as holding_stocks might be updated (re-entry) or deleted
-                    transaction_pnl = 0.0
-                    pnl_found = False
-
-                    if 'P&L:' in notes:
-                        try:
-                            pnl_str = notes.split('P&L: ¥')[1].split(' ')[0]
-                            transaction_pnl = float(pnl_str)
-                            pnl_found = True
-                        except Exception as e:
-                            logger.warning(f"Could not parse P&L from notes for {symbol}: {e}")
-
-                    if not pnl_found:
-                        # Fallback to cost basis from holding_stocks (RISKY if re-entered)
-                        cursor.execute("""
-                            SELECT cost_basis_diluted
-                            FROM holding_stocks
-                            WHERE code = ? AND user_id = ?
-                        """, (symbol, self.user_id))
-
-                        cost_row = cursor.fetchone()
-                        if cost_row:
-                            cost_basis = float(cost_row[0]) * quantity
-                            transaction_pnl = net_amount - cost_basis
-                        else:
-                            transaction_pnl = 0
-
-                    pnl += transaction_pnl
-
-            return pnl, sell_count
-
-        def calculate_unrealized_pnl(holdings: Dict[str, Dict], date: str) -> tuple[float, float, float]:
-            """
-            Calculate unrealized P&L for all holdings.
-
-            Returns:
-                Tuple of (unrealized_pnl, total_cost, total_market_value)
-            """
-            unrealized_pnl = 0.0
-            total_cost = 0.0
-            total_market_value = 0.0
-
-            for symbol, holding in holdings.items():
-                market_data = self.get_market_data(symbol, date)
-                if market_data is None:
-                    logger.warning(f"No market data for {symbol} on {date}, using cost basis")
-                    current_price = holding['cost_per_share']
-                else:
-                    current_price = float(market_data['close'])
-
-                quantity = holding['quantity']
-                cost_per_share = holding['cost_per_share']
-
-                holding_cost = quantity * cost_per_share
-                market_value = quantity * current_price
-                holding_unrealized = market_value - holding_cost
-
-                total_cost += holding_cost
-                total_market_value += market_value
-                unrealized_pnl += holding_unrealized
-
-            return unrealized_pnl, total_cost, total_market_value
-
-        # Process each trading day - READ ONLY
-        for trading_day in trading_dates:
-            # Get realized P&L from executed sells
-            daily_realized_pnl, sell_count = get_realized_pnl_for_date(trading_day)
-            cumulative_realized_pnl += daily_realized_pnl
-
-            # Get current holdings
-            holdings = get_holdings_on_date(trading_day)
-
-            # Calculate unrealized P&L
-            unrealized_pnl, total_held_cost, total_held_market_value = calculate_unrealized_pnl(
-                holdings, trading_day
-            )
-
-            # Calculate total P&L
-            total_pnl = cumulative_realized_pnl + unrealized_pnl
-            portfolio_value = INITIAL_CASH + total_pnl
-
-            # Count all transactions (buy + sell) for this day
-            with DB.cursor() as cursor:
-                cursor.execute("""
-                    SELECT COUNT(*)
-                    FROM transactions
-                    WHERE user_id = ? AND transaction_date = ?
-                """, (self.user_id, convert_to_datetime(trading_day)))
-                total_transactions = cursor.fetchone()[0]
-
-            timeline.append({
-                'date': trading_day,
-                'executed_orders': total_transactions,
-                'sell_count': sell_count,
-                'daily_realized_pnl': daily_realized_pnl,
-                'daily_unrealized_pnl': unrealized_pnl,
-                'daily_total_pnl': daily_realized_pnl + unrealized_pnl,
-                'cumulative_realized_pnl': cumulative_realized_pnl,
-                'cumulative_unrealized_pnl': unrealized_pnl,
-                'cumulative_total_pnl': total_pnl,
-                'total_held_cost': total_held_cost,
-                'total_held_market_value': total_held_market_value,
-                'portfolio_value': portfolio_value,
-                'positions_count': len(holdings),
-            })
+        # One read of the transactions table replayed against a close-price
+        # matrix (backtest/core/period.py) instead of per-day / per-holding queries
+        from backtest.core.period import build_period_frames, load_transactions
+        txns = load_transactions(DB, self.user_id, end_date)
+        external = self._untracked_holdings(txns, end_date)
+        frames = build_period_frames(txns, trading_dates, lambda codes: self._period_closes(codes, trading_dates),
+                                     INITIAL_CASH, external)
 
+        timeline: List[Dict[str, Any]] = frames.daily.to_dict('records')
         if not timeline:
             raise ValueError("Unable to build period timeline from transactions.")
 
-        # Get final holdings for report
-        final_holdings = get_holdings_on_date(end_date)
+        # Final holdings for report
+        final_holdings = {code: dict(h, available=h['quantity'])
+                          for code, h in frames.holdings.to_dict('index').items()}
 
         # --- Benchmark Comparison & Summary ---
         # Create Portfolio DataFrame
@@ -2387,6 +2393,51 @@ class OrderAnalyzer:
             start_date, end_date, timeline, final_holdings, output_file, benchmark_results
         )
         logger.info(f"✓ Period report saved to {output_file}")
+        return period_summary(timeline, benchmark_results)
+
+    def _untracked_holdings(self, txns: pd.DataFrame, end_date: str) -> pd.DataFrame:
+        """Held positions with no transactions (e.g. synced from the app), valued from holding_stocks."""
+        tracked = set(txns['code'])
+        rows = []
+        with DB.cursor() as cursor:
+            cursor.execute("""
+                SELECT code, name, holdings, cost_basis_total, last_updated
+                FROM holding_stocks
+                WHERE user_id = ? AND last_updated <= ?
+            """, (self.user_id, convert_to_datetime(end_date)))
+            for code, name, holdings, cost_total, last_updated in cursor.fetchall():
+                if code not in tracked and holdings:
+                    rows.append((code, name, holdings, cost_total or 0.0, convert_trade_date(last_updated)))
+        return pd.DataFrame(rows, columns=['code', 'name', 'quantity', 'cost_total', 'since'])
+
+    def _period_closes(self, codes: List[str], trading_dates: List[str]) -> pd.DataFrame:
+        """
+        Close prices (trading dates x codes) for the symbols held during a period.
+
+        Fetched with one multi-symbol get_stock_data() call. Like get_market_data(),
+        a day without a bar uses the latest close of the previous 5 trading days;
+        otherwise the price is NaN (valued at cost).
+        """
+        if not codes or not trading_dates:
+            return pd.DataFrame(index=trading_dates, columns=codes, dtype=float)
+        from backtest.data.panel import MarketPanel
+        lookback = calendar.get_trading_days_before(trading_dates[0], 5)
+        try:
+            df = data_provider.get_stock_data(list(codes), lookback, trading_dates[-1])
+        except Exception as e:
+            logger.warning(f"No market data for period holdings ({len(codes)} symbols): {e}; valuing at cost")
+            return pd.DataFrame(index=trading_dates, columns=codes, dtype=float)
+        panel = MarketPanel.from_long(df)
+        closes = panel.frame(panel.close)
+        all_dates = sorted(set(closes.index) | set(trading_dates))
+        # Columns are ts_codes; holdings may store the bare code ('600000' vs '600000.SH')
+        closes.columns = [bare_code(symbol) for symbol in closes.columns]
+        closes = closes.reindex(all_dates).ffill(limit=5).reindex(index=trading_dates, columns=[bare_code(c) for c in codes])
+        closes.columns = list(codes)
+        missing = [c for c in codes if closes[c].isna().all()]
+        if missing:
+            logger.warning(f"No market data for {len(missing)} symbols in period, using cost basis: {missing[:10]}")
+        return closes
 
     def _write_period_report(self, start_date: str, end_date: str,
                              timeline: List[Dict], final_holdings: Dict,
@@ -2459,8 +2510,10 @@ class OrderAnalyzer:
                 f.write("|--------|------|----------|----------|--------------|--------------|----------------|-----------|--------|\n")
 
                 for symbol, holding in final_holdings.items():
-                    market_data = self.get_market_data(symbol, end_date)
-                    market_price = float(market_data['close']) if market_data is not None else holding['cost_per_share']
+                    market_price = holding.get('market_price')
+                    if market_price is None:
+                        market_data = self.get_market_data(symbol, end_date)
+                        market_price = float(market_data['close']) if market_data is not None else holding['cost_per_share']
 
                     market_value = holding['quantity'] * market_price
                     cost_total = holding['cost_total']
@@ -2593,65 +2646,34 @@ def ensure_searxng_container_running():
 
 def discover_working_search_providers():
     """
-    Read the provider capability cache (created by tests/test_search_api.py)
+    Load the search provider capability matrix (utils/search_providers_cache.json)
     and set WORKING_SEARCH_PROVIDERS to only include providers that are
-    backtest-capable (both can_search AND history_date_for_backtest are true).
-
-    Usage:
-        1. Run `python tests/test_search_api.py` before starting the backtest.
-           This creates/updates utils/search_providers_cache.json with the
-           actual capability of each provider.
-        2. At backtest start, this function reads that cache and restricts
-           SearchService to only use backtest-capable providers.
-    """
-    import json
-    import os
-    import subprocess
-    import sys
-
-    cache_path = os.path.join(
-        os.path.dirname(os.path.abspath(__file__)),
-        "utils", "search_providers_cache.json",
-    )
+    backtest-capable (both can_search AND history_date_for_backtest are true),
+    fastest measured p50 latency first.
 
-    # If cache does not exist, run test_search_api.py to create it
-    if not os.path.exists(cache_path):
-        logger.warning("search_providers_cache.json not found — running test_search_api.py to create it...")
-        test_script = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)),
-            "tests", "test_search_api.py",
-        )
-        if os.path.exists(test_script):
-            ret = subprocess.run(
-                [sys.executable, test_script],
-                timeout=300,
-            )
-            if ret.returncode != 0:
-                logger.error("test_search_api.py failed — search providers will not be filtered")
-                return
-        else:
-            logger.error(f"test_search_api.py not found at {test_script} — search providers will not be filtered")
-            return
+    The matrix is re-probed (all providers concurrently, each bounded by
+    PROVIDER_PROBE_TIMEOUT) only when it is missing or older than
+    PROVIDER_CACHE_TTL_HOURS; `python tests/test_search_api.py` forces a fresh probe.
+    """
+    from utils.stock_news_public_opinion import ensure_provider_matrix, get_backtest_providers
 
-    # Read the cache
-    try:
-        with open(cache_path) as f:
-            cache = json.load(f)
-    except Exception as e:
-        logger.error(f"Failed to read provider cache: {e}")
+    cache = ensure_provider_matrix()
+    if not cache:
+        logger.error("Search provider matrix unavailable — search providers will not be filtered")
         return
 
     # Only include providers that are backtest-capable (both flags true)
-    backtest_providers = [
-        name for name, caps in cache.items()
-        if caps.get("can_search") and caps.get("history_date_for_backtest")
-    ]
+    backtest_providers = get_backtest_providers()
 
     if backtest_providers:
         provider_filter = ",".join(p.lower() for p in backtest_providers)
         os.environ["WORKING_SEARCH_PROVIDERS"] = provider_filter
         logger.info(f"✅ Search provider whitelist (backtest-capable): {backtest_providers}")
         logger.info(f"   WORKING_SEARCH_PROVIDERS='{provider_filter}'")
+        for name in backtest_providers:
+            caps = cache[name]
+            logger.info(f"   {name}: p50={caps.get('latency_p50')}s p95={caps.get('latency_p95')}s "
+                        f"error_rate={caps.get('error_rate')}")
     else:
         logger.warning(
             "⚠️ No backtest-capable providers found in cache! "
@@ -2702,7 +2724,7 @@ def _adaptive_tp_sl(h_cost, h_current_price, days_held, tp_pct, sl_pct,
     return tp, sl
 
 
-def pick_orders_trading(start_date: Optional[str]=None, end_date: Optional[str]=None, user_id: int = 1, src: str = 'ts_7AZ_96MA_flow', resume: bool = False, backtest_search: bool = True, backtest_ai: bool = True, is_live: bool = False, app_cash: float = None, app_positions: list = None, app_running_orders: list = None):
+def pick_orders_trading(start_date: Optional[str]=None, end_date: Optional[str]=None, user_id: int = 1, src: str = 'ts_7AZ_96MA_flow', resume: bool = False, backtest_search: bool = True, backtest_ai: bool = True, is_live: bool = False, app_cash: float = None, app_positions: list = None, app_running_orders: list = None, workers: int = 1, picks: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
     """
     Pick stocks, create smart orders and trading for the specified date range.
 
@@ -2711,12 +2733,25 @@ def pick_orders_trading(start_date: Optional[str]=None, end_date: Optional[str]=
     end_date -- The end date (format: YYYY-MM-DD), default is today.
     user_id -- The user ID for the trading account.
     src -- The source of stocks, default is 'ts_7AZ'.
-    resume -- Skip dates that already have report_orders generated
+    resume -- Skip dates that already have report_orders generated (up to the last resume checkpoint)
     backtest_search -- Enable search providers for news/sentiment (default True).
                        If False, skip all search calls, AI gets no news context.
     backtest_ai -- Enable AI analysis for stock picking (default True).
                    If False, switch AI-dependent strategies to pure-technical alternatives.
     is_live -- If True, uses the real production database (DB) instead of the test database (DBTEST).
+               Otherwise the portfolio is simulated in an in-memory ledger (backtest/core/ledger.py)
+               loaded from DBTEST and flushed back every LEDGER_CHECKPOINT_DAYS dates and at the end
+               (.env BACKTEST_LEDGER=db writes to DBTEST directly).
+    workers -- Backtest only: when > 1, pick files for all dates are computed first across this
+               many processes, then orders are created and executed serially over them.
+               Reports are identical to a serial run.
+    picks -- Pick files already written by the caller, {date: pick_file}; those dates are not
+             picked again, and search discovery and the OHLCV cache refresh are left to the
+             caller (used by backtest/sweep.py to replay one pick set under many parameters).
+
+    Returns:
+    The period report's headline metrics (see period_summary()), or None when no period
+    report was generated.
     """
     global DB
     if is_live:
@@ -2725,11 +2760,12 @@ def pick_orders_trading(start_date: Optional[str]=None, end_date: Optional[str]=
         logger.warning("Live mode active: Using real imobile.db instead of test database.")
 
     # Auto discover and white-list working search providers before beginning the backtest
-    if backtest_search:
-        discover_working_search_providers()
-    else:
+    # (callers passing `picks` have already done so for the pick phase)
+    if not backtest_search:
         logger.info("backtest_search=False: Skipping search provider discovery, all search disabled.")
         os.environ["WORKING_SEARCH_PROVIDERS"] = ""  # empty = no search providers
+    elif picks is None:
+        discover_working_search_providers()
 
     today = convert_trade_date(datetime.now().strftime('%Y-%m-%d'))
     if not start_date:
@@ -2745,171 +2781,217 @@ def pick_orders_trading(start_date: Optional[str]=None, end_date: Optional[str]=
     logger.info(f"Starting picking from {start_date} to {end_date}...")
     
     # Invalidate recent OHLCV cache to avoid stale prices (last 3 trading days)
-    from backtest.data.sqlite_cache import SQLiteDataCache
-    from backtest import DB_CACHE_FILE
-    _cache = SQLiteDataCache(DB_CACHE_FILE)
-    _cache.invalidate_recent(data_type='ohlcv_data', days=3)
+    if picks is None:
+        from backtest.data.sqlite_cache import create_data_cache
+        from backtest import DB_CACHE_FILE
+        _cache = create_data_cache(DB_CACHE_FILE)
+        _cache.invalidate_recent(data_type='ohlcv_data', days=3)
     
     dates = calendar.get_trading_days_between(start_date, end_date)
-    global PEAK_NAV
-    PEAK_NAV = 0.0  # reset drawdown high-water mark for this backtest run
-    for this_date in dates:
-        # Dynamically set MAX_POSITIONS based on market regime (memoized)
-        regime_data = _detect_market_regime_cached(this_date)
-        regime = regime_data.get('regime', 'normal')
-        regime_max_positions = {
-            'bull': 12,
-            'normal': 10,
-            'volatile': 8,
-            'bear': 5
-        }
-        global MAX_POSITIONS
-        MAX_POSITIONS = regime_max_positions.get(regime, 10)
-        logger.info(f"[{this_date}] Dynamic position limit: {MAX_POSITIONS} positions (Regime: {regime.upper()})")
-
-        report_file = os.path.join(REPORT_PATH, f'report_orders_{this_date}.md')
-        if resume and os.path.exists(report_file):
-            logger.info(f"[{this_date}] Found existing report {report_file}, skipping...")
-            # We still need to instantiate OrderAnalyzer to generate period report at the end
-            smart_output_file = os.path.join(REPORT_PATH, f'smart_orders_{this_date}.json')
-            if os.path.exists(smart_output_file):
-                analyzer = OrderAnalyzer(smart_orders_file=smart_output_file, user_id=user_id)
-            continue
+    # Regime timeline for the whole range from one index fetch; the per-date
+    # detect_market_regime() calls (here and in strategy subprocesses) read it back.
+    try:
+        regime_series(start_date, end_date)
+    except Exception as e:
+        logger.warning(f"Regime prefill failed ({e}); regimes are computed per date")
+
+    # Backtests keep the portfolio (holdings, transactions, orders, cash) in an
+    # in-memory ledger loaded from the test DB and flush it back at resume
+    # checkpoints and at the end, instead of a disk round-trip per query.
+    file_db = DB
+    ledger = None
+    if not is_live and os.getenv('BACKTEST_LEDGER', 'memory').lower() == 'memory':
+        from backtest.core.ledger import BacktestLedger
+        ledger = BacktestLedger(DB.db_path)
+        DB = ledger
+    # Realized P&L / NAV / drawdown peak: read the sells already in the DB once,
+    # then accumulate each executed sell (no per-day re-parse of all sell notes).
+    from backtest.core.portfolio import PortfolioState
+    global PORTFOLIO
+    PORTFOLIO = PortfolioState.from_db(DB, user_id, INITIAL_CASH)
+    _bar_windows().clear()
+    checkpoint_days = int(os.getenv('LEDGER_CHECKPOINT_DAYS', '20'))
+    # Dates up to the last checkpoint are in the saved DB state; later reports
+    # (written after the last flush of an interrupted run) are redone. Without a
+    # checkpoint only the direct-DB mode has its reported dates in the DB; a
+    # ledger run interrupted before its first flush left nothing there.
+    resume_checkpoint = _load_resume_checkpoint() if resume else None
+
+    def _resumed(this_date: str) -> bool:
+        if not (resume and os.path.exists(os.path.join(REPORT_PATH, f'report_orders_{this_date}.md'))):
+            return False
+        if resume_checkpoint is None:
+            return ledger is None
+        return this_date <= resume_checkpoint
 
-        # Step 1: Pick stocks
-        pick_output_file = pick_stocks_to_file(this_date, src=src, backtest_search=backtest_search, backtest_ai=backtest_ai)
+    def _checkpoint(this_date: str) -> None:
+        """Make the portfolio state through `this_date` durable for --resume."""
+        if ledger is not None:
+            ledger.flush()
+        _save_resume_checkpoint(this_date)
 
-        # Step 1.5: Calculate Cumulative Realized P&L and Current Capital
-        cumulative_realized_pnl = 0.0
-        current_holdings_cost = 0.0
-        with DB.cursor() as cursor:
-            # Calculate realized P&L from all sell transactions strictly BEFORE today
-            # We want to use the capital that is available at start of day (or end of yesterday) for sizing today's orders
-            cursor.execute("""
-                SELECT notes FROM transactions
-                WHERE user_id=? AND transaction_type='sell' AND transaction_date < ?
-            """, (user_id, convert_to_datetime(this_date)))
-            sells = cursor.fetchall()
-            for row in sells:
-                notes = row[0]
-                if notes and 'P&L: ¥' in notes:
-                    try:
-                        pnl_val = float(notes.split('P&L: ¥')[1].split(' ')[0])
-                        cumulative_realized_pnl += pnl_val
-                    except Exception:
-                        pass
+    try:
+        # Two-phase mode: picks do not depend on portfolio state, so compute them
+        # for the whole range in parallel, then run the stateful order pass serially.
+        precomputed_picks = dict(picks or {})
+        if workers > 1 and not is_live and picks is None:
+            pending = [d for d in dates if not _resumed(d)]
+            precomputed_picks = precompute_picks(pending, src, workers, backtest_search=backtest_search, backtest_ai=backtest_ai)
+
+        days_run = 0
+        for this_date in dates:
+            # Dynamically set MAX_POSITIONS based on market regime (memoized)
+            regime_data = _detect_market_regime_cached(this_date)
+            regime = regime_data.get('regime', 'normal')
+            global MAX_POSITIONS
+            MAX_POSITIONS = REGIME_MAX_POSITIONS.get(regime, 10)
+            logger.info(f"[{this_date}] Dynamic position limit: {MAX_POSITIONS} positions (Regime: {regime.upper()})")
+
+            report_file = os.path.join(REPORT_PATH, f'report_orders_{this_date}.md')
+            if _resumed(this_date):
+                logger.info(f"[{this_date}] Found existing report {report_file}, skipping...")
+                # We still need to instantiate OrderAnalyzer to generate period report at the end
+                smart_output_file = os.path.join(REPORT_PATH, f'smart_orders_{this_date}.json')
+                if os.path.exists(smart_output_file):
+                    analyzer = OrderAnalyzer(smart_orders_file=smart_output_file, user_id=user_id)
+                continue
 
-            # Calculate cost of currently held stocks to determine available cash
-            cursor.execute("""
-                SELECT sum(cost_basis_total) FROM holding_stocks WHERE user_id=?
-            """, (user_id,))
-            res = cursor.fetchone()
-            if res and res[0]:
-                current_holdings_cost = float(res[0])
-
-        current_portfolio_nav = INITIAL_CASH + cumulative_realized_pnl
-        current_capital = current_portfolio_nav - current_holdings_cost
-
-        if is_live:
-            # Determine if this run date is today (current date) or a past date (backtest run)
-            check_date = this_date.replace('-', '')
-            today_str = datetime.now().strftime('%Y%m%d')
-            if check_date >= today_str:
-                # Target date is today/future: get real cash directly from app homepage
-                real_cash = None
-                if app_cash is not None:
-                    real_cash = app_cash
-                    logger.info(f"[{this_date}] Live mode: Using app_cash from arguments: ¥{real_cash:,.2f}")
-                else:
-                    try:
-                        from utils.tools import get_available_cash_from_homepage
-                        real_cash = get_available_cash_from_homepage()
-                    except Exception as e:
-                        logger.error(f"[{this_date}] Live mode: Failed to get real cash from app: {e}. Falling back to DB summary_account.")
+            # Step 1: Pick stocks (unless already picked in the parallel phase)
+            pick_output_file = precomputed_picks.get(this_date)
+            if pick_output_file is None:
+                pick_output_file = pick_stocks_to_file(this_date, src=src, backtest_search=backtest_search, backtest_ai=backtest_ai)
+
+            # Step 1.5: Calculate Cumulative Realized P&L and Current Capital
+            # Realized P&L from all sells strictly BEFORE today: we want the capital
+            # available at start of day (or end of yesterday) for sizing today's orders
+            cumulative_realized_pnl = PORTFOLIO.realized_before(this_date)
+            current_holdings_cost = 0.0
+            with DB.cursor() as cursor:
+                # Calculate cost of currently held stocks to determine available cash
+                cursor.execute("""
+                    SELECT sum(cost_basis_total) FROM holding_stocks WHERE user_id=?
+                """, (user_id,))
+                res = cursor.fetchone()
+                if res and res[0]:
+                    current_holdings_cost = float(res[0])
+
+            current_portfolio_nav = INITIAL_CASH + cumulative_realized_pnl
+            current_capital = current_portfolio_nav - current_holdings_cost
+
+            if is_live:
+                # Determine if this run date is today (current date) or a past date (backtest run)
+                check_date = this_date.replace('-', '')
+                today_str = datetime.now().strftime('%Y%m%d')
+                if check_date >= today_str:
+                    # Target date is today/future: get real cash directly from app homepage
+                    real_cash = None
+                    if app_cash is not None:
+                        real_cash = app_cash
+                        logger.info(f"[{this_date}] Live mode: Using app_cash from arguments: ¥{real_cash:,.2f}")
+                    else:
+                        try:
+                            from utils.tools import get_available_cash_from_homepage
+                            real_cash = get_available_cash_from_homepage()
+                        except Exception as e:
+                            logger.error(f"[{this_date}] Live mode: Failed to get real cash from app: {e}. Falling back to DB summary_account.")
                 
-                if real_cash is not None:
-                    current_capital = real_cash
-                    logger.info(f"[{this_date}] Live mode (Today/Future): using real cash from app homepage: ¥{current_capital:,.2f}")
-                    # Sync it to DB summary_account
-                    with DB.cursor() as cursor:
-                        cursor.execute("""
-                            INSERT INTO summary_account (user_id, cash, last_updated)
-                            VALUES (?, ?, ?)
-                            ON CONFLICT(user_id) DO UPDATE SET
-                                cash = excluded.cash,
-                                last_updated = excluded.last_updated
-                        """, (user_id, real_cash, datetime.now().isoformat()))
+                    if real_cash is not None:
+                        current_capital = real_cash
+                        logger.info(f"[{this_date}] Live mode (Today/Future): using real cash from app homepage: ¥{current_capital:,.2f}")
+                        # Sync it to DB summary_account
+                        with DB.cursor() as cursor:
+                            cursor.execute("""
+                                INSERT INTO summary_account (user_id, cash, last_updated)
+                                VALUES (?, ?, ?)
+                                ON CONFLICT(user_id) DO UPDATE SET
+                                    cash = excluded.cash,
+                                    last_updated = excluded.last_updated
+                            """, (user_id, real_cash, datetime.now().isoformat()))
+                    else:
+                        # Fallback to DB
+                        with DB.cursor() as cursor:
+                            cursor.execute("SELECT cash FROM summary_account WHERE user_id=?", (user_id,))
+                            res = cursor.fetchone()
+                            if res and res[0] is not None:
+                                current_capital = float(res[0])
+                                logger.info(f"[{this_date}] Live mode fallback: using available cash from DB summary_account: ¥{current_capital:,.2f}")
+                            else:
+                                logger.warning(f"[{this_date}] Live mode fallback but no cash found in summary_account. Falling back to simulated capital: ¥{current_capital:,.2f}")
                 else:
-                    # Fallback to DB
+                    # Past date (backtest run): read cash from summary_account table in DB
                     with DB.cursor() as cursor:
                         cursor.execute("SELECT cash FROM summary_account WHERE user_id=?", (user_id,))
                         res = cursor.fetchone()
                         if res and res[0] is not None:
                             current_capital = float(res[0])
-                            logger.info(f"[{this_date}] Live mode fallback: using available cash from DB summary_account: ¥{current_capital:,.2f}")
+                            logger.info(f"[{this_date}] Live mode (Backtest): using available cash from DB summary_account: ¥{current_capital:,.2f}")
                         else:
-                            logger.warning(f"[{this_date}] Live mode fallback but no cash found in summary_account. Falling back to simulated capital: ¥{current_capital:,.2f}")
+                            logger.warning(f"[{this_date}] Live mode but no cash found in summary_account. Falling back to simulated capital: ¥{current_capital:,.2f}")
             else:
-                # Past date (backtest run): read cash from summary_account table in DB
-                with DB.cursor() as cursor:
-                    cursor.execute("SELECT cash FROM summary_account WHERE user_id=?", (user_id,))
-                    res = cursor.fetchone()
-                    if res and res[0] is not None:
-                        current_capital = float(res[0])
-                        logger.info(f"[{this_date}] Live mode (Backtest): using available cash from DB summary_account: ¥{current_capital:,.2f}")
-                    else:
-                        logger.warning(f"[{this_date}] Live mode but no cash found in summary_account. Falling back to simulated capital: ¥{current_capital:,.2f}")
-        else:
-            logger.info(f"[{this_date}] Cumulative Realized P&L: ¥{cumulative_realized_pnl:,.2f}, Total Equity (Cash+Holdings): ¥{current_portfolio_nav:,.2f}, Avail Cash: ¥{current_capital:,.2f}")
-
-        # Dynamic risk budgeting: max-drawdown hard constraint.
-        # NAV here uses only realized P&L from sells strictly before today (past
-        # data, no lookahead). Shrink exposure when in a drawdown from the peak.
-        MAX_POSITIONS = _drawdown_cap(MAX_POSITIONS, current_portfolio_nav)
-
-        pass_app_positions = app_positions if (is_live and this_date >= today) else None
-        pass_app_running_orders = app_running_orders if (is_live and this_date >= today) else None
-
-        # Step 2: Create smart orders from picks and save to database
-        smart_output_file = create_smart_orders_from_picks(
-            pick_output_file, 
-            user_id=user_id, 
-            current_capital=current_capital,
-            app_positions=app_positions,
-            app_running_orders=app_running_orders,
-            is_live=is_live
-        )
+                logger.info(f"[{this_date}] Cumulative Realized P&L: ¥{cumulative_realized_pnl:,.2f}, Total Equity (Cash+Holdings): ¥{current_portfolio_nav:,.2f}, Avail Cash: ¥{current_capital:,.2f}")
+
+            # Dynamic risk budgeting: max-drawdown hard constraint.
+            # NAV here uses only realized P&L from sells strictly before today (past
+            # data, no lookahead). Shrink exposure when in a drawdown from the peak.
+            MAX_POSITIONS = _drawdown_cap(MAX_POSITIONS, PORTFOLIO, this_date)
+
+            pass_app_positions = app_positions if (is_live and this_date >= today) else None
+            pass_app_running_orders = app_running_orders if (is_live and this_date >= today) else None
+
+            # Step 2: Create smart orders from picks and save to database
+            smart_output_file = create_smart_orders_from_picks(
+                pick_output_file, 
+                user_id=user_id, 
+                current_capital=current_capital,
+                app_positions=app_positions,
+                app_running_orders=app_running_orders,
+                is_live=is_live
+            )
 
-        # Step 3: Analyze orders and generate reports
-        analyzer = OrderAnalyzer(smart_orders_file=smart_output_file, user_id=user_id)
-        # Step 3.1: Generate daily execution report — meaningful for past dates
-        # AND for today once the market has closed (>15:00, OHLCV now available).
-        include_today = (this_date == today) and _after_market_close()
-        if (this_date < today) or include_today:
-            analyzer.generate_daily_report(this_date, os.path.join(REPORT_PATH, f'report_orders_{this_date}.md'), cumulative_realized_pnl)
-        else:
-            logger.info(f"[{this_date}] Future/today date — skipping daily report (no OHLCV data yet).")
+            # Step 3: Analyze orders and generate reports
+            analyzer = OrderAnalyzer(smart_orders_file=smart_output_file, user_id=user_id)
+            # Step 3.1: Generate daily execution report — meaningful for past dates
+            # AND for today once the market has closed (>15:00, OHLCV now available).
+            include_today = (this_date == today) and _after_market_close()
+            if (this_date < today) or include_today:
+                analyzer.generate_daily_report(this_date, os.path.join(REPORT_PATH, f'report_orders_{this_date}.md'), cumulative_realized_pnl)
+            else:
+                logger.info(f"[{this_date}] Future/today date — skipping daily report (no OHLCV data yet).")
 
-        # Step 3.2: Adjust orders based on this_date close
-        #analyzer.adjust_orders(this_date, os.path.join(REPORT_PATH, f'adjusted_orders_{this_date.replace("-", "")}.json'))
+            # Step 3.2: Adjust orders based on this_date close
+            #analyzer.adjust_orders(this_date, os.path.join(REPORT_PATH, f'adjusted_orders_{this_date.replace("-", "")}.json'))
 
-        if this_date != dates[-1]:
-            # Skip API rate limit sleep if running offline backtest
-            sleep_time = 0.01 if (not backtest_search and not backtest_ai) else 30.0
-            time.sleep(sleep_time)
+            # Resume checkpoint: the direct-DB mode is durable after every date
+            days_run += 1
+            if not is_live and (ledger is None or (checkpoint_days > 0 and days_run % checkpoint_days == 0)):
+                _checkpoint(this_date)
 
-    if not analyzer:
-        logger.info("No orders were processed in the given date range.")
-        return
-    # Step 4: Generate period report — meaningful for historical ranges, and for
-    # a range ending today once the market has closed (>15:00, OHLCV available).
-    include_end = (end_date == today) and _after_market_close()
-    if (end_date < today) or include_end:
-        analyzer.generate_period_report(start_date, end_date, os.path.join(REPORT_PATH, f'report_period_{start_date}_{end_date}.md'))
-    else:
-        logger.info(f"Period report skipped: end_date {end_date} is today/future — no historical OHLCV or benchmark data available.")
+            if this_date != dates[-1] and this_date not in precomputed_picks:
+                # Skip API rate limit sleep if running offline backtest (or picks were precomputed)
+                sleep_time = 0.01 if (not backtest_search and not backtest_ai) else 30.0
+                time.sleep(sleep_time)
+
+        if dates and not is_live:
+            _checkpoint(dates[-1])
 
-    logger.info("All reports generated successfully!")
+        if not analyzer:
+            logger.info("No orders were processed in the given date range.")
+            return None
+        # Step 4: Generate period report — meaningful for historical ranges, and for
+        # a range ending today once the market has closed (>15:00, OHLCV available).
+        summary = None
+        include_end = (end_date == today) and _after_market_close()
+        if (end_date < today) or include_end:
+            summary = analyzer.generate_period_report(start_date, end_date, os.path.join(REPORT_PATH, f'report_period_{start_date}_{end_date}.md'))
+        else:
+            logger.info(f"Period report skipped: end_date {end_date} is today/future — no historical OHLCV or benchmark data available.")
+
+        logger.info("All reports generated successfully!")
+        return summary
+    finally:
+        if ledger is not None:
+            DB = file_db
+            ledger.close()
 
 
 if __name__ == '__main__':
@@ -2928,6 +3010,7 @@ Examples:
   python backtest/engine.py 20250101 20250331 ts_daily --no-search
   python backtest/engine.py 20250101 20250331 ts_go --resume
   python backtest/engine.py 20250101 20250331 ts_7AZ_96MA --user-id 2
+  python backtest/engine.py 20250101 20250630 ts_7AZ --no-search --no-ai --workers 8
         """
     )
 
@@ -2946,6 +3029,9 @@ Examples:
                         help='Enable AI analysis (default: True)')
     parser.add_argument('--resume', action='store_true', default=False,
                         help='Resume an interrupted backtest without wiping DB')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Compute picks for all dates across N processes first, then run the '
+                             'order pass serially (default: 1 = pick inline per date)')
     parser.add_argument('--cash', type=float, default=None,
                         help='Initial cash for the simulated account '
                              '(default: config portfolio_config.initial_cash, e.g. 600000)')
@@ -3008,7 +3094,7 @@ Examples:
     try:
         pick_orders_trading(start_date=start_date, end_date=end_date, user_id=user_id,
                             src=src, resume=resume, backtest_search=backtest_search,
-                            backtest_ai=backtest_ai)
+                            backtest_ai=backtest_ai, workers=args.workers)
     except Exception as e:
         import traceback
         traceback.print_exc()
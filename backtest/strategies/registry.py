@@ -0,0 +1,76 @@
+"""
+In-process strategy registry.
+
+Every pick script in backtest/strategies exposes
+
+    pick(date, flags=()) -> pd.DataFrame
+
+taking the same target date and ``--lookahead`` / ``--no-search`` / ``--no-ai``
+flags as its command line, and returning the engine's ``selected_stocks``
+records (rank, symbol, score, ...) as a DataFrame. The engine calls it directly
+so every backtest date shares the already-initialised data provider, trading
+calendar and caches, instead of starting one interpreter per date and reading
+the result back from /tmp/tmp. The script entry points remain as the
+subprocess fallback.
+"""
+
+import functools
+import importlib
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+# Strategy name -> module implementing pick(date, flags)
+STRATEGY_MODULES: Dict[str, str] = {
+    'ts_longup': 'backtest.strategies.ts_longup',
+    'ts_hma': 'backtest.strategies.ts_hma',
+    'ts_96MA': 'backtest.strategies.ts_96MA',
+    'ts_7AZ_96MA': 'backtest.strategies.ts_7AZ_96MA',
+    'ts_7AZ_96MA_flow': 'backtest.strategies.ts_7AZ_96MA_flow',
+    'ts_daily': 'backtest.strategies.ts_daily',
+    'ts_7AZ': 'backtest.strategies.ts_7AZ',
+    'ts_7AZ_grok': 'backtest.strategies.ts_7AZ_grok',
+    'ts_ao_er': 'backtest.strategies.ts_ao_er',
+    'ts_multi_swing_defensive': 'backtest.strategies.ts_multi_swing_defensive',
+    'ts_multi_skills': 'backtest.strategies.ts_multi_skills',
+}
+
+# Sector strategies served by ts_ths_dc, which takes the source as an argument
+SECTOR_SOURCES = ('ts_ths', 'ts_dc')
+
+
+def get_strategy_picker(src: str) -> Optional[Callable[..., pd.DataFrame]]:
+    """Return the in-process ``pick(date, flags)`` callable for `src`, or None.
+
+    The strategy module is imported on first use; an import failure propagates
+    so the caller can fall back to running the script.
+    """
+    if src in STRATEGY_MODULES:
+        return importlib.import_module(STRATEGY_MODULES[src]).pick
+    if src in SECTOR_SOURCES:
+        module = importlib.import_module('backtest.strategies.ts_ths_dc')
+        return functools.partial(module.pick, src=src)
+    return None
+
+
+def pick_reads_reports(src: str, date: str) -> bool:
+    """Whether `src`'s pick for `date` may read this run's earlier order reports.
+
+    Such picks depend on portfolio history and must be made in date order;
+    all others depend on market data only and can be computed ahead of the
+    order pass. Strategies opt in with a module-level
+    ``pick_reads_reports(date)``; unregistered strategies are assumed to.
+    """
+    if src in SECTOR_SOURCES:
+        return False
+    if src not in STRATEGY_MODULES:
+        return True
+    hook = getattr(importlib.import_module(STRATEGY_MODULES[src]), 'pick_reads_reports', None)
+    return bool(hook(date)) if hook else False
+
+
+def selected_records(df: Optional[pd.DataFrame]) -> List[dict]:
+    """Convert a pick() result into JSON-ready ``selected_stocks`` records (NaN -> None)."""
+    if df is None or df.empty:
+        return []
+    return df.astype(object).where(df.notna(), None).to_dict('records')
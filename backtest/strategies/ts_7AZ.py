@@ -15,6 +15,7 @@ Output:
 import os
 import sys
 import json
+from typing import Sequence
 from datetime import datetime
 from loguru import logger
 import pandas as pd
@@ -24,9 +25,11 @@ import tushare as ts
 from dotenv import load_dotenv
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from backtest import data_provider
+from backtest import data_provider, DB_CACHE_FILE
+from backtest.data.fundamentals import PointInTimeFundamentals, FINA_FIELDS
 from backtest.utils.trading_calendar import get_trading_days_before
 from backtest.utils.util import convert_trade_date
+from backtest.utils.rate_limiter import rate_limited_pro
 from backtest.utils.market_regime import detect_market_regime
 
 def _detect_small_cap_crash(end_date: str) -> bool:
@@ -78,6 +81,7 @@ def _detect_small_cap_crash(end_date: str) -> bool:
         pass
     return False
 from backtest.strategies.ts_ths_dc import no_risky_stocks
+from backtest.strategies.registry import selected_records
 
 warnings.filterwarnings("ignore", category=UserWarning, module='py_mini_racer')
 
@@ -85,7 +89,7 @@ load_dotenv()
 TUSHARE_TOKEN = os.getenv("TUSHARE_TOKEN")
 if not TUSHARE_TOKEN:
     raise ValueError("Please set the TUSHARE_TOKEN environment variable.")
-PRO = ts.pro_api(TUSHARE_TOKEN)
+PRO = rate_limited_pro(ts.pro_api(TUSHARE_TOKEN))
 
 # ── CANSLIM Parameters ────────────────────────────────────────
 C_EPS_GROWTH_THRESHOLD = 0.25    # C: 当季扣非净利润同比增长 ≥ 25%
@@ -97,6 +101,7 @@ I_TURNOVER_MIN = 0.02            # I: 换手率 2%-15% (proxy for institutional
 I_TURNOVER_MAX = 0.15
 M_MA200_ABOVE = True            # M: 价格 > 200日均线
 LOOKBACK_DAYS = 280              # Days for RPS calculation (250 + buffer)
+CANSLIM_TOP_N = int(os.getenv('CANSLIM_TOP_N', '50'))  # Largest caps scored after the S/I pre-filter
 
 
 def compute_rps(stock_data: pd.DataFrame, lookback: int = 250) -> float:
@@ -108,12 +113,50 @@ def compute_rps(stock_data: pd.DataFrame, lookback: int = 250) -> float:
     return ret * 100
 
 
-def fetch_financial_data(ts_code: str) -> dict:
+FUNDAMENTALS = None   # PointInTimeFundamentals, created on first use
+_FINA_COLUMNS = ','.join(['ts_code', 'ann_date', 'end_date', *FINA_FIELDS])
+
+
+def _fundamentals() -> PointInTimeFundamentals:
+    global FUNDAMENTALS
+    if FUNDAMENTALS is None:
+        FUNDAMENTALS = PointInTimeFundamentals(DB_CACHE_FILE)
+    return FUNDAMENTALS
+
+
+def fundamentals_as_of(ts_codes: Sequence[str], as_of: str) -> pd.DataFrame:
+    """
+    Financial indicators known on `as_of` for many stocks in one lookup.
+
+    The point-in-time store is filled by bulk period pulls (fina_indicator_vip),
+    falling back to per-stock fina_indicator; each is fetched once per store.
+
+    Returns:
+        DataFrame indexed by ts_code with eps_growth and roe
+    """
+    store = _fundamentals()
+    codes = list(dict.fromkeys(ts_codes))
+    store.ensure(codes, as_of,
+                 fetch_period=lambda period: PRO.fina_indicator_vip(period=period, fields=_FINA_COLUMNS),
+                 fetch_stock=lambda ts_code: PRO.fina_indicator(ts_code=ts_code, fields=_FINA_COLUMNS))
+    known = store.as_of(codes, as_of)
+    return known.rename(columns={'q_dtprofit_yoy': 'eps_growth'})[['eps_growth', 'roe']]
+
+
+def fetch_financial_data(ts_code: str, as_of: str | None = None) -> dict:
     """
     Fetch financial indicators from Tushare.
+    With `as_of`, only reports announced by that date are considered
+    (point-in-time store); otherwise the latest report.
     Returns dict with eps_growth, roe, or None values on failure.
     """
     try:
+        if as_of:
+            known = fundamentals_as_of([ts_code], as_of)
+            if ts_code not in known.index:
+                return {'eps_growth': None, 'roe': None}
+            row = known.loc[ts_code]
+            return {k: (None if pd.isna(row[k]) else float(row[k])) for k in ('eps_growth', 'roe')}
         fina = PRO.fina_indicator(ts_code=ts_code, period_type=0)
         if fina.empty:
             return {'eps_growth': None, 'roe': None}
@@ -171,7 +214,7 @@ def canslim_score_stock(ts_code: str, name: str, end_date: str) -> dict | None:
     if tech is None:
         return None
 
-    fin = fetch_financial_data(ts_code)
+    fin = fetch_financial_data(ts_code, end_date)
 
     # C: EPS growth ≥ 25%
     c = fin.get('eps_growth') is not None and fin['eps_growth'] >= C_EPS_GROWTH_THRESHOLD
@@ -216,14 +259,14 @@ def canslim_score_stock(ts_code: str, name: str, end_date: str) -> dict | None:
     }
 
 
-def canslim_screener(end_date: str, top_n: int = 50) -> pd.DataFrame:
+def canslim_screener(end_date: str, top_n: int | None = None) -> pd.DataFrame:
     """
-    Fast CANSLIM screener — uses stock_basic for pre-filter,
-    PRO.daily for technical (small pool), fina_indicator for fundamentals.
+    Fast CANSLIM screener — uses stock_basic for pre-filter, the cached
+    whole-market daily bars for technicals and the point-in-time fundamentals
+    store (one lookup for all technical qualifiers).
     Designed to run under 90s for daily backtest use.
     """
-    import time as time_mod
-    
+    top_n = top_n or CANSLIM_TOP_N
     logger.info(f"CANSLIM screener for {end_date}")
     lookback_start = get_trading_days_before(end_date, LOOKBACK_DAYS - 1)
 
@@ -232,7 +275,7 @@ def canslim_screener(end_date: str, top_n: int = 50) -> pd.DataFrame:
 
     # ── Phase 1: Quick pre-filter via daily_basic (S + I) ──
     try:
-        daily_basic = PRO.daily_basic(trade_date=end_date)
+        daily_basic = data_provider.get_bulk_daily_basic_by_date(end_date)
         if daily_basic is not None and not daily_basic.empty:
             pool = pool.merge(daily_basic[['ts_code', 'circ_mv', 'turnover_rate', 'total_mv']], 
                             on='ts_code', how='left')
@@ -246,7 +289,7 @@ def canslim_screener(end_date: str, top_n: int = 50) -> pd.DataFrame:
     except Exception as e:
         logger.warning(f"daily_basic failed: {e}")
     
-    # Limit pool size for performance
+    # Limit pool size (CANSLIM_TOP_N)
     if len(pool) > top_n:
         pool = pool.nlargest(top_n, 'total_mv') if 'total_mv' in pool.columns else pool.head(top_n)
         logger.info(f"Limited to top {top_n} stocks")
@@ -255,16 +298,19 @@ def canslim_screener(end_date: str, top_n: int = 50) -> pd.DataFrame:
         logger.warning("No stocks after pre-filter")
         return pd.DataFrame()
 
-    # ── Phase 2: Technical + Fundamental scoring (combined per stock) ──
+    # ── Phase 2: Technical scoring, then fundamentals for the qualifiers ──
     logger.info(f"Phase 2: Scoring {len(pool)} stocks...")
-    
+    # Whole-market daily bars (snapshot cache) instead of one PRO.daily call per stock;
+    # providers without bulk bars fall back to the cached per-stock OHLCV.
+    bars = data_provider.get_bulk_ohlcv_by_date_range(lookback_start, end_date)
+
     results = []
     for i, (_, row) in enumerate(pool.iterrows()):
         ts_code = row['ts_code']
         
-        # Fetch daily data
         try:
-            daily = PRO.daily(ts_code=ts_code, start_date=lookback_start, end_date=end_date)
+            daily = bars.get(ts_code) if bars else data_provider.get_ohlcv_data(
+                symbol=ts_code, start_date=lookback_start, end_date=end_date)
             if daily is None or daily.empty or len(daily) < 200:
                 continue
             daily = daily.sort_values('trade_date', ascending=False)
@@ -288,12 +334,6 @@ def canslim_screener(end_date: str, top_n: int = 50) -> pd.DataFrame:
         if tech_score < 3:
             continue
         
-        # Fetch fundamentals only for technical qualifiers
-        time_mod.sleep(0.2)
-        fin = fetch_financial_data(ts_code)
-        c = fin.get('eps_growth') is not None and fin['eps_growth'] >= C_EPS_GROWTH_THRESHOLD
-        a = fin.get('roe') is not None and fin['roe'] >= A_ROE_THRESHOLD
-        
         results.append({
             'ts_code': ts_code, 'name': row.get('name', ts_code),
             'price': price, 'return_250': ret_250,
@@ -302,12 +342,27 @@ def canslim_screener(end_date: str, top_n: int = 50) -> pd.DataFrame:
             'n_near_high': n, 's_small_cap': s,
             'i_turnover_ok': i_ok, 'm_above_ma': m,
             'tech_score': tech_score,
-            'c_eps': c, 'a_roe': a,
-            'eps_growth': fin.get('eps_growth'), 'roe': fin.get('roe'),
         })
         
         if (i+1) % 20 == 0:
             logger.info(f"  Scored {i+1}/{len(pool)}, {len(results)} passing")
+
+    # Fundamentals as known on end_date, for all technical qualifiers at once
+    if results:
+        try:
+            fin = fundamentals_as_of([r['ts_code'] for r in results], end_date)
+        except Exception as e:
+            logger.warning(f"Fundamentals lookup failed: {e}")
+            fin = pd.DataFrame(columns=['eps_growth', 'roe'])
+        for r in results:
+            known = fin.loc[r['ts_code']] if r['ts_code'] in fin.index else None
+            eps_growth = None if known is None or pd.isna(known['eps_growth']) else float(known['eps_growth'])
+            roe = None if known is None or pd.isna(known['roe']) else float(known['roe'])
+            r.update({
+                'c_eps': eps_growth is not None and eps_growth >= C_EPS_GROWTH_THRESHOLD,
+                'a_roe': roe is not None and roe >= A_ROE_THRESHOLD,
+                'eps_growth': eps_growth, 'roe': roe,
+            })
     
     logger.info(f"Passed: {len(results)} stocks")
     
@@ -434,13 +489,11 @@ def pick_strong_stocks(start_date: str, end_date: str, src: str = 'ts_7AZ') -> p
 
     # Small cap crash detector — 0 picks on crash days
     if _detect_small_cap_crash(end_date):
-        _write_pick_output(pd.DataFrame())
         return pd.DataFrame()
 
     df = canslim_screener(end_date)
 
     if df.empty:
-        _write_pick_output(df)
         return df
 
     # Growth stock crash filter — remove STAR/ChiNext stocks when ChiNext crashes
@@ -451,7 +504,6 @@ def pick_strong_stocks(start_date: str, end_date: str, src: str = 'ts_7AZ') -> p
         df = df[~df['ts_code'].str.startswith(('300', '301', '302', '688'))].reset_index(drop=True)
         logger.info(f"[ts_7AZ] Filtered STAR/ChiNext: {before} -> {len(df)} stocks")
         if df.empty:
-            _write_pick_output(df)
             return df
 
     # Filter for stocks scoring 4+ (most CANSLIM criteria met)
@@ -486,11 +538,8 @@ def pick_strong_stocks(start_date: str, end_date: str, src: str = 'ts_7AZ') -> p
     # (Jul 3,6,7,29,30) have avg <= -1.42%. Past data only — no lookahead.
     if _avg_mom is not None and _avg_mom < -1.0:
         logger.warning(f"[ts_7AZ] Day momentum gate: avg 5d={_avg_mom:+.2f}% < -1% → 0 picks (avoid topped-out entries)")
-        _write_pick_output(pd.DataFrame())
         return pd.DataFrame()
 
-    # Save to /tmp/tmp in standard format
-    _write_pick_output(df)
     return df
 
 
@@ -521,13 +570,8 @@ def _avg_pick_momentum(df: pd.DataFrame, end_date: str) -> float:
     return sum(rets) / len(rets)
 
 
-def _write_pick_output(df: pd.DataFrame) -> None:
-    """Write picks to the engine's temp file so it can find empty (0-pick) results.
-
-    Must always be called — even for crash/empty days — or the engine fails with
-    FileNotFoundError when it tries to open the temp file. See the crash-detector
-    early returns in pick_strong_stocks().
-    """
+def _selected_stocks(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert screener output to selected_stocks records (rank, symbol, score)."""
     selected_stocks = []
     if df is not None and not df.empty:
         for _, row in df.iterrows():
@@ -536,6 +580,17 @@ def _write_pick_output(df: pd.DataFrame) -> None:
                 'symbol': row['ts_code'],
                 'score': float(f"{row['score']:.1f}")
             })
+    return pd.DataFrame(selected_stocks)
+
+
+def _write_pick_output(picks: pd.DataFrame) -> None:
+    """Write picks to the engine's temp file so it can find empty (0-pick) results.
+
+    Must always be called by the script entry point — even for crash/empty
+    days — or the subprocess fallback in the engine fails with
+    FileNotFoundError when it tries to open the temp file.
+    """
+    selected_stocks = selected_records(picks)
 
     output_file = '/tmp/tmp'
     # If /tmp/tmp is a directory (pip residue), use alternative
@@ -547,37 +602,58 @@ def _write_pick_output(df: pd.DataFrame) -> None:
     logger.info(f"Saved {len(selected_stocks)} CANSLIM picks to {output_file}")
 
 
+def _log_top_picks(df: pd.DataFrame) -> None:
+    if df.empty:
+        return
+    logger.info("=== TOP 10 CANSLIM Picks ===")
+    for _, row in df.head(10).iterrows():
+        flags = []
+        if row.get('c_eps'): flags.append('C')
+        if row.get('a_roe'): flags.append('A')
+        if row.get('n_near_high'): flags.append('N')
+        if row.get('s_small_cap'): flags.append('S')
+        if row.get('l_rps_pass'): flags.append('L')
+        if row.get('i_turnover_ok'): flags.append('I')
+        if row.get('m_above_ma'): flags.append('M')
+        logger.info(
+            f"  {row['rank']}. {row['name']}({row['ts_code']}) "
+            f"Score={row['score']:.0f} RPS={row.get('rps',0):.0f} "
+            f"Flags={'|'.join(flags)}"
+        )
+
+
+def pick_reads_reports(date: str) -> bool:
+    """True when pick(date) may apply the repeat-SL blacklist, which reads
+    earlier report_orders files. It only runs under the double index-stress
+    gate, so on other days the picks depend on market data alone.
+    """
+    ref_date = get_trading_days_before(convert_trade_date(date), 1)
+    return _is_index_stressed(ref_date, '000852.SH', -5.0) and _is_index_stressed(ref_date, '399006.SZ', -5.0)
+
+
+def pick(date: str = None, flags: Sequence[str] = ()) -> pd.DataFrame:
+    """In-process entry point (see backtest/strategies/registry.py).
+
+    Always screens on the previous trading day of `date`; `flags` are accepted
+    for interface compatibility and ignored. Returns selected_stocks records.
+    """
+    ref_date = convert_trade_date(date) if date else datetime.now().strftime('%Y%m%d')
+    ref_date = get_trading_days_before(ref_date, 1)
+    start_date = get_trading_days_before(ref_date, 5)  # look back 5 days for financial data context
+
+    df = pick_strong_stocks(start_date=start_date, end_date=ref_date, src='ts_7AZ')
+    _log_top_picks(df)
+    return _selected_stocks(df)
+
+
 if __name__ == "__main__":
     argv = sys.argv[1:]
-    if len(argv) >= 1:
-        date = convert_trade_date(argv[0])
-    else:
-        date = datetime.now().strftime('%Y%m%d')
+    flags = [a for a in argv if a.startswith('--')]
+    args = [a for a in argv if not a.startswith('--')]
 
-    src = argv[1] if len(argv) >= 2 else 'ts_7AZ'
+    src = args[1] if len(args) >= 2 else 'ts_7AZ'
     if src != 'ts_7AZ':
         logger.error("Usage: python -m pick_stocks_from_sector.ts_7AZ <date YYYYMMDD> [ts_7AZ]")
         exit(1)
 
-    date = get_trading_days_before(date, 1)
-    start_date = get_trading_days_before(date, 5)  # look back 5 days for financial data context
-    end_date = date
-
-    df = pick_strong_stocks(start_date=start_date, end_date=end_date, src=src)
-
-    if not df.empty:
-        logger.info("=== TOP 10 CANSLIM Picks ===")
-        for _, row in df.head(10).iterrows():
-            flags = []
-            if row.get('c_eps'): flags.append('C')
-            if row.get('a_roe'): flags.append('A')
-            if row.get('n_near_high'): flags.append('N')
-            if row.get('s_small_cap'): flags.append('S')
-            if row.get('l_rps_pass'): flags.append('L')
-            if row.get('i_turnover_ok'): flags.append('I')
-            if row.get('m_above_ma'): flags.append('M')
-            logger.info(
-                f"  {row['rank']}. {row['name']}({row['ts_code']}) "
-                f"Score={row['score']:.0f} RPS={row.get('rps',0):.0f} "
-                f"Flags={'|'.join(flags)}"
-            )
+    _write_pick_output(pick(args[0] if args else None, flags))
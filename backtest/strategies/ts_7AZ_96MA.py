@@ -31,6 +31,7 @@ Usage:
 import os
 import sys
 import json
+from typing import Sequence
 import pandas as pd
 from loguru import logger
 from dotenv import load_dotenv
@@ -40,6 +41,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 from backtest.utils.trading_calendar import get_trading_days_before, convert_trade_date
 from backtest.utils.logging_config import configure_logger
 from backtest import data_provider
+from backtest.strategies.registry import selected_records
 
 load_dotenv()
 LOG_LEVEL = os.getenv("LOG_LEVEL", default="INFO")
@@ -134,7 +136,7 @@ def _regime_96ma(end_date: str) -> bool:
         return False
 
 
-def _write_output(df: pd.DataFrame) -> None:
+def _selected_stocks(df: pd.DataFrame) -> pd.DataFrame:
     selected_stocks = []
     if df is not None and not df.empty:
         for _, row in df.iterrows():
@@ -144,6 +146,11 @@ def _write_output(df: pd.DataFrame) -> None:
                 'name': row.get('name', ''),
                 'score': float(row.get('score', 0) or 0),
             })
+    return pd.DataFrame(selected_stocks)
+
+
+def _write_output(picks: pd.DataFrame) -> None:
+    selected_stocks = selected_records(picks)
     output_file = '/tmp/tmp'
     if os.path.isdir(output_file):
         output_file = '/tmp/ts_7AZ_tmp.json'
@@ -152,33 +159,35 @@ def _write_output(df: pd.DataFrame) -> None:
     logger.info(f"[ts_7AZ_96MA] Saved {len(selected_stocks)} picks to {output_file}")
 
 
-if __name__ == "__main__":
-    argv = sys.argv[1:]
-    lookahead = False
-    if '--lookahead' in argv:
-        lookahead = True
-        argv.remove('--lookahead')
+def pick_reads_reports(date: str) -> bool:
+    """Delegates to ts_7AZ, whose repeat-SL blacklist reads earlier order reports."""
+    from backtest.strategies.ts_7AZ import pick_reads_reports as _ts_7AZ_reads_reports
+    return _ts_7AZ_reads_reports(date)
 
-    if len(argv) >= 1:
-        target_date = convert_trade_date(argv[0])
-    else:
-        target_date = str(pd.Timestamp.today().strftime('%Y%m%d'))
 
-    date = target_date
-    if not lookahead:
-        date = get_trading_days_before(target_date, 1)
+def pick(date: str = None, flags: Sequence[str] = ()) -> pd.DataFrame:
+    """In-process entry point (see backtest/strategies/registry.py).
+
+    `date` is the target trading date; picks use the previous trading day's
+    data unless '--lookahead' is in `flags`. Returns selected_stocks records.
+    """
+    target_date = convert_trade_date(date) if date else str(pd.Timestamp.today().strftime('%Y%m%d'))
 
-    logger.info(f"[ts_7AZ_96MA] target {target_date} ref {date}")
+    ref_date = target_date
+    if '--lookahead' not in flags:
+        ref_date = get_trading_days_before(target_date, 1)
+
+    logger.info(f"[ts_7AZ_96MA] target {target_date} ref {ref_date}")
 
     from backtest.strategies.ts_7AZ import pick_strong_stocks
     from backtest.strategies.ts_96MA import pick_96mv_stocks
 
-    use_96 = _regime_96ma(date)
+    use_96 = _regime_96ma(ref_date)
     if use_96:
-        df = pick_96mv_stocks(end_date=date)
+        df = pick_96mv_stocks(end_date=ref_date)
         logger.info(f"[ts_7AZ_96MA] used ts_96MA -> {len(df)} candidates")
     else:
-        df = pick_strong_stocks(date, date, src='ts_7AZ')
+        df = pick_strong_stocks(ref_date, ref_date, src='ts_7AZ')
         logger.info(f"[ts_7AZ_96MA] used ts_7AZ -> {len(df)} candidates")
 
     # Crash-gated defensive fallback (per docs/adjust_ts_7AZ_96MA.md):
@@ -189,10 +198,18 @@ if __name__ == "__main__":
     # This fires ONLY in true crashes (Jul 2026), NOT on dips that recover
     # (Mar 2026 24-27) — so it avoids the March damage + April carryover that a
     # plain "0-pick -> hma" fallback caused. Past data only, no lookahead.
-    if (df is None or df.empty) and _in_crash(date):
+    if (df is None or df.empty) and _in_crash(ref_date):
         from backtest.strategies.ts_hma import pick_hma_stocks
         logger.warning("[ts_7AZ_96MA] 0 picks + confirmed crash -> defensive ts_hma fallback")
-        df = pick_hma_stocks(end_date=date)
+        df = pick_hma_stocks(end_date=ref_date)
         logger.info(f"[ts_7AZ_96MA] hma defensive fallback -> {len(df)} candidates")
 
-    _write_output(df)
+    return _selected_stocks(df)
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    flags = [a for a in argv if a.startswith('--')]
+    args = [a for a in argv if not a.startswith('--')]
+
+    _write_output(pick(args[0] if args else None, flags))
@@ -25,6 +25,7 @@ Usage:
 import os
 import sys
 import json
+from typing import Sequence
 import pandas as pd
 from loguru import logger
 from dotenv import load_dotenv
@@ -34,6 +35,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 from backtest.utils.trading_calendar import get_trading_days_before, convert_trade_date
 from backtest.utils.logging_config import configure_logger
 from backtest import data_provider
+from backtest.strategies.registry import selected_records
+from backtest.utils.lhb_index import LHBIndex, load_lhb_index
 
 load_dotenv()
 LOG_LEVEL = os.getenv("LOG_LEVEL", default="INFO")
@@ -53,40 +56,23 @@ LHB_CACHE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path
 LHB_LOOKBACK_DAYS = 10     # institutional activity in the prior N calendar days
 SCREEN_NEG_INST = -50_000_000   # screen picks with institutional net-SELL below this (¥50M out)
 BOOST_POS_INST = 8              # score boost per +¥100M institutional net-buy
-_lhb_inst = None                # loaded once
-
-
-def _load_lhb_inst():
-    global _lhb_inst
-    if _lhb_inst is not None:
-        return _lhb_inst
-    if not os.path.exists(LHB_CACHE):
-        logger.warning(f"[ts_7AZ_96MA_flow] LHB cache missing at {LHB_CACHE} -> flow filter disabled")
-        _lhb_inst = pd.DataFrame()
-        return _lhb_inst
-    df = pd.read_csv(LHB_CACHE)
-    df['代码'] = df['代码'].astype(str).str.zfill(6)
-    df['上榜日期'] = df['上榜日期'].astype(str)
-    df['_d'] = df['上榜日期'].str.replace('-', '').astype(int)
-    df['inst_net'] = pd.to_numeric(df['机构买入净额'], errors='coerce').fillna(0.0)
-    _lhb_inst = df
-    logger.info(f"[ts_7AZ_96MA_flow] loaded LHB institutional cache: {len(df)} records")
-    return _lhb_inst
+
+
+def _load_lhb_inst() -> LHBIndex:
+    """Institutional net-buy ledger compiled once per process (shared with ts_multi_skills)."""
+    return load_lhb_index(LHB_CACHE, '机构买入净额')
+
+
+def _lhb_window(ref_date: str):
+    """[lo, hi) listing-date bounds of the prior LHB_LOOKBACK_DAYS before `ref_date`."""
+    ref_int = int(convert_trade_date(ref_date))
+    return ref_int - LHB_LOOKBACK_DAYS, ref_int
 
 
 def _institutional_flow(code6: str, ref_date: str) -> float:
     """Sum institutional net-buy (¥) for `code6` with 上榜日 in the prior
     LHB_LOOKBACK_DAYS before `ref_date`. Past records only -> no lookahead."""
-    inst = _load_lhb_inst()
-    if inst.empty:
-        return 0.0
-    ref = convert_trade_date(ref_date)
-    ref_int = int(ref)
-    lo = ref_int - LHB_LOOKBACK_DAYS
-    sub = inst[(inst['代码'] == code6) & (inst['_d'] >= lo) & (inst['_d'] < ref_int)]
-    if len(sub) == 0:
-        return 0.0
-    return float(sub['inst_net'].sum())
+    return float(_load_lhb_inst().window_sum([code6], *_lhb_window(ref_date))[0])
 
 
 def _apply_flow_filter(df: pd.DataFrame, ref_date: str) -> pd.DataFrame:
@@ -94,34 +80,23 @@ def _apply_flow_filter(df: pd.DataFrame, ref_date: str) -> pd.DataFrame:
     if df is None or df.empty:
         return df
     inst = _load_lhb_inst()
-    if inst.empty:
+    if not len(inst):
         logger.warning("[ts_7AZ_96MA_flow] no LHB data -> passthrough")
         return df
-    rows = []
-    for _, row in df.iterrows():
-        ts_code = row['ts_code']
-        code6 = str(ts_code).split('.')[0].zfill(6)
-        flow = _institutional_flow(code6, ref_date)
-        score = float(row.get('score', 0) or 0)
-        # boost: +BOOST per 100M institutional net-buy
-        boosted = score + BOOST_POS_INST * (flow / 100_000_000.0)
-        rows.append({'row': row, 'code6': code6, 'flow': flow, 'boosted': boosted})
+    code6 = df['ts_code'].astype(str).str.split('.').str[0].str.zfill(6)
+    flow = inst.window_sum(code6, *_lhb_window(ref_date))
+    score = pd.to_numeric(df['score'], errors='coerce').fillna(0.0) if 'score' in df else 0.0
+    # boost: +BOOST per 100M institutional net-buy
+    boosted = score + BOOST_POS_INST * (flow / 100_000_000.0)
     # Screen: drop candidates with heavy institutional net-SELL (distribution)
-    kept = [r for r in rows if r['flow'] >= SCREEN_NEG_INST]
-    screened = len(rows) - len(kept)
+    keep = flow >= SCREEN_NEG_INST
+    screened = int((~keep).sum())
     if screened:
-        logger.info(f"[ts_7AZ_96MA_flow] screened {screened}/{len(rows)} picks with inst net-SELL < {SCREEN_NEG_INST/1e6:.0f}M")
+        logger.info(f"[ts_7AZ_96MA_flow] screened {screened}/{len(df)} picks with inst net-SELL < {SCREEN_NEG_INST/1e6:.0f}M")
     # Re-rank remaining by boosted score
-    kept.sort(key=lambda r: r['boosted'], reverse=True)
-    out_rows = []
-    for i, r in enumerate(kept):
-        new = r['row'].copy()
-        new['rank'] = i + 1
-        new['score'] = r['boosted']
-        out_rows.append(new)
-    out = pd.DataFrame(out_rows)
-    if 'rank' not in out.columns:
-        out['rank'] = range(1, len(out) + 1)
+    out = df.loc[keep].assign(score=boosted[keep])
+    out = out.sort_values('score', ascending=False, kind='stable')
+    out['rank'] = range(1, len(out) + 1)
     logger.info(f"[ts_7AZ_96MA_flow] {len(out)} picks after flow filter (screen {screened})")
     return out
 
@@ -170,7 +145,7 @@ def _regime_96ma(end_date: str) -> bool:
         return False
 
 
-def _write_output(df: pd.DataFrame) -> None:
+def _selected_stocks(df: pd.DataFrame) -> pd.DataFrame:
     selected_stocks = []
     if df is not None and not df.empty:
         for _, row in df.iterrows():
@@ -180,6 +155,11 @@ def _write_output(df: pd.DataFrame) -> None:
                 'name': row.get('name', ''),
                 'score': float(row.get('score', 0) or 0),
             })
+    return pd.DataFrame(selected_stocks)
+
+
+def _write_output(picks: pd.DataFrame) -> None:
+    selected_stocks = selected_records(picks)
     output_file = '/tmp/tmp'
     if os.path.isdir(output_file):
         output_file = '/tmp/ts_7AZ_tmp.json'
@@ -188,41 +168,51 @@ def _write_output(df: pd.DataFrame) -> None:
     logger.info(f"[ts_7AZ_96MA_flow] Saved {len(selected_stocks)} picks to {output_file}")
 
 
-if __name__ == "__main__":
-    argv = sys.argv[1:]
-    lookahead = False
-    if '--lookahead' in argv:
-        lookahead = True
-        argv.remove('--lookahead')
+def pick_reads_reports(date: str) -> bool:
+    """Delegates to ts_7AZ, whose repeat-SL blacklist reads earlier order reports."""
+    from backtest.strategies.ts_7AZ import pick_reads_reports as _ts_7AZ_reads_reports
+    return _ts_7AZ_reads_reports(date)
 
-    if len(argv) >= 1:
-        target_date = convert_trade_date(argv[0])
-    else:
-        target_date = str(pd.Timestamp.today().strftime('%Y%m%d'))
 
-    date = target_date
-    if not lookahead:
-        date = get_trading_days_before(target_date, 1)
+def pick(date: str = None, flags: Sequence[str] = ()) -> pd.DataFrame:
+    """In-process entry point (see backtest/strategies/registry.py).
+
+    `date` is the target trading date; picks use the previous trading day's
+    data unless '--lookahead' is in `flags`. Returns selected_stocks records.
+    """
+    target_date = convert_trade_date(date) if date else str(pd.Timestamp.today().strftime('%Y%m%d'))
 
-    logger.info(f"[ts_7AZ_96MA_flow] target {target_date} ref {date}")
+    ref_date = target_date
+    if '--lookahead' not in flags:
+        ref_date = get_trading_days_before(target_date, 1)
+
+    logger.info(f"[ts_7AZ_96MA_flow] target {target_date} ref {ref_date}")
 
     from backtest.strategies.ts_7AZ import pick_strong_stocks
     from backtest.strategies.ts_96MA import pick_96mv_stocks
 
-    use_96 = _regime_96ma(date)
+    use_96 = _regime_96ma(ref_date)
     if use_96:
-        df = pick_96mv_stocks(end_date=date)
+        df = pick_96mv_stocks(end_date=ref_date)
         logger.info(f"[ts_7AZ_96MA_flow] used ts_96MA -> {len(df)} candidates")
     else:
-        df = pick_strong_stocks(date, date, src='ts_7AZ')
+        df = pick_strong_stocks(ref_date, ref_date, src='ts_7AZ')
         logger.info(f"[ts_7AZ_96MA_flow] used ts_7AZ -> {len(df)} candidates")
 
-    if (df is None or df.empty) and _in_crash(date):
+    if (df is None or df.empty) and _in_crash(ref_date):
         from backtest.strategies.ts_hma import pick_hma_stocks
         logger.warning("[ts_7AZ_96MA_flow] 0 picks + confirmed crash -> defensive ts_hma fallback")
-        df = pick_hma_stocks(end_date=date)
+        df = pick_hma_stocks(end_date=ref_date)
         logger.info(f"[ts_7AZ_96MA_flow] hma defensive fallback -> {len(df)} candidates")
 
-    df = _apply_flow_filter(df, date)
+    df = _apply_flow_filter(df, ref_date)
+
+    return _selected_stocks(df)
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    flags = [a for a in argv if a.startswith('--')]
+    args = [a for a in argv if not a.startswith('--')]
 
-    _write_output(df)
+    _write_output(pick(args[0] if args else None, flags))
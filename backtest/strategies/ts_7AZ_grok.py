@@ -23,6 +23,7 @@ import os
 import sys
 import json
 import time
+from typing import Sequence
 from datetime import datetime, timedelta
 from loguru import logger
 import pandas as pd
@@ -34,7 +35,9 @@ from dotenv import load_dotenv
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from backtest.utils.trading_calendar import get_trading_days_before
 from backtest.utils.util import convert_trade_date
+from backtest.utils.rate_limiter import rate_limited_pro
 from backtest.utils.market_regime import detect_market_regime
+from backtest.strategies.registry import selected_records
 from backtest.strategies.ts_7AZ import (
     canslim_screener,
     C_EPS_GROWTH_THRESHOLD,
@@ -53,7 +56,7 @@ load_dotenv()
 TUSHARE_TOKEN = os.getenv("TUSHARE_TOKEN")
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
 GROK_MODEL = os.getenv("GROK_MODEL", "x-ai/grok-4.5")
-PRO = ts.pro_api(TUSHARE_TOKEN) if TUSHARE_TOKEN else None
+PRO = rate_limited_pro(ts.pro_api(TUSHARE_TOKEN)) if TUSHARE_TOKEN else None
 
 # How many CANSLIM candidates to send to Grok for re-ranking
 GROK_CANDIDATE_POOL = 20
@@ -363,7 +366,7 @@ def _enrich_picks_with_details(picks: list, end_date: str) -> list:
 def pick_strong_stocks_grok(end_date: str) -> pd.DataFrame:
     """
     Main entry: CANSLIM screener + Grok news re-ranking.
-    Outputs to /tmp/tmp in standard format.
+    Returns the final picks ordered by Grok score.
     """
     # 1. Try to reuse baseline CANSLIM picks (fast path)
     baseline = _load_baseline_picks(end_date)
@@ -465,23 +468,6 @@ def pick_strong_stocks_grok(end_date: str) -> pd.DataFrame:
                 "reason": "fallback",
             })
 
-    # 7. Output to /tmp/tmp in standard format
-    selected_stocks = []
-    for i, p in enumerate(final_picks):
-        selected_stocks.append({
-            "rank": i + 1,
-            "symbol": p["ts_code"],
-            "score": float(p["grok_score"]) / 10.0,  # scale 0-100 → 0-10 for engine compat
-        })
-
-    output_file = "/tmp/tmp"
-    if os.path.isdir(output_file):
-        output_file = "/tmp/ts_7AZ_grok_tmp.json"
-    with open(output_file, "w") as f:
-        json.dump({"selected_stocks": selected_stocks}, f)
-
-    logger.info(f"Saved {len(selected_stocks)} Grok-ranked picks to {output_file}")
-
     # Log summary
     for p in final_picks:
         logger.info(f"  {p['ts_code']} {p['name']} CS={p['canslim_score']} Grok={p['grok_score']} {p['reason'][:40]}")
@@ -489,16 +475,41 @@ def pick_strong_stocks_grok(end_date: str) -> pd.DataFrame:
     return pd.DataFrame(final_picks)
 
 
+def _selected_stocks(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert Grok-ranked picks to selected_stocks records (rank, symbol, score)."""
+    selected_stocks = []
+    if df is not None and not df.empty:
+        for i, p in enumerate(df.to_dict("records")):
+            selected_stocks.append({
+                "rank": i + 1,
+                "symbol": p["ts_code"],
+                "score": float(p["grok_score"]) / 10.0,  # scale 0-100 → 0-10 for engine compat
+            })
+    return pd.DataFrame(selected_stocks)
+
+
+def pick(date: str = None, flags: Sequence[str] = ()) -> pd.DataFrame:
+    """In-process entry point (see backtest/strategies/registry.py).
+
+    Always screens on the previous trading day of `date`; `flags` are accepted
+    for interface compatibility and ignored. Returns selected_stocks records.
+    """
+    end_date = convert_trade_date(date) if date else datetime.now().strftime("%Y%m%d")
+    end_date = get_trading_days_before(end_date, 1)
+    return _selected_stocks(pick_strong_stocks_grok(end_date))
+
+
 if __name__ == "__main__":
     argv = sys.argv[1:]
-    if len(argv) >= 1:
-        date = convert_trade_date(argv[0])
-    else:
-        date = datetime.now().strftime("%Y%m%d")
+    args = [a for a in argv if not a.startswith("--")]
+    flags = [a for a in argv if a.startswith("--")]
 
-    src = argv[1] if len(argv) >= 2 else "ts_7AZ_grok"
+    selected_stocks = selected_records(pick(args[0] if args else None, flags))
 
-    date = get_trading_days_before(date, 1)
-    end_date = date
+    output_file = "/tmp/tmp"
+    if os.path.isdir(output_file):
+        output_file = "/tmp/ts_7AZ_grok_tmp.json"
+    with open(output_file, "w") as f:
+        json.dump({"selected_stocks": selected_stocks}, f)
 
-    pick_strong_stocks_grok(end_date)
+    logger.info(f"Saved {len(selected_stocks)} Grok-ranked picks to {output_file}")
@@ -49,7 +49,7 @@ from datetime import datetime
 import pandas as pd
 import numpy as np
 import warnings
-from typing import Optional
+from typing import Optional, Sequence
 
 from dotenv import load_dotenv
 from loguru import logger
@@ -57,10 +57,12 @@ from loguru import logger
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from backtest import data_provider
+from backtest.data.panel import MarketPanel, pct_slope, rolling_max
 from backtest.utils.trading_calendar import get_trading_days_before, convert_trade_date
 from backtest.utils.market_regime import detect_market_regime
 from backtest.utils.logging_config import configure_logger
 from backtest.strategies.ts_ths_dc import no_risky_stocks
+from backtest.strategies.registry import selected_records
 
 warnings.filterwarnings("ignore", category=UserWarning)
 
@@ -453,6 +455,40 @@ def analyze_stock_96mv(ts_code: str, df: pd.DataFrame,
         return None
 
 
+def prefilter_96mv_candidates(all_stock_data: dict) -> set:
+    """
+    Apply the MA96 hard filters to the whole universe at once on a MarketPanel.
+
+    Conservative by design: a stock is dropped only when the panel proves it
+    fails a hard filter of analyze_stock_96mv(). Anything the panel cannot
+    decide (suspension gaps, short history -> NaN) is kept for the exact
+    per-stock analysis.
+
+    Returns:
+        Set of ts_codes worth analyzing
+    """
+    panel = MarketPanel.from_frames(all_stock_data)
+    if not panel.symbols:
+        return set()
+
+    close = panel.close
+    ma96 = panel.sma(MA96_PERIOD)
+    latest_close = close[-1]
+    latest_ma96 = ma96[-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct_above_ma96 = (latest_close - latest_ma96) / latest_ma96 * 100
+        high_52w = rolling_max(close, 250)[-1]
+        near_high = latest_close / high_52w
+
+    fails = (
+        (latest_close < latest_ma96)                              # HARD FILTER 1
+        | (pct_above_ma96 > MAX_ABOVE_MA96_PCT)                   # HARD FILTER 2
+        | ((high_52w > 0) & (near_high < HIGH_52W_RATIO))         # HARD FILTER 2b
+        | (pct_slope(ma96, SLOPE_WINDOW)[-1] < MA96_MIN_SLOPE)    # HARD FILTER 3
+    )
+    return {sym for sym, failed in zip(panel.symbols, fails) if not failed}
+
+
 def pick_96mv_stocks(end_date: str, max_picks: int = 10) -> pd.DataFrame:
     """
     Pick stocks using the 96-MA strategy.
@@ -505,6 +541,10 @@ def pick_96mv_stocks(end_date: str, max_picks: int = 10) -> pd.DataFrame:
     all_stock_data = data_provider.get_bulk_ohlcv_by_date_range(start_date, end_date)
     logger.info(f"[ts_96MA] Bulk fetch complete: {len(all_stock_data)} stocks with data")
 
+    # Vectorized hard filters across the universe; only survivors get the full per-stock scoring
+    candidates = prefilter_96mv_candidates(all_stock_data)
+    logger.info(f"[ts_96MA] Panel pre-filter: {len(all_stock_data)} -> {len(candidates)} candidates")
+
     # Analyze all stocks
     results = []
     total = len(stock_basic)
@@ -515,7 +555,7 @@ def pick_96mv_stocks(end_date: str, max_picks: int = 10) -> pd.DataFrame:
             logger.info(f"[ts_96MA] Analyzing stocks: {idx}/{total}")
 
         ts_code = row['ts_code']
-        stock_df = all_stock_data.get(ts_code)
+        stock_df = all_stock_data.get(ts_code) if ts_code in candidates else None
 
         if stock_df is not None:
             analysis = analyze_stock_96mv(ts_code, stock_df, index_returns_20d)
@@ -577,33 +617,24 @@ def pick_96mv_stocks(end_date: str, max_picks: int = 10) -> pd.DataFrame:
     return df
 
 
-if __name__ == "__main__":
-    argv = sys.argv[1:]
-    lookahead = False
-
-    if '--lookahead' in argv:
-        lookahead = True
-        argv.remove('--lookahead')
+def pick(date: str = None, flags: Sequence[str] = ()) -> pd.DataFrame:
+    """In-process entry point (see backtest/strategies/registry.py).
 
-    if len(argv) >= 1:
-        date = convert_trade_date(argv[0])
-        target_date = argv[0]
-    else:
-        date = datetime.now().strftime('%Y%m%d')
-        target_date = date
+    `date` is the target trading date; picks use the previous trading day's
+    data unless '--lookahead' is in `flags`. Returns selected_stocks records.
+    """
+    target_date = date or datetime.now().strftime('%Y%m%d')
+    ref_date = convert_trade_date(target_date)
 
     # Use previous trading day unless lookahead is enabled
-    if not lookahead:
-        date = get_trading_days_before(date, 1)
+    if '--lookahead' not in flags:
+        ref_date = get_trading_days_before(ref_date, 1)
 
-    logger.info(f"[ts_96MA] Picking stocks for target date {target_date} with reference date: {date}")
+    logger.info(f"[ts_96MA] Picking stocks for target date {target_date} with reference date: {ref_date}")
 
-    df = pick_96mv_stocks(end_date=date)
+    df = pick_96mv_stocks(end_date=ref_date)
 
-    # Output to standard format
-    output_file = '/tmp/tmp'
     selected_stocks = []
-
     if not df.empty:
         for _, stock in df.iterrows():
             selected_stocks.append({
@@ -617,6 +648,19 @@ if __name__ == "__main__":
                 'ma96': stock.get('ma96'),
                 'close': stock.get('close'),
             })
+    return pd.DataFrame(selected_stocks)
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    flags = [a for a in argv if a.startswith('--')]
+    args = [a for a in argv if not a.startswith('--')]
+
+    picks = pick(args[0] if args else None, flags)
+
+    # Output to standard format
+    output_file = '/tmp/tmp'
+    selected_stocks = selected_records(picks)
 
     with open(output_file, 'w') as f:
         json.dump({'selected_stocks': selected_stocks}, f)
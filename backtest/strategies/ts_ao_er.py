@@ -22,7 +22,7 @@ from datetime import datetime
 import pandas as pd
 import numpy as np
 import warnings
-from typing import Optional
+from typing import Optional, Sequence
 
 from dotenv import load_dotenv
 from loguru import logger
@@ -34,6 +34,7 @@ from backtest.utils.trading_calendar import get_trading_days_before, convert_tra
 from backtest.utils.market_regime import detect_market_regime
 from backtest.utils.logging_config import configure_logger
 from backtest.strategies.ts_ths_dc import no_risky_stocks
+from backtest.strategies.registry import selected_records
 
 warnings.filterwarnings("ignore", category=UserWarning)
 warnings.filterwarnings("ignore", category=FutureWarning)
@@ -317,27 +318,20 @@ def pick_ao_er_stocks(end_date: str, max_picks: int = MAX_PICKS) -> pd.DataFrame
     return df
 
 
-if __name__ == "__main__":
-    argv = sys.argv[1:]
-    # Strip optional flags (passed by engine.py)
-    flags = [a for a in argv if a.startswith('--')]
-    args = [a for a in argv if not a.startswith('--')]
+def pick(date: str = None, flags: Sequence[str] = ()) -> pd.DataFrame:
+    """In-process entry point (see backtest/strategies/registry.py).
 
-    if len(args) >= 1:
-        date = convert_trade_date(args[0])
-    else:
-        date = datetime.now().strftime('%Y%m%d')
+    Always uses the previous trading day for T+1 compliance; `flags` are
+    accepted for interface compatibility and ignored. Returns selected_stocks
+    records.
+    """
+    ref_date = convert_trade_date(date) if date else datetime.now().strftime('%Y%m%d')
 
     # Use previous trading day for T+1 compliance
-    date = get_trading_days_before(date, 1)
-    logger.info(f"[ts_ao_er] Picking stocks for reference date: {date}")
+    ref_date = get_trading_days_before(ref_date, 1)
+    logger.info(f"[ts_ao_er] Picking stocks for reference date: {ref_date}")
 
-    df = pick_ao_er_stocks(end_date=date)
-
-    # Output to /tmp/tmp in standard format
-    output_file = '/tmp/tmp'
-    if os.path.isdir(output_file):
-        output_file = '/tmp/ts_ao_er_tmp.json'
+    df = pick_ao_er_stocks(end_date=ref_date)
 
     selected_stocks = []
     for _, stock in df.iterrows():
@@ -347,6 +341,23 @@ if __name__ == "__main__":
             'name': stock.get('name', ''),
             'score': float(stock['composite_score']),
         })
+    return pd.DataFrame(selected_stocks)
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    # Strip optional flags (passed by engine.py)
+    flags = [a for a in argv if a.startswith('--')]
+    args = [a for a in argv if not a.startswith('--')]
+
+    picks = pick(args[0] if args else None, flags)
+
+    # Output to /tmp/tmp in standard format
+    output_file = '/tmp/tmp'
+    if os.path.isdir(output_file):
+        output_file = '/tmp/ts_ao_er_tmp.json'
+
+    selected_stocks = selected_records(picks)
 
     with open(output_file, 'w') as f:
         json.dump({'selected_stocks': selected_stocks}, f)
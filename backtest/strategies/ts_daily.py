@@ -15,19 +15,19 @@ Usage:
 import os
 import sys
 import json
-import time
-import argparse
-import hashlib
 import sqlite3
+import argparse
 import warnings
 warnings.filterwarnings("ignore", message=".*Accessing the.*attribute on the instance is deprecated.*")
 warnings.filterwarnings("ignore", message=".*model_computed_fields.*")
 warnings.filterwarnings("ignore", message=".*model_fields.*")
 warnings.filterwarnings("ignore", message=".*PydanticDeprecatedSince211.*")
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Sequence
 from dataclasses import dataclass
 from datetime import datetime
+from functools import partial
 
+import pandas as pd
 from dotenv import load_dotenv
 from loguru import logger
 
@@ -35,8 +35,11 @@ from loguru import logger
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from backtest import data_provider
 from backtest.utils.trading_calendar import get_trading_days_before
+from backtest.utils.rate_limiter import rate_limited_pro
 from backtest.utils.market_regime import detect_market_regime
 from backtest.analysis.indicators import TechnicalIndicators
+from backtest.analysis.llm_pipeline import AnalysisJob, AnalysisPipeline, PromptResultCache, prompt_hash
+from backtest.strategies.registry import selected_records
 
 load_dotenv()
 
@@ -47,7 +50,7 @@ SERPAPI_API_KEYS = os.getenv("SERPAPI_API_KEYS", "").split(",") if os.getenv("SE
 
 # Initialize Tushare
 import tushare as ts
-PRO = ts.pro_api(TUSHARE_TOKEN) if TUSHARE_TOKEN else None
+PRO = rate_limited_pro(ts.pro_api(TUSHARE_TOKEN)) if TUSHARE_TOKEN else None
 
 # Configuration
 MAX_CANDIDATES = 50
@@ -171,11 +174,8 @@ class NewsService:
         except Exception as e:
             logger.warning(f"Failed to initialize Tavily: {e}")
     
-    def _search_serpapi(self, query: str, max_results: int = 3) -> str:
-        """Fallback search using SerpAPI."""
-        if not self._serpapi_key:
-            return "SerpAPI未配置"
-        
+    def _search_serpapi(self, query: str, max_results: int = 3) -> Optional[List[Dict[str, Any]]]:
+        """Fallback search using SerpAPI; None when the request failed."""
         try:
             import requests
             params = {
@@ -188,28 +188,51 @@ class NewsService:
             }
             response = requests.get('https://serpapi.com/search', params=params, timeout=10)
             data = response.json()
-            
-            results = []
-            for r in data.get('organic_results', [])[:max_results]:
-                title = r.get('title', '')
-                snippet = r.get('snippet', '')[:200]
-                results.append(f"- {title}: {snippet}")
-            
-            return "\n".join(results) if results else "无相关新闻"
+            return [{'title': r.get('title', ''), 'snippet': r.get('snippet', ''), 'url': r.get('link', '')}
+                    for r in data.get('organic_results', [])[:max_results]]
         except Exception as e:
             logger.warning(f"SerpAPI search failed: {e}")
-            return "新闻搜索不可用"
-    
+            return None
+
+    def _search_tavily(self, query: str, max_results: int) -> List[Dict[str, Any]]:
+        """Tavily search; the answer (if any) is kept as a first item with source 'answer'."""
+        response = self._tavily_client.search(
+            query=query,
+            search_depth="advanced", # use advanced for more exhaustive historical search
+            max_results=max_results,
+            include_answer=True
+        )
+        items = []
+        if response.get("answer"):
+            items.append({'title': '', 'snippet': response['answer'], 'source': 'answer', 'url': ''})
+        for r in response.get("results", [])[:max_results]:
+            items.append({'title': r.get("title", ""), 'snippet': r.get("content", ""), 'url': r.get("url", "")})
+        return items
+
+    @staticmethod
+    def _format(items: List[Dict[str, Any]]) -> str:
+        results = []
+        for item in items:
+            if item.get('source') == 'answer':
+                results.append(f"摘要: {item['snippet']}")
+            else:
+                results.append(f"- {item.get('title', '')}: {(item.get('snippet') or '')[:200]}")
+        return "\n".join(results) if results else "无相关新闻"
+
     def search(self, stock_name: str, stock_code: str, target_date: str = '', max_results: int = 5) -> str:
-        """Search for news, targeting the exact date for historical testing."""
+        """Search for news, targeting the exact date for historical testing.
+
+        Results go through the shared search store (utils/search_store.py), so a
+        re-run of a backtest day reads them back without calling any provider.
+        """
+        import sys
+        import os
+        utils_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'utils')
+        if utils_path not in sys.path:
+            sys.path.insert(0, utils_path)
+
         # 1. Try stock_news_public_opinion.py first (which uses A-Share optimized SearchService)
         try:
-            import sys
-            import os
-            utils_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'utils')
-            if utils_path not in sys.path:
-                sys.path.insert(0, utils_path)
-
             import stock_news_public_opinion
             news_content = stock_news_public_opinion.fetch_stock_news_and_opinion(stock_name, stock_code, target_date, max_results)
             if news_content and news_content.strip() != "无相关新闻":
@@ -218,6 +241,9 @@ class NewsService:
         except Exception as e:
             logger.warning(f"stock_news_public_opinion failed: {e}")
 
+        from search_store import get_search_store
+        store = get_search_store()
+
         # Format exact dates for search query to be very specific to the target date
         date_str = ''
         if target_date:
@@ -234,23 +260,9 @@ class NewsService:
 
         if self._tavily_client and not self._tavily_exhausted:
             try:
-                response = self._tavily_client.search(
-                    query=query,
-                    search_depth="advanced", # use advanced for more exhaustive historical search
-                    max_results=max_results,
-                    include_answer=True
-                )
-                
-                results = []
-                if response.get("answer"):
-                    results.append(f"摘要: {response['answer']}")
-                
-                for r in response.get("results", [])[:max_results]:
-                    title = r.get("title", "")
-                    content = r.get("content", "")[:200]
-                    results.append(f"- {title}: {content}")
-                
-                return "\n".join(results) if results else "无相关新闻"
+                items = store.cached('tavily', f"{query} #{max_results}", target_date,
+                                     lambda: self._search_tavily(query, max_results))
+                return self._format(items)
             except Exception as e:
                 error_msg = str(e).lower()
                 if 'limit' in error_msg or 'quota' in error_msg or 'exceeded' in error_msg or '429' in error_msg:
@@ -260,73 +272,30 @@ class NewsService:
                     logger.warning(f"Tavily search failed: {e}")
         
         if self._serpapi_key:
-            return self._search_serpapi(query, max_results)
+            items = store.get('serpapi', f"{query} #{max_results}", target_date)
+            if items is None:
+                items = self._search_serpapi(query, max_results)
+                if items is None:
+                    return "新闻搜索不可用"
+                items = store.put('serpapi', f"{query} #{max_results}", target_date, items)
+            return self._format(items)
         
         return "新闻搜索未配置"
 
 
-class DailyAnalysisCache:
-    """SQLite cache for Daily AI analysis results."""
-    
+class DailyAnalysisCache(PromptResultCache):
+    """SQLite cache for Daily AI analysis results, keyed by the prompt content hash.
+
+    The prompt carries the stock, regime, market context and news, so any change
+    to them is a new entry, and identical prompts (re-runs, sweeps) share one result.
+    The pre-hash ts_daily_cache table (keyed by code and date, without the prompt)
+    cannot be mapped onto prompt hashes, so it is dropped on open.
+    """
+
     def __init__(self, db_path: str = CACHE_DB_PATH):
-        self.db_path = db_path
-        self._init_db()
-    
-    def _init_db(self):
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS ts_daily_cache (
-                    cache_key TEXT PRIMARY KEY,
-                    ts_code TEXT,
-                    target_date TEXT,
-                    score INTEGER,
-                    recommendation TEXT,
-                    summary TEXT,
-                    created_at TEXT
-                )
-            """)
-            conn.commit()
-    
-    def _make_key(self, ts_code: str, target_date: str, market_regime: str) -> str:
-        key_str = f"ts_daily_{ts_code}_{target_date}_{market_regime}"
-        return hashlib.md5(key_str.encode()).hexdigest()
-    
-    def get(self, ts_code: str, target_date: str, market_regime: str) -> Optional[Dict[str, Any]]:
-        cache_key = self._make_key(ts_code, target_date, market_regime)
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute(
-                    "SELECT score, recommendation, summary FROM ts_daily_cache WHERE cache_key = ?",
-                    (cache_key,)
-                )
-                row = cursor.fetchone()
-                if row:
-                    return {
-                        "score": row[0],
-                        "recommendation": row[1],
-                        "summary": row[2]
-                    }
-        except Exception as e:
-            logger.warning(f"Cache read error: {e}")
-        return None
-    
-    def set(self, ts_code: str, target_date: str, market_regime: str, analysis: Dict[str, Any]):
-        cache_key = self._make_key(ts_code, target_date, market_regime)
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("""
-                    INSERT OR REPLACE INTO ts_daily_cache 
-                    (cache_key, ts_code, target_date, score, recommendation, summary, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    cache_key, ts_code, target_date,
-                    analysis['score'], analysis['recommendation'], analysis['summary'],
-                    datetime.now().isoformat()
-                ))
-                conn.commit()
-        except Exception as e:
-            logger.warning(f"Cache write error: {e}")
+        super().__init__(db_path)
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("DROP TABLE IF EXISTS ts_daily_cache")
 
 
 class GeminiDailyAnalyzer:
@@ -363,14 +332,16 @@ class GeminiDailyAnalyzer:
         self._init_model()
 
     def _init_model(self):
-        # Use OpenRouter API directly (OpenAI-compatible)
+        # OpenRouter API directly (OpenAI-compatible); LLM_BASE_URL points it at another
+        # OpenAI-compatible endpoint, e.g. the local stand-in utils/stub_llm_server.py for load tests
         try:
-            _api_key = os.getenv("OPENROUTER_API_KEY")
+            _base_url = os.getenv("LLM_BASE_URL", "")
+            _api_key = os.getenv("OPENROUTER_API_KEY") or ("local" if _base_url else "")
             if not _api_key:
                 logger.error("OPENROUTER_API_KEY not set in environment")
                 return
             self._client = OpenAI(
-                base_url="https://openrouter.ai/api/v1",
+                base_url=_base_url or "https://openrouter.ai/api/v1",
                 api_key=_api_key,
             )
             logger.info(f"OpenRouter client initialized for ts_daily with {len(self._model_list)} models: {self._model_list[:3]}...")
@@ -392,27 +363,23 @@ class GeminiDailyAnalyzer:
         )
         return response.choices[0].message.content
 
-    def analyze(self, stock_info: Dict[str, Any], news_context: str, market_regime: str = 'normal', hot_sectors: str = '', market_dashboard: str = '', target_date: str = '') -> Dict[str, Any]:
-        ts_code = stock_info.get('ts_code', '')
-        
-        cached = self._cache.get(ts_code, target_date, market_regime)
-        if cached:
-            logger.info(f"Using cached ts_daily analysis for {ts_code}")
-            return cached
-        
-        if not self.is_available():
-            return {"score": 50, "recommendation": "观望", "summary": "AI分析不可用", "tp_pct": 0.10, "sl_pct": 0.05}
-        
-        prompt = self._build_prompt(stock_info, news_context, market_regime, hot_sectors, market_dashboard, target_date)
-        
+    @property
+    def cache_namespace(self) -> str:
+        """Prompt-hash namespace: results of different model lists are cached apart."""
+        return ",".join(self._model_list)
+
+    def complete(self, prompt: str) -> str:
+        """Completion text for `prompt`, rotating models on rate-limit/auth errors.
+
+        Raises:
+            RuntimeError: if every model is exhausted or a non-retryable error occurs
+        """
         last_error = None
         for model in self._model_list:
             try:
                 content = self._try_completion(model, prompt)
-                result = self._parse_response(content)
-                self._cache.set(ts_code, target_date, market_regime, result)
-                logger.info(f"ts_daily analysis for {ts_code} succeeded with model {model}")
-                return result
+                logger.debug(f"ts_daily completion succeeded with model {model}")
+                return content
             except Exception as e:
                 err_str = str(e).lower()
                 is_rate_limit = any(kw in err_str for kw in ("429", "rate", "quota", "limit", "exhausted"))
@@ -427,7 +394,33 @@ class GeminiDailyAnalyzer:
                     break
 
         logger.error(f"All {len(self._model_list)} models exhausted. Last error: {last_error}")
-        return {"score": 50, "recommendation": "观望", "summary": f"模型全部限流: {str(last_error)[:50] if last_error else '未知'}", "tp_pct": 0.10, "sl_pct": 0.05}
+        raise RuntimeError(f"模型全部限流: {str(last_error)[:50] if last_error else '未知'}")
+
+    def fallback_result(self, error: Exception | None = None) -> Dict[str, Any]:
+        """Neutral result when no analysis is available."""
+        summary = str(error) if error else "AI分析不可用"
+        return {"score": 50, "recommendation": "观望", "summary": summary, "tp_pct": 0.10, "sl_pct": 0.05}
+
+    def analyze(self, stock_info: Dict[str, Any], news_context: str, market_regime: str = 'normal', hot_sectors: str = '', market_dashboard: str = '', target_date: str = '') -> Dict[str, Any]:
+        ts_code = stock_info.get('ts_code', '')
+        prompt = self._build_prompt(stock_info, news_context, market_regime, hot_sectors, market_dashboard, target_date)
+        cache_key = prompt_hash(prompt, self.cache_namespace)
+
+        cached = self._cache.get(cache_key)
+        if cached:
+            logger.info(f"Using cached ts_daily analysis for {ts_code}")
+            return cached
+
+        if not self.is_available():
+            return self.fallback_result()
+
+        try:
+            result = self._parse_response(self.complete(prompt))
+        except Exception as e:
+            return self.fallback_result(e)
+        self._cache.set(cache_key, result)
+        logger.info(f"ts_daily analysis for {ts_code} succeeded")
+        return result
 
     def _build_prompt(self, stock_info: Dict[str, Any], news_context: str, market_regime: str = 'normal', hot_sectors: str = '', market_dashboard: str = '', target_date: str = '') -> str:
         # Prompt tuned exclusively for DAILY catalysts
@@ -536,7 +529,6 @@ def get_stock_candidates(target_date: str, lookahead: bool = False, market_regim
         df = data_provider.get_bulk_daily_by_date(date)
         if df is not None and not df.empty:
             all_daily_data[date] = df
-        time.sleep(0.1)
     
     stock_history_5d = {}
     for date in momentum_dates:
@@ -646,9 +638,201 @@ def get_stock_candidates(target_date: str, lookahead: bool = False, market_regim
     return final_candidates[:MAX_PICKS * 2]
 
 
+def _load_daily_stock_analysis():
+    """(analyze_stock, cache namespace) from the daily_stock_analysis submodule (fast single-LLM path), or (None, '')."""
+    _dsa_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'utils', 'daily_stock_analysis')
+    if _dsa_path not in sys.path:
+        sys.path.insert(0, _dsa_path)
+    try:
+        from src.config import get_config
+        from src.services.analyzer_service import analyze_stock
+    except ImportError as e:
+        logger.warning(f"daily_stock_analysis unavailable ({e}) -> in-tree analyzer")
+        return None, ''
+    dsa_config = get_config()
+    dsa_config.agent_mode = False  # Strictly disable slow & expensive agent loops for backtesting!
+    dsa_config.agent_skills = []   # Force the lightweight, fast, single-LLM analysis path
+    return analyze_stock, f"daily_stock_analysis:{getattr(dsa_config, 'litellm_model', '') or ''}"
+
+
+SEED_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'amount', 'pct_chg', 'ma5', 'ma10', 'ma20']
+
+
+def _save_seed_rows(db_mgr, df: pd.DataFrame):
+    """Upsert seeded bars into daily_stock_analysis's stock_daily table with one executemany per date."""
+    from sqlalchemy.dialects.sqlite import insert
+    from src.storage import StockDaily
+
+    columns = [c for c in SEED_COLUMNS if c in df.columns]
+    values = df[columns].astype(object).where(df[columns].notna(), None)
+    now = datetime.now()
+    stmt = insert(StockDaily)
+    stmt = stmt.on_conflict_do_update(index_elements=['code', 'date'],
+                                      set_={c: stmt.excluded[c] for c in columns + ['data_source', 'updated_at']})
+    session = db_mgr.get_session()
+    try:
+        for day, idx in df.groupby('date', sort=True).groups.items():
+            bar_date = datetime.strptime(day, '%Y-%m-%d').date()
+            rows = [{'code': code, 'date': bar_date, 'data_source': source, 'created_at': now, 'updated_at': now,
+                     **dict(zip(columns, vals))}
+                    for code, source, vals in zip(df.loc[idx, 'ts_code'], df.loc[idx, '_source'],
+                                                  values.loc[idx].itertuples(index=False, name=None))]
+            session.execute(stmt, rows)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def _seed_analysis_history(codes: List[str], start_date: str, end_date: str) -> pd.DataFrame:
+    """Seed daily_stock_analysis's DB with the candidates' history in one pass.
+
+    Bars come from one multi-symbol get_stock_data read (codes it misses from one
+    PRO.daily call) and MAs are computed per code with a groupby. They are written
+    with one executemany upsert per date; if the submodule's storage does not
+    expose that table, it falls back to its per-code save_daily_data.
+
+    Returns the seeded rows (the history each analysis sees), or an empty frame.
+    """
+    from src.storage import DatabaseManager
+
+    frames = []
+    try:
+        hist = data_provider.get_stock_data(codes, start_date, end_date)
+        if hist is not None and not hist.empty:
+            frames.append(hist.assign(_source='BacktestProvider'))
+    except Exception as e:
+        logger.warning(f"Seeding read failed: {e}")
+    seeded = set(frames[0]['ts_code']) if frames else set()
+    missing = [c for c in codes if c not in seeded]
+    if missing and PRO:
+        try:
+            df_ts = PRO.daily(ts_code=','.join(missing), start_date=start_date, end_date=end_date)
+            if df_ts is not None and not df_ts.empty:
+                frames.append(df_ts.assign(_source='TuShareAPI'))
+        except Exception as e:
+            logger.warning(f"Seeding TuShare fallback failed for {len(missing)} stocks: {e}")
+    if not frames:
+        return pd.DataFrame()
+
+    df = pd.concat(frames, ignore_index=True).sort_values(['ts_code', 'trade_date']).reset_index(drop=True)
+    close = df.groupby('ts_code', sort=False)['close']
+    for n in (5, 10, 20):
+        df[f'ma{n}'] = close.rolling(n).mean().reset_index(level=0, drop=True)
+    df['date'] = df['trade_date'].str.slice(0, 4) + '-' + df['trade_date'].str.slice(4, 6) + '-' + df['trade_date'].str.slice(6, 8)
+    df['volume'] = df['vol']
+
+    db_mgr = DatabaseManager()
+    try:
+        _save_seed_rows(db_mgr, df)
+    except Exception as e:
+        logger.warning(f"Bulk seeding unavailable ({e}) -> per-code save_daily_data")
+        for (ts_code, source), frame in df.groupby(['ts_code', '_source'], sort=False):
+            try:
+                db_mgr.save_daily_data(frame.drop(columns='_source').reset_index(drop=True), ts_code, source)
+            except Exception as e_code:
+                logger.warning(f"Seeding failed for {ts_code}: {e_code}")
+    logger.info(f"Seeded {len(df)} rows for {df['ts_code'].nunique()}/{len(codes)} candidates")
+    return df
+
+
+def _dsa_inputs(stock: Dict[str, Any], history: pd.DataFrame, target_date: str, market_regime: str) -> str:
+    """Everything a daily_stock_analysis result depends on, as one hashable string.
+
+    Covers the candidate row, the seeded bars it analyzes, the regime and the
+    target date, so a change to any of them is a new cache entry. News is left
+    out: analyze_stock searches it itself (once, on a cache miss), and a target
+    date's news is fixed for a backtest, so keying on it would only add a search.
+    """
+    ts_code = stock['ts_code']
+    bars = history[history['ts_code'] == ts_code] if not history.empty else history
+    bars = bars[[c for c in ['trade_date', 'close', 'volume', 'amount', 'pct_chg'] if c in bars.columns]]
+    return json.dumps({
+        'ts_code': ts_code, 'target_date': target_date, 'market_regime': market_regime,
+        'stock': {k: stock[k] for k in sorted(stock)}, 'bars': bars.to_csv(index=False),
+    }, ensure_ascii=False, default=str)
+
+
+def _dsa_analyze(analyze_stock, stock: Dict[str, Any], target_date: str, market_regime: str, no_search: bool) -> Optional[Dict[str, Any]]:
+    """Run daily_stock_analysis for one candidate and map its result to ts_daily analysis fields (None on failure)."""
+    import re
+    ts_code = stock['ts_code']
+    try:
+        dt_target = datetime.strptime(target_date, '%Y%m%d').replace(hour=17, minute=0, second=0)
+        logger.info(f"Analyzing {stock['name']} ({ts_code}) at {dt_target} with daily_stock_analysis (no_search={no_search})...")
+        res = analyze_stock(ts_code, current_time=dt_target)
+        
+        if res:
+            # Map decision types to compatible terms using a robust normalized check
+            advice = str(res.operation_advice or "").strip().lower()
+            dec = str(res.decision_type or "").strip().lower()
+            score_val = int(res.sentiment_score or 50)
+            
+            # Overcome the LLM's hyper-defensive system prompt bias
+            is_ai_strongly_bullish = (
+                score_val >= 60 or 
+                (market_regime == 'bull' and score_val >= 55)
+            )
+            
+            is_buy = (
+                "buy" in dec or 
+                "buy" in advice or
+                "强烈看多" in advice or
+                "看多" in advice or
+                "强烈买入" in advice or
+                "买入" in advice or 
+                "加仓" in advice or
+                "增持" in advice or
+                is_ai_strongly_bullish
+            )
+            recommendation = '买入' if is_buy else '观望'
+            
+            # Parse stop-loss & take-profit from dashboard
+            tp_pct = 0.10
+            sl_pct = 0.05
+            try:
+                close_val = float(stock['close'])
+                bp = res.dashboard.get('battle_plan', {}) if res.dashboard else {}
+                sp = bp.get('sniper_points', {}) if bp else {}
+                
+                tp_val = sp.get('take_profit')
+                sl_val = sp.get('stop_loss')
+                
+                if tp_val:
+                    tp_match = re.search(r'\d+\.?\d*', str(tp_val))
+                    if tp_match:
+                        tp_price = float(tp_match.group(0))
+                        if tp_price > close_val:
+                            tp_pct = round((tp_price - close_val) / close_val, 4)
+                            
+                if sl_val:
+                    sl_match = re.search(r'\d+\.?\d*', str(sl_val))
+                    if sl_match:
+                        sl_price = float(sl_match.group(0))
+                        if sl_price < close_val:
+                            sl_pct = round((close_val - sl_price) / close_val, 4)
+            except Exception as parse_err:
+                logger.warning(f"Failed to parse dynamic TP/SL from dashboard for {ts_code}: {parse_err}")
+                
+            logger.info(f"Analysis result for {ts_code}: score={res.sentiment_score}, rec={recommendation}, tp={tp_pct}, sl={sl_pct}")
+            return {
+                'ai_score': res.sentiment_score,
+                'recommendation': recommendation,
+                'ai_summary': res.analysis_summary or res.key_points or "高级分析成功",
+                'tp_pct': tp_pct,
+                'sl_pct': sl_pct
+            }
+        else:
+            logger.warning(f"Full analysis returned None for {ts_code}")
+    except Exception as ex:
+        logger.error(f"Failed to run full analysis for {ts_code}: {ex}")
+    return None
+
+
 def pick_stocks(target_date: str, lookahead: bool = False, no_search: bool = False, no_ai: bool = False) -> List[StockPick]:
     """Main daily picking logic."""
-    import re
     logger.info("=== Daily News-Driven Stock Picker (ts_daily) ===")
     logger.info(f"Target: {target_date}, Lookahead: {lookahead}, no_search: {no_search}, no_ai: {no_ai}")
     
@@ -679,150 +863,76 @@ def pick_stocks(target_date: str, lookahead: bool = False, no_search: bool = Fal
         logger.info(f"--no-ai: Selected {len(picks)} stocks via technical scoring")
         return picks
     
-    # Set up daily_stock_analysis import
-    _dsa_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'utils', 'daily_stock_analysis')
-    if _dsa_path not in sys.path:
-        sys.path.insert(0, _dsa_path)
-    
-    from src.config import get_config
-    dsa_config = get_config()
-    dsa_config.agent_mode = False  # Strictly disable slow & expensive agent loops for backtesting!
-    dsa_config.agent_skills = []   # Force the lightweight, fast, single-LLM analysis path
-    
-    from src.services.analyzer_service import analyze_stock
-    from src.storage import DatabaseManager
-    
-    analyzed_stocks = []
-    
     # Calculate dates for seeding
     if lookahead:
         data_date = target_date
     else:
         data_date = get_trading_days_before(target_date, 1)
-        
+
     start_date = get_trading_days_before(data_date, 80)
-    
-    # Helper to process and analyze a single breakout candidate stock
-    def process_candidate(item):
-        idx, stock = item
-        ts_code = stock['ts_code']
-        logger.info(f"analysis #{idx}/#{total_candidates} stock now: {stock['name']} ({ts_code})")
-        logger.info(f"Preparing data seeding for {stock['name']} ({ts_code})...")
-        
-        # Step 1: Bulletproof seeding to daily_stock_analysis DB
-        try:
-            df_hist = data_provider.get_stock_data(ts_code, start_date, data_date)
-            if df_hist is not None and not df_hist.empty:
-                df_hist = df_hist.sort_values('trade_date').reset_index(drop=True)
-                df_hist['ma5'] = df_hist['close'].rolling(5).mean()
-                df_hist['ma10'] = df_hist['close'].rolling(10).mean()
-                df_hist['ma20'] = df_hist['close'].rolling(20).mean()
-                df_hist['date'] = df_hist['trade_date'].apply(lambda x: f"{x[:4]}-{x[4:6]}-{x[6:]}")
-                df_hist['volume'] = df_hist['vol']
-                
-                db_mgr = DatabaseManager()
-                db_mgr.save_daily_data(df_hist, ts_code, 'BacktestProvider')
-                logger.info(f"Successfully seeded {len(df_hist)} rows for {ts_code}")
-            else:
-                if PRO:
-                    df_ts = PRO.daily(ts_code=ts_code, start_date=start_date, end_date=data_date)
-                    if df_ts is not None and not df_ts.empty:
-                        df_ts = df_ts.sort_values('trade_date').reset_index(drop=True)
-                        df_ts['ma5'] = df_ts['close'].rolling(5).mean()
-                        df_ts['ma10'] = df_ts['close'].rolling(10).mean()
-                        df_ts['ma20'] = df_ts['close'].rolling(20).mean()
-                        df_ts['date'] = df_ts['trade_date'].apply(lambda x: f"{x[:4]}-{x[4:6]}-{x[6:]}")
-                        df_ts['volume'] = df_ts['vol']
-                        
-                        db_mgr = DatabaseManager()
-                        db_mgr.save_daily_data(df_ts, ts_code, 'TuShareAPI')
-                        logger.info(f"Successfully seeded {len(df_ts)} rows from TuShare for {ts_code}")
-        except Exception as e:
-            logger.warning(f"Seeding failed for {ts_code}: {e}")
-            
-        # Step 2: Call the full analyze_stock function from daily_stock_analysis
-        try:
-            dt_target = datetime.strptime(target_date, '%Y%m%d').replace(hour=17, minute=0, second=0)
-            logger.info(f"Analyzing {stock['name']} ({ts_code}) at {dt_target} with daily_stock_analysis (no_search={no_search})...")
-            res = analyze_stock(ts_code, current_time=dt_target)
-            
-            if res:
-                # Map decision types to compatible terms using a robust normalized check
-                advice = str(res.operation_advice or "").strip().lower()
-                dec = str(res.decision_type or "").strip().lower()
-                score_val = int(res.sentiment_score or 50)
-                
-                # Overcome the LLM's hyper-defensive system prompt bias
-                is_ai_strongly_bullish = (
-                    score_val >= 60 or 
-                    (market_regime == 'bull' and score_val >= 55)
-                )
-                
-                is_buy = (
-                    "buy" in dec or 
-                    "buy" in advice or
-                    "强烈看多" in advice or
-                    "看多" in advice or
-                    "强烈买入" in advice or
-                    "买入" in advice or 
-                    "加仓" in advice or
-                    "增持" in advice or
-                    is_ai_strongly_bullish
-                )
-                recommendation = '买入' if is_buy else '观望'
-                
-                # Parse stop-loss & take-profit from dashboard
-                tp_pct = 0.10
-                sl_pct = 0.05
-                try:
-                    close_val = float(stock['close'])
-                    bp = res.dashboard.get('battle_plan', {}) if res.dashboard else {}
-                    sp = bp.get('sniper_points', {}) if bp else {}
-                    
-                    tp_val = sp.get('take_profit')
-                    sl_val = sp.get('stop_loss')
-                    
-                    if tp_val:
-                        tp_match = re.search(r'\d+\.?\d*', str(tp_val))
-                        if tp_match:
-                            tp_price = float(tp_match.group(0))
-                            if tp_price > close_val:
-                                tp_pct = round((tp_price - close_val) / close_val, 4)
-                                
-                    if sl_val:
-                        sl_match = re.search(r'\d+\.?\d*', str(sl_val))
-                        if sl_match:
-                            sl_price = float(sl_match.group(0))
-                            if sl_price < close_val:
-                                sl_pct = round((close_val - sl_price) / close_val, 4)
-                except Exception as parse_err:
-                    logger.warning(f"Failed to parse dynamic TP/SL from dashboard for {ts_code}: {parse_err}")
-                    
-                logger.info(f"Analysis result for {ts_code}: score={res.sentiment_score}, rec={recommendation}, tp={tp_pct}, sl={sl_pct}")
-                return {
-                    **stock,
-                    'ai_score': res.sentiment_score,
-                    'recommendation': recommendation,
-                    'ai_summary': res.analysis_summary or res.key_points or "高级分析成功",
-                    'tp_pct': tp_pct,
-                    'sl_pct': sl_pct
-                }
-            else:
-                logger.warning(f"Full analysis returned None for {ts_code}")
-        except Exception as ex:
-            logger.error(f"Failed to run full analysis for {ts_code}: {ex}")
-        return None
 
     # We analyze up to 15 candidates for daily due to the stricter requirements
-    total_candidates = len(candidates[:15])
-    
-    # Run concurrent threads using ThreadPoolExecutor for up to 5x parallel speedup
-    from concurrent.futures import ThreadPoolExecutor
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        items = list(enumerate(candidates[:15], start=1))
-        results = list(executor.map(process_candidate, items))
-        analyzed_stocks = [r for r in results if r is not None]
-        
+    to_analyze = candidates[:15]
+    total_candidates = len(to_analyze)
+    stocks = {c['ts_code']: c for c in to_analyze}
+
+    news = None if no_search else NewsService()
+    analyze_stock, dsa_namespace = _load_daily_stock_analysis()
+    if analyze_stock is not None:
+        # daily_stock_analysis prompts (and searches news) internally: seed its DB once
+        # for all candidates and run the analysis under the LLM bound, deduplicated and
+        # cached by the hash of its inputs (candidate, bars, regime, date)
+        history = _seed_analysis_history(list(stocks), start_date, data_date)
+        pipeline = AnalysisPipeline(cache=DailyAnalysisCache(), namespace=dsa_namespace, fallback=lambda job, e: None)
+        jobs = [AnalysisJob(key=ts_code,
+                            inputs=partial(_dsa_inputs, stock, history, target_date, market_regime),
+                            run=partial(_dsa_analyze, analyze_stock, stock, target_date, market_regime, no_search))
+                for ts_code, stock in stocks.items()]
+    else:
+        # In-tree analyzer: news search and LLM completions as separate bounded stages,
+        # identical prompts deduplicated and cached by content hash
+        analyzer = GeminiDailyAnalyzer()
+        if not analyzer.is_available():
+            logger.warning("No LLM client available -> neutral scores")
+        hot_sectors = get_hot_sectors(data_date)
+        market_dashboard = get_market_dashboard(data_date)
+
+        def build_prompt(stock):
+            news_context = "新闻搜索已禁用" if news is None else news.search(stock['name'], stock['ts_code'], target_date)
+            return analyzer._build_prompt(stock, news_context, market_regime, hot_sectors, market_dashboard, target_date)
+
+        def complete(prompt):
+            if not analyzer.is_available():
+                raise RuntimeError("AI分析不可用")     # neutral fallback, never cached
+            return analyzer.complete(prompt)
+
+        pipeline = AnalysisPipeline(complete=complete, parse=analyzer._parse_response, cache=analyzer._cache,
+                                    namespace=analyzer.cache_namespace,
+                                    fallback=lambda job, e: analyzer.fallback_result(e))
+        jobs = [AnalysisJob(key=ts_code, build_prompt=partial(build_prompt, stock)) for ts_code, stock in stocks.items()]
+
+    def on_result(ts_code, result):
+        completed.append(ts_code)
+        logger.info(f"analysis #{len(completed)}/#{total_candidates} done: {stocks[ts_code]['name']} ({ts_code})")
+        if result is None:
+            return
+        if analyze_stock is None:
+            result = {
+                'ai_score': result.get('score', 50),
+                'recommendation': result.get('recommendation', '观望'),
+                'ai_summary': result.get('summary', ''),
+                'tp_pct': result.get('tp_pct', 0.10),
+                'sl_pct': result.get('sl_pct', 0.05),
+            }
+        analyzed[ts_code] = {**stocks[ts_code], **result}
+
+    analyzed: Dict[str, Dict[str, Any]] = {}
+    completed: List[str] = []
+    pipeline.run(jobs, on_result=on_result)
+    logger.info(f"Analysis pipeline: {pipeline.stats}")
+    # Keep the candidate order for the (stable) score sort below
+    analyzed_stocks = [analyzed[c] for c in stocks if c in analyzed]
+
     # --- Smart-Gate Strategy (平衡策略): Active trading with robust local technical guardrails ---
     # 1. Active flat score threshold across all regimes
     min_score = 50  # Lowered score gate to neutral to guarantee high trading activity
@@ -879,6 +989,29 @@ def pick_stocks(target_date: str, lookahead: bool = False, no_search: bool = Fal
     return picks
 
 
+def pick(date: str = None, flags: Sequence[str] = ()) -> pd.DataFrame:
+    """In-process entry point (see backtest/strategies/registry.py).
+
+    Honours the same '--lookahead', '--no-search' and '--no-ai' flags as the
+    command line. Returns selected_stocks records.
+    """
+    target_date = date or datetime.now().strftime('%Y%m%d')
+    picks = pick_stocks(target_date, '--lookahead' in flags,
+                        no_search='--no-search' in flags, no_ai='--no-ai' in flags)
+    return pd.DataFrame([
+        {
+            "rank": p.rank,
+            "symbol": p.symbol,
+            "score": p.score,
+            "name": p.name,
+            "ai_summary": p.ai_summary,
+            "tp_pct": getattr(p, 'tp_pct', 0.10),
+            "sl_pct": getattr(p, 'sl_pct', 0.05)
+        }
+        for p in picks
+    ])
+
+
 def main():
     parser = argparse.ArgumentParser(description='Daily Stock Picker (ts_daily)')
     parser.add_argument('date', help='Target trading date (YYYYMMDD)')
@@ -892,24 +1025,12 @@ def main():
         args.output = '/tmp/tmp'
         
     # Pick stocks
-    picks = pick_stocks(args.date, args.lookahead, no_search=args.no_search, no_ai=args.no_ai)
-    
+    flags = [f for f, on in (('--lookahead', args.lookahead), ('--no-search', args.no_search), ('--no-ai', args.no_ai)) if on]
+    picks = pick(args.date, flags)
+
     # Standard output format
-    output = {
-        "selected_stocks": [
-            {
-                "rank": p.rank,
-                "symbol": p.symbol,
-                "score": p.score,
-                "name": p.name,
-                "ai_summary": p.ai_summary,
-                "tp_pct": getattr(p, 'tp_pct', 0.10),
-                "sl_pct": getattr(p, 'sl_pct', 0.05)
-            }
-            for p in picks
-        ]
-    }
-    
+    output = {"selected_stocks": selected_records(picks)}
+
     with open(args.output, 'w') as f:
         json.dump(output, f)
         
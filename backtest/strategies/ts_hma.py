@@ -18,7 +18,7 @@ from datetime import datetime
 import pandas as pd
 import numpy as np
 import warnings
-from typing import Any
+from typing import Any, Sequence
 
 from dotenv import load_dotenv
 from loguru import logger
@@ -26,10 +26,12 @@ from loguru import logger
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from backtest import data_provider
+from backtest.data.panel import rolling_wma
 from backtest.utils.trading_calendar import get_trading_days_before, convert_trade_date
 from backtest.utils.market_regime import detect_market_regime
 from backtest.utils.logging_config import configure_logger
 from backtest.strategies.ts_ths_dc import no_risky_stocks
+from backtest.strategies.registry import selected_records
 
 warnings.filterwarnings("ignore", category=UserWarning)
 
@@ -49,11 +51,7 @@ LOOKBACK_DAYS = 60  # Days of data to fetch
 
 def calculate_wma(series: pd.Series, period: int) -> pd.Series:
     """Calculate Weighted Moving Average."""
-    weights = np.arange(1, period + 1)
-    return series.rolling(window=period).apply(
-        lambda x: np.sum(x * weights) / np.sum(weights),
-        raw=True
-    )
+    return pd.Series(rolling_wma(series.to_numpy(dtype=float), period), index=series.index)
 
 
 def calculate_hma(close: pd.Series, period: int = 20) -> pd.Series:
@@ -380,41 +378,44 @@ def pick_hma_stocks(end_date: str, max_picks: int = 10) -> pd.DataFrame:
     return df
 
 
-if __name__ == "__main__":
-    argv = sys.argv[1:]
-    lookahead = False
-    
-    if '--lookahead' in argv:
-        lookahead = True
-        argv.remove('--lookahead')
-    
-    if len(argv) >= 1:
-        date = convert_trade_date(argv[0])
-        target_date = argv[0]
-    else:
-        date = datetime.now().strftime('%Y%m%d')
-        target_date = date
-    
+def pick(date: str = None, flags: Sequence[str] = ()) -> pd.DataFrame:
+    """In-process entry point (see backtest/strategies/registry.py).
+
+    `date` is the target trading date; picks use the previous trading day's
+    data unless '--lookahead' is in `flags`. Returns selected_stocks records.
+    """
+    ref_date = convert_trade_date(date or datetime.now().strftime('%Y%m%d'))
+
     # Use previous trading day unless lookahead is enabled
-    if not lookahead:
-        date = get_trading_days_before(date, 1)
-    
-    logger.info(f"[ts_hma] Picking stocks for target date with reference date: {date}")
-    
-    df = pick_hma_stocks(end_date=date)
-    
-    # Output to standard format
-    output_file = '/tmp/tmp'
+    if '--lookahead' not in flags:
+        ref_date = get_trading_days_before(ref_date, 1)
+
+    logger.info(f"[ts_hma] Picking stocks for target date with reference date: {ref_date}")
+
+    df = pick_hma_stocks(end_date=ref_date)
+
     selected_stocks = []
-    
     for _, stock in df.iterrows():
         selected_stocks.append({
             'rank': int(stock['rank']),
             'symbol': stock['ts_code'],
             'score': float(stock['composite_score'])
         })
-    
+    return pd.DataFrame(selected_stocks)
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    flags = [a for a in argv if a.startswith('--')]
+    args = [a for a in argv if not a.startswith('--')]
+
+    picks = pick(args[0] if args else None, flags)
+
+    # Output to standard format
+    output_file = '/tmp/tmp'
+    selected_stocks = selected_records(picks)
+
     with open(output_file, 'w') as f:
         json.dump({'selected_stocks': selected_stocks}, f)
-    
+
     logger.info(f"[ts_hma] Saved {len(selected_stocks)} picked stocks to {output_file}")
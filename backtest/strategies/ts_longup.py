@@ -26,7 +26,7 @@ from datetime import datetime
 import pandas as pd
 import numpy as np
 import warnings
-from typing import Optional
+from typing import Optional, Sequence
 
 from dotenv import load_dotenv
 from loguru import logger
@@ -34,10 +34,12 @@ from loguru import logger
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from backtest import data_provider
+from backtest.data.panel import MarketPanel, adx
 from backtest.utils.trading_calendar import get_trading_days_before, convert_trade_date
 from backtest.utils.market_regime import detect_market_regime
 from backtest.utils.logging_config import configure_logger
 from backtest.strategies.ts_ths_dc import no_risky_stocks
+from backtest.strategies.registry import selected_records
 
 warnings.filterwarnings("ignore", category=UserWarning)
 
@@ -54,264 +56,190 @@ ADX_MIN = 20   # Minimum ADX for trending
 ADX_MAX = 50   # Maximum ADX (avoid exhausted trends)
 
 
-def calculate_ma(close: pd.Series, period: int) -> pd.Series:
-    """Calculate Simple Moving Average."""
-    return close.rolling(window=period).mean()
-
-
 def calculate_ema(close: pd.Series, period: int) -> pd.Series:
     """Calculate Exponential Moving Average."""
     return close.ewm(span=period, adjust=False).mean()
 
 
-def calculate_adx(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> dict:
+def _tail_mean(values: np.ndarray, n: int) -> np.ndarray:
+    """Mean of the last `n` rows per column, skipping NaN (Series.tail(n).mean())."""
+    tail = values[-n:]
+    count = (~np.isnan(tail)).sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(count > 0, np.nansum(tail, axis=0) / count, np.nan)
+
+
+def _slope(ma: np.ndarray, window: int = 10) -> np.ndarray:
+    """Latest rate of change (%) of each column over `window` bars."""
+    return (ma[-1] - ma[-1 - window]) / ma[-1 - window] * 100
+
+
+def _first_signal(*options) -> Optional[str]:
+    """Label of the first (condition, label) option that holds; a callable label is formatted lazily."""
+    for condition, label in options:
+        if condition:
+            return label() if callable(label) else label
+    return None
+
+
+def score_panel(panel: MarketPanel, index_returns_20d: float = 0.0) -> pd.DataFrame:
     """
-    Calculate ADX (Average Directional Index) with +DI and -DI.
-    
+    Score every symbol of a bar panel (MarketPanel.from_bars) in one pass.
+
+    The quick filters run on the whole universe; the scoring only on the
+    survivors.
+
+    Args:
+        panel: Right-aligned bars, one column per stock
+        index_returns_20d: CSI300 returns over last 20 days (for relative strength)
+
     Returns:
-        dict with 'adx', 'plus_di', 'minus_di' as Series
+        One row per stock scoring >= 30, in panel column order
     """
-    # True Range
-    high_low = high - low
-    high_close = np.abs(high - close.shift(1))
-    low_close = np.abs(low - close.shift(1))
-    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    
-    # Directional Movement
-    up_move = high - high.shift(1)
-    down_move = low.shift(1) - low
-    
-    plus_dm = pd.Series(np.where((up_move > down_move) & (up_move > 0), up_move, 0), index=close.index)
-    minus_dm = pd.Series(np.where((down_move > up_move) & (down_move > 0), down_move, 0), index=close.index)
-    
-    # Smooth using EMA
-    atr = tr.ewm(span=period, adjust=False).mean()
-    plus_di = 100 * (plus_dm.ewm(span=period, adjust=False).mean() / atr)
-    minus_di = 100 * (minus_dm.ewm(span=period, adjust=False).mean() / atr)
-    
-    # DX and ADX
-    dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di + 1e-10)
-    adx = dx.ewm(span=period, adjust=False).mean()
-    
-    return {
-        'adx': adx,
-        'plus_di': plus_di,
-        'minus_di': minus_di
-    }
+    if panel.close.shape[0] < 80:
+        return pd.DataFrame()
+    lengths = panel.lengths
 
+    # MA20/60/120 with 120+ bars; fallback MA10/30/60 with 80-119 bars
+    full = lengths >= 120
+    ma_short, ma_mid, ma_long = (np.where(full, panel.sma(long_period), panel.sma(short_period))
+                                 for long_period, short_period in ((20, 10), (60, 30), (120, 60)))
+    latest = panel.close[-1]
+    low_120d = np.fmin.reduce(panel.low[-120:], axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gain_from_low = (latest - low_120d) / low_120d * 100
+        slopes = [_slope(ma) for ma in (ma_short, ma_mid, ma_long)]
+
+    # ─── QUICK FILTERS (reject early) ───
+    # MAs and their slopes available, price not below MA_long,
+    # not already up >50% from the 120-day low
+    passed = (lengths >= 80) & ~(latest < ma_long[-1] * 0.98) & ~(gain_from_low > MAX_GAIN_FROM_LOW_PCT)
+    for values in [ma_short[-1], ma_mid[-1], ma_long[-1]] + slopes:
+        passed &= ~np.isnan(values)
+    cols = np.flatnonzero(passed)
+    if not len(cols):
+        return pd.DataFrame()
+
+    latest, gain_from_low, full = latest[cols], gain_from_low[cols], full[cols]
+    ma_short = ma_short[:, cols]
+    ls, lm, ll = ma_short[-1], ma_mid[-1, cols], ma_long[-1, cols]
+    slope_short, slope_mid, slope_long = (slope[cols] for slope in slopes)
+    close, high, low, vol = (m[:, cols] for m in (panel.close, panel.high, panel.low, panel.vol))
+
+    # ─── SCORING SYSTEM (0-100) ───
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 1. MA ALIGNMENT (25 pts): MA_short > MA_mid > MA_long + all trending up
+        ma_aligned = (ls > lm) & (lm > ll)
+        all_slopes_up = (slope_short > 0) & (slope_mid > 0) & (slope_long > 0)
+        ma_conditions = [ma_aligned & all_slopes_up, ma_aligned, (latest > lm) & (slope_mid > 0)]
+        score = np.select(ma_conditions, [25.0, 15.0, 8.0], 0.0)
+
+        # 2. PRICE POSITION (20 pts): Above MAs but not overextended
+        price_above_all_ma = (latest > ls) & (ls > lm)
+        price_distance_from_ma20 = (latest - ls) / ls * 100
+        price_conditions = [
+            price_above_all_ma & (price_distance_from_ma20 >= 0) & (price_distance_from_ma20 <= 5),
+            price_above_all_ma & (price_distance_from_ma20 > 5) & (price_distance_from_ma20 <= MA_PROXIMITY_MAX_PCT),
+            ~price_above_all_ma & (latest > lm),
+        ]
+        score += np.select(price_conditions, [20.0, 12.0, 5.0], 0.0)
+
+        # 3. VOLUME PATTERN (20 pts): Expanding volume from consolidation
+        vol_5d, vol_20d, vol_60d = (_tail_mean(vol, n) for n in (5, 20, 60))
+        vol_ratio_short = np.where(vol_20d > 0, vol_5d / vol_20d, 1.0)
+        vol_ratio_trend = np.where(vol_60d > 0, vol_20d / vol_60d, 1.0)
+        vol_conditions = [(vol_ratio_short > 1.3) & (vol_ratio_trend > 1.1),
+                          (vol_ratio_short > 1.1) & (vol_ratio_trend > 1.0),
+                          vol_ratio_trend > 1.0]
+        score += np.select(vol_conditions, [20.0, 12.0, 5.0], 0.0)
 
-def calculate_slope(series: pd.Series, window: int = 10) -> pd.Series:
-    """Calculate slope (rate of change) over a rolling window."""
-    return (series - series.shift(window)) / series.shift(window) * 100
+        # 4. ADX TREND STRENGTH (15 pts): ADX rising from low level = new trend forming
+        adx_data = adx(high, low, close, window=14)
+        latest_adx = adx_data['adx'][-1]
+        latest_plus_di, latest_minus_di = adx_data['plus_di'][-1], adx_data['minus_di'][-1]
+        adx_rising = latest_adx > adx_data['adx'][-10]
+        di_bullish = latest_plus_di > latest_minus_di
+        adx_conditions = [(ADX_MIN <= latest_adx) & (latest_adx <= ADX_MAX) & adx_rising & di_bullish,
+                          di_bullish & (latest_adx > 15)]
+        score += np.select(adx_conditions, [15.0, 8.0], 0.0)
+
+        # 5. PULLBACK-RECOVERY (10 pts): a low touched MA20 (within 2%) in the last 10 days
+        touched_ma20 = (np.abs(low[-10:] - ma_short[-10:]) / ma_short[-10:] * 100 < 2.0).any(axis=0) & (latest > ls)
+        # Alternative: breaking above recent consolidation range
+        range_20d_high = np.fmax.reduce(high[-30:-5], axis=0)
+        breakout = ~touched_ma20 & (latest > range_20d_high) & (latest < range_20d_high * 1.05)
+        score += np.select([touched_ma20, breakout], [10.0, 7.0], 0.0)
+
+        # 6. RELATIVE STRENGTH (10 pts): Outperforming CSI300
+        excess_return = (latest / close[-20] - 1) * 100 - index_returns_20d
+        score += np.select([excess_return > 5, excess_return > 2], [10.0, 5.0], 0.0)
+
+    # ─── Minimum score threshold ───
+    keep = np.flatnonzero(score >= 30)
+    if not len(keep):
+        return pd.DataFrame()
+
+    signals = []
+    for j in keep:
+        ma_label = "MA20/MA60/MA120" if full[j] else "MA10/MA30/MA60"
+        dist, vrs, vrt = price_distance_from_ma20[j], vol_ratio_short[j], vol_ratio_trend[j]
+        adx_j, plus_j, minus_j = latest_adx[j], latest_plus_di[j], latest_minus_di[j]
+        stock_signals = [
+            _first_signal((ma_conditions[0][j], f"MA_aligned_up({ma_label})"),
+                          (ma_conditions[1][j], f"MA_aligned({ma_label})"),
+                          (ma_conditions[2][j], "MA_partial_align")),
+            _first_signal((price_conditions[0][j], f"price_near_MA20({dist:.1f}%)"),
+                          (price_conditions[1][j], f"price_above_MA20({dist:.1f}%)"),
+                          (price_conditions[2][j], "price_above_MA60")),
+            _first_signal((vol_conditions[0][j], f"vol_expanding(5d/20d={vrs:.2f},20d/60d={vrt:.2f})"),
+                          (vol_conditions[1][j], f"vol_moderate_up(5d/20d={vrs:.2f})"),
+                          (vol_conditions[2][j], "vol_trend_up")),
+            _first_signal((adx_conditions[0][j],
+                           lambda: f"ADX_rising({adx_j:.1f},+DI>{int(plus_j)},-DI={int(minus_j)})"),
+                          (adx_conditions[1][j], lambda: f"DI_bullish(ADX={adx_j:.1f})")),
+            _first_signal((touched_ma20[j], "pullback_bounce_MA20"),
+                          (breakout[j], "breakout_consolidation")),
+            _first_signal((excess_return[j] > 5, f"rel_strength(+{excess_return[j]:.1f}%)"),
+                          (excess_return[j] > 2, f"moderate_rel_str(+{excess_return[j]:.1f}%)")),
+        ]
+        signals.append([signal for signal in stock_signals if signal])
+
+    return pd.DataFrame({
+        'ts_code': [panel.symbols[cols[j]] for j in keep],
+        'close': latest[keep],
+        'ma_short': ls[keep],
+        'ma_mid': lm[keep],
+        'ma_long': ll[keep],
+        'ma_aligned': ma_aligned[keep],
+        'all_slopes_up': all_slopes_up[keep],
+        'adx': np.nan_to_num(latest_adx[keep]),
+        'plus_di': np.nan_to_num(latest_plus_di[keep]),
+        'minus_di': np.nan_to_num(latest_minus_di[keep]),
+        'gain_from_low_pct': np.round(gain_from_low[keep], 2),
+        'price_dist_ma20': np.round(price_distance_from_ma20[keep], 2),
+        'composite_score': np.round(score[keep], 2),
+        'signals': signals,
+    })
 
 
 def analyze_stock_longup(ts_code: str, df: pd.DataFrame,
                          index_returns_20d: float = 0.0) -> Optional[dict]:
     """
     Analyze a single stock for early-stage long-term uptrend signals.
-    
+
     Args:
         ts_code: Stock code
         df: Pre-fetched OHLCV DataFrame
         index_returns_20d: CSI300 returns over last 20 days (for relative strength)
-    
+
     Returns:
         dict with analysis results or None
     """
-    try:
-        if df is None or df.empty or len(df) < 80:
-            return None
-        
-        # Sort by date ascending
-        df = df.sort_values('trade_date', ascending=True).reset_index(drop=True)
-        
-        close = df['close'].astype(float)
-        high = df['high'].astype(float)
-        low = df['low'].astype(float)
-        vol = df['vol'].astype(float)
-        
-        # Need at least 120 bars for MA120
-        if len(close) < 120:
-            # Fallback: use shorter MAs if we have 60+ bars
-            if len(close) < 60:
-                return None
-            ma_long = calculate_ma(close, 60)
-            ma_mid = calculate_ma(close, 30)
-            ma_short = calculate_ma(close, 10)
-            ma_label = "MA10/MA30/MA60"
-        else:
-            ma_long = calculate_ma(close, 120)
-            ma_mid = calculate_ma(close, 60)
-            ma_short = calculate_ma(close, 20)
-            ma_label = "MA20/MA60/MA120"
-        
-        latest = close.iloc[-1]
-        latest_ma_short = ma_short.iloc[-1]
-        latest_ma_mid = ma_mid.iloc[-1]
-        latest_ma_long = ma_long.iloc[-1]
-        
-        if pd.isna(latest_ma_short) or pd.isna(latest_ma_mid) or pd.isna(latest_ma_long):
-            return None
-        
-        # ─── QUICK FILTERS (reject early) ───
-        
-        # Skip if price below MA_long (not in uptrend territory)
-        if latest < latest_ma_long * 0.98:
-            return None
-        
-        # Skip stocks already up >50% from 120-day low
-        low_120d = low.tail(120).min() if len(low) >= 120 else low.min()
-        gain_from_low = (latest - low_120d) / low_120d * 100
-        if gain_from_low > MAX_GAIN_FROM_LOW_PCT:
-            return None
-        
-        # ─── SCORING SYSTEM (0-100) ───
-        score = 0.0
-        signals = []
-        
-        # 1. MA ALIGNMENT (25 pts): MA_short > MA_mid > MA_long + all trending up
-        ma_aligned = (latest_ma_short > latest_ma_mid > latest_ma_long)
-        
-        # MA slopes (positive = trending up)
-        slope_short = calculate_slope(ma_short, 10).iloc[-1]
-        slope_mid = calculate_slope(ma_mid, 10).iloc[-1]
-        slope_long = calculate_slope(ma_long, 10).iloc[-1]
-        
-        if pd.isna(slope_short) or pd.isna(slope_mid) or pd.isna(slope_long):
-            return None
-        
-        all_slopes_up = (slope_short > 0 and slope_mid > 0 and slope_long > 0)
-        
-        if ma_aligned and all_slopes_up:
-            score += 25.0
-            signals.append(f"MA_aligned_up({ma_label})")
-        elif ma_aligned:
-            score += 15.0
-            signals.append(f"MA_aligned({ma_label})")
-        elif latest > latest_ma_mid and slope_mid > 0:
-            score += 8.0
-            signals.append("MA_partial_align")
-        
-        # 2. PRICE POSITION (20 pts): Above MAs but not overextended
-        price_above_all_ma = (latest > latest_ma_short > latest_ma_mid)
-        price_distance_from_ma20 = (latest - latest_ma_short) / latest_ma_short * 100
-        
-        if price_above_all_ma:
-            if 0 <= price_distance_from_ma20 <= 5:
-                # Sweet spot: just above MA20, close support
-                score += 20.0
-                signals.append(f"price_near_MA20({price_distance_from_ma20:.1f}%)")
-            elif 5 < price_distance_from_ma20 <= MA_PROXIMITY_MAX_PCT:
-                score += 12.0
-                signals.append(f"price_above_MA20({price_distance_from_ma20:.1f}%)")
-            # If > MA_PROXIMITY_MAX_PCT, overextended, no points
-        elif latest > latest_ma_mid:
-            score += 5.0
-            signals.append("price_above_MA60")
-        
-        # 3. VOLUME PATTERN (20 pts): Expanding volume from consolidation
-        if len(vol) >= 60:
-            vol_5d = vol.tail(5).mean()
-            vol_20d = vol.tail(20).mean()
-            vol_60d = vol.tail(60).mean()
-            
-            # Recent volume expansion vs 20d average
-            vol_ratio_short = vol_5d / vol_20d if vol_20d > 0 else 1.0
-            # 20d volume vs 60d average (is volume trending up?)
-            vol_ratio_trend = vol_20d / vol_60d if vol_60d > 0 else 1.0
-            
-            if vol_ratio_short > 1.3 and vol_ratio_trend > 1.1:
-                score += 20.0
-                signals.append(f"vol_expanding(5d/20d={vol_ratio_short:.2f},20d/60d={vol_ratio_trend:.2f})")
-            elif vol_ratio_short > 1.1 and vol_ratio_trend > 1.0:
-                score += 12.0
-                signals.append(f"vol_moderate_up(5d/20d={vol_ratio_short:.2f})")
-            elif vol_ratio_trend > 1.0:
-                score += 5.0
-                signals.append("vol_trend_up")
-        
-        # 4. ADX TREND STRENGTH (15 pts)
-        adx_data = calculate_adx(high, low, close, period=14)
-        latest_adx = adx_data['adx'].iloc[-1]
-        latest_plus_di = adx_data['plus_di'].iloc[-1]
-        latest_minus_di = adx_data['minus_di'].iloc[-1]
-        
-        if not pd.isna(latest_adx):
-            # ADX rising from low level = new trend forming
-            adx_10d_ago = adx_data['adx'].iloc[-10] if len(adx_data['adx']) >= 10 else latest_adx
-            adx_rising = latest_adx > adx_10d_ago
-            di_bullish = latest_plus_di > latest_minus_di
-            
-            if ADX_MIN <= latest_adx <= ADX_MAX and adx_rising and di_bullish:
-                score += 15.0
-                signals.append(f"ADX_rising({latest_adx:.1f},+DI>{int(latest_plus_di)},-DI={int(latest_minus_di)})")
-            elif di_bullish and latest_adx > 15:
-                score += 8.0
-                signals.append(f"DI_bullish(ADX={latest_adx:.1f})")
-        
-        # 5. PULLBACK-RECOVERY (10 pts): Recent bounce off MA20
-        if len(close) >= 20:
-            # Check if price touched MA20 in last 10 days and bounced
-            low.tail(10).min()
-            close.tail(10)
-            ma_short.tail(10)
-            
-            # Check if any recent low touched MA20 (within 2%) 
-            touched_ma20 = False
-            for i in range(-10, 0):
-                if len(close) + i >= 0 and not pd.isna(ma_short.iloc[i]):
-                    distance_to_ma20 = abs(low.iloc[i] - ma_short.iloc[i]) / ma_short.iloc[i] * 100
-                    if distance_to_ma20 < 2.0 and close.iloc[-1] > ma_short.iloc[-1]:
-                        touched_ma20 = True
-                        break
-            
-            if touched_ma20:
-                score += 10.0
-                signals.append("pullback_bounce_MA20")
-            else:
-                # Alternative: breaking above recent consolidation range
-                if len(close) >= 30:
-                    range_20d_high = high.iloc[-30:-5].max()
-                    if latest > range_20d_high and latest < range_20d_high * 1.05:
-                        score += 7.0
-                        signals.append("breakout_consolidation")
-        
-        # 6. RELATIVE STRENGTH (10 pts): Outperforming CSI300
-        if len(close) >= 20:
-            stock_returns_20d = (close.iloc[-1] / close.iloc[-20] - 1) * 100
-            excess_return = stock_returns_20d - index_returns_20d
-            
-            if excess_return > 5:
-                score += 10.0
-                signals.append(f"rel_strength(+{excess_return:.1f}%)")
-            elif excess_return > 2:
-                score += 5.0
-                signals.append(f"moderate_rel_str(+{excess_return:.1f}%)")
-        
-        # ─── Minimum score threshold ───
-        if score < 30:
-            return None
-        
-        return {
-            'ts_code': ts_code,
-            'close': latest,
-            'ma_short': latest_ma_short,
-            'ma_mid': latest_ma_mid,
-            'ma_long': latest_ma_long,
-            'ma_aligned': ma_aligned,
-            'all_slopes_up': all_slopes_up,
-            'adx': latest_adx if not pd.isna(latest_adx) else 0,
-            'plus_di': latest_plus_di if not pd.isna(latest_plus_di) else 0,
-            'minus_di': latest_minus_di if not pd.isna(latest_minus_di) else 0,
-            'gain_from_low_pct': round(gain_from_low, 2),
-            'price_dist_ma20': round(price_distance_from_ma20, 2),
-            'composite_score': round(score, 2),
-            'signals': signals,
-        }
-        
-    except Exception as e:
-        logger.warning(f"Error analyzing {ts_code}: {e}")
+    if df is None or df.empty:
         return None
+    scored = score_panel(MarketPanel.from_bars({ts_code: df}), index_returns_20d)
+    return scored.iloc[0].to_dict() if len(scored) else None
 
 
 def get_index_returns(end_date: str, period: int = 20) -> float:
@@ -467,34 +395,18 @@ def pick_longup_stocks(end_date: str, max_picks: int = 10) -> pd.DataFrame:
     all_stock_data = data_provider.get_bulk_ohlcv_by_date_range(start_date, end_date)
     logger.info(f"[ts_longup] Bulk fetch complete: {len(all_stock_data)} stocks with data")
     
-    # Analyze all stocks
-    results = []
-    total = len(stock_basic)
-    analyzed = 0
-    
-    for idx, row in stock_basic.iterrows():
-        if idx % 500 == 0:
-            logger.info(f"[ts_longup] Analyzing stocks: {idx}/{total}")
-        
-        ts_code = row['ts_code']
-        stock_df = all_stock_data.get(ts_code)
-        
-        if stock_df is not None:
-            analysis = analyze_stock_longup(ts_code, stock_df, index_returns_20d)
-            if analysis:
-                analysis['name'] = row['name']
-                results.append(analysis)
-                analyzed += 1
-    
-    logger.info(f"[ts_longup] Analyzed {analyzed} stocks passed initial filters")
-    
-    if not results:
+    # Score the universe on one panel, columns in stock_basic order (ties keep that order)
+    frames = {code: all_stock_data[code] for code in stock_basic['ts_code'] if code in all_stock_data}
+    df = score_panel(MarketPanel.from_bars(frames), index_returns_20d)
+    logger.info(f"[ts_longup] Analyzed {len(df)} stocks passed initial filters")
+
+    if df.empty:
         logger.warning("[ts_longup] No stocks passed the analysis criteria")
         return pd.DataFrame()
-    
-    # Create DataFrame
-    df = pd.DataFrame(results)
-    
+
+    names = stock_basic.drop_duplicates('ts_code').set_index('ts_code')['name']
+    df['name'] = df['ts_code'].map(names).to_numpy()
+
     # Sort by composite score descending
     df = df.sort_values('composite_score', ascending=False)
     
@@ -538,33 +450,24 @@ def pick_longup_stocks(end_date: str, max_picks: int = 10) -> pd.DataFrame:
     return df
 
 
-if __name__ == "__main__":
-    argv = sys.argv[1:]
-    lookahead = False
-    
-    if '--lookahead' in argv:
-        lookahead = True
-        argv.remove('--lookahead')
-    
-    if len(argv) >= 1:
-        date = convert_trade_date(argv[0])
-        target_date = argv[0]
-    else:
-        date = datetime.now().strftime('%Y%m%d')
-        target_date = date
-    
+def pick(date: str = None, flags: Sequence[str] = ()) -> pd.DataFrame:
+    """In-process entry point (see backtest/strategies/registry.py).
+
+    `date` is the target trading date; picks use the previous trading day's
+    data unless '--lookahead' is in `flags`. Returns selected_stocks records.
+    """
+    target_date = date or datetime.now().strftime('%Y%m%d')
+    ref_date = convert_trade_date(target_date)
+
     # Use previous trading day unless lookahead is enabled
-    if not lookahead:
-        date = get_trading_days_before(date, 1)
-    
-    logger.info(f"[ts_longup] Picking stocks for target date {target_date} with reference date: {date}")
-    
-    df = pick_longup_stocks(end_date=date)
-    
-    # Output to standard format
-    output_file = '/tmp/tmp'
+    if '--lookahead' not in flags:
+        ref_date = get_trading_days_before(ref_date, 1)
+
+    logger.info(f"[ts_longup] Picking stocks for target date {target_date} with reference date: {ref_date}")
+
+    df = pick_longup_stocks(end_date=ref_date)
+
     selected_stocks = []
-    
     for _, stock in df.iterrows():
         selected_stocks.append({
             'rank': int(stock['rank']),
@@ -572,8 +475,21 @@ if __name__ == "__main__":
             'name': stock.get('name', ''),
             'score': float(stock['composite_score']),
         })
-    
+    return pd.DataFrame(selected_stocks)
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    flags = [a for a in argv if a.startswith('--')]
+    args = [a for a in argv if not a.startswith('--')]
+
+    picks = pick(args[0] if args else None, flags)
+
+    # Output to standard format
+    output_file = '/tmp/tmp'
+    selected_stocks = selected_records(picks)
+
     with open(output_file, 'w') as f:
         json.dump({'selected_stocks': selected_stocks}, f)
-    
+
     logger.info(f"[ts_longup] Saved {len(selected_stocks)} picked stocks to {output_file}")
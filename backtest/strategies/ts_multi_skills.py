@@ -43,6 +43,8 @@ Usage:
 import os
 import sys
 import json
+from typing import Sequence
+import numpy as np
 import pandas as pd
 from loguru import logger
 from dotenv import load_dotenv
@@ -52,6 +54,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 from backtest.utils.trading_calendar import get_trading_days_before, convert_trade_date
 from backtest.utils.logging_config import configure_logger
 from backtest import data_provider
+from backtest.strategies.registry import selected_records
+from backtest.utils.lhb_index import load_lhb_index
 
 load_dotenv()
 LOG_LEVEL = os.getenv("LOG_LEVEL", default="INFO")
@@ -75,54 +79,29 @@ SCREEN_NEG_INST = -50_000_000   # #03: screen heavy institutional net-SELL (¥50
 BOOST_POS_INST = 8              # #13: score boost per +¥100M institutional net-buy
 # #07/#13 float-cap soft adjust (from LHB 流通市值, in ¥)
 FLOAT_OK_MIN = 2.0e9         # healthy float >= ¥2B (avoid micro-cap illiquidity)
-_lhb_inst = None
-_lhb_dragon = None
 
 
 def _load_lhb():
-    global _lhb_inst, _lhb_dragon
-    if _lhb_inst is None:
-        try:
-            _lhb_inst = pd.read_csv(LHB_CACHE) if os.path.exists(LHB_CACHE) else pd.DataFrame()
-            if not _lhb_inst.empty:
-                _lhb_inst['代码'] = _lhb_inst['代码'].astype(str).str.zfill(6)
-                _lhb_inst['上榜日期'] = _lhb_inst['上榜日期'].astype(str)
-                _lhb_inst['_d'] = _lhb_inst['上榜日期'].str.replace('-', '').astype(int)
-                _lhb_inst['inst_net'] = pd.to_numeric(_lhb_inst['机构买入净额'], errors='coerce').fillna(0.0)
-        except Exception as e:
-            logger.warning(f"[ts_multi_skills] LHB inst cache err: {e}")
-            _lhb_inst = pd.DataFrame()
-    if _lhb_dragon is None:
-        try:
-            _lhb_dragon = pd.read_csv(LHB_DRAGON_CACHE) if os.path.exists(LHB_DRAGON_CACHE) else pd.DataFrame()
-            if not _lhb_dragon.empty:
-                _lhb_dragon['代码'] = _lhb_dragon['代码'].astype(str).str.zfill(6)
-                _lhb_dragon['上榜日期'] = _lhb_dragon['上榜日期'].astype(str)
-                _lhb_dragon['_d'] = _lhb_dragon['上榜日期'].str.replace('-', '').astype(int)
-                _lhb_dragon['float'] = pd.to_numeric(_lhb_dragon['流通市值'], errors='coerce')
-        except Exception as e:
-            logger.warning(f"[ts_multi_skills] LHB dragon cache err: {e}")
-            _lhb_dragon = pd.DataFrame()
-    return _lhb_inst, _lhb_dragon
+    """Institutional net-buy and dragon-list float-cap ledgers, compiled once per process
+    (the institutional index is shared with ts_7AZ_96MA_flow)."""
+    return (load_lhb_index(LHB_CACHE, '机构买入净额'),
+            load_lhb_index(LHB_DRAGON_CACHE, '流通市值', dropna=True))
+
+
+def _lhb_window(ref_date: str):
+    ref_int = int(convert_trade_date(ref_date))
+    return ref_int - LHB_LOOKBACK_DAYS, ref_int
 
 
 def _institutional_flow(code6: str, ref_date: str) -> float:
     inst, _ = _load_lhb()
-    if inst.empty:
-        return 0.0
-    ref_int = int(convert_trade_date(ref_date))
-    sub = inst[(inst['代码'] == code6) & (inst['_d'] >= ref_int - LHB_LOOKBACK_DAYS) & (inst['_d'] < ref_int)]
-    return float(sub['inst_net'].sum()) if len(sub) else 0.0
+    return float(inst.window_sum([code6], *_lhb_window(ref_date))[0])
 
 
 def _float_cap(code6: str, ref_date: str) -> float | None:
     _, dragon = _load_lhb()
-    if dragon.empty:
-        return None
-    ref_int = int(convert_trade_date(ref_date))
-    sub = dragon[(dragon['代码'] == code6) & (dragon['_d'] >= ref_int - LHB_LOOKBACK_DAYS) & (dragon['_d'] < ref_int)]
-    vals = sub['float'].dropna()
-    return float(vals.iloc[-1]) if len(vals) else None
+    cap = dragon.window_last([code6], *_lhb_window(ref_date))[0]
+    return None if np.isnan(cap) else float(cap)
 
 
 def _apply_multi_skills(df: pd.DataFrame, ref_date: str) -> pd.DataFrame:
@@ -130,32 +109,22 @@ def _apply_multi_skills(df: pd.DataFrame, ref_date: str) -> pd.DataFrame:
     if df is None or df.empty:
         return df
     inst, dragon = _load_lhb()
-    rows = []
-    for _, row in df.iterrows():
-        ts_code = row['ts_code']
-        code6 = str(ts_code).split('.')[0].zfill(6)
-        flow = _institutional_flow(code6, ref_date)
-        score = float(row.get('score', 0) or 0)
-        # #13 institutional flow boost
-        boosted = score + BOOST_POS_INST * (flow / 100_000_000.0)
-        # #07/#13 float-cap soft adjust (small positive for healthy float)
-        fc = _float_cap(code6, ref_date)
-        if fc is not None and fc >= FLOAT_OK_MIN:
-            boosted += 0.5
-        rows.append({'row': row, 'code6': code6, 'flow': flow, 'boosted': boosted})
+    code6 = df['ts_code'].astype(str).str.split('.').str[0].str.zfill(6)
+    lo, hi = _lhb_window(ref_date)
+    flow = inst.window_sum(code6, lo, hi)
+    score = pd.to_numeric(df['score'], errors='coerce').fillna(0.0) if 'score' in df else 0.0
+    # #13 institutional flow boost
+    boosted = score + BOOST_POS_INST * (flow / 100_000_000.0)
+    # #07/#13 float-cap soft adjust (small positive for healthy float)
+    boosted = boosted + np.where(dragon.window_last(code6, lo, hi) >= FLOAT_OK_MIN, 0.5, 0.0)
     # #03 distribution screen
-    kept = [r for r in rows if r['flow'] >= SCREEN_NEG_INST]
-    screened = len(rows) - len(kept)
+    keep = flow >= SCREEN_NEG_INST
+    screened = int((~keep).sum())
     if screened:
-        logger.info(f"[ts_multi_skills] screened {screened}/{len(rows)} with inst net-SELL < {SCREEN_NEG_INST/1e6:.0f}M")
-    kept.sort(key=lambda r: r['boosted'], reverse=True)
-    out_rows = []
-    for i, r in enumerate(kept):
-        new = r['row'].copy()
-        new['rank'] = i + 1
-        new['score'] = r['boosted']
-        out_rows.append(new)
-    out = pd.DataFrame(out_rows)
+        logger.info(f"[ts_multi_skills] screened {screened}/{len(df)} with inst net-SELL < {SCREEN_NEG_INST/1e6:.0f}M")
+    out = df.loc[keep].assign(score=boosted[keep])
+    out = out.sort_values('score', ascending=False, kind='stable')
+    out['rank'] = range(1, len(out) + 1)
     logger.info(f"[ts_multi_skills] {len(out)} picks after multi-skill filter (screen {screened})")
     return out
 
@@ -197,7 +166,7 @@ def _regime_96ma(end_date: str) -> bool:
         return False
 
 
-def _write_output(df: pd.DataFrame) -> None:
+def _selected_stocks(df: pd.DataFrame) -> pd.DataFrame:
     selected_stocks = []
     if df is not None and not df.empty:
         for _, row in df.iterrows():
@@ -207,6 +176,11 @@ def _write_output(df: pd.DataFrame) -> None:
                 'name': row.get('name', ''),
                 'score': float(row.get('score', 0) or 0),
             })
+    return pd.DataFrame(selected_stocks)
+
+
+def _write_output(picks: pd.DataFrame) -> None:
+    selected_stocks = selected_records(picks)
     output_file = '/tmp/tmp'
     if os.path.isdir(output_file):
         output_file = '/tmp/ts_multi_skills_tmp.json'
@@ -215,41 +189,52 @@ def _write_output(df: pd.DataFrame) -> None:
     logger.info(f"[ts_multi_skills] Saved {len(selected_stocks)} picks to {output_file}")
 
 
-if __name__ == "__main__":
-    argv = sys.argv[1:]
-    lookahead = False
-    if '--lookahead' in argv:
-        lookahead = True
-        argv.remove('--lookahead')
+def pick_reads_reports(date: str) -> bool:
+    """Delegates to ts_7AZ, whose repeat-SL blacklist reads earlier order reports."""
+    from backtest.strategies.ts_7AZ import pick_reads_reports as _ts_7AZ_reads_reports
+    return _ts_7AZ_reads_reports(date)
 
-    if len(argv) >= 1:
-        target_date = convert_trade_date(argv[0])
-    else:
-        target_date = pd.Timestamp.today().strftime('%Y%m%d')
 
-    date = target_date
-    if not lookahead:
-        date = get_trading_days_before(date, 1)
+def pick(date: str = None, flags: Sequence[str] = ()) -> pd.DataFrame:
+    """In-process entry point (see backtest/strategies/registry.py).
+
+    `date` is the target trading date; picks use the previous trading day's
+    data unless '--lookahead' is in `flags`. Returns selected_stocks records.
+    """
+    target_date = convert_trade_date(date) if date else pd.Timestamp.today().strftime('%Y%m%d')
+
+    ref_date = target_date
+    if '--lookahead' not in flags:
+        ref_date = get_trading_days_before(target_date, 1)
 
-    logger.info(f"[ts_multi_skills] target {target_date} ref {date}")
+    logger.info(f"[ts_multi_skills] target {target_date} ref {ref_date}")
 
     from backtest.strategies.ts_7AZ import pick_strong_stocks
     from backtest.strategies.ts_96MA import pick_96mv_stocks
 
-    use_96 = _regime_96ma(date)
+    use_96 = _regime_96ma(ref_date)
     if use_96:
-        df = pick_96mv_stocks(end_date=date)
+        df = pick_96mv_stocks(end_date=ref_date)
         logger.info(f"[ts_multi_skills] used ts_96MA -> {len(df)} candidates")
     else:
-        df = pick_strong_stocks(date, date, src='ts_7AZ')
+        df = pick_strong_stocks(ref_date, ref_date, src='ts_7AZ')
         logger.info(f"[ts_multi_skills] used ts_7AZ -> {len(df)} candidates")
 
     # sustained-crash defensive fallback (same as production)
-    if (df is None or df.empty) and _in_crash(date):
+    if (df is None or df.empty) and _in_crash(ref_date):
         from backtest.strategies.ts_hma import pick_hma_stocks
         logger.warning("[ts_multi_skills] 0 picks + confirmed crash -> defensive ts_hma fallback")
-        df = pick_hma_stocks(end_date=date)
+        df = pick_hma_stocks(end_date=ref_date)
         logger.info(f"[ts_multi_skills] hma defensive fallback -> {len(df)}")
 
-    df = _apply_multi_skills(df, date)
-    _write_output(df)
+    df = _apply_multi_skills(df, ref_date)
+
+    return _selected_stocks(df)
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    flags = [a for a in argv if a.startswith('--')]
+    args = [a for a in argv if not a.startswith('--')]
+
+    _write_output(pick(args[0] if args else None, flags))
@@ -43,6 +43,8 @@ import os
 import sys
 import json
 import math
+from typing import Sequence
+import numpy as np
 import pandas as pd
 from loguru import logger
 from dotenv import load_dotenv
@@ -53,6 +55,8 @@ from backtest.utils.trading_calendar import get_trading_days_before, convert_tra
 from backtest.utils.logging_config import configure_logger
 from backtest.utils.market_regime import detect_market_regime
 from backtest import data_provider
+from backtest.data.panel import MarketPanel, ema, rolling_mean
+from backtest.strategies.registry import selected_records
 
 load_dotenv()
 LOG_LEVEL = os.getenv("LOG_LEVEL", default="INFO")
@@ -79,112 +83,110 @@ W_PROX = 1.0                 # proximity to MA20 (not extended)
 W_LOWVOL = 1.0               # low volatility
 
 
-# ── Indicator helpers (pure pandas) ──────────────────────────────
+# ── Indicator helpers (panel matrices: bars x symbols) ─────────
 
-def _ema(series: pd.Series, period: int) -> pd.Series:
-    return series.ewm(span=period, adjust=False).mean()
-
-
-def _macd(close: pd.Series, fast=12, slow=26, signal=9):
-    dif = _ema(close, fast) - _ema(close, slow)
-    dea = _ema(dif, signal)
+def _macd(close: np.ndarray, fast=12, slow=26, signal=9):
+    dif = ema(close, fast) - ema(close, slow)
+    dea = ema(dif, signal)
     return dif, dea, (dif - dea) * 2
 
 
-def _rsi(close: pd.Series, period: int = RSI_PERIOD) -> pd.Series:
-    delta = close.diff()
-    gain = delta.clip(lower=0).rolling(period).mean()
-    loss = (-delta.clip(upper=0)).rolling(period).mean()
-    rs = gain / loss.replace(0, pd.NA)
-    return (100 - 100 / (1 + rs)).fillna(50)
+def _rsi(close: np.ndarray, period: int = RSI_PERIOD) -> np.ndarray:
+    delta = np.diff(close, axis=0, prepend=np.nan)
+    gain = rolling_mean(np.clip(delta, 0, None), period)
+    loss = rolling_mean(np.clip(-delta, 0, None), period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - 100 / (1 + gain / loss)
+    return np.where(np.isnan(rsi) | (loss == 0), 50.0, rsi)
 
 
-def _annualized_vol(close: pd.Series, period: int = 20) -> float:
-    rets = close.pct_change().dropna()
-    if len(rets) < period:
-        return float('inf')
-    return float(rets.tail(period).std() * math.sqrt(252))
+def _annualized_vol(close: np.ndarray, lengths: np.ndarray, period: int = 20) -> np.ndarray:
+    """Annualized std of the last `period` daily returns; inf with fewer returns."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rets = close[1:] / close[:-1] - 1
+        vol = np.std(rets[-period:], axis=0, ddof=1) * math.sqrt(252)
+    return np.where(lengths - 1 < period, np.inf, vol)
 
 
-# ── Single-stock scoring ────────────────────────────────────────
+# ── Universe scoring ────────────────────────────────────────────
 
-def analyze_stock_with_data(ts_code: str, df: pd.DataFrame) -> dict | None:
-    """Score one stock. Returns dict (or None if it fails the hard gates)."""
-    try:
-        if df is None or df.empty or len(df) < MA_SLOW + 10:
-            return None
-        df = df.sort_values('trade_date', ascending=True).reset_index(drop=True)
-        close = df['close'].astype(float)
-        vol = df['vol'].astype(float) if 'vol' in df.columns else df['volume'].astype(float)
+def score_panel(panel: MarketPanel) -> pd.DataFrame:
+    """Score every symbol of a bar panel (MarketPanel.from_bars) in one pass.
+
+    Returns one row per stock passing the hard gates, in panel column order.
+    """
+    close = panel.close
+    if close.shape[0] < 6:
+        return pd.DataFrame()
+    last = close[-1]
 
-        ma20 = close.rolling(MA_FAST, min_periods=10).mean()
-        ma60 = close.rolling(MA_TREND, min_periods=30).mean()
-        ma120 = close.rolling(MA_SLOW, min_periods=60).mean()
+    def latest_or_last(ma):
+        return np.where(np.isnan(ma[-1]), last, ma[-1])
 
-        last = float(close.iloc[-1])
-        lma20 = float(ma20.iloc[-1]) if not pd.isna(ma20.iloc[-1]) else last
-        lma60 = float(ma60.iloc[-1]) if not pd.isna(ma60.iloc[-1]) else last
-        lma120 = float(ma120.iloc[-1]) if not pd.isna(ma120.iloc[-1]) else last
+    ma60 = panel.sma(MA_TREND, min_periods=30)
+    lma20 = latest_or_last(panel.sma(MA_FAST, min_periods=10))
+    lma60 = latest_or_last(ma60)
+    lma120 = latest_or_last(panel.sma(MA_SLOW, min_periods=60))
 
+    with np.errstate(divide='ignore', invalid='ignore'):
         # ── TREND gate ─────────────────────────────────────────
-        ma60_slope = (lma60 / float(ma60.iloc[-6]) - 1) * 100 if not pd.isna(ma60.iloc[-6]) else 0
+        ma60_slope = np.where(np.isnan(ma60[-6]), 0.0, (lma60 / ma60[-6] - 1) * 100)
         above_ma60 = last >= lma60
         above_ma20 = last >= lma20
-        stack_ok = (lma20 >= lma60) or (last > lma120)   # non-bearish MA stack
-        trend_pass = above_ma60 and above_ma20 and ma60_slope > -1.0 and stack_ok
-        if not trend_pass:
-            return None
+        stack_ok = (lma20 >= lma60) | (last > lma120)   # non-bearish MA stack
+        passed = (panel.lengths >= MA_SLOW + 10) & above_ma60 & above_ma20 & (ma60_slope > -1.0) & stack_ok
 
         # ── SWING: MACD rhythm ─────────────────────────────────
-        dif, dea, hist = _macd(close)
-        ldif, ldea = float(dif.iloc[-1]), float(dea.iloc[-1])
-        macd_above_zero = ldif > 0 or ldea > 0
-        macd_bullish = ldif > ldea
+        dif, dea, _ = _macd(close)
+        macd_above_zero = (dif[-1] > 0) | (dea[-1] > 0)
+        macd_bullish = dif[-1] > dea[-1]
         # fresh golden cross within last 5 days = fresh swing buy trigger
-        gc_recent = any((float(dif.iloc[i]) > float(dea.iloc[i]))
-                        and (float(dif.iloc[i-1]) <= float(dea.iloc[i-1]))
-                        for i in range(len(close)-1, max(len(close)-6, 0), -1)) \
-            if len(dif) >= 6 else False
-        macd_ok = (macd_above_zero and macd_bullish) or gc_recent
-        if not macd_ok:
-            return None
+        gc_recent = ((dif[-5:] > dea[-5:]) & (dif[-6:-1] <= dea[-6:-1])).any(axis=0)
+        passed &= (macd_above_zero & macd_bullish) | gc_recent
 
         # ── SWING: pullback to support (not stretched) ─────────
-        rsi = float(_rsi(close).iloc[-1])
-        dist_ma20 = (last / lma20 - 1)  * 100
-        pullback_ok = rsi >= RSI_MIN and rsi <= RSI_MAX and dist_ma20 <= PULLBACK_BAND * 100
-        if not pullback_ok:
-            return None
-
-        # ── DEFENSIVE: volatility + liquidity ──────────────────
-        ann_vol = _annualized_vol(close)
-        vol_ok = ann_vol < MAX_VOLATILITY
-        recent_vol = float(vol.tail(10).mean()) if len(vol) > 10 else 1.0
-
-        # ── Composite Q score ───────────────────────────────────
-        q = 0.0
-        q += W_TREND * (2.0 if (above_ma60 and ma60_slope > 0.5) else (1.0 if above_ma60 else 0.0))
-        q += W_MACD * (2.0 if (macd_above_zero and macd_bullish) else 1.0)
-        q += W_PROX * (2.0 if abs(dist_ma20) <= 2.0 else (1.0 if dist_ma20 > 0 else 0.0))
-        q += W_LOWVOL * (2.0 if ann_vol < 0.25 else (1.0 if vol_ok else 0.0))
-        composite = max(0.0, min(100.0, (q / (2*(W_TREND+W_MACD+W_PROX+W_LOWVOL))) * 100))
-
-        return {
-            'ts_code': ts_code,
-            'close': last,
-            'ma20': lma20,
-            'ma60': lma60,
-            'dist_ma20': dist_ma20,
-            'rsi': rsi,
-            'macd': ldif - ldea,
-            'composite_score': composite,
-            'volatility': ann_vol,
-            'recent_vol': recent_vol,
-            'trend': 'Bullish' if (above_ma60 and ma60_slope > 0) else 'Neutral',
-        }
-    except Exception as e:
-        logger.warning(f"[ts_multi_swing_defensive] error {ts_code}: {e}")
+        rsi = _rsi(close)[-1]
+        dist_ma20 = (last / lma20 - 1) * 100
+        passed &= (rsi >= RSI_MIN) & (rsi <= RSI_MAX) & (dist_ma20 <= PULLBACK_BAND * 100)
+
+    if not passed.any():
+        return pd.DataFrame()
+    cols = np.flatnonzero(passed)
+
+    # ── DEFENSIVE: volatility + liquidity ──────────────────────
+    ann_vol = _annualized_vol(close[:, cols], panel.lengths[cols])
+    vol_ok = ann_vol < MAX_VOLATILITY
+    recent_vol = np.where(panel.lengths[cols] > 10, np.nanmean(panel.vol[-10:, cols], axis=0), 1.0)
+
+    # ── Composite Q score ───────────────────────────────────────
+    above, slope, dist = above_ma60[cols], ma60_slope[cols], dist_ma20[cols]
+    q = W_TREND * np.where(above & (slope > 0.5), 2.0, np.where(above, 1.0, 0.0))
+    q += W_MACD * np.where(macd_above_zero[cols] & macd_bullish[cols], 2.0, 1.0)
+    q += W_PROX * np.where(np.abs(dist) <= 2.0, 2.0, np.where(dist > 0, 1.0, 0.0))
+    q += W_LOWVOL * np.where(ann_vol < 0.25, 2.0, np.where(vol_ok, 1.0, 0.0))
+    composite = np.clip(q / (2*(W_TREND+W_MACD+W_PROX+W_LOWVOL)) * 100, 0.0, 100.0)
+
+    return pd.DataFrame({
+        'ts_code': [panel.symbols[c] for c in cols],
+        'close': last[cols],
+        'ma20': lma20[cols],
+        'ma60': lma60[cols],
+        'dist_ma20': dist,
+        'rsi': rsi[cols],
+        'macd': dif[-1, cols] - dea[-1, cols],
+        'composite_score': composite,
+        'volatility': ann_vol,
+        'recent_vol': recent_vol,
+        'trend': np.where(above & (slope > 0), 'Bullish', 'Neutral'),
+    })
+
+
+def analyze_stock_with_data(ts_code: str, df: pd.DataFrame) -> dict | None:
+    """Score one stock. Returns dict (or None if it fails the hard gates)."""
+    if df is None or df.empty:
         return None
+    scored = score_panel(MarketPanel.from_bars({ts_code: df}))
+    return scored.iloc[0].to_dict() if len(scored) else None
 
 
 # ── Entry point ─────────────────────────────────────────────────
@@ -221,27 +223,21 @@ def pick_multi_swing_defensive(end_date: str, max_picks: int = 10) -> pd.DataFra
     all_data = data_provider.get_bulk_ohlcv_by_date_range(start_date, end_date)
     logger.info(f"[ts_multi_swing_defensive] bulk fetch: {len(all_data)} stocks")
 
-    results = []
-    for idx, row in stock_basic.iterrows():
-        if idx % 1000 == 0:
-            logger.info(f"[ts_multi_swing_defensive] analyzing {idx}/{len(stock_basic)}")
-        ts_code = row['ts_code']
-        sdf = all_data.get(ts_code)
-        if sdf is None:
-            continue
-        analysis = analyze_stock_with_data(ts_code, sdf)
-        if analysis:
-            # weak-regime defensiveness: bump the effective bar
-            if regime in ('bear', 'volatile') and analysis['volatility'] > 0.30:
-                continue
-            analysis['name'] = row.get('name', '')
-            results.append(analysis)
-
-    if not results:
+    # One panel for the universe, columns in stock_basic order (ties keep that order)
+    frames = {code: all_data[code] for code in stock_basic['ts_code'] if code in all_data}
+    df = score_panel(MarketPanel.from_bars(frames))
+    logger.info(f"[ts_multi_swing_defensive] {len(df)} of {len(frames)} stocks pass the gates")
+    if not df.empty and regime in ('bear', 'volatile'):
+        # weak-regime defensiveness: bump the effective bar
+        df = df[~(df['volatility'] > 0.30)]
+
+    if df.empty:
         logger.warning("[ts_multi_swing_defensive] no candidates")
         return pd.DataFrame()
 
-    df = pd.DataFrame(results)
+    names = stock_basic.drop_duplicates('ts_code').set_index('ts_code')['name'] \
+        if 'name' in stock_basic.columns else pd.Series(dtype=object)
+    df = df.assign(name=df['ts_code'].map(names).fillna('').to_numpy())
     df = df.sort_values('composite_score', ascending=False)
     kept = df[df['composite_score'] >= min_score]
     if len(kept) == 0:
@@ -253,29 +249,21 @@ def pick_multi_swing_defensive(end_date: str, max_picks: int = 10) -> pd.DataFra
     return kept
 
 
-if __name__ == "__main__":
-    argv = sys.argv[1:]
-    lookahead = False
-    if '--lookahead' in argv:
-        lookahead = True
-        argv.remove('--lookahead')
-
-    if len(argv) >= 1:
-        target_date = convert_trade_date(argv[0])
-    else:
-        target_date = pd.Timestamp.today().strftime('%Y%m%d')
+def pick(date: str = None, flags: Sequence[str] = ()) -> pd.DataFrame:
+    """In-process entry point (see backtest/strategies/registry.py).
 
-    date = target_date
-    if not lookahead:
-        date = get_trading_days_before(date, 1)
+    `date` is the target trading date; picks use the previous trading day's
+    data unless '--lookahead' is in `flags`. Returns selected_stocks records.
+    """
+    target_date = convert_trade_date(date) if date else pd.Timestamp.today().strftime('%Y%m%d')
 
-    logger.info(f"[ts_multi_swing_defensive] target {target_date} ref {date}")
+    ref_date = target_date
+    if '--lookahead' not in flags:
+        ref_date = get_trading_days_before(ref_date, 1)
 
-    df = pick_multi_swing_defensive(end_date=date)
+    logger.info(f"[ts_multi_swing_defensive] target {target_date} ref {ref_date}")
 
-    output_file = '/tmp/tmp'
-    if os.path.isdir(output_file):
-        output_file = '/tmp/ts_multi_swing_defensive_tmp.json'
+    df = pick_multi_swing_defensive(end_date=ref_date)
 
     selected = []
     if df is not None and not df.empty:
@@ -286,6 +274,21 @@ if __name__ == "__main__":
                 'name': stock.get('name', ''),
                 'score': float(stock['composite_score']),
             })
+    return pd.DataFrame(selected)
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    flags = [a for a in argv if a.startswith('--')]
+    args = [a for a in argv if not a.startswith('--')]
+
+    picks = pick(args[0] if args else None, flags)
+
+    output_file = '/tmp/tmp'
+    if os.path.isdir(output_file):
+        output_file = '/tmp/ts_multi_swing_defensive_tmp.json'
+
+    selected = selected_records(picks)
 
     with open(output_file, 'w') as f:
         json.dump({'selected_stocks': selected}, f)
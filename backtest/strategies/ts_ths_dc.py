@@ -29,7 +29,6 @@ selected_columns = ['股票代码', '股票简称', '最新价','最新涨跌幅
 """
 import os
 import sys
-import time
 from datetime import datetime
 import json
 from dotenv import load_dotenv
@@ -37,15 +36,19 @@ from loguru import logger
 import pandas as pd
 import numpy as np
 import warnings
-from typing import Any
+from typing import Any, Sequence
 
 import tushare as ts
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from backtest import data_provider
+from backtest import data_provider, DB_CACHE_FILE
+from backtest.data.sector_store import SectorStore, three_day_returns
+from backtest.data.sqlite_cache import create_data_cache
 from backtest.utils.trading_calendar import get_trading_days_before, get_trading_days_between
 from backtest.utils.util import convert_trade_date
+from backtest.utils.rate_limiter import rate_limited_pro
 from backtest.utils.market_regime import detect_market_regime
+from backtest.strategies.registry import selected_records
 
 warnings.filterwarnings("ignore", category=UserWarning, module='py_mini_racer')
 
@@ -53,9 +56,10 @@ load_dotenv()
 TUSHARE_TOKEN = os.getenv("TUSHARE_TOKEN")
 if not TUSHARE_TOKEN:
     raise ValueError("Please set the TUSHARE_TOKEN environment variable.")
-PRO = ts.pro_api(TUSHARE_TOKEN)     # pyright: ignore
+PRO = rate_limited_pro(ts.pro_api(TUSHARE_TOKEN))     # pyright: ignore
 RECENT_DAYS = 5                     # recent days to calculate returns
 LOOKBACK_DAYS = RECENT_DAYS * 4     # trading days lookback, almost 4 weeks, 1 month.
+SECTOR_STORES = {}                  # src -> SectorStore (concept bars and members persisted in DB_CACHE_FILE)
 
 def get_concept_sectors(start_date: str, end_date: str, src: str='ts_ths') -> pd.DataFrame:
     """
@@ -101,25 +105,40 @@ def batch_get_concept_daily(concept_list: pd.DataFrame, start_date: str, end_dat
     logger.info(f"Got {len(concept_codes)} concept codes.")
 
     # Got all concepts/sectors from [ths_index](https://tushare.pro/document/2?doc_id=260)
-    # Obtain daily data for all sectors(3000 records/once) in order to avoid frequent API call limits(5 times/minute).
-    # Each day records < 3000, max 3000/1 time. end_date - start_date = RECENT_DAYS days to get all concepts.
-    all_concept_daily = pd.DataFrame()
-    for date in get_trading_days_between(start_date, end_date):
-        if src == 'ts_ths':
-            concept_daily = PRO.ths_daily(start_date=date, end_date=date)
-        else:
-            concept_daily = PRO.dc_daily(start_date=date, end_date=date)
-        if 'trade_date' in concept_daily:
-            concept_daily = concept_daily.sort_values(by='trade_date', ascending=False)
-        # 过滤出概念板块
-        concept_daily = concept_daily[concept_daily['ts_code'].isin(concept_codes)]
-        logger.info(f"{date} concept daily records: {len(concept_daily)}")
-        all_concept_daily = pd.concat([all_concept_daily, concept_daily], ignore_index=True)
-        time.sleep(1)
+    # Daily data for all sectors is one call per day (< 3000 records) and persisted per day,
+    # so a window shifted by one trading day costs one fetch.
+    api = PRO.ths_daily if src == 'ts_ths' else PRO.dc_daily
+    all_concept_daily = _sector_store(src).concept_daily(
+        get_trading_days_between(start_date, end_date),
+        lambda date: api(start_date=date, end_date=date))
+    if all_concept_daily.empty:
+        return all_concept_daily
+    # 过滤出概念板块
+    all_concept_daily = all_concept_daily[all_concept_daily['ts_code'].isin(concept_codes)]
+    all_concept_daily = all_concept_daily.sort_values(by='trade_date', ascending=False, kind='stable').reset_index(drop=True)
     logger.info(f"Got {len(all_concept_daily)} concept sectors daily records from {start_date} to {end_date}.")
     return all_concept_daily
 
 
+def _sector_store(src: str) -> SectorStore:
+    store = SECTOR_STORES.get(src)
+    if store is None:
+        store = SECTOR_STORES[src] = SectorStore(create_data_cache(DB_CACHE_FILE), src=src)
+    return store
+
+
+def _member_bars(codes: Sequence[str], start_date: str, end_date: str) -> pd.DataFrame:
+    """OHLCV bars of `codes` in the window, from the whole-market daily snapshots when available."""
+    bulk = data_provider.get_bulk_ohlcv_by_date_range(start_date, end_date)
+    frames = [bulk[c] for c in codes if c in bulk] if bulk else []
+    if not frames:
+        frames = [data_provider.get_ohlcv_data(symbol=c, start_date=start_date, end_date=end_date) for c in codes]
+        frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=['ts_code', 'trade_date', 'close'])
+    return pd.concat(frames, ignore_index=True)
+
+
 # 策略1: 基于板块动量筛选强势股
 def sector_momentum_strategy(stock_basic: pd.DataFrame, concept_list: pd.DataFrame, start_date: str, end_date: str, src: str='ts_ths') -> pd.DataFrame:
     logger.info("策略1: 板块动量选股")
@@ -130,72 +149,62 @@ def sector_momentum_strategy(stock_basic: pd.DataFrame, concept_list: pd.DataFra
             sector_data = pd.merge(all_concept_daily, concept_list[['ts_code', 'name']], on=['ts_code'], how='left')
         else:
             sector_data = pd.merge(all_concept_daily, concept_list[['ts_code', 'trade_date', 'name']], on=['ts_code', 'trade_date'], how='left')
-        sector_data = sector_data.sort_values(['ts_code', 'trade_date'], ascending=[True, False])
-        sector_performance = []
-        for sector_code in sector_data['ts_code'].unique():
-            sector_daily = sector_data[sector_data['ts_code'] == sector_code]
-            if len(sector_daily) >= 4:  # Need at least 4 days for 3-day return
-                sector_name = sector_daily['name'].iloc[0]
-                # 计算3日收益率 (Identify hot sectors faster, T vs T-3)
-                recent_3d_return = (sector_daily.iloc[0]['close'] / sector_daily.iloc[3]['close'] - 1) * 100
-                if recent_3d_return > 3:  # 3日内涨幅超过3%
-                    sector_performance.append({
-                        'sector_name': sector_name,
-                        'sector_code': sector_code,
-                        '3d_return': recent_3d_return,
-                        'data_points': len(sector_daily)
-                    })
-
-        # 按收益率排序
-        sector_performance.sort(key=lambda x: x['3d_return'], reverse=True)
+        # 计算3日收益率 (Identify hot sectors faster, T vs T-3); needs at least 4 days
+        sector_returns = three_day_returns(sector_data)
+        sector_returns = sector_returns[sector_returns > 3].sort_values(ascending=False, kind='stable')  # 3日内涨幅超过3%
+        sector_names = sector_data.sort_values('trade_date', ascending=False).drop_duplicates('ts_code').set_index('ts_code')['name']
+        sector_performance = [
+            {'sector_name': sector_names.get(code), 'sector_code': code, '3d_return': ret}
+            for code, ret in sector_returns.items()
+        ]
 
         logger.info("强势板块排名top 10:")
         for i, sector in enumerate(sector_performance[:10], 1):
             logger.info(f"{i}. {sector['sector_name']}: {sector['3d_return']:.2f}%")
 
         # 获取强势板块的成分股
+        store = _sector_store(src)
+        member_api = PRO.ths_member if src == 'ts_ths' else PRO.dc_member
+        sector_members = {}
         for sector in sector_performance[:10]:
-            if src == 'ts_ths':
-                # ts_code, con_code, con_name
-                members = PRO.ths_member(ts_code=sector['sector_code'])
-            else:
-                # trade_date, ts_code, con_code, name 
-                members = PRO.dc_member(ts_code=sector['sector_code'])
+            # ts_ths: ts_code, con_code, con_name; ts_dc: trade_date, ts_code, con_code, name
+            members = store.members(sector['sector_code'], end_date, lambda code: member_api(ts_code=code))
+            if members.empty:
+                sector_members[sector['sector_code']] = members
+                continue
             # filter members from start_date to end_date and no-risk mainboard stocks
             members = members[members['con_code'].isin(stock_basic['ts_code'])].reset_index(drop=True)
             if src == 'ts_dc':
                 members = members[(members['trade_date'] >= start_date) & (members['trade_date'] <= end_date)]
+            sector_members[sector['sector_code']] = members.drop_duplicates('con_code')
 
-            sector_stocks = []
-            logger.info(f'Get sector ({sector["sector_code"]}){sector["sector_name"]} {len(members)} members daily data from {start_date} to {end_date} ...')
-            for _, member in members.iterrows():
-                stock_data = data_provider.get_ohlcv_data(symbol=member['con_code'], start_date=start_date, end_date=end_date)
-                if 'trade_date' in stock_data:
-                    stock_data = stock_data.sort_values(by='trade_date', ascending=False)
-                if len(stock_data) >= 4:
-                    # Calculate 3-day return for stock
-                    stock_3d_return = (stock_data.iloc[0]['close'] /
-                                        stock_data.iloc[3]['close'] - 1) * 100
-                    
-                    # [MODIFIED] Remove < 15% cap to allow Dragon stocks
-                    # Only filter out weak stocks (< 5%)
-                    if stock_3d_return > 3:
-                        sector_stocks.append({
-                            'ts_code': member['con_code'],
-                            'name': member['con_name'] if 'con_name' in member else member['name'],
-                            'sector': sector['sector_name'],
-                            'sector_return': sector['3d_return'],
-                            'stock_3d_return': stock_3d_return,
-                            'strategy': '板块动量'
-                        })
-            
-            # Identify Sector Leader (Dragon)
-            if sector_stocks:
-                sector_stocks.sort(key=lambda x: x['stock_3d_return'], reverse=True)
-                # Mark the top stock as Leader
-                sector_stocks[0]['is_leader'] = True
-                # Add top 3 to strong_stocks
-                strong_stocks.extend(sector_stocks[:3])
+        codes = sorted({c for m in sector_members.values() if not m.empty for c in m['con_code']})
+        logger.info(f'Get {len(codes)} sector members daily data from {start_date} to {end_date} ...')
+        stock_returns = three_day_returns(_member_bars(codes, start_date, end_date)) if codes else pd.Series(dtype=float)
+
+        for sector in sector_performance[:10]:
+            members = sector_members[sector['sector_code']]
+            if members.empty:
+                continue
+            members = members.assign(stock_3d_return=members['con_code'].map(stock_returns))
+            # [MODIFIED] Remove < 15% cap to allow Dragon stocks
+            # Only filter out weak stocks (< 3%)
+            members = members[members['stock_3d_return'] > 3]
+            if members.empty:
+                continue
+            # Identify Sector Leader (Dragon): top 3 by 3-day return, the first marked as leader
+            members = members.sort_values('stock_3d_return', ascending=False, kind='stable').head(3)
+            name_col = 'con_name' if 'con_name' in members else 'name'
+            sector_stocks = [{
+                'ts_code': code,
+                'name': name,
+                'sector': sector['sector_name'],
+                'sector_return': sector['3d_return'],
+                'stock_3d_return': ret,
+                'strategy': '板块动量'
+            } for code, name, ret in zip(members['con_code'], members[name_col], members['stock_3d_return'])]
+            sector_stocks[0]['is_leader'] = True
+            strong_stocks.extend(sector_stocks)
 
     except Exception as e:
         logger.error(f"板块动量策略执行出错: {e}")
@@ -226,7 +235,6 @@ def money_flow_strategy(stock_basic: pd.DataFrame, start_date: str, end_date: st
                         accumulated_mf = pd.merge(accumulated_mf, daily_mf_subset, on='ts_code', how='outer', suffixes=('', '_new'))
                         accumulated_mf['net_mf_amount'] = accumulated_mf['net_mf_amount'].fillna(0) + accumulated_mf['net_mf_amount_new'].fillna(0)
                         accumulated_mf = accumulated_mf[['ts_code', 'net_mf_amount']]
-                time.sleep(0.1) # Avoid hitting API rate limits
             except Exception as e:
                 logger.warning(f"Failed to fetch money flow for {trade_date}: {e}")
                 raise
@@ -640,8 +648,34 @@ def no_risky_stocks(stock_basic: pd.DataFrame, mainboard: bool = True) -> list[s
     return risky_free_stocks
 
 
+def pick(date: str = None, flags: Sequence[str] = (), src: str = 'ts_ths') -> pd.DataFrame:
+    """In-process entry point (see backtest/strategies/registry.py).
+
+    Screens the RECENT_DAYS window ending on the previous trading day of
+    `date` using sector source `src` ('ts_ths' or 'ts_dc'); `flags` are
+    accepted for interface compatibility and ignored. Returns selected_stocks
+    records.
+    """
+    if src not in ['ts_ths', 'ts_dc']:
+        raise ValueError(f"Unknown sector source {src!r}, expected 'ts_ths' or 'ts_dc'")
+    end_date = convert_trade_date(date) if date else datetime.now().strftime('%Y%m%d')
+    end_date = get_trading_days_before(end_date, 1)
+    start_date = get_trading_days_before(end_date, RECENT_DAYS-1)
+    df = pick_strong_stocks(start_date=start_date, end_date=end_date, src=src)
+
+    selected_stocks = []
+    for _, stock in df.iterrows():
+        selected_stocks.append({
+            'rank': int(stock['rank']),
+            'symbol': stock['ts_code'],
+            'score': float(f"{stock['composite_score']:.2f}")
+        })
+    return pd.DataFrame(selected_stocks)
+
+
 if __name__ == "__main__":
-    argv = sys.argv[1:]
+    flags = [a for a in sys.argv[1:] if a.startswith('--')]
+    argv = [a for a in sys.argv[1:] if not a.startswith('--')]
     if len(argv) >=2:
         src = argv[1]
         date = convert_trade_date(argv[0])
@@ -657,24 +691,16 @@ if __name__ == "__main__":
 
     # Save to /tmp/tmp: {"selected_stocks": [{"rank": 1, "symbol": "603085.SH", "score": 0.94},...]}
     output_file = '/tmp/tmp'
-    date = get_trading_days_before(date, 1)
-    start_date = get_trading_days_before(date, RECENT_DAYS-1)
-    end_date = date
-    days = get_trading_days_between(start_date, end_date)
-    df = pick_strong_stocks(start_date=start_date, end_date=end_date, src=src)
     if len(argv) >=1:
-        selected_stocks = []
-        for _, stock in df.iterrows():
-            selected_stocks.append({
-                'rank': int(stock['rank']),
-                'symbol': stock['ts_code'],
-                'score': float(f"{stock['composite_score']:.2f}")
-            })
+        selected_stocks = selected_records(pick(argv[0], flags, src=src))
         with open(output_file, 'w') as f:
             json.dump({'selected_stocks': selected_stocks}, f)
         logger.info(f"Saved picked stocks to {output_file}")
         exit(0)
 
+    date = get_trading_days_before(date, 1)
+    start_date = get_trading_days_before(date, RECENT_DAYS-1)
+    df = pick_strong_stocks(start_date=start_date, end_date=date, src=src)
     print("TOP 10强势股排名--------------------------")
     for i, (_, stock) in enumerate(df.head(10).iterrows(), 1):
         print(f"{i}. {stock['name']}({stock['ts_code']}) - 排名: {stock['rank']} - 综合评分: {stock['composite_score']:.2f}")
@@ -0,0 +1,381 @@
+#!/usr/bin/python3
+"""
+Parameter sweep — many backtests over one pick set and one market-data load.
+
+Tuning DRAWDOWN_BUDGET, the regime position limits, TP/SL thresholds or
+SCORE_MIN otherwise takes one full engine.py run per combination, each
+re-picking every date and re-fetching data into the one test_imobile.db.
+The sweep instead:
+
+  1. picks every date once, untruncated and without the SCORE_MIN filter
+     (engine.py's parallel pick phase), and warms the market-data cache for
+     every picked symbol over the range;
+  2. replays the order pass once per parameter set, each in its own process
+     with a private scratch database and report directory; a variant applies
+     its own SCORE_MIN filter and regime position limit to the shared picks;
+  3. writes sweep_summary.md / sweep_summary.csv ranked by total return
+     (or --rank-by).
+
+Usage:
+  python backtest/sweep.py run <start_date> <end_date> [src] --grid grid.json [--workers N]
+
+Grid file (JSON):
+  {"grid": {"SCORE_MIN": [0, 5], "DRAWDOWN_BUDGET.shrink30_dd": [-2.0, -3.0]}}
+      cartesian product of the value lists, or
+  {"variants": [{"SL_BULL": 0.04}, {"REGIME_MAX_POSITIONS.bull": 8}]}
+      explicit parameter sets.
+  A baseline variant (no overrides) is always included.
+
+Parameter keys:
+  UPPER_CASE                  environment variable (SCORE_MIN, SL_BULL, HOLD_DAYS_MULT, ...)
+  DRAWDOWN_BUDGET.<key>       engine.DRAWDOWN_BUDGET entry
+  REGIME_MAX_POSITIONS.<key>  engine.REGIME_MAX_POSITIONS entry
+  anything else               dotted config.json key,
+                              e.g. trading_rules.risk_reward_ratios.bull_market.stop_loss_pct
+
+Dates whose pick may read the run's own earlier reports (see
+strategies/registry.pick_reads_reports) are not shared: each variant picks
+them inline during its own order pass.
+
+Examples:
+  python backtest/sweep.py run 20260101 20260630 ts_7AZ --grid sweep.json --no-search --no-ai --workers 8
+"""
+
+import os
+import sys
+import json
+import argparse
+import itertools
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+from loguru import logger
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# engine module dicts that can be overridden per variant
+ENGINE_TABLES = ('DRAWDOWN_BUDGET', 'REGIME_MAX_POSITIONS')
+# Pick files of the shared phase keep every candidate; variants truncate
+UNCAPPED_POSITIONS = 1_000_000
+RANK_METRICS = ('total_return_pct', 'max_drawdown_pct', 'realized_pnl', 'final_value', 'excess_csi300_pct')
+
+
+def load_param_sets(grid_file: str) -> List[Dict[str, Any]]:
+    """Read the parameter sets of a grid file, baseline (no overrides) first."""
+    with open(grid_file, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    if 'variants' in spec:
+        param_sets = [dict(p) for p in spec['variants']]
+    elif 'grid' in spec:
+        keys = list(spec['grid'])
+        param_sets = [dict(zip(keys, values)) for values in itertools.product(*(spec['grid'][k] for k in keys))]
+    else:
+        raise ValueError(f"Grid file {grid_file} needs a 'grid' or 'variants' entry")
+    return [{}] + [p for p in param_sets if p]
+
+
+def variant_name(index: int, params: Dict[str, Any]) -> str:
+    return 'baseline' if not params else f'v{index:02d}'
+
+
+def split_overrides(params: Dict[str, Any]) -> Tuple[Dict[str, str], Dict[str, Any], Dict[str, Any]]:
+    """Split a parameter set into (environment, config.json, engine-table) overrides."""
+    env, config, engine = {}, {}, {}
+    for key, value in params.items():
+        if key.split('.', 1)[0] in ENGINE_TABLES and '.' in key:
+            engine[key] = value
+        elif '.' not in key and key == key.upper():
+            env[key] = str(value).lower() if isinstance(value, bool) else str(value)
+        else:
+            config[key] = value
+    return env, config, engine
+
+
+def write_variant_config(base_config_file: str, overrides: Dict[str, Any], path: str) -> str:
+    """Write a copy of the base config.json with dotted-key overrides applied."""
+    from backtest.utils.config import ConfigManager
+
+    cm = ConfigManager(config_file=base_config_file)
+    for key, value in overrides.items():
+        if cm.get(key) is None:
+            logger.warning(f"Sweep config key '{key}' is not in {base_config_file}; adding it")
+        cm.set(key, value)
+    cm.config_file = path
+    cm.save_config()
+    return path
+
+
+def write_variant_picks(raw_file: str, out_dir: str, regime_data: Dict[str, Any],
+                        score_min: int, max_positions: int) -> str:
+    """Derive a variant's pick file from a shared, untruncated one.
+
+    Applies the same SCORE_MIN filter and position truncation as
+    engine.pick_stocks_to_file, with the variant's regime data.
+    """
+    with open(raw_file, 'r') as f:
+        data = json.load(f)
+    selected = data.get('selected_stocks', [])
+    if score_min > 0:
+        selected = [s for s in selected if (s.get('score') or 0) >= score_min]
+    data['selected_stocks'] = selected[:max_positions]
+    data['market_pattern'] = regime_data.get('regime', data.get('market_pattern'))
+    data['regime_data'] = regime_data
+    out_file = os.path.join(out_dir, os.path.basename(raw_file))
+    with open(out_file, 'w') as f:
+        json.dump(data, f)
+    return out_file
+
+
+def rank_results(results: List[Dict[str, Any]], rank_by: str = 'total_return_pct') -> List[Dict[str, Any]]:
+    """Order variant results best-first by `rank_by`; failed or crashed variants go last."""
+    def _key(result):
+        value = None if result.get('returncode') else (result.get('summary') or {}).get(rank_by)
+        return (value is None, -value if value is not None else 0.0)
+    return sorted(results, key=_key)
+
+
+def _format_params(params: Dict[str, Any]) -> str:
+    return ', '.join(f'{k}={v}' for k, v in params.items()) or '(baseline)'
+
+
+def write_summary(ranked: List[Dict[str, Any]], sweep_dir: str, title: str, rank_by: str) -> Tuple[str, str]:
+    """Write the ranked comparison table as markdown and CSV; returns both paths."""
+    md_file = os.path.join(sweep_dir, 'sweep_summary.md')
+    csv_file = os.path.join(sweep_dir, 'sweep_summary.csv')
+
+    rows = []
+    for rank, result in enumerate(ranked, 1):
+        summary = result.get('summary') or {}
+        rows.append({'rank': rank, 'variant': result['variant'], 'params': json.dumps(result['params']),
+                     'returncode': result.get('returncode'), 'error': result.get('error') or '', **summary})
+    pd.DataFrame(rows).to_csv(csv_file, index=False)
+
+    crashed = [r['variant'] for r in ranked if r.get('returncode')]
+    with open(md_file, 'w', encoding='utf-8') as f:
+        f.write(f"# Parameter Sweep: {title}\n\n")
+        f.write(f"**Ranked by:** `{rank_by}`\n\n")
+        if crashed:
+            f.write(f"**⚠ {len(crashed)} variant(s) exited non-zero:** {', '.join(crashed)}\n\n")
+        f.write("| Rank | Variant | Parameters | Total Return | Max DD | Realized P&L | Final Value | Txns | Sells | Excess vs CSI 300 |\n")
+        f.write("|------|---------|------------|--------------|--------|--------------|-------------|------|-------|-------------------|\n")
+        for rank, result in enumerate(ranked, 1):
+            s = result.get('summary')
+            params = _format_params(result['params'])
+            if not s or result.get('returncode'):
+                failed = f"failed (exit {result['returncode']})" if result.get('returncode') else 'failed'
+                f.write(f"| {rank} | {result['variant']} | {params} | {failed}: {result.get('error') or 'no period report'} | - | - | - | - | - | - |\n")
+                continue
+            excess = f"{s['excess_csi300_pct']:.2f}%" if s.get('excess_csi300_pct') is not None else '-'
+            f.write(f"| {rank} | {result['variant']} | {params} | {s['total_return_pct']:.2f}% | "
+                    f"{s['max_drawdown_pct']:.2f}% | ¥{s['realized_pnl']:,.2f} | ¥{s['final_value']:,.2f} | "
+                    f"{s['transactions']} | {s['sells']} | {excess} |\n")
+    return md_file, csv_file
+
+
+def warm_market_data(pick_files: Dict[str, str], start_date: str, end_date: str) -> None:
+    """Fetch OHLCV/fundamentals for every picked symbol over the range once, into the shared cache."""
+    from backtest import data_provider
+    from backtest.utils.trading_calendar import calendar
+
+    symbols = set()
+    for pick_file in pick_files.values():
+        with open(pick_file, 'r') as f:
+            symbols.update(s['symbol'] for s in json.load(f).get('selected_stocks', []) if s.get('symbol'))
+    if not symbols:
+        return
+    # OrderAnalyzer looks back up to 20 trading days for ER / context bars
+    lookback_start = calendar.get_trading_days_before(start_date, 20)
+    logger.info(f"Warming market data for {len(symbols)} picked symbols ({lookback_start}-{end_date})")
+    try:
+        data_provider.get_stock_data(sorted(symbols), lookback_start, end_date)
+    except Exception as e:
+        logger.warning(f"Market data warm-up failed ({e}); variants will fetch on demand")
+
+
+def run_variant(spec_file: str) -> Optional[Dict[str, Any]]:
+    """Replay the order pass for one parameter set (runs in the variant's own process).
+
+    Environment and config.json overrides are already in this process's
+    environment (CONFIG_FILE points at the variant's config copy); engine
+    table overrides come from the spec.
+    """
+    from backtest import engine
+    from shared.db.db import create_scratch_database, drop_database_files
+
+    with open(spec_file, 'r') as f:
+        spec = json.load(f)
+    report_path = spec['report_path']
+    os.makedirs(report_path, exist_ok=True)
+    engine.REPORT_PATH = report_path
+    for key, value in spec['engine'].items():
+        table, entry = key.split('.', 1)
+        getattr(engine, table)[entry] = value
+
+    engine.DB = create_scratch_database(f"sweep_{spec['name']}_{os.getpid()}")
+    try:
+        score_min = int(os.getenv('SCORE_MIN', '0'))
+        picks = {}
+        for this_date, raw_file in spec['picks'].items():
+            regime_data = engine._detect_market_regime_cached(this_date)
+            max_positions = engine.REGIME_MAX_POSITIONS.get(regime_data.get('regime', 'normal'), 10)
+            picks[this_date] = write_variant_picks(raw_file, report_path, regime_data, score_min, max_positions)
+        summary = engine.pick_orders_trading(
+            start_date=spec['start_date'], end_date=spec['end_date'], user_id=spec['user_id'],
+            src=spec['src'], backtest_search=spec['backtest_search'], backtest_ai=spec['backtest_ai'],
+            picks=picks)
+    finally:
+        drop_database_files(engine.DB.db_path)
+
+    with open(os.path.join(report_path, 'summary.json'), 'w') as f:
+        json.dump(summary, f)
+    return summary
+
+
+def _launch_variant(spec_file: str, env: Dict[str, str]) -> Dict[str, Any]:
+    """Run one variant in a fresh interpreter; returns its exit code, period summary and any error."""
+    summary_file = os.path.join(os.path.dirname(spec_file), 'summary.json')
+    if os.path.exists(summary_file):
+        os.remove(summary_file)  # never report a previous sweep's result for a crashed variant
+    cmd = [sys.executable, os.path.abspath(__file__), 'variant', spec_file]
+    result = subprocess.run(cmd, capture_output=True, text=True, env=env, check=False)
+    outcome = {'returncode': result.returncode, 'summary': None, 'error': None}
+    if result.returncode != 0:
+        stderr_tail = result.stderr[-500:] if result.stderr else "(no stderr)"
+        last_line = stderr_tail.strip().splitlines()[-1] if result.stderr.strip() else "(no stderr)"
+        logger.error(f"Variant {spec_file} exited with code {result.returncode}.\nstderr: {stderr_tail}")
+        outcome['error'] = last_line
+        return outcome
+    try:
+        with open(summary_file, 'r') as f:
+            outcome['summary'] = json.load(f)
+    except (OSError, ValueError) as e:
+        outcome['error'] = f"no period report ({e})"
+    return outcome
+
+
+def run_sweep(start_date: str, end_date: str, src: str, param_sets: List[Dict[str, Any]], workers: int = 1,
+              backtest_search: bool = True, backtest_ai: bool = True, user_id: int = 1,
+              rank_by: str = 'total_return_pct') -> List[Dict[str, Any]]:
+    """Pick once, replay every parameter set, and write the ranked comparison table."""
+    from backtest import engine
+    from backtest.data.sqlite_cache import create_data_cache
+    from backtest import DB_CACHE_FILE
+    from backtest.utils.trading_calendar import calendar, convert_trade_date
+
+    start_date = convert_trade_date(start_date)
+    end_date = convert_trade_date(end_date)
+    for params in param_sets:
+        for key in split_overrides(params)[2]:
+            table, entry = key.split('.', 1)
+            if entry not in getattr(engine, table):
+                raise ValueError(f"Unknown sweep parameter '{key}' (not a key of engine.{table})")
+
+    sweep_dir = os.path.abspath(os.path.join(engine.REPORT_PATH, f'sweep_{start_date}_{end_date}_{src}'))
+    picks_dir = os.path.join(sweep_dir, 'picks')
+    os.makedirs(picks_dir, exist_ok=True)
+
+    # Phase 1: one pick set and one market-data load for all variants
+    if backtest_search:
+        engine.discover_working_search_providers()
+    else:
+        os.environ["WORKING_SEARCH_PROVIDERS"] = ""
+    create_data_cache(DB_CACHE_FILE).invalidate_recent(data_type='ohlcv_data', days=3)
+    base_env = dict(os.environ)
+    dates = calendar.get_trading_days_between(start_date, end_date)
+    engine.REPORT_PATH = picks_dir
+    os.environ['SCORE_MIN'] = '0'  # variants apply their own SCORE_MIN
+    try:
+        shared_picks = engine.precompute_picks(dates, src, max(workers, 1), backtest_search=backtest_search,
+                                               backtest_ai=backtest_ai, max_positions=UNCAPPED_POSITIONS)
+    finally:
+        if 'SCORE_MIN' in base_env:
+            os.environ['SCORE_MIN'] = base_env['SCORE_MIN']
+        else:
+            os.environ.pop('SCORE_MIN', None)
+    warm_market_data(shared_picks, start_date, end_date)
+
+    # Phase 2: one process (and scratch database) per parameter set
+    launches = []
+    for index, params in enumerate(param_sets):
+        name = variant_name(index, params)
+        variant_dir = os.path.join(sweep_dir, name)
+        os.makedirs(variant_dir, exist_ok=True)
+        env_overrides, config_overrides, engine_overrides = split_overrides(params)
+        # Variants are never resumed: flush the ledger only once, at the end
+        env = {**base_env, 'LEDGER_CHECKPOINT_DAYS': '0', **env_overrides}
+        if config_overrides:
+            env['CONFIG_FILE'] = write_variant_config(engine.CONFIG_FILE, config_overrides,
+                                                      os.path.join(variant_dir, 'config.json'))
+        spec_file = os.path.join(variant_dir, 'variant.json')
+        with open(spec_file, 'w') as f:
+            json.dump({'name': name, 'params': params, 'start_date': start_date, 'end_date': end_date,
+                       'src': src, 'user_id': user_id, 'backtest_search': backtest_search,
+                       'backtest_ai': backtest_ai, 'picks': shared_picks, 'engine': engine_overrides,
+                       'report_path': variant_dir}, f, indent=2)
+        launches.append((name, params, spec_file, env))
+
+    logger.info(f"Sweep: {len(launches)} parameter sets across {max(workers, 1)} workers "
+                f"({len(shared_picks)}/{len(dates)} dates share picks)")
+    results = []
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        futures = {pool.submit(_launch_variant, spec_file, env): (name, params)
+                   for name, params, spec_file, env in launches}
+        for future in as_completed(futures):
+            name, params = futures[future]
+            try:
+                outcome = future.result()
+            except Exception as e:
+                outcome = {'returncode': None, 'summary': None, 'error': str(e).splitlines()[0]}
+            results.append({'variant': name, 'params': params, **outcome})
+            if outcome['summary'] is None:
+                logger.error(f"[sweep] {name} failed: {outcome['error']}")
+            else:
+                logger.info(f"[sweep] {name} done")
+
+    ranked = rank_results(results, rank_by)
+    md_file, csv_file = write_summary(ranked, sweep_dir, f"{start_date} to {end_date} ({src})", rank_by)
+    logger.info(f"✓ Sweep summary saved to {md_file} and {csv_file}")
+    return ranked
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Parameter sweep — simulate many parameter sets over one pick/data load.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python backtest/sweep.py run 20260101 20260630 ts_7AZ --grid sweep.json --workers 8
+  python backtest/sweep.py run 20260101 20260630 ts_7AZ --grid sweep.json --no-search --no-ai --rank-by max_drawdown_pct
+        """
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Run a parameter sweep')
+    run_parser.add_argument('start_date', help='Start date in YYYYMMDD format')
+    run_parser.add_argument('end_date', help='End date in YYYYMMDD format')
+    run_parser.add_argument('src', nargs='?', default='ts_7AZ_96MA_flow',
+                            help='Strategy source (default: ts_7AZ_96MA_flow)')
+    run_parser.add_argument('--grid', required=True,
+                            help='JSON file with a "grid" (cartesian product) or "variants" (list) of parameter sets')
+    run_parser.add_argument('--workers', type=int, default=1,
+                            help='Processes for the pick phase and concurrent variants (default: 1)')
+    run_parser.add_argument('--user-id', type=int, default=1,
+                            help='User ID for the simulated accounts (default: 1)')
+    run_parser.add_argument('--search', action=argparse.BooleanOptionalAction, default=True,
+                            help='Enable search providers for the pick phase (default: True)')
+    run_parser.add_argument('--ai', action=argparse.BooleanOptionalAction, default=True,
+                            help='Enable AI analysis (default: True)')
+    run_parser.add_argument('--rank-by', default='total_return_pct', choices=RANK_METRICS,
+                            help='Metric to rank variants by, best (highest) first (default: total_return_pct)')
+
+    variant_parser = subparsers.add_parser('variant', help='(internal) replay one parameter set')
+    variant_parser.add_argument('spec_file', help='Variant spec written by "run"')
+
+    args = parser.parse_args()
+    if args.command == 'variant':
+        run_variant(args.spec_file)
+    else:
+        run_sweep(args.start_date, args.end_date, args.src, load_param_sets(args.grid), workers=args.workers,
+                  backtest_search=args.search, backtest_ai=args.ai, user_id=args.user_id, rank_by=args.rank_by)
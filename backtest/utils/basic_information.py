@@ -11,6 +11,7 @@ from datetime import datetime
 import pandas as pd
 
 from ..data.cache import get_global_cache
+from .security_master import SecurityMaster
 
 def _is_pickle_fresh(max_age_hours: int = 24) -> bool:
 	"""Check if basic info cache exists and is fresh.
@@ -105,10 +106,15 @@ class BasicInformationCache:
 		- Supports on-demand incremental refresh (force)
 		- Daily auto-refresh helper (after 08:00 local time) via ensure_daily_refresh()
 
+	Lookups go through a SecurityMaster (columnar arrays + hash, inverted and
+	n-gram indexes), rebuilt on every refresh.
+
 	Provided helpers:
 		- get(symbol) -> dict row
+		- find_by_name(name, fuzzy=False) -> dict row
 		- search(name_substr)
 		- filter(**criteria)
+		- master -> SecurityMaster
 		- list_all() -> DataFrame (copy)
 		- ensure_daily_refresh()
 		- stats()
@@ -121,7 +127,7 @@ class BasicInformationCache:
 
 	def __init__(self, try_pickle_first: bool = True, max_age_hours: int = 24):
 		self._df: Optional[pd.DataFrame] = None
-		self._index: Dict[str, Dict[str, Any]] = {}
+		self._master: SecurityMaster = SecurityMaster(pd.DataFrame(columns=self.REQUIRED_COLUMNS))
 		self._last_refresh: Optional[datetime] = None
 		self._max_age_hours = max_age_hours
 
@@ -146,12 +152,9 @@ class BasicInformationCache:
 			except Exception:
 				pass
 		self._df = df.copy()
-		# Build symbol indices (ts_code unique)
-		self._index.clear()
-		for _, row in self._df.iterrows():
-			self._index[str(row['ts_code'])] = row.to_dict()
+		self._master = SecurityMaster(self._df)
 		self._last_refresh = datetime.now()
-		logger.info(f"Basic info cache initialized with {len(self._index)} symbols")
+		logger.info(f"Basic info cache initialized with {len(self._master)} symbols")
 
 	def _fetch_from_api(self) -> pd.DataFrame:
 		logger.info("Fetching full stock basic information from Tushare API ...")
@@ -187,43 +190,29 @@ class BasicInformationCache:
 			return self.refresh(force=True)
 		return False
 
+	@property
+	def master(self) -> SecurityMaster:
+		return self._master
+
 	def get(self, symbol: str) -> Optional[Dict[str, Any]]:
-		if not symbol:
-			return None
-		# Accept raw '000001.SZ' or ts_code; Tushare uses ts_code with suffix.
-		return self._index.get(symbol) or self._index.get(symbol.upper())
+		# Accept ts_code ('000001.SZ', any case) or the 6-digit symbol.
+		return self._master.get(symbol)
+
+	def find_by_name(self, name: str, fuzzy: bool = False) -> Optional[Dict[str, Any]]:
+		return self._master.find_by_name(name, fuzzy=fuzzy)
 
 	def list_all(self) -> pd.DataFrame:
 		return self._df.copy() if self._df is not None else pd.DataFrame()
 
 	def search(self, name_substr: str) -> List[Dict[str, Any]]:
-		if not name_substr:
-			return []
-		name_substr = name_substr.lower()
-		return [row for row in self._index.values() if str(row.get('name', '')).lower().find(name_substr) >= 0]
+		return self._master.search(name_substr)
 
 	def filter(self, **criteria) -> List[Dict[str, Any]]:
-		if not criteria:
-			return list(self._index.values())
-		results = []
-		for row in self._index.values():
-			ok = True
-			for k, v in criteria.items():
-				if isinstance(v, (list, tuple, set)):
-					if row.get(k) not in v:
-						ok = False
-						break
-				else:
-					if row.get(k) != v:
-						ok = False
-						break
-			if ok:
-				results.append(row)
-		return results
+		return self._master.filter(**criteria)
 
 	def stats(self) -> Dict[str, Any]:
 		return {
-			'symbols': len(self._index),
+			'symbols': len(self._master),
 			'last_refresh': self._last_refresh.isoformat() if self._last_refresh else None,
 			'cache_enabled': True,
 		}
@@ -248,6 +237,10 @@ def get_basic_info(symbol: str) -> Optional[Dict[str, Any]]:
 	return get_basic_info_cache().get(symbol)
 
 
+def find_basic_info_by_name(name: str, fuzzy: bool = False) -> Optional[Dict[str, Any]]:
+	return get_basic_info_cache().find_by_name(name, fuzzy=fuzzy)
+
+
 def search_basic_info(name_substr: str) -> List[Dict[str, Any]]:
 	return get_basic_info_cache().search(name_substr)
 
@@ -0,0 +1,100 @@
+"""
+Compiled lookups over the cached Dragon-Tiger list (LHB) CSVs in shared/data/lhb/.
+
+Each ledger is compiled once per process into one array sorted by
+(code, listing date), keyed by code_id * 10^8 + YYYYMMDD, with a cumulative
+prefix sum of the value column. For any number of codes, the sum over a date
+window [lo, hi) is two vectorized binary searches and a subtraction, and the
+latest value in the window is one lookup — no per-candidate scan of the ledger.
+
+Usage:
+    inst = load_lhb_index(LHB_CACHE, '机构买入净额')
+    flows = inst.window_sum(['600353', '000001'], 20260601, 20260611)
+    dragon = load_lhb_index(LHB_DRAGON_CACHE, '流通市值', dropna=True)
+    caps = dragon.window_last(codes6, lo, hi)       # NaN where no record
+"""
+
+import os
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+DATE_COLUMNS = ('上榜日期', '上榜日')     # institutional ledger / dragon list
+_KEY_BASE = 10 ** 8                       # code_id * _KEY_BASE + YYYYMMDD
+_INDEXES: Dict[Tuple[str, str, bool], 'LHBIndex'] = {}
+
+
+class LHBIndex:
+    """Per-code sorted listing dates with a prefix sum of one value column."""
+
+    def __init__(self, codes: Iterable[str], dates: Iterable[int], values: Iterable[float]):
+        codes = np.asarray(list(codes), dtype=object)
+        dates = np.asarray(list(dates), dtype=np.int64)
+        values = np.asarray(list(values), dtype=np.float64)
+        self._code_ids: Dict[str, int] = {c: i for i, c in enumerate(pd.unique(codes))}
+        ids = np.fromiter((self._code_ids[c] for c in codes), dtype=np.int64, count=len(codes))
+        keys = ids * _KEY_BASE + dates
+        order = np.argsort(keys, kind='stable')
+        self._keys = keys[order]
+        self._values = values[order]
+        self._csum = np.concatenate(([0.0], np.cumsum(np.nan_to_num(self._values))))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, value_col: str, dropna: bool = False) -> 'LHBIndex':
+        """Compile a ledger frame (代码, 上榜日期 or 上榜日, `value_col`); dropna drops rows without a value."""
+        if df is None or df.empty:
+            return cls([], [], [])
+        date_col = next(c for c in DATE_COLUMNS if c in df.columns)
+        values = pd.to_numeric(df[value_col], errors='coerce')
+        if dropna:
+            df, values = df[values.notna()], values[values.notna()]
+        codes = df['代码'].astype(str).str.zfill(6)
+        dates = df[date_col].astype(str).str.replace('-', '').astype(np.int64)
+        return cls(codes, dates, values.fillna(0.0))
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _bounds(self, codes6: Iterable[str], lo, hi) -> Tuple[np.ndarray, np.ndarray]:
+        ids = np.fromiter((self._code_ids.get(c, -1) for c in codes6), dtype=np.int64)
+        lo_keys = ids * _KEY_BASE + np.asarray(lo, dtype=np.int64)
+        hi_keys = ids * _KEY_BASE + np.asarray(hi, dtype=np.int64)
+        left = np.searchsorted(self._keys, lo_keys, side='left')
+        right = np.searchsorted(self._keys, hi_keys, side='left')
+        right = np.where(ids < 0, left, right)          # unknown code -> empty window
+        return left, right
+
+    def window_sum(self, codes6: Iterable[str], lo, hi) -> np.ndarray:
+        """Sum of values per code with listing date in [lo, hi) (YYYYMMDD ints, scalar or per code)."""
+        left, right = self._bounds(codes6, lo, hi)
+        return self._csum[right] - self._csum[left]
+
+    def window_last(self, codes6: Iterable[str], lo, hi) -> np.ndarray:
+        """Value of the latest record per code with listing date in [lo, hi); NaN when none."""
+        left, right = self._bounds(codes6, lo, hi)
+        out = np.full(len(left), np.nan)
+        has = right > left
+        out[has] = self._values[right[has] - 1]
+        return out
+
+
+def load_lhb_index(path: str, value_col: str, dropna: bool = False) -> LHBIndex:
+    """Compiled index of the ledger at `path`, built once per process (empty if the file is missing)."""
+    key = (path, value_col, dropna)
+    index = _INDEXES.get(key)
+    if index is not None:
+        return index
+    if not os.path.exists(path):
+        logger.warning(f"[lhb] cache missing at {path}")
+        index = LHBIndex([], [], [])
+    else:
+        try:
+            index = LHBIndex.from_frame(pd.read_csv(path), value_col, dropna=dropna)
+            logger.info(f"[lhb] compiled {os.path.basename(path)} ({value_col}): {len(index)} records")
+        except Exception as e:
+            logger.warning(f"[lhb] cache err {path}: {e}")
+            index = LHBIndex([], [], [])
+    _INDEXES[key] = index
+    return index
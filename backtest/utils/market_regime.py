@@ -1,89 +1,187 @@
 """
 Market regime detection for adaptive trading strategies.
+
+The regime of a date only depends on the index closes up to that date, so the
+whole timeline is computed by regime_series() from one index fetch with rolling
+windows and stored in the cache DB (table market_regime, keyed by index,
+SWITCH_INDEX_COMBINE_MA mode and trade_date). detect_market_regime() is then a
+lookup for every process and every backtest date; only the regime-dependent
+trading config (with its .env overrides) is built per call.
 """
-from typing import Literal, Dict, Any
+import os
+from datetime import datetime
+from typing import Literal, Dict, Any, List, Tuple
+
+import numpy as np
+import pandas as pd
 from loguru import logger
 from backtest import data_provider, global_cm, DB_CACHE_FILE
-from backtest.utils.trading_calendar import get_trading_days_before
-from backtest.data.sqlite_cache import SQLiteDataCache
+from backtest.utils.trading_calendar import get_trading_days_before, get_trading_days_between
+from backtest.data.sqlite_cache import create_data_cache
 
 MarketRegime = Literal['bull', 'normal', 'volatile', 'bear']
-CACHE = SQLiteDataCache(DB_CACHE_FILE)
+CACHE = create_data_cache(DB_CACHE_FILE)
 
-def detect_market_regime(date: str, index_code: str = '000001.SH') -> Dict[str, Any]:
-    """
-    Detect current market regime based on index trends and volatility.
+LOOKBACK_DAYS = 120      # trading days of index history behind each regime
+MIN_HISTORY_ROWS = 30    # index bars required inside the lookback window
+REGIME_COLUMNS = ['regime', 'close', 'ma20', 'ma60', 'ma120', 'volatility']
 
-    Args:
-        date: Trading date in YYYYMMDD or YYYY-MM-DD format
-        index_code: Index to analyze (default: SSE Composite)
+# (index_code, mode) -> regimes of dates with their own index bar, this process
+_MEMO: Dict[Tuple[str, str], pd.DataFrame] = {}
 
-    Returns:
-        Dict containing 'regime' and configuration parameters
-    """
-    import os
+
+def _regime_mode(index_code: str) -> Tuple[str, str, bool]:
+    """Resolve the index and storage mode for the SWITCH_INDEX_COMBINE_MA setting."""
     switch_fast_regime = os.getenv('SWITCH_INDEX_COMBINE_MA', 'false').lower() in ('true', '1', 'yes')
     if switch_fast_regime and index_code == '000001.SH':
         index_code = '000905.SH'  # Switch to CSI500
+    return index_code, 'combine_ma' if switch_fast_regime else 'default', switch_fast_regime
 
-    # Get 120 trading days of index data (approx 6 months)
-    date = date.replace('-', '')
-    start_date = get_trading_days_before(date, 120) 
-    df = data_provider.get_index_data(index_code, start_date, date)
 
-    if df is None or df.empty or len(df) < 30:
-        error_msg = f"Insufficient data for regime detection (got {len(df) if df is not None else 0} records, need at least 30). Index: {index_code}"
-        logger.error(error_msg)
-        raise ValueError(error_msg)
-    else:
-        # Calculate indicators
-        close = df['close'].astype(float)
+def classify_regimes(index_df: pd.DataFrame, switch_fast_regime: bool = False) -> pd.DataFrame:
+    """
+    Regime of every bar of an index history, from trailing windows ending at that bar.
 
-        ma20 = close.rolling(20, min_periods=10).mean().iloc[-1]
-        ma60 = close.rolling(60, min_periods=30).mean().iloc[-1]
-        ma120 = close.rolling(120, min_periods=60).mean().iloc[-1]
-        current_price = close.iloc[-1]
+    Each row uses the same indicators as a single-date detection over the
+    LOOKBACK_DAYS window ending there: MA20/60/120 (min 10/30/60 bars) and the
+    standard deviation of the daily returns inside the window.
 
-        # Calculate volatility (annualized)
-        returns = close.pct_change()
-        volatility = returns.std() * 100  # Daily volatility as percentage
+    Args:
+        index_df: Index bars with trade_date and close
+        switch_fast_regime: SWITCH_INDEX_COMBINE_MA classification rules
 
-        # Calculate trend strength
-        trend_20d = (current_price - ma20) / ma20 * 100
-        trend_60d = (current_price - ma60) / ma60 * 100
-        trend_120d = (current_price - ma120) / ma120 * 100
+    Returns:
+        DataFrame indexed by trade_date with REGIME_COLUMNS; bars with fewer than
+        MIN_HISTORY_ROWS bars in their window are left out
+    """
+    if index_df is None or index_df.empty:
+        return pd.DataFrame(columns=REGIME_COLUMNS)
+    df = index_df.drop_duplicates('trade_date').sort_values('trade_date')
+    close = pd.Series(df['close'].astype(float).values, index=df['trade_date'].astype(str).values)
 
-        # Regime classification
-        logger.debug(f"Regime indicators - Price: {current_price:.2f}, MA20: {ma20:.2f}, MA60: {ma60:.2f}, "
-                    f"MA120: {ma120:.2f}, Vol: {volatility:.2f}%, "
-                    f"Trend20d: {trend_20d:.2f}%, Trend60d: {trend_60d:.2f}%, Trend120d: {trend_120d:.2f}%")
+    ma20 = close.rolling(20, min_periods=10).mean()
+    ma60 = close.rolling(60, min_periods=30).mean()
+    ma120 = close.rolling(120, min_periods=60).mean()
+    # A window of LOOKBACK_DAYS + 1 bars holds LOOKBACK_DAYS daily returns
+    volatility = close.pct_change().rolling(LOOKBACK_DAYS, min_periods=2).std() * 100
+    enough = close.rolling(LOOKBACK_DAYS + 1, min_periods=1).count() >= MIN_HISTORY_ROWS
+    trend_60d = (close - ma60) / ma60 * 100
 
-        if switch_fast_regime:
+    if switch_fast_regime:
+        conditions = [
             # Bull market: Strong uptrend, low volatility, price above MA20
-            if current_price > ma20 and current_price > ma60 > ma120 and volatility < 2.0:
-                regime = 'bull'
+            (close > ma20) & (close > ma60) & (ma60 > ma120) & (volatility < 2.0),
             # Fast Bear Market / Correction: Price breaks below the 20-day MA
-            elif current_price < ma20 and (current_price < ma60 or trend_60d < 0):
-                regime = 'bear'
-            # Volatile market: High volatility regardless of trend
-            elif volatility > 3.0:
-                regime = 'volatile'
-            # Normal market: Default
-            else:
-                regime = 'normal'
-        else:
+            (close < ma20) & ((close < ma60) | (trend_60d < 0)),
+        ]
+    else:
+        conditions = [
             # Bull market: Strong uptrend, low volatility
-            if current_price > ma60 > ma120 and trend_60d > 0 and volatility < 2.0:
-                regime = 'bull'
+            (close > ma60) & (ma60 > ma120) & (trend_60d > 0) & (volatility < 2.0),
             # Bear market: Downtrend
-            elif current_price < ma60 < ma120 and trend_60d < 0:
-                regime = 'bear'
-            # Volatile market: High volatility regardless of trend
-            elif volatility > 3.0:
-                regime = 'volatile'
-            # Normal market: Default
-            else:
-                regime = 'normal'
+            (close < ma60) & (ma60 < ma120) & (trend_60d < 0),
+        ]
+    # Volatile market: High volatility regardless of trend; otherwise normal
+    conditions.append(volatility > 3.0)
+    regime = np.select(conditions, ['bull', 'bear', 'volatile'], default='normal')
+
+    out = pd.DataFrame({'regime': regime, 'close': close, 'ma20': ma20, 'ma60': ma60,
+                        'ma120': ma120, 'volatility': volatility}, index=close.index)
+    out.index.name = 'trade_date'
+    return out[enough.values]
+
+
+def _regimes_for(dates: List[str], index_code: str = '000001.SH') -> pd.DataFrame:
+    """
+    Regimes of `dates` (any calendar dates): memo, then the cache DB, then one
+    index fetch covering every remaining date.
+
+    A date without its own index bar (holiday, or today before the close is
+    published) takes the regime of the latest bar before it; such rows and
+    today's row are neither memoized nor stored.
+    """
+    index_code, mode, switch_fast_regime = _regime_mode(index_code)
+    dates = sorted(set(dates))
+    known = _MEMO.get((index_code, mode), pd.DataFrame(columns=REGIME_COLUMNS))
+
+    missing = [d for d in dates if d not in known.index]
+    if missing:
+        stored = CACHE.get_regimes(index_code, mode, missing)
+        if not stored.empty:
+            known = pd.concat([known, stored])
+            missing = [d for d in missing if d not in stored.index]
+
+    fallback = pd.DataFrame(columns=REGIME_COLUMNS)
+    if missing:
+        index_df = data_provider.get_index_data(
+            index_code, get_trading_days_before(missing[0], LOOKBACK_DAYS), missing[-1])
+        computed = classify_regimes(index_df, switch_fast_regime)
+        own = computed[computed.index.isin(missing)]
+        today = datetime.now().strftime('%Y%m%d')
+        CACHE.set_regimes(index_code, mode, own[own.index < today])
+        known = pd.concat([known, own])
+        logger.debug(f"Computed {len(own)} {index_code} regimes ({mode}) from {len(computed)} index bars")
+
+        # Dates without their own bar: regime as of the latest earlier bar
+        rest = [d for d in missing if d not in own.index]
+        if rest and not computed.empty:
+            pos = computed.index.searchsorted(rest, side='right') - 1
+            fallback = computed.iloc[pos[pos >= 0]].set_axis([d for d, p in zip(rest, pos) if p >= 0])
+
+    known = known[~known.index.duplicated(keep='last')].sort_index()
+    _MEMO[(index_code, mode)] = known
+    found = pd.concat([known[known.index.isin(dates)], fallback]).sort_index()
+    found.index.name = 'trade_date'
+    return found
+
+
+def regime_series(start_date: str, end_date: str, index_code: str = '000001.SH') -> pd.DataFrame:
+    """
+    Market regime timeline for every trading day in [start_date, end_date].
+
+    Computed from one index fetch (LOOKBACK_DAYS before start_date through
+    end_date) and persisted, so later calls - in this or any other process -
+    are lookups. Call it once for a backtest range before the per-date
+    detect_market_regime() calls.
+
+    Returns:
+        DataFrame indexed by trade_date with REGIME_COLUMNS
+    """
+    dates = get_trading_days_between(start_date.replace('-', ''), end_date.replace('-', ''))
+    if not dates:
+        return pd.DataFrame(columns=REGIME_COLUMNS)
+    return _regimes_for(dates, index_code)
+
+
+def detect_market_regime(date: str, index_code: str = '000001.SH') -> Dict[str, Any]:
+    """
+    Detect current market regime based on index trends and volatility.
+
+    Args:
+        date: Trading date in YYYYMMDD or YYYY-MM-DD format
+        index_code: Index to analyze (default: SSE Composite)
+
+    Returns:
+        Dict containing 'regime' and configuration parameters
+    """
+    date = date.replace('-', '')
+    rows = _regimes_for([date], index_code)
+
+    if rows.empty:
+        resolved = _regime_mode(index_code)[0]
+        error_msg = (f"Insufficient data for regime detection (need at least {MIN_HISTORY_ROWS} records "
+                     f"in the {LOOKBACK_DAYS}-day window). Index: {resolved}")
+        logger.error(error_msg)
+        raise ValueError(error_msg)
+
+    row = rows.iloc[-1]
+    regime = row['regime']
+    current_price, ma20, ma60, ma120 = row['close'], row['ma20'], row['ma60'], row['ma120']
+    logger.debug(f"Regime indicators - Price: {current_price:.2f}, MA20: {ma20:.2f}, MA60: {ma60:.2f}, "
+                 f"MA120: {ma120:.2f}, Vol: {row['volatility']:.2f}%, "
+                 f"Trend20d: {(current_price - ma20) / ma20 * 100:.2f}%, "
+                 f"Trend60d: {(current_price - ma60) / ma60 * 100:.2f}%, "
+                 f"Trend120d: {(current_price - ma120) / ma120 * 100:.2f}%")
 
     # Get config for this regime
     config = get_regime_config(regime, global_cm)
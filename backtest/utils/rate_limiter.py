@@ -0,0 +1,175 @@
+"""
+Cross-process token-bucket rate limiter for Tushare Pro endpoints.
+
+Tushare enforces a per-minute quota per endpoint for the whole account, so
+every process that calls it (the provider, strategy scripts, parallel pick
+workers, sweep variants) must draw from the same budget. Bucket state lives in
+one small JSON file guarded by an exclusive fcntl lock; each acquire refills
+the endpoint's bucket for the elapsed time, takes a token and returns, or
+releases the lock and sleeps exactly until the next token is due.
+
+Configuration (.env):
+- TUSHARE_RATE_PER_MIN    default calls/minute per endpoint (0 disables limiting)
+- TUSHARE_RATE_LIMITS     per-endpoint overrides, e.g. "ths_daily=5,moneyflow=100"
+- TUSHARE_RATE_BURST      bucket capacity (calls allowed back-to-back), capped at the rate
+- TUSHARE_RATE_STATE_FILE shared bucket state file
+
+Usage:
+    PRO = rate_limited_pro(ts.pro_api(TUSHARE_TOKEN))
+    df = PRO.daily(ts_code='000001.SZ')      # waits for a 'daily' token first
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from loguru import logger
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX: limit within this process only
+    fcntl = None
+
+DEFAULT_STATE_FILE = '/tmp/ibacktest_tushare_quota.json'
+
+
+def _parse_limits(spec: str) -> Dict[str, float]:
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        endpoint, _, rate = item.partition('=')
+        try:
+            limits[endpoint.strip()] = float(rate)
+        except ValueError:
+            logger.warning(f"Ignoring invalid TUSHARE_RATE_LIMITS entry: {item!r}")
+    return limits
+
+
+class TokenBucketLimiter:
+    """Per-endpoint token buckets shared by every process using the same state file."""
+
+    def __init__(self, state_file: str, rate_per_min: float, burst: int = 10,
+                 endpoint_limits: Optional[Dict[str, float]] = None):
+        self.state_file = state_file
+        self.rate_per_min = rate_per_min
+        self.burst = burst
+        self.endpoint_limits = endpoint_limits or {}
+        self._thread_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'TokenBucketLimiter':
+        return cls(
+            state_file=os.path.expanduser(os.getenv('TUSHARE_RATE_STATE_FILE', DEFAULT_STATE_FILE)),
+            rate_per_min=float(os.getenv('TUSHARE_RATE_PER_MIN', '200')),
+            burst=int(os.getenv('TUSHARE_RATE_BURST', '10')),
+            endpoint_limits=_parse_limits(os.getenv('TUSHARE_RATE_LIMITS', '')),
+        )
+
+    def rate(self, endpoint: str) -> float:
+        return self.endpoint_limits.get(endpoint, self.rate_per_min)
+
+    @contextmanager
+    def _locked_state(self):
+        """Exclusive access to the shared state: yields a dict that is written back on exit."""
+        with self._thread_lock:
+            fd = os.open(self.state_file, os.O_RDWR | os.O_CREAT, 0o666)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                with os.fdopen(os.dup(fd), 'r+', encoding='utf-8') as f:
+                    raw = f.read()
+                    try:
+                        state = json.loads(raw) if raw else {}
+                    except ValueError:
+                        state = {}
+                    yield state
+                    f.seek(0)
+                    f.truncate()
+                    json.dump(state, f)
+            finally:
+                os.close(fd)   # releases the flock
+
+    def acquire(self, endpoint: str) -> float:
+        """
+        Block until a call to `endpoint` is within quota and take its token.
+
+        Returns:
+            Seconds spent waiting
+        """
+        rate = self.rate(endpoint)
+        if rate <= 0:
+            return 0.0
+        capacity = max(1.0, min(float(self.burst), rate))
+        per_second = rate / 60.0
+        waited = 0.0
+        while True:
+            with self._locked_state() as state:
+                now = time.time()
+                bucket = state.get(endpoint) or {'tokens': capacity, 'ts': now, 'minute': now, 'used': 0}
+                tokens = min(capacity, bucket['tokens'] + (now - bucket['ts']) * per_second)
+                if tokens >= 1.0:
+                    if now - bucket['minute'] >= 60:
+                        bucket['minute'], bucket['used'] = now, 0
+                    bucket.update(tokens=tokens - 1.0, ts=now, used=bucket['used'] + 1)
+                    state[endpoint] = bucket
+                    used = bucket['used']
+                    delay = 0.0
+                else:
+                    bucket.update(tokens=tokens, ts=now)
+                    state[endpoint] = bucket
+                    delay = (1.0 - tokens) / per_second
+            if delay <= 0:
+                break
+            time.sleep(delay)
+            waited += delay
+
+        if waited:
+            logger.info(f"[tushare-quota] {endpoint}: waited {waited:.2f}s for quota ({used}/{rate:g} this minute)")
+        else:
+            logger.debug(f"[tushare-quota] {endpoint}: {used}/{rate:g} this minute")
+        return waited
+
+    def usage(self) -> Dict[str, int]:
+        """Calls per endpoint in its current one-minute window, across all processes."""
+        with self._locked_state() as state:
+            now = time.time()
+            return {ep: b['used'] for ep, b in state.items() if now - b['minute'] < 60}
+
+
+_LIMITER: Optional[TokenBucketLimiter] = None
+
+
+def tushare_limiter() -> TokenBucketLimiter:
+    """Process-wide limiter configured from the environment."""
+    global _LIMITER
+    if _LIMITER is None:
+        _LIMITER = TokenBucketLimiter.from_env()
+    return _LIMITER
+
+
+class RateLimitedPro:
+    """Tushare pro_api client whose endpoint calls first take a token from the shared limiter."""
+
+    def __init__(self, pro, limiter: Optional[TokenBucketLimiter] = None):
+        self._pro = pro
+        self._limiter = limiter
+
+    def __getattr__(self, endpoint: str):
+        func = getattr(self._pro, endpoint)
+        if endpoint.startswith('_') or not callable(func):
+            return func
+        limiter = self._limiter or tushare_limiter()
+
+        def call(*args, **kwargs):
+            limiter.acquire(endpoint)
+            return func(*args, **kwargs)
+
+        call.__name__ = endpoint
+        return call
+
+
+def rate_limited_pro(pro, limiter: Optional[TokenBucketLimiter] = None) -> Optional[RateLimitedPro]:
+    """Wrap a pro_api client (None passes through, for scripts without a token)."""
+    return RateLimitedPro(pro, limiter) if pro is not None else None
@@ -0,0 +1,193 @@
+"""
+Columnar, indexed security master built from Tushare stock_basic.
+
+One instance backs BasicInformationCache (get / search / filter) and the
+trading-side name -> code resolution, so every lookup is a hash or posting-list
+operation instead of a scan over all rows:
+
+- columnar storage: one NumPy array per stock_basic column, rows materialized on demand
+- hash indexes: ts_code, symbol, normalized name and cleaned name (no ST/*ST/N/... markers)
+- inverted indexes: industry, market, exchange -> row ids
+- n-gram index: character unigrams and bigrams of the normalized name, for
+  substring search and fuzzy (Dice similarity) Chinese name lookup
+
+Usage:
+    master = SecurityMaster(stock_basic_df)
+    master.get('600519.SH')                 # or '600519'
+    master.find_by_name('*ST 华微')          # exact, then cleaned name
+    master.filter(market='主板', exchange=['SSE', 'SZSE'])
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+INDEXED_COLUMNS = ('industry', 'market', 'exchange')
+FUZZY_MIN_SIMILARITY = 0.75   # Dice similarity of name bigrams for find_by_name(fuzzy=True)
+
+_PREFIX_RE = re.compile(r'^(\*ST|ST|NST|PT|N|C|R|kr|KR|S|XD|XR|DR)\s*', re.IGNORECASE)
+_SUFFIX_RE = re.compile(r'\s*(\(U\)|\(W\)|\(V\)|U|W|V)$', re.IGNORECASE)
+
+
+def normalize_name(name: Any) -> str:
+    """Full-width to half-width (NFKC), trimmed and case-folded: the lookup key of a name."""
+    if name is None or (isinstance(name, float) and np.isnan(name)):
+        return ''
+    return unicodedata.normalize('NFKC', str(name)).strip().casefold()
+
+
+def clean_name(name: str) -> str:
+    """Strip risk/listing markers from a stock name (e.g. *ST, ST, N, U, W, V)."""
+    if not name:
+        return ''
+    name = _PREFIX_RE.sub('', name)
+    return _SUFFIX_RE.sub('', name)
+
+
+def _grams(text: str) -> List[str]:
+    """Bigrams of `text` (the single character for one-character text)."""
+    if len(text) < 2:
+        return [text] if text else []
+    return [text[i:i + 2] for i in range(len(text) - 1)]
+
+
+class SecurityMaster:
+    """Immutable index over one stock_basic snapshot."""
+
+    def __init__(self, df: pd.DataFrame):
+        df = df.reset_index(drop=True)
+        self.columns: List[str] = list(df.columns)
+        self._cols: Dict[str, np.ndarray] = {c: df[c].to_numpy() for c in self.columns}
+        self._size = len(df)
+        self._rows: List[Optional[Dict[str, Any]]] = [None] * self._size
+
+        self._by_ts_code: Dict[str, int] = {}
+        self._by_symbol: Dict[str, int] = {}
+        if 'ts_code' in self._cols:
+            self._by_ts_code = {str(c).upper(): i for i, c in enumerate(self._cols['ts_code'])}
+        if 'symbol' in self._cols:
+            self._by_symbol = {str(s): i for i, s in enumerate(self._cols['symbol'])}
+
+        names = [normalize_name(n) for n in self._cols['name']] if 'name' in self._cols else [''] * self._size
+        self._names = names
+        self._by_name: Dict[str, List[int]] = {}
+        self._by_clean_name: Dict[str, List[int]] = {}
+        unigrams: Dict[str, List[int]] = {}
+        bigrams: Dict[str, List[int]] = {}
+        for i, name in enumerate(names):
+            if not name:
+                continue
+            self._by_name.setdefault(name, []).append(i)
+            self._by_clean_name.setdefault(clean_name(name), []).append(i)
+            for ch in set(name):
+                unigrams.setdefault(ch, []).append(i)
+            for gram in set(_grams(name)):
+                bigrams.setdefault(gram, []).append(i)
+        self._unigrams = {k: np.asarray(v, dtype=np.int32) for k, v in unigrams.items()}
+        self._bigrams = {k: np.asarray(v, dtype=np.int32) for k, v in bigrams.items()}
+        self._gram_counts = np.fromiter((len(set(_grams(n))) for n in names), dtype=np.int32, count=self._size)
+
+        self._inverted: Dict[str, Dict[Any, np.ndarray]] = {
+            col: {k: np.asarray(v, dtype=np.int32) for k, v in df.groupby(col, sort=False).indices.items()}
+            for col in INDEXED_COLUMNS if col in df.columns
+        }
+
+    def __len__(self) -> int:
+        return self._size
+
+    # ---------------- rows -----------------
+    def row(self, i: int) -> Dict[str, Any]:
+        """Row `i` as a dict (built once, then shared)."""
+        row = self._rows[i]
+        if row is None:
+            row = {c: self._cols[c][i] for c in self.columns}
+            self._rows[i] = row
+        return row
+
+    def rows(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        return [self.row(int(i)) for i in ids]
+
+    def frame(self, ids: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Columns of the given rows (all rows when None) as a DataFrame."""
+        if ids is None:
+            return pd.DataFrame(self._cols, columns=self.columns)
+        return pd.DataFrame({c: v[ids] for c, v in self._cols.items()}, columns=self.columns)
+
+    # ---------------- lookups -----------------
+    def get(self, code: str) -> Optional[Dict[str, Any]]:
+        """Row of a ts_code ('600519.SH', any case) or 6-digit symbol ('600519')."""
+        if not code:
+            return None
+        i = self._by_ts_code.get(code.upper())
+        if i is None:
+            i = self._by_symbol.get(code)
+        return self.row(i) if i is not None else None
+
+    def find_by_name(self, name: str, fuzzy: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Row of a stock name: exact normalized name, then cleaned name, then
+        (if `fuzzy`) the single best n-gram match with similarity >= FUZZY_MIN_SIMILARITY.
+        """
+        key = normalize_name(name)
+        if not key:
+            return None
+        ids = self._by_name.get(key) or self._by_clean_name.get(clean_name(key))
+        if ids:
+            return self.row(ids[0])
+        if fuzzy:
+            matches = self.fuzzy(key, limit=2)
+            if matches and matches[0][0] >= FUZZY_MIN_SIMILARITY and (
+                    len(matches) == 1 or matches[1][0] < matches[0][0]):
+                return matches[0][1]
+        return None
+
+    def fuzzy(self, name: str, limit: int = 5) -> List[Tuple[float, Dict[str, Any]]]:
+        """Best name matches by Dice similarity of character bigrams, highest first."""
+        grams = set(_grams(clean_name(normalize_name(name))))
+        postings = [self._bigrams[g] for g in grams if g in self._bigrams]
+        if not postings:
+            return []
+        overlap = np.bincount(np.concatenate(postings), minlength=self._size)
+        candidates = np.nonzero(overlap)[0]
+        scores = 2.0 * overlap[candidates] / (len(grams) + self._gram_counts[candidates])
+        order = np.argsort(-scores, kind='stable')[:limit]
+        return [(float(scores[k]), self.row(int(candidates[k]))) for k in order]
+
+    def search(self, name_substr: str) -> List[Dict[str, Any]]:
+        """Rows whose name contains `name_substr` (case- and width-insensitive)."""
+        key = normalize_name(name_substr)
+        if not key:
+            return []
+        index = self._unigrams if len(key) == 1 else self._bigrams
+        ids = None
+        for gram in (_grams(key) if len(key) > 1 else [key]):
+            posting = index.get(gram)
+            if posting is None:
+                return []
+            ids = posting if ids is None else np.intersect1d(ids, posting, assume_unique=True)
+        return [self.row(int(i)) for i in ids if key in self._names[i]]
+
+    def select(self, **criteria) -> np.ndarray:
+        """Row ids matching every criterion (value, or list/tuple/set of accepted values)."""
+        ids = np.arange(self._size, dtype=np.int32)
+        for col, value in criteria.items():
+            accepted = list(value) if isinstance(value, (list, tuple, set)) else [value]
+            if col in self._inverted:
+                postings = [self._inverted[col].get(v) for v in accepted]
+                postings = [p for p in postings if p is not None]
+                matched = np.unique(np.concatenate(postings)) if postings else np.empty(0, dtype=np.int32)
+                ids = np.intersect1d(ids, matched, assume_unique=True)
+            elif col in self._cols:
+                ids = ids[np.isin(self._cols[col][ids], accepted)]
+            elif None not in accepted:
+                return np.empty(0, dtype=np.int32)
+            if not len(ids):
+                break
+        return ids
+
+    def filter(self, **criteria) -> List[Dict[str, Any]]:
+        """Rows matching every criterion, in stock_basic order."""
+        return self.rows(self.select(**criteria))
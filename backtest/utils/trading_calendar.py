@@ -1,11 +1,24 @@
 """
 Trading calendar utility for proper handling of trading days vs calendar days.
 Optimized for high-performance operations with advanced caching mechanisms.
+
+Besides the string API (get_trading_days_before/after/between, is_trading_day),
+TradingCalendar has an ordinal layer: trading day i <-> date as NumPy arrays
+(int32 YYYYMMDD and datetime64[D]). offset(), trading_day_index(),
+between_idx() and is_trading_day() accept whole arrays of dates, so rolling
+windows over many dates are index arithmetic instead of per-date string work:
+
+    idx = calendar.trading_day_index(dates)          # ordinals
+    starts = calendar.dates_at(idx - 20)             # 20 trading days back, int32 YYYYMMDD
+    lo, hi = calendar.between_idx('20250101', '20250630')
+    days = calendar.trading_days_int[lo:hi]
 """
 import bisect
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, Union
 from datetime import datetime, timedelta, date
 from functools import lru_cache
+
+import numpy as np
 from loguru import logger
 
 from .. import data_provider, calendar
@@ -118,6 +131,7 @@ class TradingCalendar:
     Optimizations:
     - Uses sorted list + binary search for O(log n) date lookups
     - Set-based membership testing for O(1) trading day checks
+    - Ordinal arrays (int32 YYYYMMDD / datetime64) for vectorized offsets and ranges
     - LRU cache for frequently accessed calculations
     - Lazy loading with intelligent cache extension
     - Memory-efficient data structures
@@ -136,6 +150,8 @@ class TradingCalendar:
         # Optimized data structures for fast operations
         self._trading_dates_list: List[str] = []  # Sorted list for binary search
         self._trading_dates_set: set = set()      # Set for O(1) membership testing
+        self._dates_int: Optional[np.ndarray] = None    # Ordinal -> int32 YYYYMMDD (built lazily)
+        self._dates_dt64: Optional[np.ndarray] = None   # Ordinal -> datetime64[D] (built lazily)
         self._cache_start_date: Optional[str] = None
         self._cache_end_date: Optional[str] = None
 
@@ -233,6 +249,9 @@ class TradingCalendar:
         self._trading_dates_list = sorted(trading_dates)
         # Build set for O(1) membership testing
         self._trading_dates_set = set(trading_dates)
+        # Ordinal arrays are rebuilt on next use
+        self._dates_int = None
+        self._dates_dt64 = None
 
     @lru_cache(maxsize=1000)
     def _normalize_date(self, date_str: str) -> Tuple[str, str]:
@@ -334,10 +353,116 @@ class TradingCalendar:
             return f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:8]}"
         return date_str
 
+    # ------------------------- ordinal layer -------------------------
+
+    @property
+    def trading_days_int(self) -> np.ndarray:
+        """Trading days as a sorted int32 YYYYMMDD array; position = trading-day ordinal."""
+        dates_int = getattr(self, '_dates_int', None)
+        if dates_int is None or len(dates_int) != len(self._trading_dates_list):
+            dates_int = np.fromiter(map(int, self._trading_dates_list), dtype=np.int32,
+                                    count=len(self._trading_dates_list))
+            self._dates_int = dates_int
+            self._dates_dt64 = None
+        return dates_int
+
+    @property
+    def trading_days_dt64(self) -> np.ndarray:
+        """Trading days as a datetime64[D] array, aligned with trading_days_int."""
+        dates_int = self.trading_days_int
+        dates_dt64 = getattr(self, '_dates_dt64', None)
+        if dates_dt64 is None:
+            dates_dt64 = _int_to_datetime64(dates_int)
+            self._dates_dt64 = dates_dt64
+        return dates_dt64
+
+    def _ordinal_lookup(self, dates) -> Tuple[np.ndarray, np.ndarray]:
+        """Dates as int32 YYYYMMDD plus the trading-day array, with the cache covering them."""
+        values = _to_date_int(dates)
+        if values.size:
+            self._ensure_date_in_cache(str(int(values.min())))
+            self._ensure_date_in_cache(str(int(values.max())))
+        if not self._trading_dates_list:
+            raise RuntimeError("Trading calendar not properly initialized - cache is empty")
+        return values, self.trading_days_int
+
+    def trading_day_index(self, dates) -> np.ndarray:
+        """
+        Ordinal of the trading day on or before each date (-1 before the first cached day).
+
+        Args:
+            dates: One date or an array of dates (YYYYMMDD / YYYY-MM-DD strings,
+                int YYYYMMDD or datetime64)
+
+        Returns:
+            int32 array shaped like `dates`
+        """
+        values, days = self._ordinal_lookup(dates)
+        return (np.searchsorted(days, values, side='right') - 1).astype(np.int32)
+
+    def dates_at(self, ordinals, fmt: str = 'int') -> np.ndarray:
+        """
+        Trading days at the given ordinals.
+
+        Args:
+            ordinals: Int or int array of trading-day ordinals
+            fmt: 'int' (int32 YYYYMMDD), 'datetime64' or 'str' (YYYYMMDD)
+
+        Raises:
+            ValueError: If an ordinal is outside the cached calendar
+        """
+        ordinals = np.asarray(ordinals)
+        days = self.trading_days_int
+        if ordinals.size and (ordinals.min() < 0 or ordinals.max() >= len(days)):
+            raise ValueError(f"Trading-day ordinal out of range [0, {len(days)})")
+        if fmt == 'datetime64':
+            return self.trading_days_dt64[ordinals]
+        result = days[ordinals]
+        return result.astype('U8') if fmt == 'str' else result
+
+    def offset(self, dates, n: Union[int, np.ndarray], fmt: str = 'int') -> np.ndarray:
+        """
+        Trading day `n` trading days away from each date (vectorized).
+
+        n < 0 matches get_trading_days_before(date, -n), n > 0 matches
+        get_trading_days_after(date, n), and n == 0 gives the date itself if it
+        is a trading day, else the trading day before it.
+
+        Args:
+            dates: One date or an array of dates
+            n: Offset in trading days (int or array broadcast against dates)
+            fmt: Result format, see dates_at()
+
+        Raises:
+            ValueError: If an offset runs past the cached calendar
+        """
+        values, days = self._ordinal_lookup(dates)
+        n = np.asarray(n)
+        left = np.searchsorted(days, values, side='left')
+        right = np.searchsorted(days, values, side='right')
+        idx = np.where(n < 0, left + n, np.where(n > 0, right + n - 1, right - 1))
+        if idx.size and (idx.min() < 0 or idx.max() >= len(days)):
+            raise ValueError(f"Not enough trading days for offset {n.tolist()} in trading calendar")
+        return self.dates_at(idx, fmt)
+
+    def between_idx(self, start_date, end_date) -> Tuple[int, int]:
+        """
+        Half-open ordinal range [lo, hi) of the trading days from start_date to end_date (inclusive).
+
+        Slice trading_days_int / trading_days_dt64 (or any array aligned with
+        them) with it instead of building a list of date strings.
+        """
+        values, days = self._ordinal_lookup([start_date, end_date])
+        if values[0] > values[1]:
+            raise ValueError(f"Start date {start_date} cannot be after end date {end_date}")
+        return int(np.searchsorted(days, values[0], side='left')), int(np.searchsorted(days, values[1], side='right'))
+
+    # ------------------------- string API -------------------------
+
     def get_trading_days_before(self, reference_date: str, trading_days: int) -> str:
         """
         Get date that is 'trading_days' trading days before reference_date.
-        Optimized with binary search and efficient data structures.
+        One binary search plus index arithmetic.
 
         Args:
             reference_date: Reference date in YYYY-MM-DD or YYYYMMDD format
@@ -354,17 +479,19 @@ class TradingCalendar:
             raise ValueError("Reference date cannot be empty")
         if trading_days <= 0:
             raise ValueError("Trading days must be positive")
-        for _ in range(trading_days):
-            prev_day = self.get_previous_trading_day(reference_date)
-            if not prev_day:
-                raise ValueError(f"Not enough trading days before {reference_date}")
-            reference_date = prev_day
-        return reference_date
+        normalized_date, return_format = self._normalize_date(reference_date)
+        self._ensure_date_in_cache(normalized_date)
+        if not self._trading_dates_list:
+            raise RuntimeError("Trading calendar not properly initialized - cache is empty")
+        pos = bisect.bisect_left(self._trading_dates_list, normalized_date) - trading_days
+        if pos < 0:
+            raise ValueError(f"Not enough trading days before {reference_date}")
+        return self._format_date(self._trading_dates_list[pos], return_format)
 
     def get_trading_days_after(self, reference_date: str, trading_days: int) -> str:
         """
         Get date that is 'trading_days' trading days after reference_date.
-        Optimized with binary search and efficient data structures.
+        One binary search plus index arithmetic.
 
         Args:
             reference_date: Reference date in YYYY-MM-DD or YYYYMMDD format
@@ -381,23 +508,30 @@ class TradingCalendar:
             raise ValueError("Reference date cannot be empty")
         if trading_days <= 0:
             raise ValueError("Trading days must be positive")
-        for _ in range(trading_days):
-            next_day = self.get_next_trading_day(reference_date)
-            if not next_day:
-                raise ValueError(f"Not enough trading days after {reference_date}")
-            reference_date = next_day
-        return reference_date
-
-    def is_trading_day(self, date_str: str) -> bool:
+        normalized_date, return_format = self._normalize_date(reference_date)
+        self._ensure_date_in_cache(normalized_date)
+        if not self._trading_dates_list:
+            raise RuntimeError("Trading calendar not properly initialized - cache is empty")
+        pos = bisect.bisect_right(self._trading_dates_list, normalized_date) + trading_days - 1
+        if pos >= len(self._trading_dates_list):
+            raise ValueError(f"Not enough trading days after {reference_date}")
+        return self._format_date(self._trading_dates_list[pos], return_format)
+
+    def is_trading_day(self, date_str) -> Union[bool, np.ndarray]:
         """
         Check if given date is a trading day using O(1) set lookup.
 
         Args:
-            date_str: Date in YYYY-MM-DD or YYYYMMDD format
+            date_str: Date in YYYY-MM-DD or YYYYMMDD format, or an array of dates
+                (see trading_day_index) for a vectorized check
 
         Returns:
-            True if date is a trading day
+            True if date is a trading day (bool array for array input)
         """
+        if not isinstance(date_str, str):
+            values, days = self._ordinal_lookup(date_str)
+            pos = np.searchsorted(days, values, side='left')
+            return days[np.minimum(pos, len(days) - 1)] == values
         try:
             normalized_date, _ = self._normalize_date(date_str)
             self._ensure_date_in_cache(normalized_date)
@@ -544,13 +678,11 @@ class TradingCalendar:
             start_pos = bisect.bisect_left(self._trading_dates_list, start_normalized)
             end_pos = bisect.bisect_right(self._trading_dates_list, end_normalized)
 
-            # Extract trading days in range and format them
-            trading_days = []
-            for i in range(start_pos, end_pos):
-                date = self._trading_dates_list[i]
-                formatted_date = self._format_date(date, return_format)
-                trading_days.append(formatted_date)
-            return trading_days
+            # Extract trading days in range (stored as YYYYMMDD: no per-day formatting needed)
+            trading_days = self._trading_dates_list[start_pos:end_pos]
+            if return_format == 'YYYYMMDD':
+                return trading_days
+            return [self._format_date(d, return_format) for d in trading_days]
         except (ValueError, RuntimeError):
             raise
         except Exception as e:
@@ -576,6 +708,27 @@ class TradingCalendar:
         }
 
 
+def _to_date_int(dates) -> np.ndarray:
+    """Dates (strings, ints or datetime64, scalar or array) as int32 YYYYMMDD."""
+    values = np.asarray(dates)
+    if np.issubdtype(values.dtype, np.datetime64):
+        days = values.astype('datetime64[D]')
+        years = days.astype('datetime64[Y]').astype(np.int64) + 1970
+        months = days.astype('datetime64[M]')
+        day_of_month = (days - months).astype(np.int64) + 1
+        return (years * 10000 + (months.astype(np.int64) % 12 + 1) * 100 + day_of_month).astype(np.int32)
+    if values.dtype.kind in 'iu':
+        return values.astype(np.int32)
+    return np.char.replace(values.astype(str), '-', '').astype(np.int32)
+
+
+def _int_to_datetime64(values: np.ndarray) -> np.ndarray:
+    """int YYYYMMDD array as datetime64[D]."""
+    values = values.astype(np.int64)
+    months = (values // 10000 - 1970) * 12 + (values // 100 % 100 - 1)
+    return months.astype('datetime64[M]').astype('datetime64[D]') + (values % 100 - 1).astype('timedelta64[D]')
+
+
 def save_calendar_to_pickle(cal: Optional['TradingCalendar'] = None) -> bool:
     """Persist a TradingCalendar instance to the cache.
 
@@ -1,8 +1,9 @@
 from datetime import date, datetime
-from typing import Optional, List, Literal
+from typing import Optional, List, Literal, Dict
 import re
 import json # json5 saved as key:value, not "key": value
 import operator
+import numpy as np
 import pandas as pd
 import time
 
@@ -108,6 +109,42 @@ def dfs_concat(dfs: List[pd.DataFrame], ignore_index: Optional[bool] = False, ax
     return pd.concat(processed_frames, ignore_index=_ignore_index, axis=axis)
 
 
+def split_by_symbol(df: pd.DataFrame, key: str = 'ts_code', sort_col: str = 'trade_date') -> Dict[str, pd.DataFrame]:
+    """
+    Split a long multi-symbol frame into per-symbol frames without per-row copies.
+
+    The frame is sorted once by (key, sort_col); each symbol is then a contiguous
+    block returned as a positional slice of that single sorted frame.
+
+    Args:
+        df: Long DataFrame holding many symbols
+        key: Column identifying the symbol
+        sort_col: Column ordering rows inside each symbol
+
+    Returns:
+        Dict symbol -> DataFrame slice ordered by sort_col
+    """
+    if df is None or df.empty or key not in df.columns:
+        return {}
+    order = [key, sort_col] if sort_col in df.columns else [key]
+    df = df.sort_values(order, kind='stable').reset_index(drop=True)
+    codes = df[key].to_numpy()
+    bounds = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(df)]))
+    return {codes[s]: df.iloc[s:e] for s, e in zip(starts, ends)}
+
+
+
+def bare_code(symbol: str) -> str:
+    """Exchange-less stock code: '600000.SH' and '600000' -> '600000'.
+
+    Joins frames keyed by ts_code to symbols stored either way (app-synced
+    holdings keep the 6-digit code).
+    """
+    return str(symbol).strip().upper().split('.')[0]
+
+
 # Prepare the filtering function
 def create_dataframe_filter(df: Optional[pd.DataFrame]=None, conditions: Optional[dict]=None, context_vars: Optional[dict]=None) -> pd.Series:
     """
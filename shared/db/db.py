@@ -5,6 +5,7 @@
 import os
 import sys
 import sqlite3
+import tempfile
 import datetime
 from loguru import logger
 from contextlib import contextmanager
@@ -303,6 +304,33 @@ def create_database_manager(db_path: str = 'db.db', **kwargs) -> DatabaseManager
     return DatabaseManager(db_path, **kwargs)
 
 
+def create_scratch_database(name: str, schema_file: str | None = None) -> DatabaseManager:
+    """Create a private, empty database initialised from the schema dump.
+
+    Used for throwaway simulated accounts (e.g. one per parameter-sweep
+    worker). The file lives in /dev/shm when available, so it is RAM-backed;
+    any previous file with the same name is replaced.
+    """
+    base_dir = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    path = os.path.join(base_dir, f'{name}.db')
+    drop_database_files(path)
+    with open(schema_file or DB_IMOBILE_SQL, 'r', encoding='utf-8') as f:
+        schema = f.read()
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(schema)
+    finally:
+        conn.close()
+    return DatabaseManager(path)
+
+
+def drop_database_files(path: str) -> None:
+    """Remove a SQLite database file together with its WAL/shared-memory files."""
+    for ext in ('', '-wal', '-shm'):
+        if os.path.exists(path + ext):
+            os.unlink(path + ext)
+
+
 def clear_stock_relate_data(user_id: int = 1):
     """Remove stock relate data from the database for a specific user."""
     with DB.cursor() as cursor:
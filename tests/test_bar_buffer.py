@@ -0,0 +1,118 @@
+"""
+Unit tests for backtest/data/bar_buffer.py (rolling bar windows) and the
+engine's per-day bulk bar prefetch.
+
+Covers:
+- RollingBarBuffer.window() first fetch, then served from memory
+- add_day() sliding the window forward and evicting old bars
+- gaps in coverage forcing a refetch
+- OrderAnalyzer.prefetch_day_bars() one bulk call for order + held symbols
+- bare 6-digit symbols (app-synced holdings) matched to the provider's ts_code rows
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backtest.data.bar_buffer import RollingBarBuffer  # noqa: E402
+
+DAYS = [f"202510{d:02d}" for d in range(1, 31)]   # every day is a trading day here
+
+
+def _days_before(date, n):
+    return DAYS[DAYS.index(date) - n]
+
+
+def _bars(symbols, start, end):
+    return pd.DataFrame([{"ts_code": s, "trade_date": d, "close": float(DAYS.index(d))}
+                         for s in symbols for d in DAYS if start <= d <= end])
+
+
+class FakeProvider:
+    def __init__(self):
+        self.calls = []
+
+    def get_stock_data(self, symbols, start, end):
+        self.calls.append((list(symbols), start, end))
+        return _bars(symbols, start, end)
+
+
+class NormalizingProvider(FakeProvider):
+    """Returns rows under the ts_code ('600000' -> '600000.SH'), as TushareDataProvider does."""
+
+    def get_stock_data(self, symbols, start, end):
+        bars = super().get_stock_data(symbols, start, end)
+        bars["ts_code"] = [c if "." in c else f"{c}.SH" for c in bars["ts_code"]]
+        return bars
+
+
+class TestRollingBarBuffer:
+    def test_window_slides_with_daily_bars(self):
+        provider = FakeProvider()
+        buf = RollingBarBuffer(5, provider.get_stock_data, _days_before)
+
+        first = buf.window("AAA.SZ", "20251010")
+        assert first["trade_date"].tolist() == DAYS[4:10]
+        assert len(provider.calls) == 1
+
+        for date in ("20251011", "20251012"):
+            buf.add_day(date, ["AAA.SZ", "BBB.SZ"], _bars(["AAA.SZ", "BBB.SZ"], date, date))
+        window = buf.window("AAA.SZ", "20251012")
+        assert window["trade_date"].tolist() == DAYS[6:12]
+        assert window["close"].tolist() == [float(i) for i in range(6, 12)]
+        assert len(provider.calls) == 1
+        assert "BBB.SZ" not in buf   # never requested, not buffered
+
+    def test_missing_bar_and_gap(self):
+        provider = FakeProvider()
+        buf = RollingBarBuffer(5, provider.get_stock_data, _days_before)
+        buf.window("AAA.SZ", "20251010")
+        buf.add_day("20251011", ["AAA.SZ"], pd.DataFrame())   # suspended: no bar, still covered
+        assert buf.window("AAA.SZ", "20251011")["trade_date"].iloc[-1] == "20251010"
+        assert len(provider.calls) == 1
+
+        buf.add_day("20251014", ["AAA.SZ"], _bars(["AAA.SZ"], "20251014", "20251014"))  # skipped days
+        assert "AAA.SZ" not in buf
+        assert buf.window("AAA.SZ", "20251014")["trade_date"].tolist() == DAYS[8:14]
+        assert len(provider.calls) == 2
+
+
+class TestPrefetchDayBars:
+    def test_one_bulk_call(self, monkeypatch):
+        import backtest.engine as engine
+
+        provider = FakeProvider()
+        monkeypatch.setattr(engine, "data_provider", provider)
+        monkeypatch.setattr(engine, "calendar", SimpleNamespace(get_trading_days_before=_days_before))
+        monkeypatch.setattr(engine, "BAR_WINDOWS", None)
+        analyzer = engine.OrderAnalyzer.__new__(engine.OrderAnalyzer)
+
+        assert analyzer.get_market_data_df("AAA.SZ", "20251025") is not None
+        bars = analyzer.prefetch_day_bars("20251026", ["AAA.SZ", "BBB.SZ", "AAA.SZ"])
+        assert provider.calls[-1] == (["AAA.SZ", "BBB.SZ"], "20251026", "20251026")
+        assert bars["BBB.SZ"]["close"] == 25.0
+        assert len(analyzer.get_market_data_df("AAA.SZ", "20251026")) == 21
+        assert len(provider.calls) == 2
+
+    def test_bare_code_symbols(self, monkeypatch):
+        import backtest.engine as engine
+
+        provider = NormalizingProvider()
+        monkeypatch.setattr(engine, "data_provider", provider)
+        monkeypatch.setattr(engine, "calendar", SimpleNamespace(get_trading_days_before=_days_before))
+        monkeypatch.setattr(engine, "BAR_WINDOWS", None)
+        analyzer = engine.OrderAnalyzer.__new__(engine.OrderAnalyzer)
+
+        assert analyzer.get_market_data_df("600000", "20251025") is not None
+        bars = analyzer.prefetch_day_bars("20251026", ["600000", "AAA.SZ"])
+        assert bars["600000"]["close"] == 25.0 and bars["AAA.SZ"]["close"] == 25.0
+        assert analyzer.get_market_data_df("600000", "20251026")["trade_date"].iloc[-1] == "20251026"
+        assert len(provider.calls) == 2                  # window slid forward, not refetched
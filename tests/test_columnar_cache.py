@@ -0,0 +1,146 @@
+"""
+Unit tests for backtest/data/columnar_cache.py.
+
+The columnar backend must be a drop-in replacement for SQLiteDataCache:
+same keys, same 90% coverage rule, same invalidation semantics — only the
+storage layout differs.
+
+Covers:
+- set()/get() round trip and upsert on (symbol, trade_date)
+- get_frame() whole-market reads and get_many() coverage
+- invalidate() / invalidate_recent()
+- migrate_blob_cache() from a pickled-blob daily_data table
+- create_data_cache() backend selection
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backtest.data.sqlite_cache import SQLiteDataCache, create_data_cache  # noqa: E402
+from backtest.data.columnar_cache import ColumnarDataCache, migrate_blob_cache  # noqa: E402
+
+DATES = ["20251023", "20251024", "20251027"]
+
+
+@pytest.fixture
+def trading_days():
+    with patch("backtest.utils.trading_calendar.get_trading_days_between", return_value=DATES):
+        yield
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ColumnarDataCache(str(tmp_path / "cache.db"))
+
+
+def _symbol_frame(sample_ohlcv, symbol):
+    return sample_ohlcv[sample_ohlcv["ts_code"] == symbol].reset_index(drop=True)
+
+
+class TestRoundTrip:
+    def test_set_then_get_range(self, cache, sample_ohlcv, trading_days):
+        df = _symbol_frame(sample_ohlcv, "AAA.SZ")
+        assert cache.set("ohlcv_data_AAA.SZ_20251023_20251027", df)
+
+        out = cache.get("ohlcv_data_AAA.SZ_20251023_20251027")
+        assert out is not None
+        assert list(out["trade_date"]) == DATES
+        assert out["close"].tolist() == [10.2, 10.8, 11.5]
+        assert out["vol"].dtype.kind in "if"
+        assert "_symbol" not in out.columns
+
+    def test_single_day_hit(self, cache, sample_ohlcv):
+        cache.set("ohlcv_data_BBB.SH_20251023_20251027", _symbol_frame(sample_ohlcv, "BBB.SH"))
+        out = cache.get("ohlcv_data_BBB.SH_20251024_20251024")
+        assert len(out) == 1
+        assert out.iloc[0]["vol"] == 480_000
+
+    def test_partial_coverage_is_a_miss(self, cache, sample_ohlcv, trading_days):
+        df = _symbol_frame(sample_ohlcv, "AAA.SZ").iloc[:1]
+        cache.set("ohlcv_data_AAA.SZ_20251023_20251023", df)
+        assert cache.get("ohlcv_data_AAA.SZ_20251023_20251027") is None
+
+    def test_upsert_overwrites_and_adds_columns(self, cache, sample_ohlcv):
+        df = _symbol_frame(sample_ohlcv, "AAA.SZ")
+        cache.set("ohlcv_data_AAA.SZ_20251023_20251027", df)
+
+        patch_row = df.iloc[[0]].copy()
+        patch_row["close"] = 99.0
+        patch_row["pe"] = 12.5
+        cache.set("ohlcv_data_AAA.SZ_20251023_20251023", patch_row)
+
+        out = cache.get("ohlcv_data_AAA.SZ_20251023_20251023")
+        assert out.iloc[0]["close"] == 99.0
+        assert out.iloc[0]["pe"] == 12.5
+        assert cache.get_cached_dates("ohlcv_data", "AAA.SZ") == DATES
+
+    def test_set_bulk_multi_symbol(self, cache, sample_ohlcv):
+        assert cache.set_bulk("ohlcv_data", sample_ohlcv) == 6
+        assert cache.get_cached_dates_by_symbol("ohlcv_data")["BBB.SH"] == set(DATES)
+
+    def test_unsupported_type_not_cached(self, cache, sample_ohlcv):
+        assert not cache.set("basic_info_AAA.SZ_20251023_20251027", sample_ohlcv)
+
+
+class TestFrameAndInvalidate:
+    def test_get_frame_whole_market(self, cache, sample_ohlcv):
+        for sym in ("AAA.SZ", "BBB.SH"):
+            cache.set(f"ohlcv_data_{sym}_20251023_20251027", _symbol_frame(sample_ohlcv, sym))
+
+        frame = cache.get_frame("ohlcv_data", "20251024", "20251027")
+        assert len(frame) == 4
+        assert set(frame["ts_code"]) == {"AAA.SZ", "BBB.SH"}
+
+        only_b = cache.get_frame("ohlcv_data", "20251023", "20251027", symbols=["BBB.SH"])
+        assert set(only_b["ts_code"]) == {"BBB.SH"}
+
+    def test_get_many_coverage(self, cache, sample_ohlcv, trading_days):
+        cache.set("ohlcv_data_AAA.SZ_20251023_20251027", _symbol_frame(sample_ohlcv, "AAA.SZ"))
+        cache.set("ohlcv_data_BBB.SH_20251023_20251023", _symbol_frame(sample_ohlcv, "BBB.SH").iloc[:1])
+
+        df, coverage = cache.get_many("ohlcv_data", ["AAA.SZ", "BBB.SH"], "20251023", "20251027")
+        assert len(df) == 4
+        assert coverage["AAA.SZ"]["missing"] == []
+        assert coverage["BBB.SH"]["missing"] == DATES[1:]
+
+    def test_invalidate_pattern_and_recent(self, cache, sample_ohlcv):
+        for sym in ("AAA.SZ", "BBB.SH"):
+            cache.set(f"ohlcv_data_{sym}_20251023_20251027", _symbol_frame(sample_ohlcv, sym))
+
+        assert cache.invalidate("ohlcv_data_AAA*") == 3
+        assert cache.get_cached_dates("ohlcv_data", "AAA.SZ") == []
+
+        assert cache.invalidate_recent("ohlcv_data", days=1) == 1
+        assert cache.get_cached_dates("ohlcv_data", "BBB.SH") == DATES[:2]
+        assert cache.get_cache_stats()["total_entries"] == 2
+
+
+class TestMigration:
+    def test_migrate_blob_cache(self, tmp_path, sample_ohlcv):
+        db = str(tmp_path / "blob.db")
+        blob = SQLiteDataCache(db)
+        for sym in ("AAA.SZ", "BBB.SH"):
+            blob.set(f"ohlcv_data_{sym}_20251023_20251027", _symbol_frame(sample_ohlcv, sym))
+
+        stats = migrate_blob_cache(db)
+        assert stats == {"migrated": 6, "skipped": 0, "failed": 0}
+
+        col = ColumnarDataCache(db)
+        frame = col.get_frame("ohlcv_data", "20251023", "20251027")
+        assert len(frame) == 6
+        assert frame.loc[frame["ts_code"] == "AAA.SZ", "close"].tolist() == [10.2, 10.8, 11.5]
+
+    def test_factory_selects_backend(self, tmp_path):
+        db = str(tmp_path / "cache.db")
+        assert isinstance(create_data_cache(db, backend="columnar"), ColumnarDataCache)
+        plain = create_data_cache(db, backend="sqlite")
+        assert type(plain) is SQLiteDataCache
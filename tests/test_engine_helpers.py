@@ -9,6 +9,7 @@ Covers:
 - kaufman_efficiency_ratio() — Kaufman ER calculation
 - _detect_market_regime_cached() — memoization wrapper
 - _run_strategy_script() / _run_cli_command() — subprocess helpers (mocked)
+- _precompute_pick() / precompute_picks() — parallel pick phase (thread pool stand-in)
 - _REGIME_CACHE behavior
 """
 
@@ -39,6 +40,7 @@ from backtest.engine import (
     _run_strategy_script,
     _run_cli_command,
 )
+import backtest.engine as engine
 
 
 # ── kaufman_efficiency_ratio ─────────────────────────────────────────────────
@@ -190,3 +192,48 @@ class TestRunCliCommand:
             cmd = mock_run.call_args[0][0]
             assert "-m" in cmd
             assert "backtest.cli" in cmd
+
+
+# ── parallel pick phase ─────────────────────────────────────────────────────
+
+class TestParallelPickPhase:
+    """Tests for the two-phase (parallel picks, serial orders) backtest mode."""
+
+    def test_worker_defers_report_dependent_dates(self):
+        with patch("backtest.strategies.registry.pick_reads_reports", return_value=True), \
+             patch("backtest.engine.pick_stocks_to_file") as mock_pick:
+            assert engine._precompute_pick("20260105", "ts_7AZ", False, False, "/tmp/r") is None
+            mock_pick.assert_not_called()
+
+    def test_worker_uses_regime_position_limit(self):
+        seen = {}
+
+        def fake_pick(this_date, **kwargs):
+            seen["max_positions"] = engine.MAX_POSITIONS
+            seen["report_path"] = engine.REPORT_PATH
+            return f"/tmp/r/pick_stocks_{this_date}.json"
+
+        with patch("backtest.strategies.registry.pick_reads_reports", return_value=False), \
+             patch("backtest.engine._detect_market_regime_cached", return_value={"regime": "bear"}), \
+             patch("backtest.engine.pick_stocks_to_file", side_effect=fake_pick), \
+             patch.object(engine, "REPORT_PATH", engine.REPORT_PATH), \
+             patch.object(engine, "MAX_POSITIONS", engine.MAX_POSITIONS):
+            out = engine._precompute_pick("20260105", "ts_hma", False, False, "/tmp/r")
+        assert out == "/tmp/r/pick_stocks_20260105.json"
+        assert seen == {"max_positions": engine.REGIME_MAX_POSITIONS["bear"], "report_path": "/tmp/r"}
+
+    def test_precompute_skips_deferred_and_failed_dates(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        def fake_worker(this_date, *args):
+            if this_date == "20260106":
+                return None
+            if this_date == "20260107":
+                raise RuntimeError("boom")
+            return f"pick_stocks_{this_date}.json"
+
+        with patch("backtest.engine.ProcessPoolExecutor",
+                   lambda max_workers, mp_context: ThreadPoolExecutor(max_workers)), \
+             patch("backtest.engine._precompute_pick", side_effect=fake_worker):
+            picks = engine.precompute_picks(["20260105", "20260106", "20260107"], "ts_hma", workers=2)
+        assert picks == {"20260105": "pick_stocks_20260105.json"}
@@ -0,0 +1,118 @@
+"""
+Unit tests for backtest/data/fundamentals.py (point-in-time fina_indicator
+store) and its use by the ts_7AZ CANSLIM screener.
+
+Tushare endpoints and market data are stubbed — no network.
+
+Covers:
+- report_periods() quarter ends that can be announced by a date
+- as_of() seeing only reports announced by the date, latest revision first
+- ensure() bulk period pulls done once, per-stock fallback when bulk fails
+- canslim_screener() scoring C/A from one point-in-time lookup
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backtest.data.fundamentals import PointInTimeFundamentals, report_periods  # noqa: E402
+
+REPORTS = pd.DataFrame([
+    # ts_code, ann_date, end_date, q_dtprofit_yoy, roe
+    ("AAA.SZ", "20250425", "20250331", 30.0, 5.0),
+    ("AAA.SZ", "20250828", "20250630", 40.0, 9.0),
+    ("AAA.SZ", "20250905", "20250630", 45.0, 9.5),   # revision of the H1 report
+    ("BBB.SZ", "20250430", "20241231", 10.0, 18.0),
+    ("BBB.SZ", "20250430", "20250331", None, 4.0),
+], columns=["ts_code", "ann_date", "end_date", "q_dtprofit_yoy", "roe"])
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PointInTimeFundamentals(str(tmp_path / "cache.db"))
+
+
+class TestPointInTimeStore:
+    def test_report_periods(self):
+        assert report_periods("20250415") == ["20250331", "20241231", "20240930", "20240630", "20240331"]
+        assert report_periods("20250701")[0] == "20250630"
+        assert report_periods("20250630")[0] == "20250331"
+        assert report_periods("20250115", 2) == ["20241231", "20240930"]
+
+    def test_as_of_only_known_reports(self, store):
+        assert store.upsert(REPORTS) == 5
+        codes = ["AAA.SZ", "BBB.SZ", "CCC.SZ"]
+        assert store.as_of(codes, "20250420").index.tolist() == []
+        early = store.as_of(codes, "20250501")
+        assert early.loc["AAA.SZ", "end_date"] == "20250331"
+        assert early.loc["BBB.SZ", "end_date"] == "20250331" and pd.isna(early.loc["BBB.SZ", "q_dtprofit_yoy"])
+        assert store.as_of(codes, "20250901").loc["AAA.SZ", "q_dtprofit_yoy"] == 40.0
+        late = store.as_of(codes, "20250910")
+        assert late.loc["AAA.SZ", "q_dtprofit_yoy"] == 45.0 and "CCC.SZ" not in late.index
+
+    def test_ensure_period_pulls_once(self, store):
+        pulled = []
+
+        def fetch_period(period):
+            pulled.append(period)
+            return REPORTS[REPORTS["end_date"] == period]
+
+        store.ensure(["AAA.SZ"], "20250910", fetch_period, lambda c: pytest.fail("per-stock pull"))
+        assert pulled == report_periods("20250910")
+        store.ensure(["AAA.SZ"], "20250601", fetch_period, lambda c: pytest.fail("per-stock pull"))
+        assert pulled[5:] == ["20240331"]   # periods pulled today are complete for earlier dates
+        store.ensure(["AAA.SZ"], "20250601", fetch_period, lambda c: pytest.fail("per-stock pull"))
+        assert len(pulled) == 6
+        assert store.as_of(["AAA.SZ"], "20250910").loc["AAA.SZ", "roe"] == 9.5
+
+    def test_ensure_falls_back_per_stock(self, store):
+        def fetch_period(period):
+            raise RuntimeError("no permission")
+
+        stocks = []
+
+        def fetch_stock(ts_code):
+            stocks.append(ts_code)
+            return REPORTS[REPORTS["ts_code"] == ts_code]
+
+        store.ensure(["AAA.SZ", "BBB.SZ"], "20250910", fetch_period, fetch_stock)
+        store.ensure(["AAA.SZ", "BBB.SZ"], "20250910", fetch_period, fetch_stock)
+        assert stocks == ["AAA.SZ", "BBB.SZ"]
+        assert store.as_of(["BBB.SZ"], "20250910").loc["BBB.SZ", "roe"] == 4.0
+
+
+class TestScreenerFundamentals:
+    def test_scores_from_point_in_time_lookup(self, store, monkeypatch):
+        import backtest.strategies.ts_7AZ as ts_7AZ
+
+        days = [d.strftime("%Y%m%d") for d in pd.bdate_range(end="2025-09-10", periods=260)]
+        bars = {code: pd.DataFrame({"ts_code": code, "trade_date": days,
+                                    "close": [10.0 + i * 0.01 for i in range(len(days))]})
+                for code in ("AAA.SZ", "BBB.SZ")}
+        provider = SimpleNamespace(
+            get_bulk_daily_basic_by_date=lambda d: pd.DataFrame({
+                "ts_code": ["AAA.SZ", "BBB.SZ"], "circ_mv": [1e6, 1e6],
+                "turnover_rate": [5.0, 5.0], "total_mv": [1e6, 2e6]}),
+            get_bulk_ohlcv_by_date_range=lambda s, e: bars,
+        )
+        pro = SimpleNamespace(fina_indicator_vip=lambda period, fields: REPORTS[REPORTS["end_date"] == period])
+        monkeypatch.setattr(ts_7AZ, "data_provider", provider)
+        monkeypatch.setattr(ts_7AZ, "PRO", pro)
+        monkeypatch.setattr(ts_7AZ, "FUNDAMENTALS", store)
+        monkeypatch.setattr(ts_7AZ, "get_trading_days_before", lambda d, n: days[0])
+        monkeypatch.setattr(ts_7AZ, "get_stock_pool",
+                            lambda: pd.DataFrame({"ts_code": ["AAA.SZ", "BBB.SZ"], "name": ["A", "B"]}))
+
+        df = ts_7AZ.canslim_screener("20250830").set_index("ts_code")
+        assert df.loc["AAA.SZ", "eps_growth"] == 40.0          # revision of 0905 not yet known
+        assert bool(df.loc["AAA.SZ", "c_eps"]) and not bool(df.loc["BBB.SZ", "c_eps"])
+        assert df.loc["BBB.SZ", "roe"] == 4.0
@@ -0,0 +1,188 @@
+"""
+Unit tests for backtest/core/ledger.py (in-memory backtest ledger).
+
+The engine's order-execution functions run against a BacktestLedger and a
+plain file-backed DatabaseManager; both must end in the same state, and the
+database file must only change on flush().
+
+Covers:
+- BacktestLedger load from file / flush back / close
+- execute_buy_order / execute_sell_order / update_available_shares_for_new_day parity (T+1)
+- rollback on a failed statement; a failing nested cursor rolling back only its own work
+- cursor(commit=False) leaving its work uncommitted
+- engine resume checkpoint file round trip
+- --resume after a ledger run interrupted before its first flush redoing every date
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import backtest.engine as engine  # noqa: E402
+from backtest.core.ledger import BacktestLedger  # noqa: E402
+from shared.db.db import DatabaseManager  # noqa: E402
+
+SCHEMA = PROJECT_ROOT / "shared" / "db" / "imobile.sql"
+INSERT_TXN = ("INSERT INTO transactions (user_id, code, name, transaction_type, transaction_date, price, "
+              "quantity, amount, net_amount) VALUES (1, ?, 'Alpha', 'buy', '2025-10-23', 10.0, 100, 1000.0, 1005.0)")
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    path = tmp_path / "test_imobile.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA.read_text(encoding="utf-8"))
+    conn.close()
+    return str(path)
+
+
+def _simulate(db, monkeypatch):
+    """Two days of trading: buy, T+1 release, partial then full sell."""
+    monkeypatch.setattr(engine, "DB", db)
+    monkeypatch.setattr(engine, "calendar", SimpleNamespace(get_trading_days_before=lambda d, n: d))
+    assert engine.execute_buy_order(1, "AAA.SZ", "Alpha", 10.0, 1000, 11.0, 9.5, "20251023", "B1")
+    assert not engine.execute_sell_order(1, "AAA.SZ", "Alpha", 10.5, 500, "20251023", "S0")  # T+1
+    assert engine.update_available_shares_for_new_day("20251024") == 1
+    assert engine.execute_sell_order(1, "AAA.SZ", "Alpha", 10.5, 400, "20251024", "S1")
+    assert engine.execute_sell_order(1, "AAA.SZ", "Alpha", 11.0, 600, "20251027", "S2", reason="stop_loss")
+
+
+def _dump(db):
+    with db.cursor() as cursor:
+        txns = [tuple(r) for r in cursor.execute(
+            "SELECT code, transaction_type, transaction_date, price, quantity, net_amount, notes "
+            "FROM transactions ORDER BY id").fetchall()]
+        holdings = [tuple(r) for r in cursor.execute("SELECT * FROM holding_stocks").fetchall()]
+    return txns, holdings
+
+
+class TestLedger:
+    def test_same_state_as_file_database(self, db_file, tmp_path, monkeypatch):
+        other = tmp_path / "direct.db"
+        other.write_bytes(Path(db_file).read_bytes())
+        direct = DatabaseManager(str(other))
+        _simulate(direct, monkeypatch)
+
+        ledger = BacktestLedger(db_file)
+        _simulate(ledger, monkeypatch)
+
+        txns, holdings = _dump(ledger)
+        assert (txns, holdings) == _dump(direct)
+        assert [t[1] for t in txns] == ["buy", "sell", "sell"]
+        assert holdings == []
+        assert "P&L: ¥" in txns[-1][-1]
+
+    def test_file_changes_only_on_flush(self, db_file, monkeypatch):
+        ledger = BacktestLedger(db_file)
+        monkeypatch.setattr(engine, "DB", ledger)
+        engine.execute_buy_order(1, "AAA.SZ", "Alpha", 10.0, 1000, 11.0, 9.5, "20251023", "B1")
+
+        file_db = DatabaseManager(db_file)
+        assert file_db.fetch_value("SELECT COUNT(*) FROM transactions") == 0
+        ledger.flush()
+        assert file_db.fetch_value("SELECT COUNT(*) FROM transactions") == 1
+        assert file_db.fetch_value("SELECT available_shares FROM holding_stocks WHERE code='AAA.SZ'") == 0
+
+        # A new ledger resumes from the flushed state
+        ledger.close()
+        assert BacktestLedger(db_file).fetch_value("SELECT holdings FROM holding_stocks") == 1000
+
+    def test_rollback_on_error(self, db_file):
+        ledger = BacktestLedger(db_file)
+        with pytest.raises(sqlite3.Error):
+            with ledger.cursor() as cursor:
+                cursor.execute("INSERT INTO transactions (user_id, code, name, transaction_type, transaction_date, "
+                               "price, quantity, amount, net_amount) VALUES (1, 'AAA.SZ', 'Alpha', 'buy', "
+                               "'2025-10-23', 10.0, 100, 1000.0, 1005.0)")
+                cursor.execute("SELECT * FROM no_such_table")
+        assert ledger.fetch_value("SELECT COUNT(*) FROM transactions") == 0
+
+    def test_nested_rollback_keeps_outer_work(self, db_file):
+        ledger = BacktestLedger(db_file)
+        with ledger.cursor() as outer:
+            outer.execute(INSERT_TXN, ("AAA.SZ",))
+            with pytest.raises(sqlite3.Error):
+                with ledger.cursor() as inner:
+                    inner.execute(INSERT_TXN, ("BBB.SZ",))
+                    inner.execute("SELECT * FROM no_such_table")
+            outer.execute(INSERT_TXN, ("CCC.SZ",))
+        assert [r[0] for r in ledger.fetch_all("SELECT code FROM transactions ORDER BY id")] == ["AAA.SZ", "CCC.SZ"]
+        assert not ledger._conn.in_transaction
+
+    def test_commit_false_is_not_committed(self, db_file):
+        ledger = BacktestLedger(db_file)
+        with ledger.cursor(commit=False) as cursor:
+            cursor.execute(INSERT_TXN, ("AAA.SZ",))
+        assert ledger._conn.in_transaction
+        ledger._conn.execute("ROLLBACK")
+        assert ledger.fetch_value("SELECT COUNT(*) FROM transactions") == 0
+
+        with ledger.cursor(commit=False) as cursor:
+            cursor.execute(INSERT_TXN, ("AAA.SZ",))
+        ledger.flush()                                   # flush commits pending work
+        assert DatabaseManager(db_file).fetch_value("SELECT COUNT(*) FROM transactions") == 1
+
+
+class TestResumeCheckpoint:
+    def test_round_trip(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(engine, "REPORT_PATH", str(tmp_path))
+        assert engine._load_resume_checkpoint() is None
+        engine._save_resume_checkpoint("20251024")
+        assert engine._load_resume_checkpoint() == "20251024"
+
+    def test_resume_after_interrupt_before_first_flush(self, db_file, tmp_path, monkeypatch):
+        dates = ["20251020", "20251021", "20251022", "20251023"]
+        processed = []
+
+        def create_orders(pick_file, **kwargs):
+            processed.append(pick_file)
+            engine.DB.execute(INSERT_TXN, (f"{pick_file}.SZ",))
+            return str(tmp_path / f"smart_orders_{pick_file}.json")
+
+        class Analyzer:
+            fail_on = "20251022"
+
+            def __init__(self, smart_orders_file, user_id):
+                pass
+
+            def generate_daily_report(self, this_date, report_file, pnl):
+                if this_date == Analyzer.fail_on:
+                    raise KeyboardInterrupt
+                Path(report_file).write_text("report", encoding="utf-8")
+
+            def generate_period_report(self, start, end, report_file):
+                return {}
+
+        monkeypatch.setenv("BACKTEST_LEDGER", "memory")
+        monkeypatch.setenv("LEDGER_CHECKPOINT_DAYS", "20")
+        monkeypatch.setattr(engine, "DB", DatabaseManager(db_file))
+        monkeypatch.setattr(engine, "REPORT_PATH", str(tmp_path))
+        monkeypatch.setattr(engine, "calendar", SimpleNamespace(
+            get_trading_days_between=lambda s, e: dates, get_trading_days_before=lambda d, n: d))
+        monkeypatch.setattr(engine, "regime_series", lambda s, e: None)
+        monkeypatch.setattr(engine, "_detect_market_regime_cached", lambda d: {"regime": "normal"})
+        monkeypatch.setattr(engine, "create_smart_orders_from_picks", create_orders)
+        monkeypatch.setattr(engine, "OrderAnalyzer", Analyzer)
+        picks = {d: d for d in dates}
+
+        with pytest.raises(KeyboardInterrupt):
+            engine.pick_orders_trading(dates[0], dates[-1], backtest_search=False, picks=picks)
+        assert (tmp_path / "report_orders_20251020.md").exists()
+        assert engine._load_resume_checkpoint() is None
+        assert DatabaseManager(db_file).fetch_value("SELECT COUNT(*) FROM transactions") == 0
+
+        processed.clear()
+        Analyzer.fail_on = None
+        engine.pick_orders_trading(dates[0], dates[-1], backtest_search=False, resume=True, picks=picks)
+        assert processed == dates                             # nothing was flushed: every date redone
+        assert DatabaseManager(db_file).fetch_value("SELECT COUNT(*) FROM transactions") == len(dates)
+        assert engine._load_resume_checkpoint() == dates[-1]
@@ -0,0 +1,90 @@
+"""
+Unit tests for backtest/utils/lhb_index.py (compiled LHB prefix-sum index)
+and the ts_7AZ_96MA_flow / ts_multi_skills flow filters built on it.
+
+Uses the git-tracked ledgers in shared/data/lhb/ and small inline frames — no network.
+
+Covers:
+- window_sum() equal to masking the ledger per code, for the real institutional CSV
+- window_last() latest value in the window, NaN for unknown codes / empty windows
+- _apply_flow_filter() screen, boost and re-rank as one vectorized pass
+- _apply_multi_skills() float-cap adjust from the dragon list (上榜日 column)
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backtest.utils.lhb_index import LHBIndex  # noqa: E402
+
+INST_CSV = PROJECT_ROOT / "shared" / "data" / "lhb" / "lhb_institutional_2026.csv"
+
+LEDGER = pd.DataFrame({
+    "代码": [1, 1, 1, 2, 600353],
+    "上榜日期": ["2026-06-01", "2026-06-05", "2026-06-09", "2026-06-05", "2026-06-08"],
+    "机构买入净额": [100.0, -30.0, None, 7.0, -60_000_000.0],
+    "流通市值": [1e9, None, 3e9, 5e9, 2.5e9],
+})
+
+
+class TestLHBIndex:
+    @pytest.mark.skipif(not INST_CSV.exists(), reason="LHB ledger not available")
+    def test_window_sum_matches_masks(self):
+        df = pd.read_csv(INST_CSV)
+        index = LHBIndex.from_frame(df, "机构买入净额")
+        df["代码"] = df["代码"].astype(str).str.zfill(6)
+        df["_d"] = df["上榜日期"].astype(str).str.replace("-", "").astype(int)
+        df["inst_net"] = pd.to_numeric(df["机构买入净额"], errors="coerce").fillna(0.0)
+        codes = df["代码"].drop_duplicates().head(200).tolist() + ["999999"]
+        for ref in (20260301, 20260612, 20260701):
+            expected = [df[(df["代码"] == c) & (df["_d"] >= ref - 10) & (df["_d"] < ref)]["inst_net"].sum()
+                        for c in codes]
+            np.testing.assert_allclose(index.window_sum(codes, ref - 10, ref), expected)
+
+    def test_window_sum_and_last(self):
+        inst = LHBIndex.from_frame(LEDGER, "机构买入净额")
+        assert inst.window_sum(["000001", "000002", "000003"], 20260601, 20260610).tolist() == [70.0, 7.0, 0.0]
+        assert inst.window_sum(["000001"], 20260602, 20260605).tolist() == [0.0]
+        caps = LHBIndex.from_frame(LEDGER, "流通市值", dropna=True)
+        last = caps.window_last(["000001", "000001", "000009"], [20260601, 20260601, 20260601], [20260609, 20260610, 20260610])
+        assert last[0] == 1e9 and last[1] == 3e9 and np.isnan(last[2])
+        assert len(LHBIndex.from_frame(pd.DataFrame(), "流通市值")) == 0
+
+
+class TestFlowFilters:
+    CANDIDATES = pd.DataFrame({
+        "ts_code": ["000002.SZ", "600353.SH", "000001.SZ", "300001.SZ"],
+        "name": ["B", "S", "A", "C"],
+        "score": [5.0, 9.0, 5.0, 5.0],
+    })
+
+    def test_flow_filter(self, monkeypatch):
+        import backtest.strategies.ts_7AZ_96MA_flow as flow
+
+        ledger = LEDGER.assign(机构买入净额=[100e6, -30e6, None, 7.0, -60e6])
+        monkeypatch.setattr(flow, "load_lhb_index", lambda path, col: LHBIndex.from_frame(ledger, col))
+        out = flow._apply_flow_filter(self.CANDIDATES, "20260610")
+        assert out["ts_code"].tolist() == ["000001.SZ", "000002.SZ", "300001.SZ"]   # heavy net-sell screened
+        assert out["rank"].tolist() == [1, 2, 3]
+        assert out["score"].tolist() == pytest.approx([5.0 + 8 * 0.7, 5.0 + 8 * 7e-8, 5.0])
+        assert flow._institutional_flow("000001", "20260610") == pytest.approx(70e6)
+
+    def test_multi_skills_float_cap(self, monkeypatch):
+        import backtest.strategies.ts_multi_skills as multi
+
+        dragon = LEDGER.rename(columns={"上榜日期": "上榜日"})
+        monkeypatch.setattr(multi, "load_lhb_index", lambda path, col, dropna=False: LHBIndex.from_frame(
+            dragon if col == "流通市值" else LEDGER, col, dropna=dropna))
+        out = multi._apply_multi_skills(self.CANDIDATES, "20260610")
+        assert out["ts_code"].tolist() == ["000001.SZ", "000002.SZ", "300001.SZ"]
+        assert out["score"].tolist() == pytest.approx([5.5 + 8 * 70e-8, 5.5 + 8 * 7e-8, 5.0])
+        assert multi._float_cap("000001", "20260610") == 3e9 and multi._float_cap("300001", "20260610") is None
@@ -0,0 +1,147 @@
+"""
+Unit tests for backtest/analysis/llm_pipeline.py (ts_daily async analysis
+pipeline) and the local stand-in LLM endpoint utils/stub_llm_server.py.
+
+LLM and search calls are stubs or the local stand-in server — no network.
+
+Covers:
+- identical prompts sent once (in-flight dedup), cached results reused by hash
+- LLM concurrency bounded by the semaphore, results streamed as they complete
+- failures mapped through the fallback and never cached
+- opaque run() jobs (external analyzer) under the same LLM bound
+- run() jobs with inputs: gathered under the search bound, deduplicated and cached by
+  the inputs' hash, a None result (failed analysis) not cached
+- the stand-in endpoint answering OpenAI-style chat completions deterministically
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backtest.analysis.llm_pipeline import (  # noqa: E402
+    AnalysisJob, AnalysisPipeline, PromptResultCache, prompt_hash,
+)
+
+
+class CountingLLM:
+    """complete() stub recording calls and peak concurrency."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.prompts = []
+        self.active = self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, prompt):
+        with self.lock:
+            self.prompts.append(prompt)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        if "boom" in prompt:
+            raise RuntimeError("model exhausted")
+        return json.dumps({"score": len(prompt)})
+
+
+def _jobs(prompts):
+    return [AnalysisJob(key=f"S{i}", build_prompt=lambda p=p: p) for i, p in enumerate(prompts)]
+
+
+class TestAnalysisPipeline:
+    def test_dedup_and_cache(self, tmp_path):
+        llm = CountingLLM()
+        cache = PromptResultCache(str(tmp_path / "cache.db"))
+        pipeline = AnalysisPipeline(complete=llm, parse=json.loads, cache=cache, namespace="m1")
+        results = pipeline.run(_jobs(["aa", "bbb", "aa"]))
+        assert results == {"S0": {"score": 2}, "S1": {"score": 3}, "S2": {"score": 2}}
+        assert sorted(llm.prompts) == ["aa", "bbb"] and pipeline.stats["deduplicated"] == 1
+
+        again = AnalysisPipeline(complete=llm, parse=json.loads, cache=cache, namespace="m1")
+        assert again.run(_jobs(["bbb"])) == {"S0": {"score": 3}}
+        assert len(llm.prompts) == 2 and again.stats["cache_hits"] == 1
+        assert cache.get(prompt_hash("aa", "m2")) is None           # other model list, other entry
+
+    def test_bounded_and_streamed(self):
+        llm = CountingLLM(delay=0.05)
+        pipeline = AnalysisPipeline(complete=llm, parse=json.loads, llm_concurrency=3)
+        prompts = ["x" * n for n in range(1, 13)]
+        seen = []
+        results = pipeline.run(_jobs(prompts), on_result=lambda key, result: seen.append(key))
+        assert llm.peak <= 3 and len(results) == 12 and sorted(seen) == sorted(results)
+
+        slow_then_fast = [AnalysisJob(key="slow", run=lambda: time.sleep(0.3) or "slow"),
+                          AnalysisJob(key="fast", run=lambda: "fast")]
+
+        async def first_key():
+            async for key, _ in AnalysisPipeline(llm_concurrency=2).stream(slow_then_fast):
+                return key
+        assert asyncio.run(first_key()) == "fast"
+
+    def test_fallback_not_cached(self, tmp_path):
+        llm = CountingLLM()
+        cache = PromptResultCache(str(tmp_path / "cache.db"))
+        pipeline = AnalysisPipeline(complete=llm, parse=json.loads, cache=cache,
+                                    fallback=lambda job, e: {"score": 50, "summary": str(e)})
+        results = pipeline.run(_jobs(["boom", "boom", "ok"]))
+        assert results["S0"] == results["S1"] == {"score": 50, "summary": "model exhausted"}
+        assert results["S2"] == {"score": 2} and pipeline.stats["errors"] == 2
+        assert cache.get(prompt_hash("boom")) is None and llm.prompts.count("boom") == 1
+
+    def test_run_jobs_cached_by_inputs(self, tmp_path):
+        cache = PromptResultCache(str(tmp_path / "cache.db"))
+        gathered, analyzed = CountingLLM(delay=0.05), []
+
+        def job(key, inputs, score):
+            def run():
+                analyzed.append(key)
+                time.sleep(0.05)
+                return None if score is None else {"ai_score": score}
+            return AnalysisJob(key=key, inputs=lambda: gathered(inputs) and inputs, run=run)
+
+        pipeline = AnalysisPipeline(cache=cache, namespace="dsa", search_concurrency=2, llm_concurrency=4)
+        results = pipeline.run([job("A", "600000|bars|news", 71), job("B", "600000|bars|news", 71),
+                                job("C", "000001|bars|news", None), job("D", "000002|bars|news", 64)])
+        assert results == {"A": {"ai_score": 71}, "B": {"ai_score": 71}, "C": None, "D": {"ai_score": 64}}
+        assert gathered.peak <= 2 and len(gathered.prompts) == 4         # inputs under the search bound
+        assert sorted(analyzed) in (["A", "C", "D"], ["B", "C", "D"])     # identical inputs analyzed once
+        assert cache.get(prompt_hash("000001|bars|news", "dsa")) is None  # failed analysis not cached
+
+        analyzed.clear()
+        again = AnalysisPipeline(cache=cache, namespace="dsa")
+        assert again.run([job("A", "600000|bars|news", 0), job("C", "000001|bars|news", 55)]) == \
+            {"A": {"ai_score": 71}, "C": {"ai_score": 55}}
+        assert analyzed == ["C"] and again.stats["cache_hits"] == 1
+
+
+class TestStubLLMServer:
+    def test_chat_completion(self):
+        from utils.stub_llm_server import serve
+
+        server = serve(port=0)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+
+            def complete(prompt):
+                body = json.dumps({"model": "stub", "messages": [{"role": "user", "content": prompt}]}).encode()
+                req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+                with urllib.request.urlopen(req, timeout=5) as resp:
+                    return json.loads(resp.read())["choices"][0]["message"]["content"]
+
+            pipeline = AnalysisPipeline(complete=complete, parse=json.loads)
+            results = pipeline.run(_jobs(["平安银行 利好", "贵州茅台", "平安银行 利好"]))
+            assert results["S0"] == results["S2"] and 40 <= results["S1"]["score"] < 95
+            assert pipeline.stats["llm_calls"] == 2
+        finally:
+            server.shutdown()
@@ -0,0 +1,122 @@
+"""
+Unit tests for backtest/data/panel.py (MarketPanel + vectorized indicators).
+
+The panel indicators must match the per-stock pandas helpers the strategies
+already use, and the ts_96MA panel pre-filter must never drop a stock the
+exact per-stock analysis would keep.
+
+Covers:
+- from_long()/from_frames() pivot and NaN for missing bars
+- rolling_mean / hma / adx parity with ts_96MA and ts_hma helpers
+- rolling_mean min_periods matching Series.rolling(min_periods=...) over leading and interior NaN
+- pct_slope NaN across suspension gaps
+- prefilter_96mv_candidates() is a superset of analyze_stock_96mv() survivors
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backtest.data.panel import MarketPanel, adx, hma, pct_slope, rolling_mean  # noqa: E402
+
+
+def _random_ohlcv(code: str, dates: list, rng, drift: float) -> pd.DataFrame:
+    close = 10 * np.exp(np.cumsum(rng.normal(drift, 0.02, len(dates))))
+    return pd.DataFrame({
+        "ts_code": code,
+        "trade_date": dates,
+        "open": close * (1 + rng.normal(0, 0.005, len(dates))),
+        "high": close * (1 + rng.random(len(dates)) * 0.02),
+        "low": close * (1 - rng.random(len(dates)) * 0.02),
+        "close": close,
+        "vol": rng.integers(1_000, 10_000, len(dates)).astype(float),
+        "amount": close * 1_000,
+    })
+
+
+@pytest.fixture
+def universe():
+    rng = np.random.default_rng(7)
+    dates = pd.bdate_range("2024-01-01", periods=280).strftime("%Y%m%d").tolist()
+    frames = {}
+    for i in range(40):
+        code = f"{i:06d}.SZ"
+        df = _random_ohlcv(code, dates, rng, drift=rng.normal(0.001, 0.002))
+        if i % 7 == 0:   # suspension gap
+            df = df.drop(index=range(200, 205)).reset_index(drop=True)
+        if i % 11 == 0:  # recent listing
+            df = df.iloc[150:].reset_index(drop=True)
+        frames[code] = df
+    return frames
+
+
+class TestPanelConstruction:
+    def test_pivot_and_missing_bars(self, sample_ohlcv):
+        panel = MarketPanel.from_long(sample_ohlcv.drop(index=[4]))
+        assert panel.shape == (3, 2)
+        assert panel.symbols == ["AAA.SZ", "BBB.SH"]
+        assert panel.close[:, 0].tolist() == [10.2, 10.8, 11.5]
+        assert np.isnan(panel.close[1, 1])
+        assert panel.bar_counts().tolist() == [3, 2]
+        assert panel.latest(panel.close)["AAA.SZ"] == 11.5
+
+    def test_empty(self):
+        panel = MarketPanel.from_frames({})
+        assert panel.symbols == []
+
+
+class TestIndicatorParity:
+    def test_matches_strategy_helpers(self, universe):
+        from backtest.strategies import ts_96MA, ts_hma
+
+        df = universe["000001.SZ"]
+        close, high, low = df["close"], df["high"], df["low"]
+
+        np.testing.assert_allclose(rolling_mean(close.to_numpy(), 96), ts_96MA.calculate_ma(close, 96), equal_nan=True)
+        np.testing.assert_allclose(hma(close.to_numpy(), 20), ts_hma.calculate_hma(close, 20), equal_nan=True)
+        expected = ts_96MA.calculate_adx(high, low, close)
+        got = adx(high.to_numpy(), low.to_numpy(), close.to_numpy())
+        for key in ("adx", "plus_di", "minus_di"):
+            np.testing.assert_allclose(got[key], expected[key], rtol=1e-9)
+
+    def test_rolling_mean_min_periods(self):
+        values = np.random.default_rng(3).normal(size=(60, 3))
+        values[:7, 1] = np.nan
+        values[30, 2] = np.nan
+        for min_periods in (1, 10, 20):
+            expected = pd.DataFrame(values).rolling(20, min_periods=min_periods).mean().to_numpy()
+            np.testing.assert_allclose(rolling_mean(values, 20, min_periods), expected, equal_nan=True)
+
+    def test_panel_adx_skips_gaps_like_per_stock(self, universe):
+        from backtest.strategies import ts_96MA
+
+        df = universe["000007.SZ"]  # has a suspension gap
+        panel = MarketPanel.from_frames(universe)
+        col = panel.column("000007.SZ")
+        expected = ts_96MA.calculate_adx(df["high"], df["low"], df["close"])["adx"].iloc[-1]
+        assert panel.adx()["adx"][-1, col] == pytest.approx(expected)
+
+    def test_slope_nan_across_gap(self):
+        x = np.array([1.0, 2.0, np.nan, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0])
+        s = pct_slope(x, 2)
+        assert np.isnan(s[3]) and np.isnan(s[4])
+        assert s[5] == pytest.approx(50.0)
+
+
+class TestPrefilter96MA:
+    def test_prefilter_keeps_every_exact_survivor(self, universe):
+        from backtest.strategies import ts_96MA
+
+        candidates = ts_96MA.prefilter_96mv_candidates(universe)
+        survivors = {code for code, df in universe.items() if ts_96MA.analyze_stock_96mv(code, df)}
+        assert survivors <= candidates
+        assert len(candidates) < len(universe)
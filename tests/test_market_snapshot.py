@@ -0,0 +1,91 @@
+"""
+Unit tests for the per-trade_date market snapshot cache.
+
+TushareDataProvider.get_bulk_ohlcv_by_date_range must read cached
+whole-market `daily` snapshots first and only call the API for missing
+dates. The Tushare client is a MagicMock — no network.
+
+Covers:
+- SQLiteDataCache.get_snapshots() / set_snapshot()
+- get_bulk_ohlcv_by_date_range() cache-first fetch and per-symbol split
+- split_by_symbol() helper
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backtest.data.sqlite_cache import SQLiteDataCache  # noqa: E402
+from backtest.data.provider import TushareDataProvider  # noqa: E402
+from backtest.utils.util import split_by_symbol  # noqa: E402
+
+DATES = ["20251023", "20251024", "20251027"]
+
+
+@pytest.fixture
+def provider(tmp_path):
+    p = TushareDataProvider.__new__(TushareDataProvider)
+    p.token = "dummy"
+    p.rate_limit_delay = 0
+    p.cache = SQLiteDataCache(str(tmp_path / "cache.db"))
+    p.pro = MagicMock()
+    return p
+
+
+def _day(sample_ohlcv, trade_date):
+    return sample_ohlcv[sample_ohlcv["trade_date"] == trade_date].reset_index(drop=True)
+
+
+class TestSnapshotCache:
+    def test_set_and_get_snapshots(self, tmp_path, sample_ohlcv):
+        c = SQLiteDataCache(str(tmp_path / "cache.db"))
+        assert c.set_snapshot("daily", "20251023", _day(sample_ohlcv, "20251023"))
+        assert not c.set_snapshot("daily", "20251024", pd.DataFrame())
+
+        snaps = c.get_snapshots("daily", DATES)
+        assert list(snaps) == ["20251023"]
+        assert len(snaps["20251023"]) == 2
+        assert c.get_snapshots("daily_basic", DATES) == {}
+
+
+class TestBulkOhlcvRange:
+    def test_only_missing_dates_hit_api(self, provider, sample_ohlcv):
+        for d in DATES[:2]:
+            provider.cache.set_snapshot("daily", d, _day(sample_ohlcv, d))
+        provider.pro.daily.return_value = _day(sample_ohlcv, DATES[2])
+
+        with patch("backtest.utils.trading_calendar.get_trading_days_between", return_value=DATES):
+            result = provider.get_bulk_ohlcv_by_date_range(DATES[0], DATES[-1])
+
+        provider.pro.daily.assert_called_once()
+        assert provider.pro.daily.call_args.kwargs["trade_date"] == DATES[2]
+        assert set(result) == {"AAA.SZ", "BBB.SH"}
+        assert result["AAA.SZ"]["trade_date"].tolist() == DATES
+        assert result["AAA.SZ"]["close"].tolist() == [10.2, 10.8, 11.5]
+        # Closed sessions are persisted, so a second run needs no API call
+        assert DATES[2] in provider.cache.get_snapshots("daily", DATES)
+
+    def test_todays_snapshot_not_persisted(self, provider, sample_ohlcv):
+        today = pd.Timestamp.now().strftime("%Y%m%d")
+        provider.pro.daily_basic.return_value = _day(sample_ohlcv, DATES[0]).assign(trade_date=today)
+
+        assert not provider.get_bulk_daily_basic_by_date(today).empty
+        assert provider.cache.get_snapshots("daily_basic", [today]) == {}
+
+
+class TestSplitBySymbol:
+    def test_contiguous_sorted_blocks(self, sample_ohlcv):
+        shuffled = sample_ohlcv.sample(frac=1, random_state=0)
+        parts = split_by_symbol(shuffled)
+        assert list(parts) == ["AAA.SZ", "BBB.SH"]
+        assert parts["BBB.SH"]["trade_date"].tolist() == DATES
+        assert split_by_symbol(pd.DataFrame()) == {}
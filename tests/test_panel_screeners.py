@@ -0,0 +1,358 @@
+"""
+Parity tests for the panel-based ts_longup and ts_multi_swing_defensive screeners.
+
+Both screeners score the whole universe on one MarketPanel.from_bars panel.
+The legacy_* functions below are the per-stock implementations they replace;
+every end date of a fixed range must give the same scores and the same picks.
+
+Uses a synthetic universe (trends, pullbacks, suspensions, recent listings)
+and stubbed data provider / regime lookups — no network.
+
+Covers:
+- MarketPanel.from_bars right-alignment, lengths and the 'volume' fallback
+- score_panel() rows equal to the per-stock analysis for every stock
+- pick_longup_stocks() / pick_multi_swing_defensive() picks (order, rank, score)
+  unchanged over ten consecutive end dates and two regimes each
+"""
+
+from __future__ import annotations
+
+import math
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backtest.data.panel import MarketPanel  # noqa: E402
+from backtest.strategies import ts_longup, ts_multi_swing_defensive as ts_msd  # noqa: E402
+from backtest.strategies.ts_96MA import calculate_adx  # noqa: E402
+
+DATES = pd.bdate_range("2024-01-01", periods=200).strftime("%Y%m%d").tolist()
+END_DATES = DATES[-10:]
+
+
+# ── Legacy per-stock implementations ────────────────────────────
+
+def legacy_analyze_longup(ts_code, df, index_returns_20d=0.0):
+    if df is None or df.empty or len(df) < 80:
+        return None
+    df = df.sort_values('trade_date', ascending=True).reset_index(drop=True)
+    close, high, low, vol = (df[c].astype(float) for c in ('close', 'high', 'low', 'vol'))
+    periods, ma_label = ((60, 30, 10), "MA10/MA30/MA60") if len(close) < 120 else ((120, 60, 20), "MA20/MA60/MA120")
+    ma_long, ma_mid, ma_short = (close.rolling(window=p).mean() for p in periods)
+    latest, ls, lm, ll = close.iloc[-1], ma_short.iloc[-1], ma_mid.iloc[-1], ma_long.iloc[-1]
+    if pd.isna(ls) or pd.isna(lm) or pd.isna(ll) or latest < ll * 0.98:
+        return None
+    low_120d = low.tail(120).min() if len(low) >= 120 else low.min()
+    gain_from_low = (latest - low_120d) / low_120d * 100
+    if gain_from_low > ts_longup.MAX_GAIN_FROM_LOW_PCT:
+        return None
+
+    score, signals = 0.0, []
+    ma_aligned = (ls > lm > ll)
+    slope_short, slope_mid, slope_long = ((ma - ma.shift(10)) / ma.shift(10) * 100 for ma in (ma_short, ma_mid, ma_long))
+    slope_short, slope_mid, slope_long = slope_short.iloc[-1], slope_mid.iloc[-1], slope_long.iloc[-1]
+    if pd.isna(slope_short) or pd.isna(slope_mid) or pd.isna(slope_long):
+        return None
+    all_slopes_up = (slope_short > 0 and slope_mid > 0 and slope_long > 0)
+    if ma_aligned and all_slopes_up:
+        score += 25.0
+        signals.append(f"MA_aligned_up({ma_label})")
+    elif ma_aligned:
+        score += 15.0
+        signals.append(f"MA_aligned({ma_label})")
+    elif latest > lm and slope_mid > 0:
+        score += 8.0
+        signals.append("MA_partial_align")
+
+    dist = (latest - ls) / ls * 100
+    if latest > ls > lm:
+        if 0 <= dist <= 5:
+            score += 20.0
+            signals.append(f"price_near_MA20({dist:.1f}%)")
+        elif 5 < dist <= ts_longup.MA_PROXIMITY_MAX_PCT:
+            score += 12.0
+            signals.append(f"price_above_MA20({dist:.1f}%)")
+    elif latest > lm:
+        score += 5.0
+        signals.append("price_above_MA60")
+
+    vol_5d, vol_20d, vol_60d = vol.tail(5).mean(), vol.tail(20).mean(), vol.tail(60).mean()
+    vrs = vol_5d / vol_20d if vol_20d > 0 else 1.0
+    vrt = vol_20d / vol_60d if vol_60d > 0 else 1.0
+    if vrs > 1.3 and vrt > 1.1:
+        score += 20.0
+        signals.append(f"vol_expanding(5d/20d={vrs:.2f},20d/60d={vrt:.2f})")
+    elif vrs > 1.1 and vrt > 1.0:
+        score += 12.0
+        signals.append(f"vol_moderate_up(5d/20d={vrs:.2f})")
+    elif vrt > 1.0:
+        score += 5.0
+        signals.append("vol_trend_up")
+
+    adx_data = calculate_adx(high, low, close, period=14)
+    adx, plus_di, minus_di = (adx_data[k].iloc[-1] for k in ('adx', 'plus_di', 'minus_di'))
+    if not pd.isna(adx):
+        adx_rising = adx > adx_data['adx'].iloc[-10]
+        if ts_longup.ADX_MIN <= adx <= ts_longup.ADX_MAX and adx_rising and plus_di > minus_di:
+            score += 15.0
+            signals.append(f"ADX_rising({adx:.1f},+DI>{int(plus_di)},-DI={int(minus_di)})")
+        elif plus_di > minus_di and adx > 15:
+            score += 8.0
+            signals.append(f"DI_bullish(ADX={adx:.1f})")
+
+    touched = any(not pd.isna(ma_short.iloc[i]) and abs(low.iloc[i] - ma_short.iloc[i]) / ma_short.iloc[i] * 100 < 2.0
+                  and close.iloc[-1] > ma_short.iloc[-1] for i in range(-10, 0))
+    if touched:
+        score += 10.0
+        signals.append("pullback_bounce_MA20")
+    else:
+        range_high = high.iloc[-30:-5].max()
+        if range_high < latest < range_high * 1.05:
+            score += 7.0
+            signals.append("breakout_consolidation")
+
+    excess = (close.iloc[-1] / close.iloc[-20] - 1) * 100 - index_returns_20d
+    if excess > 5:
+        score += 10.0
+        signals.append(f"rel_strength(+{excess:.1f}%)")
+    elif excess > 2:
+        score += 5.0
+        signals.append(f"moderate_rel_str(+{excess:.1f}%)")
+
+    if score < 30:
+        return None
+    return {'ts_code': ts_code, 'close': latest, 'ma_short': ls, 'ma_mid': lm, 'ma_long': ll,
+            'ma_aligned': ma_aligned, 'all_slopes_up': all_slopes_up,
+            'adx': adx if not pd.isna(adx) else 0,
+            'plus_di': plus_di if not pd.isna(plus_di) else 0,
+            'minus_di': minus_di if not pd.isna(minus_di) else 0,
+            'gain_from_low_pct': round(gain_from_low, 2), 'price_dist_ma20': round(dist, 2),
+            'composite_score': round(score, 2), 'signals': signals}
+
+
+def legacy_analyze_multi_swing(ts_code, df):
+    if df is None or df.empty or len(df) < ts_msd.MA_SLOW + 10:
+        return None
+    df = df.sort_values('trade_date', ascending=True).reset_index(drop=True)
+    close, vol = df['close'].astype(float), df['vol'].astype(float)
+    ma20 = close.rolling(ts_msd.MA_FAST, min_periods=10).mean()
+    ma60 = close.rolling(ts_msd.MA_TREND, min_periods=30).mean()
+    ma120 = close.rolling(ts_msd.MA_SLOW, min_periods=60).mean()
+    last = float(close.iloc[-1])
+    lma20, lma60, lma120 = (float(ma.iloc[-1]) if not pd.isna(ma.iloc[-1]) else last for ma in (ma20, ma60, ma120))
+
+    ma60_slope = (lma60 / float(ma60.iloc[-6]) - 1) * 100 if not pd.isna(ma60.iloc[-6]) else 0
+    above_ma60 = last >= lma60
+    if not (above_ma60 and last >= lma20 and ma60_slope > -1.0 and (lma20 >= lma60 or last > lma120)):
+        return None
+
+    dif = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    dea = dif.ewm(span=9, adjust=False).mean()
+    ldif, ldea = float(dif.iloc[-1]), float(dea.iloc[-1])
+    macd_above_zero, macd_bullish = ldif > 0 or ldea > 0, ldif > ldea
+    gc_recent = any(dif.iloc[i] > dea.iloc[i] and dif.iloc[i - 1] <= dea.iloc[i - 1]
+                    for i in range(len(close) - 1, max(len(close) - 6, 0), -1))
+    if not ((macd_above_zero and macd_bullish) or gc_recent):
+        return None
+
+    delta = close.diff()
+    gain = delta.clip(lower=0).rolling(ts_msd.RSI_PERIOD).mean()
+    loss = (-delta.clip(upper=0)).rolling(ts_msd.RSI_PERIOD).mean()
+    rsi = float((100 - 100 / (1 + gain / loss.replace(0, pd.NA))).fillna(50).iloc[-1])
+    dist_ma20 = (last / lma20 - 1) * 100
+    if not (ts_msd.RSI_MIN <= rsi <= ts_msd.RSI_MAX and dist_ma20 <= ts_msd.PULLBACK_BAND * 100):
+        return None
+
+    rets = close.pct_change().dropna()
+    ann_vol = float(rets.tail(20).std() * math.sqrt(252)) if len(rets) >= 20 else float('inf')
+    q = ts_msd.W_TREND * (2.0 if (above_ma60 and ma60_slope > 0.5) else (1.0 if above_ma60 else 0.0))
+    q += ts_msd.W_MACD * (2.0 if (macd_above_zero and macd_bullish) else 1.0)
+    q += ts_msd.W_PROX * (2.0 if abs(dist_ma20) <= 2.0 else (1.0 if dist_ma20 > 0 else 0.0))
+    q += ts_msd.W_LOWVOL * (2.0 if ann_vol < 0.25 else (1.0 if ann_vol < ts_msd.MAX_VOLATILITY else 0.0))
+    weights = ts_msd.W_TREND + ts_msd.W_MACD + ts_msd.W_PROX + ts_msd.W_LOWVOL
+    return {'ts_code': ts_code, 'close': last, 'ma20': lma20, 'ma60': lma60, 'dist_ma20': dist_ma20,
+            'rsi': rsi, 'macd': ldif - ldea, 'composite_score': max(0.0, min(100.0, q / (2 * weights) * 100)),
+            'volatility': ann_vol, 'recent_vol': float(vol.tail(10).mean()),
+            'trend': 'Bullish' if (above_ma60 and ma60_slope > 0) else 'Neutral'}
+
+
+def legacy_pick_longup(stock_basic, all_data, index_returns_20d, max_picks, min_score):
+    results = []
+    for _, row in stock_basic.iterrows():
+        analysis = legacy_analyze_longup(row['ts_code'], all_data.get(row['ts_code']), index_returns_20d)
+        if analysis:
+            analysis['name'] = row['name']
+            results.append(analysis)
+    if not results:
+        return pd.DataFrame()
+    df = pd.DataFrame(results).sort_values('composite_score', ascending=False)
+    df = df[df['composite_score'] >= min_score]
+    df['priority'] = df.apply(lambda r: 2 if (r['ma_aligned'] and r['all_slopes_up']) else (1 if r['ma_aligned'] else 0),
+                              axis=1)
+    df = df.sort_values(['priority', 'composite_score'], ascending=[False, False]).drop(columns=['priority'])
+    df = df.head(max_picks).reset_index(drop=True)
+    df['rank'] = range(1, len(df) + 1)
+    return df
+
+
+def legacy_pick_multi_swing(stock_basic, all_data, regime, max_picks, min_score):
+    results = []
+    for _, row in stock_basic.iterrows():
+        analysis = legacy_analyze_multi_swing(row['ts_code'], all_data.get(row['ts_code']))
+        if analysis and not (regime in ('bear', 'volatile') and analysis['volatility'] > 0.30):
+            analysis['name'] = row['name']
+            results.append(analysis)
+    if not results:
+        return pd.DataFrame()
+    df = pd.DataFrame(results).sort_values('composite_score', ascending=False)
+    kept = df[df['composite_score'] >= min_score]
+    if len(kept) == 0:
+        kept = df.head(max_picks)
+    kept = kept.head(max_picks).copy()
+    kept['rank'] = range(1, len(kept) + 1)
+    return kept
+
+
+# ── Synthetic universe ──────────────────────────────────────────
+
+def _stock(code, rng, uptrend_days):
+    n = len(DATES)
+    drift = np.where(np.arange(n) < n - uptrend_days, rng.normal(0, 0.001), rng.uniform(0.002, 0.006))
+    sigma = rng.uniform(0.006, 0.025)
+    close = 10 * np.exp(np.cumsum(drift + rng.normal(0, sigma, n)))
+    spread = rng.random(n) * sigma
+    return pd.DataFrame({
+        "ts_code": code,
+        "trade_date": DATES,
+        "open": close * (1 + rng.normal(0, sigma / 4, n)),
+        "high": close * (1 + spread),
+        "low": close * (1 - spread),
+        "close": close,
+        "vol": rng.integers(1_000, 10_000, n) * np.linspace(1.0, rng.uniform(0.8, 1.6), n),
+        "amount": close * 1_000,
+    })
+
+
+@pytest.fixture(scope="module")
+def universe():
+    rng = np.random.default_rng(11)
+    frames, names = {}, []
+    for i in range(120):
+        code = f"{600000 + i:06d}.SH" if i % 2 else f"{i:06d}.SZ"
+        df = _stock(code, rng, uptrend_days=int(rng.integers(20, 120)))
+        if i % 7 == 0:    # suspension
+            df = df.drop(index=range(150, 156))
+        if i % 11 == 0:   # recent listing: MA10/30/60 fallback, too short for multi-swing
+            df = df.iloc[-100:]
+        if i % 13 == 0:   # listed a few days too late for the long MAs
+            df = df.iloc[-125:]
+        frames[code] = df.iloc[::-1].reset_index(drop=True) if i % 5 == 0 else df.reset_index(drop=True)
+        names.append(f"*ST{i}" if i % 17 == 0 else f"股票{i}")
+    stock_basic = pd.DataFrame({"ts_code": list(frames), "name": names})
+    return stock_basic, frames
+
+
+def _window(frames, end_date, lookback):
+    start = DATES[DATES.index(end_date) - lookback]
+    return {code: df[(df['trade_date'] >= start) & (df['trade_date'] <= end_date)] for code, df in frames.items()}
+
+
+def _provider(stock_basic, frames):
+    return SimpleNamespace(get_basic_information_api=lambda: stock_basic.copy(),
+                           get_bulk_ohlcv_by_date_range=lambda start, end: {
+                               code: df[(df['trade_date'] >= start) & (df['trade_date'] <= end)]
+                               for code, df in frames.items()})
+
+
+def _trading_days_before(date, n):
+    return DATES[DATES.index(date) - n]
+
+
+def _same_rows(got, expected, columns):
+    assert got['ts_code'].tolist() == expected['ts_code'].tolist()
+    for column in columns:
+        np.testing.assert_allclose(got[column].astype(float), expected[column].astype(float), rtol=1e-9)
+
+
+class TestFromBars:
+    def test_right_aligned_with_lengths(self):
+        frames = {"B": pd.DataFrame({"trade_date": DATES[:6][::-1], "close": np.arange(6.0), "vol": 1.0}),
+                  "A": pd.DataFrame({"trade_date": DATES[2:6], "close": np.arange(4.0), "volume": 2.0}),
+                  "C": pd.DataFrame()}
+        panel = MarketPanel.from_bars(frames, length=5)
+        assert panel.symbols == ["B", "A"] and panel.lengths.tolist() == [6, 4]
+        assert panel.close[:, 0].tolist() == [4.0, 3.0, 2.0, 1.0, 0.0]
+        assert np.isnan(panel.close[0, 1]) and panel.close[1:, 1].tolist() == [0.0, 1.0, 2.0, 3.0]
+        assert panel.vol[-1].tolist() == [1.0, 2.0]
+        assert panel.dates[-1] == "0"
+
+
+class TestScreenerParity:
+    @pytest.mark.parametrize("end_date", END_DATES[::3])
+    def test_score_panel_matches_per_stock(self, universe, end_date):
+        _, frames = universe
+        window = _window(frames, end_date, ts_longup.LOOKBACK_DAYS)
+        expected = pd.DataFrame([r for code, df in window.items() if (r := legacy_analyze_longup(code, df, 1.5))])
+        got = ts_longup.score_panel(MarketPanel.from_bars(window), 1.5)
+        _same_rows(got, expected, ['close', 'ma_short', 'ma_mid', 'ma_long', 'adx', 'plus_di', 'minus_di',
+                                   'gain_from_low_pct', 'price_dist_ma20', 'composite_score'])
+        assert got['signals'].tolist() == expected['signals'].tolist()
+        assert got['ma_aligned'].tolist() == expected['ma_aligned'].tolist()
+
+        window = _window(frames, end_date, ts_msd.LOOKBACK_DAYS)
+        expected = pd.DataFrame([r for code, df in window.items() if (r := legacy_analyze_multi_swing(code, df))])
+        got = ts_msd.score_panel(MarketPanel.from_bars(window))
+        _same_rows(got, expected, ['close', 'ma20', 'ma60', 'dist_ma20', 'rsi', 'macd', 'composite_score',
+                                   'volatility', 'recent_vol'])
+        assert got['trend'].tolist() == expected['trend'].tolist()
+        assert len(got) and ts_msd.analyze_stock_with_data(got['ts_code'].iloc[0], window[got['ts_code'].iloc[0]])
+
+    @pytest.mark.parametrize("vt_regime, max_picks, min_score", [("bull", 12, 40), ("volatile", 3, 55)])
+    def test_longup_picks_unchanged(self, universe, monkeypatch, vt_regime, max_picks, min_score):
+        stock_basic, frames = universe
+        monkeypatch.setattr(ts_longup, "data_provider", _provider(stock_basic, frames))
+        monkeypatch.setattr(ts_longup, "get_trading_days_before", _trading_days_before)
+        monkeypatch.setattr(ts_longup, "get_vol_turnover_regime", lambda d, index_code: {
+            "regime": vt_regime, "vol": 0, "turn": 0, "base_vol": 0, "base_turn": 0})
+        monkeypatch.setattr(ts_longup, "detect_market_regime", lambda d: {"regime": "normal"})
+        monkeypatch.setattr(ts_longup, "get_index_returns", lambda d, period: 1.5)
+
+        picked = 0
+        for end_date in END_DATES:
+            got = ts_longup.pick_longup_stocks(end_date)
+            basic = stock_basic[stock_basic['ts_code'].isin(ts_longup.no_risky_stocks(stock_basic))]
+            expected = legacy_pick_longup(basic.reset_index(drop=True),
+                                          _window(frames, end_date, ts_longup.LOOKBACK_DAYS), 1.5, max_picks, min_score)
+            _same_rows(got, expected, ['composite_score', 'rank'])
+            assert got['signals'].tolist() == expected['signals'].tolist()
+            picked += len(got)
+        assert picked >= len(END_DATES)
+
+    @pytest.mark.parametrize("regime", ["normal", "volatile"])
+    def test_multi_swing_picks_unchanged(self, universe, monkeypatch, regime):
+        stock_basic, frames = universe
+        monkeypatch.setattr(ts_msd, "data_provider", _provider(stock_basic, frames))
+        monkeypatch.setattr(ts_msd, "get_trading_days_before", _trading_days_before)
+        monkeypatch.setattr(ts_msd, "detect_market_regime", lambda d: {"regime": regime})
+        max_picks = {'normal': 10, 'volatile': 4}[regime]
+        min_score = {'normal': 55, 'volatile': 60}[regime]
+
+        from backtest.strategies.ts_ths_dc import no_risky_stocks
+        basic = stock_basic[stock_basic['ts_code'].isin(no_risky_stocks(stock_basic))].reset_index(drop=True)
+        picked = 0
+        for end_date in END_DATES:
+            got = ts_msd.pick_multi_swing_defensive(end_date)
+            expected = legacy_pick_multi_swing(basic, _window(frames, end_date, ts_msd.LOOKBACK_DAYS),
+                                               regime, max_picks, min_score)
+            _same_rows(got, expected, ['composite_score', 'volatility', 'rank'])
+            assert got['name'].tolist() == expected['name'].tolist()
+            picked += len(got)
+        assert picked >= len(END_DATES)
@@ -0,0 +1,168 @@
+"""
+Unit tests for backtest/core/period.py (set-based period report accounting).
+
+Transactions are written by the engine's own execute_buy_order /
+execute_sell_order, then replayed; no market data is fetched.
+
+Covers:
+- load_transactions() date normalisation and end-date cut-off
+- replay_transactions() average-cost bookkeeping and round trips
+- build_period_frames() daily realized / unrealized P&L, equity curve, counts
+- history before the period and price gaps (valued at cost)
+- positions without transactions (external holdings)
+- OrderAnalyzer.generate_period_report() end to end (offline provider/calendar)
+- period closes for bare-code holdings priced from the provider's ts_code rows
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import backtest.engine as engine  # noqa: E402
+from backtest.core.period import build_period_frames, load_transactions, replay_transactions  # noqa: E402
+from shared.db.db import DatabaseManager  # noqa: E402
+
+SCHEMA = PROJECT_ROOT / "shared" / "db" / "imobile.sql"
+DATES = ["20251023", "20251024", "20251027", "20251028"]
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    path = tmp_path / "test_imobile.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA.read_text(encoding="utf-8"))
+    conn.close()
+    db = DatabaseManager(str(path))
+    monkeypatch.setattr(engine, "DB", db)
+    monkeypatch.setattr(engine, "PORTFOLIO", None)
+    monkeypatch.setattr(engine, "calendar", SimpleNamespace(get_trading_days_before=lambda d, n: d))
+    # AAA: bought 1023, half sold 1024, rest sold 1027. BBB: bought 1024, still held.
+    assert engine.execute_buy_order(1, "AAA.SZ", "Alpha", 10.0, 1000, 11.0, 9.5, "20251023", "B1")
+    engine.update_available_shares_for_new_day("20251024")
+    assert engine.execute_sell_order(1, "AAA.SZ", "Alpha", 10.5, 500, "20251024", "S1")
+    assert engine.execute_buy_order(1, "BBB.SZ", "Beta", 20.0, 200, 22.0, 19.0, "20251024", "B2")
+    assert engine.execute_sell_order(1, "AAA.SZ", "Alpha", 9.8, 500, "20251027", "S2", reason="stop_loss")
+    return db
+
+
+def _closes(values):
+    frame = pd.DataFrame(values, index=DATES, dtype=float)
+    return lambda codes: frame.reindex(columns=codes)
+
+
+class TestReplay:
+    def test_load_and_replay(self, db):
+        txns = load_transactions(db, 1, "20251027")
+        assert txns["date"].tolist() == ["20251023", "20251024", "20251024", "20251027"]
+        assert load_transactions(db, 1, "20251023")["type"].tolist() == ["buy"]
+
+        replayed, trips = replay_transactions(txns)
+        assert replayed["qty_after"].tolist() == [1000, 500, 200, 0]
+        buy_cost = replayed["cost_after"].iloc[0]
+        assert replayed["cost_after"].iloc[1] == pytest.approx(buy_cost / 2)
+        aaa = trips.set_index("code").loc["AAA.SZ"]
+        assert (aaa["open_date"], aaa["close_date"], aaa["bought"]) == ("20251023", "20251027", 1000)
+        assert aaa["realized_pnl"] == pytest.approx(replayed["pnl"].sum())
+
+
+class TestPeriodFrames:
+    def test_daily_equity_curve(self, db):
+        txns = load_transactions(db, 1, DATES[-1])
+        closes = _closes({"AAA.SZ": [10.2, 10.4, 9.8, 9.9], "BBB.SZ": [None, 20.5, 21.0, 19.0]})
+        frames = build_period_frames(txns, DATES, closes, 100000.0)
+        daily = frames.daily.set_index("date")
+        replayed, _ = replay_transactions(txns)
+
+        assert daily["executed_orders"].tolist() == [1, 2, 1, 0]
+        assert daily["sell_count"].tolist() == [0, 1, 1, 0]
+        assert daily["positions_count"].tolist() == [1, 2, 1, 1]
+        assert daily["cumulative_realized_pnl"].iloc[-1] == pytest.approx(replayed["pnl"].sum())
+
+        aaa_cost, bbb_cost = replayed["cost_after"].iloc[0], replayed["cost_after"].iloc[2]
+        assert daily.loc["20251023", "daily_unrealized_pnl"] == pytest.approx(1000 * 10.2 - aaa_cost)
+        assert daily.loc["20251028", "total_held_market_value"] == pytest.approx(200 * 19.0)
+        assert daily.loc["20251028", "portfolio_value"] == pytest.approx(
+            100000.0 + replayed["pnl"].sum() + 200 * 19.0 - bbb_cost)
+
+        held = frames.holdings.loc["BBB.SZ"]
+        assert (held["quantity"], held["purchase_date"], held["market_price"]) == (200, "20251024", 19.0)
+        assert list(frames.holdings.index) == ["BBB.SZ"]
+        assert frames.trips.set_index("code")["holding_days"].to_dict() == {"AAA.SZ": 3, "BBB.SZ": 3}
+
+    def test_prior_history_and_missing_prices(self, db):
+        txns = load_transactions(db, 1, DATES[-1])
+        frames = build_period_frames(txns, DATES[2:], _closes({}), 100000.0)
+        daily = frames.daily
+        # Sells before the period are not period P&L; BBB carried in at cost
+        assert daily["daily_realized_pnl"].iloc[0] == pytest.approx(replay_transactions(txns)[0]["pnl"].iloc[3])
+        assert daily["sell_count"].tolist() == [1, 0]
+        assert daily["daily_unrealized_pnl"].tolist() == pytest.approx([0.0, 0.0])
+        assert daily["positions_count"].tolist() == [1, 1]
+
+    def test_external_holdings(self, db):
+        txns = load_transactions(db, 1, DATES[-1])
+        external = pd.DataFrame([("CCC.SH", "Gamma", 100, 500.0, "20251027")],
+                                columns=["code", "name", "quantity", "cost_total", "since"])
+        frames = build_period_frames(txns, DATES, _closes({"CCC.SH": [6.0, 6.0, 6.0, 6.0]}), 0.0, external)
+        assert frames.daily["positions_count"].tolist() == [1, 2, 2, 2]
+        assert frames.holdings.loc["CCC.SH", "purchase_date"] == "20251027"
+        assert frames.holdings.loc["CCC.SH", "market_price"] == 6.0
+
+    def test_no_transactions(self, tmp_path):
+        conn = sqlite3.connect(tmp_path / "empty.db")
+        conn.executescript(SCHEMA.read_text(encoding="utf-8"))
+        conn.close()
+        empty = DatabaseManager(str(tmp_path / "empty.db"))
+        frames = build_period_frames(load_transactions(empty, 1, DATES[-1]), DATES, _closes({}), 1000.0)
+        assert frames.daily["portfolio_value"].tolist() == [1000.0] * 4
+        assert frames.holdings.empty
+
+
+class TestGeneratePeriodReport:
+    def test_report_from_frames(self, db, tmp_path, monkeypatch):
+        def between(start, end):
+            return [d for d in DATES if start <= d <= end]
+
+        def stock_data(codes, start, end):
+            return pd.DataFrame([{"ts_code": c, "trade_date": d, "close": 10.0}
+                                 for c in codes for d in between(start, end)])
+
+        def no_index(*args, **kwargs):
+            raise RuntimeError("offline")
+
+        monkeypatch.setattr(engine, "calendar", SimpleNamespace(
+            get_trading_days_before=lambda d, n: d, get_trading_days_between=between))
+        monkeypatch.setattr(engine, "data_provider", SimpleNamespace(get_stock_data=stock_data, get_index_data=no_index))
+        monkeypatch.setattr(engine, "INITIAL_CASH", 100000.0)
+        orders = tmp_path / "smart_orders.json"
+        orders.write_text(json.dumps({"target_trading_date": DATES[-1], "market_pattern": "normal", "smart_orders": []}))
+
+        report = tmp_path / "report_period.md"
+        summary = engine.OrderAnalyzer(str(orders)).generate_period_report(DATES[0], DATES[-1], str(report))
+        text = report.read_text(encoding="utf-8")
+        assert "| BBB.SZ | Beta | 200 |" in text
+        assert "| **Sell Transactions** | 2 |" in text
+        assert summary["sells"] == 2 and summary["transactions"] == 4
+
+    def test_closes_for_bare_codes(self, monkeypatch):
+        def stock_data(codes, start, end):
+            return pd.DataFrame([{"ts_code": c if "." in c else f"{c}.SH", "trade_date": d, "close": 12.5}
+                                 for c in codes for d in DATES if start <= d <= end])
+
+        monkeypatch.setattr(engine, "calendar", SimpleNamespace(get_trading_days_before=lambda d, n: d))
+        monkeypatch.setattr(engine, "data_provider", SimpleNamespace(get_stock_data=stock_data))
+        analyzer = engine.OrderAnalyzer.__new__(engine.OrderAnalyzer)
+        closes = analyzer._period_closes(["600000", "BBB.SZ"], DATES)
+        assert closes.columns.tolist() == ["600000", "BBB.SZ"]
+        assert closes.notna().all().all() and closes.loc[DATES[-1], "600000"] == 12.5
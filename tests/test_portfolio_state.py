@@ -0,0 +1,100 @@
+"""
+Unit tests for backtest/core/portfolio.py (running realized-P&L / NAV state).
+
+Covers:
+- realized_pnl_from_notes() parsing of sell notes
+- PortfolioState.realized_before() prefix sums, backwards queries, out-of-order sells
+- PortfolioState.from_db() seeding from the transactions table
+- execute_sell_order() feeding the engine's PORTFOLIO
+- engine._drawdown_cap() peak / drawdown de-risking
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import backtest.engine as engine  # noqa: E402
+from backtest.core.portfolio import PortfolioState, realized_pnl_from_notes  # noqa: E402
+from shared.db.db import DatabaseManager  # noqa: E402
+
+SCHEMA = PROJECT_ROOT / "shared" / "db" / "imobile.sql"
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = tmp_path / "test_imobile.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA.read_text(encoding="utf-8"))
+    conn.close()
+    return DatabaseManager(str(path))
+
+
+class TestNotesParsing:
+    def test_parse(self):
+        assert realized_pnl_from_notes("Order S1 executed: take_profit, P&L: ¥123.45 (1.23%)") == 123.45
+        assert realized_pnl_from_notes("Order S2 executed: stop_loss, P&L: ¥-50.00 (-0.50%)") == -50.0
+        assert realized_pnl_from_notes("manual") is None
+        assert realized_pnl_from_notes("P&L: ¥abc") is None
+        assert realized_pnl_from_notes(None) is None
+
+
+class TestPortfolioState:
+    def test_prefix_sums_and_backwards_query(self):
+        state = PortfolioState(1000.0)
+        state.record_sell("20251023", 10.0)
+        state.record_sell("2025-10-24", -4.0)
+        state.record_sell("20251027", 2.5)
+        assert state.realized_before("20251023") == 0.0
+        assert state.realized_before("20251024") == 10.0
+        assert state.realized_before("20251028") == 8.5
+        assert state.realized_before("20251024") == 10.0   # backwards: recomputed
+        assert state.nav("20251028") == 1008.5
+        assert state.realized_total == 8.5
+
+    def test_out_of_order_sell(self):
+        state = PortfolioState(0.0)
+        state.record_sell("20251027", 1.0)
+        assert state.realized_before("20251028") == 1.0
+        state.record_sell("20251023", 5.0)
+        assert state.realized_before("20251024") == 5.0
+        assert state.realized_before("20251028") == 6.0
+
+    def test_mark_nav(self):
+        state = PortfolioState(100.0)
+        assert state.mark_nav(100.0) == 0.0
+        assert state.mark_nav(95.0) == pytest.approx(-5.0)
+        assert state.peak_nav == 100.0
+
+
+class TestEngineIntegration:
+    def test_from_db_matches_recorded_sells(self, db, monkeypatch):
+        monkeypatch.setattr(engine, "DB", db)
+        monkeypatch.setattr(engine, "calendar", SimpleNamespace(get_trading_days_before=lambda d, n: d))
+        monkeypatch.setattr(engine, "PORTFOLIO", PortfolioState(100000.0))
+        assert engine.execute_buy_order(1, "AAA.SZ", "Alpha", 10.0, 1000, 11.0, 9.5, "20251023", "B1")
+        engine.update_available_shares_for_new_day("20251024")
+        assert engine.execute_sell_order(1, "AAA.SZ", "Alpha", 10.5, 400, "20251024", "S1")
+        assert engine.execute_sell_order(1, "AAA.SZ", "Alpha", 9.7, 600, "20251027", "S2", reason="stop_loss")
+
+        seeded = PortfolioState.from_db(db, 1, 100000.0)
+        for date in ("20251024", "20251027", "20251028"):
+            assert seeded.realized_before(date) == engine.PORTFOLIO.realized_before(date)
+        assert seeded.realized_before("20251025") > 0 > seeded.realized_before("20251028") - seeded.realized_before("20251025")
+
+    def test_drawdown_cap(self):
+        state = PortfolioState(100000.0)
+        assert engine._drawdown_cap(10, state, "20251023") == 10
+        state.record_sell("20251023", -2500.0)      # -2.5% from the 100k peak
+        assert engine._drawdown_cap(10, state, "20251024") == 7
+        state.record_sell("20251024", -1500.0)      # -4.0%
+        assert engine._drawdown_cap(10, state, "20251027") == engine.DRAWDOWN_BUDGET["defensive_max_positions"]
+        assert state.peak_nav == 100000.0
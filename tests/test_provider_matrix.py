@@ -0,0 +1,114 @@
+"""
+Unit tests for the search provider capability matrix in
+utils/stock_news_public_opinion.py (test_search_providers / ensure_provider_matrix).
+
+Providers are in-process fakes and the matrix file lives in tmp_path — no network.
+
+Covers:
+- all providers probed concurrently; a hung provider cut off at the probe timeout
+- capability flags, p50/p95 latency and error rate accumulated over probes
+- a fresh matrix reused without probing, a stale or legacy one re-probed
+- backtest providers (and the SearchService provider list) ordered by latency
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import utils.stock_news_public_opinion as opinion  # noqa: E402
+
+
+class FakeProvider:
+    def __init__(self, name, delay=0.0, ok=True, dated=True, available=True):
+        self.name = name
+        self.delay = delay
+        self.ok = ok
+        self.dated = dated
+        self.is_available = available
+        self.calls = 0
+
+    def search(self, query, max_results=3, days=30):
+        self.calls += 1
+        time.sleep(self.delay)
+        if not self.ok:
+            raise ConnectionError("connection refused")
+        published = "2026-10-11" if self.dated else None
+        return SimpleNamespace(success=True, error_message=None,
+                               results=[SimpleNamespace(published_date=published)])
+
+
+@pytest.fixture
+def providers(tmp_path, monkeypatch):
+    fakes = [
+        FakeProvider("SearXNG", delay=0.05),
+        FakeProvider("Tavily", delay=0.3),
+        FakeProvider("SerpAPI", delay=0.1),
+        FakeProvider("Brave", ok=False),
+        FakeProvider("Bocha", delay=5.0),
+        FakeProvider("MiniMax", available=False),
+        FakeProvider("TinyFish", delay=0.2, dated=False),
+    ]
+    monkeypatch.setattr(opinion, "PROVIDER_CACHE_PATH", str(tmp_path / "search_providers_cache.json"))
+    monkeypatch.setattr(opinion, "SERVICE_AVAILABLE", True)
+    monkeypatch.setattr(opinion, "get_config", lambda: None, raising=False)
+    monkeypatch.setattr(opinion, "_build_all_providers", lambda config: [(p.name, p) for p in fakes])
+    return {p.name: p for p in fakes}
+
+
+class TestProviderMatrix:
+    def test_concurrent_probe_with_timeout(self, providers):
+        start = time.monotonic()
+        matrix = opinion.test_search_providers(timeout=0.8)
+        assert time.monotonic() - start < 1.5            # not 5.45s of sequential waiting
+        assert set(matrix) == set(providers)
+        assert matrix["SerpAPI"]["can_search"] and matrix["SerpAPI"]["history_date_for_backtest"]
+        assert matrix["SearXNG"]["can_search"] and not matrix["SearXNG"]["history_date_for_backtest"]
+        assert matrix["TinyFish"]["can_search"] and not matrix["TinyFish"]["history_date_for_backtest"]
+        assert not matrix["Bocha"]["can_search"] and "timeout" in matrix["Bocha"]["last_error"]
+        assert not matrix["Brave"]["can_search"] and matrix["Brave"]["error_rate"] == 1.0
+        assert matrix["MiniMax"]["samples"] == [] and providers["MiniMax"].calls == 0
+        assert opinion.get_backtest_providers() == ["SerpAPI", "Tavily"]          # fastest first
+        assert opinion.get_search_capable_providers()[0] == "SearXNG"
+
+    def test_stats_accumulate(self, providers):
+        providers["Bocha"].delay = 0.0
+        opinion.test_search_providers(timeout=1.0)
+        providers["Tavily"].ok = False
+        matrix = opinion.test_search_providers(timeout=1.0)
+        tavily = matrix["Tavily"]
+        assert len(tavily["samples"]) == 2 and tavily["error_rate"] == 0.5
+        assert tavily["latency_p50"] == tavily["latency_p95"] == tavily["samples"][0][0]
+        assert not tavily["can_search"]
+        assert opinion._percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.0
+        assert opinion._percentile([1.0, 2.0, 3.0, 4.0], 95) == 4.0
+
+    def test_fresh_matrix_skips_probes(self, providers):
+        providers["Bocha"].delay = 0.0
+        first = opinion.ensure_provider_matrix()
+        calls = providers["SerpAPI"].calls
+        assert opinion.ensure_provider_matrix() == first and providers["SerpAPI"].calls == calls
+
+        stale = {name: dict(caps, probed_at=(datetime.now() - timedelta(hours=48)).isoformat())
+                 for name, caps in first.items()}
+        Path(opinion.PROVIDER_CACHE_PATH).write_text(json.dumps(stale))
+        opinion.ensure_provider_matrix(max_age_hours=24)
+        assert providers["SerpAPI"].calls == calls + 1
+
+        legacy = {"SerpAPI": {"can_search": True, "history_date_for_backtest": True}}
+        assert not opinion.is_matrix_fresh(legacy)
+
+    def test_service_provider_order(self):
+        service = SimpleNamespace(_providers=[SimpleNamespace(name=n) for n in ("Bocha", "Tavily", "SerpAPI")])
+        opinion._order_by_latency(service, ["SerpAPI", "Tavily"])
+        assert [p.name for p in service._providers] == ["SerpAPI", "Tavily", "Bocha"]
@@ -0,0 +1,150 @@
+"""
+Unit tests for utils/quote_service.py (batched real-time quotes behind
+utils.tools.get_realtime_quote(s) and pre_market_run.get_confirmed_opens).
+
+Tencent and EastMoney are served by a local stub HTTP server; Tushare is off.
+
+Covers:
+- one request per source for many codes, Tencent/EastMoney payload parsing
+- sources queried in parallel, first valid price per code wins
+- a slow or failing source not delaying the batch past the other source
+- 15 codes (a 09:25 pre-market confirmation) priced well under a second
+- the sub-second in-memory quote cache
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.quote_service import QuoteService, parse_eastmoney, parse_tencent  # noqa: E402
+
+CODES = [f"{600000 + i:06d}" for i in range(8)] + [f"{i:06d}" for i in range(1, 8)]   # 15 codes
+PRICES = {code: round(5 + i * 0.37, 2) for i, code in enumerate(CODES)}
+
+
+class StubQuotes:
+    """Tencent- and EastMoney-style quote endpoints with per-source latency and failures."""
+
+    def __init__(self):
+        self.latency = {"tencent": 0.0, "eastmoney": 0.0}
+        self.broken = set()
+        self.requests = {"tencent": 0, "eastmoney": 0}
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                source = "tencent" if url.path.startswith("/q=") else "eastmoney"
+                with stub.lock:
+                    stub.requests[source] += 1
+                time.sleep(stub.latency[source])
+                if source in stub.broken:
+                    self.send_error(502)
+                    return
+                if source == "tencent":
+                    lines = []
+                    for sym in url.path[3:].split(","):
+                        code = sym[2:]
+                        open_p = PRICES[code] if code != CODES[0] else 0
+                        lines.append(f'v_{sym}="1~name~{code}~{PRICES[code] + 0.5}~{PRICES[code] - 0.2}~{open_p:.2f}~1";')
+                    body = "\n".join(lines).encode("gbk")
+                else:
+                    secids = parse_qs(url.query)["secids"][0].split(",")
+                    diff = [{"f12": s.split(".")[1], "f43": int(PRICES[s.split(".")[1]] * 100) + 50,
+                             "f46": int(round(PRICES[s.split(".")[1]] * 100))} for s in secids]
+                    body = json.dumps({"data": {"diff": diff}}).encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def wait_requests(self, expected, timeout=2.0):
+        """Requests seen per source once `expected` arrived (the slower source may land after get_quotes returns)."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self.lock:
+                if self.requests == expected:
+                    break
+            time.sleep(0.01)
+        with self.lock:
+            return dict(self.requests)
+
+    def service(self, **kwargs):
+        return QuoteService(sources=("tencent", "eastmoney"), tencent_url=f"{self.base}/q=",
+                            eastmoney_url=f"{self.base}/api/qt/ulist.np/get", **kwargs)
+
+
+@pytest.fixture
+def stub():
+    stub = StubQuotes()
+    yield stub
+    stub.server.shutdown()
+
+
+class TestParsers:
+    def test_tencent_and_eastmoney(self):
+        text = 'v_sz000858="51~五 粮 液~000858~27.78~27.60~27.70~1";\nv_sh600000="1~浦发银行~600000~7.81~7.90~0.00~2";'
+        assert parse_tencent(text) == {"000858": 27.70, "600000": 7.81}    # open, else latest (not prev close)
+        payload = {"data": {"diff": {"0": {"f12": "600000", "f43": 781, "f46": "-"}}}}
+        assert parse_eastmoney(payload) == {"600000": 7.81}
+        assert parse_eastmoney({"data": None}) == {}
+
+
+class TestQuoteService:
+    def test_batched_parallel_first_valid(self, stub):
+        service = stub.service()
+        start = time.monotonic()
+        prices = service.get_quotes(CODES)
+        assert time.monotonic() - start < 1.0
+        assert set(prices) == set(CODES)
+        assert {c: p for c, p in prices.items() if c != CODES[0]} == pytest.approx(
+            {c: p for c, p in PRICES.items() if c != CODES[0]})
+        assert prices[CODES[0]] in (pytest.approx(PRICES[CODES[0]]), pytest.approx(PRICES[CODES[0]] + 0.5))
+        assert stub.wait_requests({"tencent": 1, "eastmoney": 1}) == {"tencent": 1, "eastmoney": 1}
+
+    def test_slow_and_failing_sources(self, stub):
+        stub.latency["tencent"] = 2.0
+        service = stub.service(timeout=3.0)
+        start = time.monotonic()
+        assert service.get_quotes(CODES) == pytest.approx(PRICES)       # EastMoney answers alone
+        assert time.monotonic() - start < 1.0
+
+        stub.latency["tencent"] = 0.0
+        stub.broken.add("eastmoney")
+        prices = stub.service().get_quotes(CODES)
+        assert prices[CODES[0]] == pytest.approx(PRICES[CODES[0]] + 0.5)   # Tencent latest when no open yet
+        assert len(prices) == len(CODES)
+
+        stub.broken.add("tencent")
+        assert stub.service().get_quotes(CODES) == {}
+
+    def test_quote_cache(self, stub):
+        service = stub.service(cache_ttl=0.3)
+        service.get_quotes(CODES[:5])
+        assert stub.wait_requests({"tencent": 1, "eastmoney": 1}) == {"tencent": 1, "eastmoney": 1}
+        assert service.get_quote(CODES[1] + ".SH") == pytest.approx(PRICES[CODES[1]])
+        assert stub.wait_requests({"tencent": 2, "eastmoney": 2}, timeout=0.2) == {"tencent": 1, "eastmoney": 1}
+        time.sleep(0.35)
+        service.get_quotes(CODES[:5])
+        assert stub.wait_requests({"tencent": 2, "eastmoney": 2}) == {"tencent": 2, "eastmoney": 2}
+
@@ -0,0 +1,129 @@
+"""
+Unit tests for the vectorized, persisted market-regime timeline in
+backtest/utils/market_regime.py.
+
+The index provider, trading calendar and cache DB are replaced per test — no
+network.
+
+Covers:
+- classify_regimes() matching the per-date window computation in both modes
+- regime_series() one index fetch for a range, stored for other processes
+- detect_market_regime() served from the store, keyed by SWITCH_INDEX_COMBINE_MA mode
+- dates without their own bar falling back to the previous bar, not stored
+- insufficient history raising ValueError
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import backtest.utils.market_regime as market_regime  # noqa: E402
+from backtest.data.sqlite_cache import SQLiteDataCache  # noqa: E402
+
+DAYS = [d.strftime("%Y%m%d") for d in pd.bdate_range("2024-01-01", "2025-06-30")]
+
+
+def _closes():
+    """Trend up, sideways and volatile, then down: every regime shows up."""
+    rng = np.random.default_rng(7)
+    n = len(DAYS)
+    drift = np.where(np.arange(n) < n // 3, 0.004, np.where(np.arange(n) < 2 * n // 3, 0.0, -0.004))
+    noise = rng.normal(0, np.where((np.arange(n) > n // 2) & (np.arange(n) < n // 2 + 60), 0.04, 0.012))
+    return 3000 * np.cumprod(1 + drift + noise)
+
+
+INDEX = pd.DataFrame({"trade_date": DAYS, "close": _closes()})
+
+
+def _window_regime(date, switch):
+    """Single-date reference: indicators over the 120-day window ending at `date`."""
+    start = DAYS[max(0, DAYS.index(date) - 120)]
+    close = INDEX[(INDEX["trade_date"] >= start) & (INDEX["trade_date"] <= date)]["close"]
+    ma20 = close.rolling(20, min_periods=10).mean().iloc[-1]
+    ma60 = close.rolling(60, min_periods=30).mean().iloc[-1]
+    ma120 = close.rolling(120, min_periods=60).mean().iloc[-1]
+    price, vol = close.iloc[-1], close.pct_change().std() * 100
+    trend_60d = (price - ma60) / ma60 * 100
+    if switch:
+        if price > ma20 and price > ma60 > ma120 and vol < 2.0:
+            return "bull"
+        if price < ma20 and (price < ma60 or trend_60d < 0):
+            return "bear"
+    else:
+        if price > ma60 > ma120 and trend_60d > 0 and vol < 2.0:
+            return "bull"
+        if price < ma60 < ma120 and trend_60d < 0:
+            return "bear"
+    return "volatile" if vol > 3.0 else "normal"
+
+
+class FakeIndexProvider:
+    def __init__(self):
+        self.calls = []
+
+    def get_index_data(self, index_code, start_date=None, end_date=None):
+        self.calls.append((index_code, start_date, end_date))
+        return INDEX[(INDEX["trade_date"] >= start_date) & (INDEX["trade_date"] <= end_date)].copy()
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    provider = FakeIndexProvider()
+    monkeypatch.setattr(market_regime, "data_provider", provider)
+    monkeypatch.setattr(market_regime, "CACHE", SQLiteDataCache(str(tmp_path / "cache.db")))
+    monkeypatch.setattr(market_regime, "_MEMO", {})
+    monkeypatch.setattr(market_regime, "get_trading_days_before",
+                        lambda d, n: DAYS[max(0, sum(x < d for x in DAYS) - n)])
+    monkeypatch.setattr(market_regime, "get_trading_days_between",
+                        lambda s, e: [d for d in DAYS if s <= d <= e])
+    monkeypatch.delenv("SWITCH_INDEX_COMBINE_MA", raising=False)
+    return provider
+
+
+class TestClassifyRegimes:
+    @pytest.mark.parametrize("switch", [False, True])
+    def test_matches_single_date_windows(self, switch):
+        series = market_regime.classify_regimes(INDEX, switch)
+        dates = DAYS[130::3]
+        expected = [_window_regime(d, switch) for d in dates]
+        assert series.loc[dates, "regime"].tolist() == expected
+        assert len(set(expected)) >= 3
+
+    def test_short_history_left_out(self):
+        series = market_regime.classify_regimes(INDEX.head(40))
+        assert series.index[0] == DAYS[29]
+
+
+class TestRegimeSeries:
+    def test_one_fetch_then_store(self, env, monkeypatch):
+        series = market_regime.regime_series("20250102", "20250331")
+        assert len(env.calls) == 1
+        assert series.index.tolist() == [d for d in DAYS if "20250102" <= d <= "20250331"]
+
+        monkeypatch.setattr(market_regime, "_MEMO", {})   # another process: same DB, empty memo
+        result = market_regime.detect_market_regime("2025-02-14")
+        assert result["regime"] == series.loc["20250214", "regime"] == _window_regime("20250214", False)
+        assert "stop_loss_pct" in result
+        assert len(env.calls) == 1
+
+        monkeypatch.setenv("SWITCH_INDEX_COMBINE_MA", "true")
+        fast = market_regime.detect_market_regime("20250214")
+        assert env.calls[-1][0] == "000905.SH" and len(env.calls) == 2
+        assert fast["regime"] == _window_regime("20250214", True)
+
+    def test_non_trading_date_uses_previous_bar(self, env):
+        assert market_regime.detect_market_regime("20250215")["regime"] == _window_regime("20250214", False)
+        assert market_regime.CACHE.get_regimes("000001.SH", "default", ["20250215"]).empty
+
+    def test_insufficient_history(self, env):
+        with pytest.raises(ValueError):
+            market_regime.detect_market_regime(DAYS[10])
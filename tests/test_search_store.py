@@ -0,0 +1,112 @@
+"""
+Unit tests for utils/search_store.py (persistent news/search result store)
+and its use in utils/stock_news_public_opinion.py.
+
+Search services are stubs and the store lives in tmp_path — no network.
+
+Covers:
+- hit/miss keyed by (provider, normalized query, target date)
+- historical dates never expire; today's results expire after the TTL
+- items deduplicated by URL and by title, failed fetches never stored
+- a second store on the same file (another process) reads stored results
+- fetch_stock_news_and_opinion() making no search call on a re-run
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.search_store import SearchResultStore, dedup_items, normalize_query  # noqa: E402
+
+ITEMS = [
+    {"title": "平安银行 发布公告", "snippet": "a", "url": "https://news.example.com/1"},
+    {"title": "平安银行 发布公告 ", "snippet": "b", "url": "https://news.example.com/2"},   # same title
+    {"title": "另一条新闻", "snippet": "c", "url": "https://news.example.com/1/"},          # same URL
+    {"title": "机构调研", "snippet": "d", "url": ""},
+]
+
+
+class Fetch:
+    def __init__(self, items):
+        self.items = items
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.items
+
+
+class TestSearchResultStore:
+    def test_hit_miss_and_dedup(self, tmp_path):
+        store = SearchResultStore(str(tmp_path / "search.db"))
+        fetch = Fetch(ITEMS)
+        first = store.cached("tavily", "平安银行  000001 利好", "20260612", fetch)
+        assert [item["snippet"] for item in first] == ["a", "d"]
+        assert store.cached("tavily", "平安银行 000001 利好", "20260612", fetch) == first   # normalized query
+        assert fetch.calls == 1 and store.stats == {"hits": 1, "misses": 1}
+        assert store.get("tavily", "平安银行 000001 利好", "20260613") is None
+        assert store.get("serpapi", "平安银行 000001 利好", "20260612") is None
+        assert normalize_query("ＡＢＣ  Def ") == "abc def"
+        assert len(dedup_items(ITEMS + ITEMS)) == 2
+
+    def test_failures_not_stored(self, tmp_path):
+        store = SearchResultStore(str(tmp_path / "search.db"))
+        assert store.cached("tavily", "q", "20260612", lambda: None) == []
+        assert store.get("tavily", "q", "20260612") is None
+        assert store.cached("tavily", "q", "20260612", Fetch([])) == []
+        assert store.get("tavily", "q", "20260612") == []            # an empty answer is an answer
+
+    def test_expiry(self, tmp_path):
+        store = SearchResultStore(str(tmp_path / "search.db"), today_ttl=1)
+        today = datetime.now().strftime("%Y%m%d")
+        store.put("tavily", "q", "20200102", ITEMS)
+        store.put("tavily", "q", today, ITEMS)
+        store.put("tavily", "q", "", ITEMS)
+        time.sleep(1.1)
+        assert store.get("tavily", "q", "20200102") is not None
+        assert store.get("tavily", "q", today) is None and store.get("tavily", "q", "") is None
+        assert store.purge_expired() == 2
+
+    def test_shared_between_stores(self, tmp_path):
+        path = str(tmp_path / "search.db")
+        SearchResultStore(path).put("serpapi", "q", "20260612", ITEMS)
+        other = SearchResultStore(path)
+        fetch = Fetch([])
+        assert len(other.cached("serpapi", "q", "20260612", fetch)) == 2 and fetch.calls == 0
+
+
+class TestStockNewsPublicOpinion:
+    def test_rerun_makes_no_search_call(self, tmp_path, monkeypatch):
+        import utils.stock_news_public_opinion as opinion
+
+        store = SearchResultStore(str(tmp_path / "search.db"))
+        monkeypatch.setattr(opinion, "get_search_store", lambda: store)
+        calls = []
+
+        class Service:
+            is_available = True
+
+            def search_stock_news(self, **kwargs):
+                calls.append(kwargs)
+                return SimpleNamespace(success=True, results=[
+                    SimpleNamespace(title="平安银行 发布公告", snippet="净利润增长", source="sina",
+                                    url="https://news.example.com/1", published_date=None),
+                ])
+
+        monkeypatch.setattr(opinion, "get_search_service", lambda: Service())
+        first = opinion.fetch_stock_news_and_opinion("平安银行", "000001.SZ", "20260612")
+        assert first == "1. [sina] 平安银行 发布公告: 净利润增长"
+
+        monkeypatch.setattr(opinion, "get_search_service", lambda: pytest.fail("search service called"))
+        assert opinion.fetch_stock_news_and_opinion("平安银行", "000001.SZ", "20260612") == first
+        assert len(calls) == 1
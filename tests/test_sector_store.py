@@ -0,0 +1,123 @@
+"""
+Unit tests for backtest/data/sector_store.py (persistent THS/DC concept bars
+and membership) and the ts_ths_dc sector momentum strategy on top of it.
+
+Tushare endpoints and market data are stubbed — no network.
+
+Covers:
+- three_day_returns() T vs T-3 per code, codes with fewer than 4 bars absent
+- concept_daily() fetching only days not stored yet, never storing today
+- members() reusing snapshots fetched on/after the as-of date, in/out dates
+- sector_momentum_strategy() thresholds, top-3 members and leader flag
+"""
+
+from __future__ import annotations
+
+import sys
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backtest.data.sector_store import SectorStore, three_day_returns  # noqa: E402
+from backtest.data.sqlite_cache import SQLiteDataCache  # noqa: E402
+
+DAYS = ["20250602", "20250603", "20250604", "20250605", "20250606", "20250609"]
+
+
+def _bars(closes):
+    """code -> closes over DAYS (aligned to the last days) as one bar frame."""
+    return pd.DataFrame([
+        {"ts_code": code, "trade_date": d, "close": c}
+        for code, series in closes.items()
+        for d, c in zip(DAYS[-len(series):], series)
+    ])
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SectorStore(SQLiteDataCache(str(tmp_path / "cache.db")), src="ts_ths")
+
+
+class TestSectorStore:
+    def test_three_day_returns(self):
+        bars = _bars({"A.TI": [10, 11, 12, 13, 15], "B.TI": [10, 10, 9.5, 9], "C.TI": [1, 2, 3]})
+        returns = three_day_returns(bars.sample(frac=1, random_state=0))
+        assert returns.loc["A.TI"] == pytest.approx(15 / 11 * 100 - 100)
+        assert returns.loc["B.TI"] == pytest.approx(-10.0)
+        assert "C.TI" not in returns.index
+        assert three_day_returns(pd.DataFrame()).empty
+
+    def test_concept_daily_incremental(self, store):
+        fetched = []
+        bars = _bars({"A.TI": [1, 2, 3, 4, 5, 6]})
+
+        def fetch_day(date):
+            fetched.append(date)
+            return bars[bars["trade_date"] == date]
+
+        assert len(store.concept_daily(DAYS[:5], fetch_day)) == 5
+        df = store.concept_daily(DAYS[1:], fetch_day)
+        assert fetched == DAYS
+        assert df["trade_date"].tolist() == DAYS[1:]
+
+        today = datetime.now().strftime("%Y%m%d")
+        store.concept_daily([today], lambda d: pd.DataFrame({"ts_code": ["A.TI"], "trade_date": [d], "close": [1.0]}))
+        assert store.cache.get_snapshots("ths_daily", [today]) == {}
+
+    def test_members_snapshot_and_validity(self, store):
+        calls = []
+        members = pd.DataFrame({
+            "ts_code": "A.TI", "con_code": ["X.SZ", "Y.SZ", "Z.SZ"], "con_name": ["X", "Y", "Z"],
+            "in_date": [None, "20250605", "20240101"], "out_date": [None, None, "20250301"],
+        })
+
+        def fetch(code):
+            calls.append(code)
+            return members
+
+        assert store.members("A.TI", "20250604", fetch)["con_code"].tolist() == ["X.SZ"]
+        assert store.members("A.TI", "20250609", fetch)["con_code"].tolist() == ["X.SZ", "Y.SZ"]
+        assert store.members("A.TI", "20250101", fetch)["con_code"].tolist() == ["X.SZ", "Z.SZ"]
+        assert calls == ["A.TI"]
+
+
+class TestSectorMomentum:
+    def test_picks_top_members_of_hot_sectors(self, store, monkeypatch):
+        import backtest.strategies.ts_ths_dc as ts_ths_dc
+
+        sector_bars = _bars({"HOT.TI": [10, 10, 10, 10, 10.5, 11], "COLD.TI": [10] * 6, "NEW.TI": [1, 2, 3]})
+        stock_bars = _bars({
+            "S1.SZ": [10, 10, 10, 10, 11, 12], "S2.SZ": [10, 10, 10, 10, 10.5, 11],
+            "S3.SZ": [10, 10, 10, 10, 10.4, 10.5], "S4.SZ": [10, 10, 10, 10, 10.35, 10.4],
+            "S5.SZ": [10] * 6,
+        })
+        pro = SimpleNamespace(
+            ths_daily=lambda start_date, end_date: sector_bars[sector_bars["trade_date"] == start_date],
+            ths_member=lambda ts_code: pd.DataFrame({
+                "ts_code": ts_code, "con_code": ["S1.SZ", "S2.SZ", "S3.SZ", "S4.SZ", "S5.SZ", "BJ.BJ"],
+                "con_name": ["一", "二", "三", "四", "五", "北"]}),
+        )
+        provider = SimpleNamespace(
+            get_bulk_ohlcv_by_date_range=lambda s, e: {c: g for c, g in stock_bars.groupby("ts_code")},
+            get_ohlcv_data=lambda **kw: pytest.fail("per-member fetch"),
+        )
+        monkeypatch.setattr(ts_ths_dc, "PRO", pro)
+        monkeypatch.setattr(ts_ths_dc, "data_provider", provider)
+        monkeypatch.setattr(ts_ths_dc, "SECTOR_STORES", {"ts_ths": store})
+        monkeypatch.setattr(ts_ths_dc, "get_trading_days_between", lambda s, e: DAYS)
+
+        concepts = pd.DataFrame({"ts_code": ["HOT.TI", "COLD.TI", "NEW.TI"], "name": ["热", "冷", "新"]})
+        stock_basic = pd.DataFrame({"ts_code": [f"S{i}.SZ" for i in range(1, 6)]})
+        picks = ts_ths_dc.sector_momentum_strategy(stock_basic, concepts, DAYS[0], DAYS[-1])
+
+        assert [p["ts_code"] for p in picks] == ["S1.SZ", "S2.SZ", "S3.SZ"]
+        assert picks[0]["is_leader"] and "is_leader" not in picks[1]
+        assert picks[0]["sector"] == "热" and picks[0]["sector_return"] == pytest.approx(10.0)
+        assert picks[0]["stock_3d_return"] == pytest.approx(20.0) and picks[2]["name"] == "三"
@@ -0,0 +1,78 @@
+"""
+Unit tests for backtest/utils/security_master.py (indexed stock_basic lookups)
+and BasicInformationCache delegating to it.
+
+Covers:
+- get() by ts_code (any case) and 6-digit symbol
+- find_by_name() exact, full-width, ST-marked and fuzzy names
+- search() substring semantics via the n-gram index
+- filter() on inverted-index and plain columns, lists of values
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backtest.utils.basic_information import BasicInformationCache  # noqa: E402
+from backtest.utils.security_master import SecurityMaster, clean_name  # noqa: E402
+
+BASIC = pd.DataFrame([
+    ("000001.SZ", "000001", "平安银行", "银行", "主板", "SZSE", "N"),
+    ("000002.SZ", "000002", "万科A", "全国地产", "主板", "SZSE", "N"),
+    ("000670.SZ", "000670", "盈方微", "半导体", "主板", "SZSE", "N"),
+    ("600000.SH", "600000", "浦发银行", "银行", "主板", "SSE", "H"),
+    ("600519.SH", "600519", "贵州茅台", "白酒", "主板", "SSE", "S"),
+    ("688981.SH", "688981", "中芯国际", "半导体", "科创板", "SSE", "H"),
+    ("300750.SZ", "300750", "宁德时代", "电气设备", "创业板", "SZSE", "S"),
+    ("600145.SH", "600145", "*ST新亿", "综合类", "主板", "SSE", "N"),
+], columns=["ts_code", "symbol", "name", "industry", "market", "exchange", "is_hs"])
+
+
+class TestSecurityMaster:
+    def test_get_by_code(self):
+        master = SecurityMaster(BASIC)
+        assert master.get("600519.SH")["name"] == "贵州茅台"
+        assert master.get("600519.sh")["symbol"] == "600519"
+        assert master.get("000670")["ts_code"] == "000670.SZ"
+        assert master.get("999999.SZ") is None and master.get("") is None
+
+    def test_find_by_name(self):
+        master = SecurityMaster(BASIC)
+        assert master.find_by_name("万科Ａ")["symbol"] == "000002"        # full-width letter
+        assert master.find_by_name("ST盈方微")["symbol"] == "000670"      # cleaned name
+        assert master.find_by_name("新亿")["symbol"] == "600145"          # master name is *ST-marked
+        assert master.find_by_name("宁德时代新能") is None
+        assert master.find_by_name("宁德时代新能", fuzzy=True)["symbol"] == "300750"
+        assert master.find_by_name("银行", fuzzy=True) is None            # too weak a match
+        assert clean_name("*ST新亿") == "新亿"
+
+    def test_search_and_filter(self):
+        master = SecurityMaster(BASIC)
+        assert [r["ts_code"] for r in master.search("银行")] == ["000001.SZ", "600000.SH"]
+        assert [r["ts_code"] for r in master.search("茅")] == ["600519.SH"]
+        assert [r["ts_code"] for r in master.search("a")] == ["000002.SZ"]
+        assert master.search("银河") == []
+
+        assert [r["symbol"] for r in master.filter(industry="半导体", exchange="SSE")] == ["688981"]
+        assert len(master.filter(market=["创业板", "科创板"])) == 2
+        assert [r["symbol"] for r in master.filter(is_hs={"S"}, market="主板")] == ["600519"]
+        assert len(master.filter()) == len(BASIC)
+        assert master.filter(industry="不存在") == [] and master.filter(area="深圳") == []
+
+
+class TestBasicInformationCache:
+    def test_delegates_to_master(self):
+        cache = BasicInformationCache.__new__(BasicInformationCache)
+        cache._max_age_hours = 24
+        cache._initialize(BASIC.copy())
+        assert cache.get("000001.SZ")["name"] == "平安银行"
+        assert cache.find_by_name("*ST新亿")["ts_code"] == "600145.SH"
+        assert [r["symbol"] for r in cache.filter(industry="银行")] == ["000001", "600000"]
+        assert cache.stats()["symbols"] == len(BASIC)
@@ -0,0 +1,121 @@
+"""
+Unit tests for backtest/data/sqlite_cache.py (pickled-blob backend).
+
+Covers:
+- Multi-day get() served by one range query, with the 90% coverage rule
+- get_many() batched multi-symbol reads with per-symbol coverage
+- set_bulk() single-transaction multi-symbol upsert
+- TushareDataProvider.get_ohlcv_data caching a bare code under its ts_code (one fetch)
+- TushareDataProvider.get_stock_data: bare codes read the ts_code cache entry (single and list)
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backtest.data.provider import TushareDataProvider  # noqa: E402
+from backtest.data.sqlite_cache import SQLiteDataCache  # noqa: E402
+
+DATES = ["20251023", "20251024", "20251027"]
+
+
+@pytest.fixture
+def trading_days():
+    with patch("backtest.utils.trading_calendar.get_trading_days_between", return_value=DATES):
+        yield
+
+
+@pytest.fixture
+def cache(tmp_path, sample_ohlcv):
+    c = SQLiteDataCache(str(tmp_path / "cache.db"))
+    c.set("ohlcv_data_AAA.SZ_20251023_20251027",
+          sample_ohlcv[sample_ohlcv["ts_code"] == "AAA.SZ"].reset_index(drop=True))
+    c.set("ohlcv_data_BBB.SH_20251023_20251024",
+          sample_ohlcv[sample_ohlcv["ts_code"] == "BBB.SH"].iloc[:2].reset_index(drop=True))
+    return c
+
+
+class TestRangeGet:
+    def test_full_range_hit(self, cache, trading_days):
+        out = cache.get("ohlcv_data_AAA.SZ_20251023_20251027")
+        assert list(out["trade_date"]) == DATES
+        assert out["close"].tolist() == [10.2, 10.8, 11.5]
+
+    def test_partial_range_is_a_miss(self, cache, trading_days):
+        assert cache.get("ohlcv_data_BBB.SH_20251023_20251027") is None
+
+
+class TestGetMany:
+    def test_reports_partial_and_missing_symbols(self, cache, trading_days):
+        df, coverage = cache.get_many("ohlcv_data", ["AAA.SZ", "BBB.SH", "CCC.SZ"], "20251023", "20251027")
+
+        assert len(df) == 5
+        assert set(df["ts_code"]) == {"AAA.SZ", "BBB.SH"}
+        assert coverage["AAA.SZ"]["ratio"] == 1.0
+        assert coverage["BBB.SH"]["missing"] == ["20251027"]
+        assert coverage["CCC.SZ"]["found"] == 0
+
+    def test_unsupported_type_returns_empty(self, cache, trading_days):
+        df, coverage = cache.get_many("basic_info", ["AAA.SZ"], "20251023", "20251027")
+        assert df.empty
+        assert coverage["AAA.SZ"]["missing"] == DATES
+
+
+class TestBulkUpsert:
+    def test_set_bulk_multi_symbol_and_overwrite(self, tmp_path, sample_ohlcv, trading_days):
+        c = SQLiteDataCache(str(tmp_path / "bulk.db"))
+        assert c.set_bulk("ohlcv_data", sample_ohlcv) == 6
+
+        changed = sample_ohlcv.copy()
+        changed["close"] = changed["close"] + 1
+        assert c.set_bulk("ohlcv_data", changed) == 6
+
+        out = c.get("ohlcv_data_BBB.SH_20251023_20251027")
+        assert out["close"].tolist() == [21.0, 21.0, 21.1]
+        assert c.get_cache_stats()["total_entries"] == 6
+        assert c.get_cached_dates_by_symbol("ohlcv_data") == {"AAA.SZ": set(DATES), "BBB.SH": set(DATES)}
+
+    def test_set_bulk_requires_symbol_column(self, tmp_path, sample_ohlcv):
+        c = SQLiteDataCache(str(tmp_path / "bulk.db"))
+        assert c.set_bulk("ohlcv_data", sample_ohlcv.drop(columns=["ts_code"])) == 0
+
+    def test_provider_bare_code_fetched_once(self, tmp_path, sample_ohlcv, trading_days):
+        provider = TushareDataProvider.__new__(TushareDataProvider)
+        provider.cache = SQLiteDataCache(str(tmp_path / "bulk.db"))
+        provider.pro = MagicMock()
+        bars = sample_ohlcv[sample_ohlcv["ts_code"] == "BBB.SH"].assign(ts_code="600000.SH")
+        provider.pro.daily.return_value = bars.reset_index(drop=True)
+
+        first = provider.get_ohlcv_data("600000", "20251023", "20251027")
+        second = provider.get_ohlcv_data("600000", "20251023", "20251027")
+        assert provider.pro.daily.call_count == 1
+        assert provider.pro.daily.call_args.kwargs["ts_code"] == "600000.SH"
+        assert second["close"].tolist() == first["close"].tolist() == [20.0, 20.0, 20.1]
+
+    def test_stock_data_bare_code_fetched_once(self, tmp_path, sample_ohlcv, trading_days):
+        provider = TushareDataProvider.__new__(TushareDataProvider)
+        provider.cache = SQLiteDataCache(str(tmp_path / "bulk.db"))
+        bars = {code: sample_ohlcv[sample_ohlcv["ts_code"] == old].assign(ts_code=code).reset_index(drop=True)
+                for code, old in (("600000.SH", "BBB.SH"), ("000001.SZ", "AAA.SZ"))}
+        provider.get_basic_information = MagicMock(side_effect=lambda code: pd.DataFrame({"ts_code": [code], "name": ["x"]}))
+        provider.get_ohlcv_data = lambda code, start, end: bars[code].drop(columns=["turnover_rate"])
+        provider.get_fundamental_data = lambda code, start, end: bars[code][["ts_code", "trade_date", "turnover_rate"]]
+
+        first = provider.get_stock_data("600000", "20251023", "20251027")
+        assert provider.get_stock_data("600000", "20251023", "20251027")["close"].tolist() == first["close"].tolist()
+        assert [c.args[0] for c in provider.get_basic_information.call_args_list] == ["600000.SH"]
+
+        result = provider.get_stock_data(["600000", "000001", "600000.SH"], "20251023", "20251027")
+        assert result["ts_code"].drop_duplicates().tolist() == ["600000.SH", "000001.SZ"]
+        assert [c.args[0] for c in provider.get_basic_information.call_args_list] == ["600000.SH", "000001.SZ"]
+        provider.get_stock_data(["000001", "600000"], "20251023", "20251027")
+        assert provider.get_basic_information.call_count == 2
@@ -0,0 +1,107 @@
+"""
+Unit tests for the concurrent multi-symbol TushareDataProvider.get_stock_data.
+
+The per-symbol fetches (basic info, OHLCV, fundamentals) are stubbed on the
+instance — no network.
+
+Covers:
+- cache hits resolved from one batched read, only misses fetched
+- misses fetched concurrently, bounded by STOCK_DATA_WORKERS
+- per-symbol errors collected in attrs['fetch_errors'], input order kept
+- fetched frames written back to the cache
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import backtest.data.provider as provider_module  # noqa: E402
+from backtest.data.provider import TushareDataProvider  # noqa: E402
+from backtest.data.sqlite_cache import SQLiteDataCache  # noqa: E402
+from backtest.utils.exceptions import DataProviderError  # noqa: E402
+
+DATES = ["20251023", "20251024", "20251027"]
+
+
+class StubbedProvider(TushareDataProvider):
+    """Per-symbol endpoints stubbed; tracks fetch calls and peak concurrency."""
+
+    def __init__(self, cache, fail=()):
+        self.cache = cache
+        self.pro = MagicMock()
+        self.rate_limit_delay = 0
+        self.fail = set(fail)
+        self.fetched = []
+        self.active = self.peak = 0
+        self._lock = threading.Lock()
+
+    def get_basic_information(self, symbol=None):
+        return pd.DataFrame([{"ts_code": symbol, "name": f"N{symbol[:3]}"}])
+
+    def get_ohlcv_data(self, symbol=None, start_date=None, end_date=None):
+        with self._lock:
+            self.fetched.append(symbol)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+        if symbol in self.fail:
+            raise DataProviderError(f"boom {symbol}")
+        return pd.DataFrame([{"ts_code": symbol, "trade_date": d, "close": 10.0} for d in DATES
+                             if start_date <= d <= end_date])
+
+    def get_fundamental_data(self, symbol=None, start_date=None, end_date=None):
+        return pd.DataFrame([{"ts_code": symbol, "trade_date": d, "turnover_rate": 1.0} for d in DATES
+                             if start_date <= d <= end_date])
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SQLiteDataCache(str(tmp_path / "cache.db"))
+
+
+@pytest.fixture(autouse=True)
+def calendar():
+    with patch("backtest.utils.trading_calendar.get_trading_days_between",
+               side_effect=lambda s, e: [d for d in DATES if s <= d <= e]):
+        yield
+
+
+class TestConcurrentGetStockData:
+    def test_hits_in_bulk_misses_concurrent(self, cache, monkeypatch):
+        monkeypatch.setattr(provider_module, "STOCK_DATA_WORKERS", 4)
+        warm = StubbedProvider(cache)
+        warm.get_stock_data(["C00.SZ"], DATES[0], DATES[-1])
+        assert warm.fetched == ["C00.SZ"]
+
+        p = StubbedProvider(cache, fail={"F00.SZ"})
+        symbols = ["C00.SZ"] + [f"M{i:02d}.SZ" for i in range(8)] + ["F00.SZ"]
+        df = p.get_stock_data(symbols, DATES[0], DATES[-1])
+
+        assert "C00.SZ" not in p.fetched and len(p.fetched) == 9
+        assert 1 < p.peak <= 4
+        assert list(dict.fromkeys(df["ts_code"])) == symbols[:-1]
+        assert set(df.attrs["fetch_errors"]) == {"F00.SZ"}
+        assert len(df) == 9 * len(DATES)
+        assert df.loc[df["ts_code"] == "M00.SZ", "turnover_rate"].tolist() == [1.0] * 3
+
+        again = StubbedProvider(cache)
+        assert len(again.get_stock_data(symbols[:-1], DATES[0], DATES[-1])) == len(df)
+        assert again.fetched == []
+
+    def test_all_failed_raises(self, cache):
+        p = StubbedProvider(cache, fail={"F00.SZ", "F01.SZ"})
+        with pytest.raises(DataProviderError):
+            p.get_stock_data(["F00.SZ", "F01.SZ"], DATES[0], DATES[-1])
@@ -0,0 +1,98 @@
+"""
+Unit tests for backtest/strategies/registry.py and the engine's in-process pick path.
+
+Strategy modules are replaced with stubs — no strategy code, network or
+subprocess is run.
+
+Covers:
+- get_strategy_picker() module lookup, ts_ths/ts_dc source binding, unknown names
+- pick_reads_reports() strategy hook and defaults
+- selected_records() JSON-ready conversion (NaN -> None)
+- engine._pick_in_process() result and fallback signalling
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backtest.strategies import registry  # noqa: E402
+from backtest.strategies.registry import get_strategy_picker, selected_records  # noqa: E402
+
+
+def _fake_pick(date, flags=(), src=None):
+    return pd.DataFrame([{'rank': 1, 'symbol': '000001.SZ', 'score': 7.5, 'src': src}])
+
+
+class TestGetStrategyPicker:
+    def test_registered_strategy_imports_module(self):
+        module = SimpleNamespace(pick=_fake_pick)
+        with patch.object(registry.importlib, 'import_module', return_value=module) as imp:
+            assert get_strategy_picker('ts_hma') is _fake_pick
+        imp.assert_called_once_with('backtest.strategies.ts_hma')
+
+    def test_sector_source_is_bound(self):
+        module = SimpleNamespace(pick=_fake_pick)
+        with patch.object(registry.importlib, 'import_module', return_value=module) as imp:
+            picker = get_strategy_picker('ts_dc')
+        imp.assert_called_once_with('backtest.strategies.ts_ths_dc')
+        assert picker('20251024', [])['src'].iloc[0] == 'ts_dc'
+
+    def test_unknown_strategy(self):
+        assert get_strategy_picker('ts_go') is None
+        assert get_strategy_picker('nope') is None
+
+
+class TestPickReadsReports:
+    def test_module_hook_and_defaults(self):
+        module = SimpleNamespace(pick=_fake_pick, pick_reads_reports=lambda date: date == '20251024')
+        with patch.object(registry.importlib, 'import_module', return_value=module):
+            assert registry.pick_reads_reports('ts_7AZ', '20251024')
+            assert not registry.pick_reads_reports('ts_7AZ', '20251023')
+        with patch.object(registry.importlib, 'import_module', return_value=SimpleNamespace(pick=_fake_pick)):
+            assert not registry.pick_reads_reports('ts_hma', '20251024')
+        assert not registry.pick_reads_reports('ts_ths', '20251024')
+        assert registry.pick_reads_reports('ts_go', '20251024')
+
+
+class TestSelectedRecords:
+    def test_nan_becomes_none_and_types_are_native(self):
+        df = pd.DataFrame([
+            {'rank': 1, 'symbol': 'AAA.SZ', 'score': np.float64(6.5), 'ma96': np.nan},
+            {'rank': 2, 'symbol': 'BBB.SH', 'score': 5.0, 'ma96': 10.2},
+        ])
+        records = selected_records(df)
+        assert records[0] == {'rank': 1, 'symbol': 'AAA.SZ', 'score': 6.5, 'ma96': None}
+        assert type(records[0]['rank']) is int
+
+    def test_empty(self):
+        assert selected_records(pd.DataFrame()) == []
+        assert selected_records(None) == []
+
+
+class TestEngineInProcessPick:
+    def test_returns_records_and_passes_flags(self):
+        from backtest.engine import _pick_in_process
+
+        picker = MagicMock(return_value=pd.DataFrame([{'rank': 1, 'symbol': 'AAA.SZ', 'score': 6.0}]))
+        with patch.object(registry, 'get_strategy_picker', return_value=picker):
+            out = _pick_in_process('ts_hma', '20251024', ['--no-ai'])
+        picker.assert_called_once_with('20251024', ['--no-ai'])
+        assert out == [{'rank': 1, 'symbol': 'AAA.SZ', 'score': 6.0}]
+
+    def test_failure_or_unregistered_signals_fallback(self):
+        from backtest.engine import _pick_in_process
+
+        with patch.object(registry, 'get_strategy_picker', side_effect=ImportError('boom')):
+            assert _pick_in_process('ts_hma', '20251024', []) is None
+        with patch.object(registry, 'get_strategy_picker', return_value=None):
+            assert _pick_in_process('ts_go', '20251024', []) is None
@@ -0,0 +1,169 @@
+"""
+Unit tests for backtest/sweep.py (parameter sweep) and its engine/DB helpers.
+
+No backtest is run — only the pure pieces the sweep is built from.
+
+Covers:
+- load_param_sets() grid product / explicit variants, baseline first
+- split_overrides() env / config.json / engine-table classification
+- write_variant_config() and write_variant_picks() derived files
+- rank_results() ordering and write_summary() markdown/CSV output
+- _launch_variant() recording a crashed variant's exit code, flagged in the summary
+- engine.period_summary() headline metrics and max drawdown
+- shared.db.db.create_scratch_database() schema initialisation
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backtest import sweep  # noqa: E402
+
+
+class TestParamSets:
+    def test_grid_is_cartesian_with_baseline_first(self, tmp_path):
+        grid = tmp_path / "grid.json"
+        grid.write_text(json.dumps({"grid": {"SCORE_MIN": [0, 5], "DRAWDOWN_BUDGET.shrink30_dd": [-2.0, -3.0]}}))
+        sets = sweep.load_param_sets(str(grid))
+        assert sets[0] == {}
+        assert len(sets) == 5
+        assert {"SCORE_MIN": 5, "DRAWDOWN_BUDGET.shrink30_dd": -3.0} in sets
+        assert [sweep.variant_name(i, p) for i, p in enumerate(sets)][:2] == ["baseline", "v01"]
+
+    def test_explicit_variants_and_bad_file(self, tmp_path):
+        grid = tmp_path / "grid.json"
+        grid.write_text(json.dumps({"variants": [{}, {"SL_BULL": 0.04}]}))
+        assert sweep.load_param_sets(str(grid)) == [{}, {"SL_BULL": 0.04}]
+        grid.write_text(json.dumps({"SCORE_MIN": [1]}))
+        with pytest.raises(ValueError):
+            sweep.load_param_sets(str(grid))
+
+    def test_split_overrides(self):
+        env, config, engine = sweep.split_overrides({
+            "SCORE_MIN": 5,
+            "SL_ENABLED": False,
+            "REGIME_MAX_POSITIONS.bull": 8,
+            "trading_rules.risk_reward_ratios.bull_market.stop_loss_pct": 0.04,
+        })
+        assert env == {"SCORE_MIN": "5", "SL_ENABLED": "false"}
+        assert engine == {"REGIME_MAX_POSITIONS.bull": 8}
+        assert config == {"trading_rules.risk_reward_ratios.bull_market.stop_loss_pct": 0.04}
+
+
+class TestVariantFiles:
+    def test_variant_config_overrides_copy_only(self, tmp_path):
+        from backtest.utils.config import ConfigManager
+
+        base = tmp_path / "config.json"
+        base.write_text(json.dumps({"trading_rules": {"risk_reward_ratios": {"bull_market": {"stop_loss_pct": 0.03}}}}))
+        out = sweep.write_variant_config(str(base), {"trading_rules.risk_reward_ratios.bull_market.stop_loss_pct": 0.05},
+                                         str(tmp_path / "v01" / "config.json"))
+        assert ConfigManager(out).get("trading_rules.risk_reward_ratios.bull_market.stop_loss_pct") == 0.05
+        assert ConfigManager(str(base)).get("trading_rules.risk_reward_ratios.bull_market.stop_loss_pct") == 0.03
+
+    def test_variant_picks_filter_and_truncate(self, tmp_path):
+        raw = tmp_path / "pick_stocks_20251024.json"
+        raw.write_text(json.dumps({
+            "target_trading_date": "20251024", "market_pattern": "normal", "regime_data": {"regime": "normal"},
+            "selected_stocks": [{"symbol": f"00000{i}.SZ", "score": s} for i, s in enumerate([9, 3, 7, 6, None])],
+        }))
+        out_dir = tmp_path / "v01"
+        out_dir.mkdir()
+        out = sweep.write_variant_picks(str(raw), str(out_dir), {"regime": "bull", "max_hold_days": 7}, 6, 2)
+        data = json.loads(Path(out).read_text())
+        assert [s["score"] for s in data["selected_stocks"]] == [9, 7]
+        assert data["market_pattern"] == "bull"
+        assert data["regime_data"]["max_hold_days"] == 7
+        assert Path(out).name == raw.name
+
+
+def _summary(ret, dd=-1.0, excess=None):
+    return {"total_return_pct": ret, "max_drawdown_pct": dd, "realized_pnl": ret * 6000, "unrealized_pnl": 0.0,
+            "final_value": 600000 * (1 + ret / 100), "transactions": 10, "sells": 4, "excess_csi300_pct": excess}
+
+
+class TestRankingAndSummary:
+    def test_rank_best_first_failed_last(self):
+        results = [
+            {"variant": "baseline", "params": {}, "summary": _summary(1.0)},
+            {"variant": "v01", "params": {"SCORE_MIN": 5}, "summary": None, "error": "boom"},
+            {"variant": "v02", "params": {"SCORE_MIN": 6}, "summary": _summary(4.5, dd=-3.0)},
+        ]
+        assert [r["variant"] for r in sweep.rank_results(results)] == ["v02", "baseline", "v01"]
+        assert [r["variant"] for r in sweep.rank_results(results, "max_drawdown_pct")] == ["baseline", "v02", "v01"]
+
+    def test_write_summary(self, tmp_path):
+        ranked = [
+            {"variant": "v02", "params": {"SCORE_MIN": 6}, "summary": _summary(4.5, excess=2.25)},
+            {"variant": "baseline", "params": {}, "summary": None, "error": "boom"},
+        ]
+        md_file, csv_file = sweep.write_summary(ranked, str(tmp_path), "20251023 to 20251027 (ts_7AZ)", "total_return_pct")
+        md = Path(md_file).read_text(encoding="utf-8")
+        assert "| 1 | v02 | SCORE_MIN=6 | 4.50% |" in md
+        assert "2.25%" in md
+        assert "| 2 | baseline | (baseline) | failed: boom |" in md
+        df = pd.read_csv(csv_file)
+        assert df["variant"].tolist() == ["v02", "baseline"]
+        assert json.loads(df["params"].iloc[0]) == {"SCORE_MIN": 6}
+
+
+    def test_crashed_variant_flagged(self, tmp_path, monkeypatch):
+        spec_file = tmp_path / "variant.json"
+        (tmp_path / "summary.json").write_text(json.dumps(_summary(9.9)))   # stale result of an earlier sweep
+        monkeypatch.setattr(sweep.subprocess, "run", lambda *a, **k: SimpleNamespace(
+            returncode=1, stdout="", stderr="Traceback ...\nKeyError: 'close'\n"))
+        outcome = sweep._launch_variant(str(spec_file), {})
+        assert outcome == {"returncode": 1, "summary": None, "error": "KeyError: 'close'"}
+
+        ranked = sweep.rank_results([
+            {"variant": "v01", "params": {"SCORE_MIN": 5}, **outcome},
+            {"variant": "baseline", "params": {}, "returncode": 0, "summary": _summary(1.0), "error": None},
+        ])
+        md_file, csv_file = sweep.write_summary(ranked, str(tmp_path), "t", "total_return_pct")
+        md = Path(md_file).read_text(encoding="utf-8")
+        assert "exited non-zero:** v01" in md
+        assert "| 2 | v01 | SCORE_MIN=5 | failed (exit 1): KeyError: 'close' |" in md
+        assert pd.read_csv(csv_file)["returncode"].tolist() == [0, 1]
+
+class TestPeriodSummary:
+    def test_metrics_and_drawdown_from_initial_capital(self, monkeypatch):
+        import backtest.engine as engine
+
+        monkeypatch.setattr(engine, "INITIAL_CASH", 100000)
+        values = [99000, 102000, 96900, 101000]
+        timeline = [{
+            "portfolio_value": v, "cumulative_total_pnl": v - 100000, "cumulative_realized_pnl": 500.0,
+            "cumulative_unrealized_pnl": v - 100500, "executed_orders": 2, "sell_count": 1,
+        } for v in values]
+        s = engine.period_summary(timeline, {"CSI 300": {"excess": 0.0125}})
+        assert s["total_return_pct"] == pytest.approx(1.0)
+        assert s["max_drawdown_pct"] == pytest.approx(-5.0)
+        assert s["final_value"] == 101000
+        assert (s["transactions"], s["sells"]) == (8, 4)
+        assert s["excess_csi300_pct"] == pytest.approx(1.25)
+        assert engine.period_summary(timeline[-1:])["excess_csi300_pct"] is None
+
+
+class TestScratchDatabase:
+    def test_schema_initialised_and_dropped(self, tmp_path):
+        from shared.db.db import create_scratch_database, drop_database_files
+
+        schema = tmp_path / "schema.sql"
+        schema.write_text("BEGIN TRANSACTION;\nCREATE TABLE transactions (id INTEGER PRIMARY KEY, notes TEXT);\nCOMMIT;\n")
+        db = create_scratch_database(f"pytest_scratch_{tmp_path.name}", str(schema))
+        try:
+            db.execute("INSERT INTO transactions (notes) VALUES (?)", ("x",))
+            assert db.fetch_value("SELECT COUNT(*) FROM transactions") == 1
+        finally:
+            drop_database_files(db.db_path)
+        assert not Path(db.db_path).exists()
@@ -0,0 +1,85 @@
+"""
+Unit tests for the ordinal (NumPy) layer of backtest/utils/trading_calendar.py.
+
+The calendar is built from a fixed list of trading days — no API calls.
+
+Covers:
+- offset() matching get_trading_days_before/after for arrays of dates and formats
+- trading_day_index() / dates_at() round trip, datetime64 input and output
+- between_idx() slicing the ordinal arrays like get_trading_days_between()
+- vectorized is_trading_day() and out-of-range errors
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backtest.utils.trading_calendar import TradingCalendar  # noqa: E402
+
+DAYS = [d.strftime("%Y%m%d") for d in pd.bdate_range("2025-01-01", "2025-12-31")]
+
+
+@pytest.fixture
+def cal():
+    cal = TradingCalendar.__new__(TradingCalendar)
+    cal.cache_years = 1
+    cal._update_cache_structures(DAYS)
+    cal._cache_start_date, cal._cache_end_date = "20250101", "20251231"
+    cal._cache_hits = cal._cache_misses = cal._api_calls = 0
+    return cal
+
+
+def _previous(date, n):
+    """Reference: step back one trading day at a time."""
+    for _ in range(n):
+        date = max(d for d in DAYS if d < date)
+    return date
+
+
+class TestOrdinalLayer:
+    def test_offset_matches_string_api(self, cal):
+        dates = ["20250315", "20250317", "2025-06-30", "20250704"]   # weekend, weekday, dashed
+        before = cal.offset(dates, -20)
+        assert before.dtype == np.int32
+        assert before.tolist() == [int(_previous(d.replace("-", ""), 20)) for d in dates]
+        assert [cal.get_trading_days_before(d, 20) for d in dates[:2]] == [str(x) for x in before[:2]]
+        assert cal.get_trading_days_before("2025-06-30", 20).replace("-", "") == str(before[2])
+
+        after = cal.offset(dates, 5, fmt="str")
+        assert after.tolist() == [cal.get_trading_days_after(d.replace("-", ""), 5) for d in dates]
+        assert cal.offset("20250315", 0).item() == 20250314
+        assert cal.offset(["20250317", "20250317"], np.array([-1, 1])).tolist() == [20250314, 20250318]
+
+    def test_index_round_trip_and_datetime64(self, cal):
+        dt = np.array(["2025-03-15", "2025-03-17"], dtype="datetime64[D]")
+        idx = cal.trading_day_index(dt)
+        assert cal.dates_at(idx).tolist() == [20250314, 20250317]
+        assert cal.dates_at(idx - 1, fmt="datetime64").tolist() == list(
+            np.array(["2025-03-13", "2025-03-14"], dtype="datetime64[D]").tolist())
+        assert cal.trading_day_index("20250101").item() == 0
+
+    def test_between_idx_slices(self, cal):
+        lo, hi = cal.between_idx("20250301", "2025-03-31")
+        assert cal.trading_days_int[lo:hi].astype(str).tolist() == cal.get_trading_days_between("20250301", "20250331")
+        assert cal.get_trading_days_between("2025-03-01", "2025-03-04") == ["2025-03-03", "2025-03-04"]
+        with pytest.raises(ValueError):
+            cal.between_idx("20250331", "20250301")
+
+    def test_is_trading_day_and_bounds(self, cal):
+        assert cal.is_trading_day(["20250314", "20250315", "20251231"]).tolist() == [True, False, True]
+        assert cal.is_trading_day("20250315") is False
+        with pytest.raises(ValueError):
+            cal.offset(["20250103"], -5)
+        with pytest.raises(ValueError):
+            cal.get_trading_days_before("20250103", 5)
+        with pytest.raises(ValueError):
+            cal.dates_at(len(DAYS))
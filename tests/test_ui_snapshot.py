@@ -0,0 +1,140 @@
+"""
+Unit tests for utils/ui_snapshot.py (parsed, indexed `mobilerun device ui` dump
+behind the utils/tools element finders).
+
+Uses an inline order-page dump — no device.
+
+Covers:
+- typed elements (class, resource id, text, bounds, centre), class/text indexes
+- find / find_button / find_edittext_near_label / find_edittext_by_y returning
+  exactly what the previous line-scan finders returned
+- UISnapshot still behaving as the dump string; UISnapshot.of() reusing a parse
+- the current snapshot dropped on invalidation and after its max age
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import utils.ui_snapshot as ui_snapshot  # noqa: E402
+from utils.ui_snapshot import UISnapshot  # noqa: E402
+
+DUMP = """\
+Current app: com.guotai.dazhihui
+1. FrameLayout: "android:id/content" - (0,0,1440,3120)
+2. TextView: "com.guotai.dazhihui:id/title", "到价买入" - (500,120,940,200)
+3. TextView: "", "触发价格" - (40,1500,300,1560)
+4. EditText: "com.guotai.dazhihui:id/et_price", "3.97" - (600,1505,1280,1565)
+5. TextView: "", "止盈触发" - (40,1930,300,1990)
+   (no bounds) 买入数量 label group
+6. View: "", "说明" - (40,2100,1400,2200)
+7. EditText: "com.guotai.dazhihui:id/et_amount", "" - (600,2580,1280,2640)
+8. EditText: "com.guotai.dazhihui:id/et_tp", "" - (600,1938,1280,1992)
+9. Button: "com.guotai.dazhihui:id/btn_ok", "确定" - (700,2780,1100,2870)
+10. TextView: "", "确定" - (100,2780,400,2870)
+11. EditText: "com.guotai.dazhihui:id/et_search", "卖出数量" - (100,300,1300,380)
+12. TextView: "", "600279" - (40,600,300,660)
+"""
+
+
+def _bounds_center(line):
+    m = re.search(r'\((\d+),(\d+),(\d+),(\d+)\)', line)
+    if m:
+        x1, y1, x2, y2 = map(int, m.groups())
+        return (x1 + x2) // 2, (y1 + y2) // 2
+    return None
+
+
+def legacy_find_element_center(ui_text, label, exclude_edittext=False):
+    for line in ui_text.split('\n'):
+        if label in line:
+            if exclude_edittext and 'EditText' in line:
+                continue
+            if _bounds_center(line):
+                return _bounds_center(line)
+    return None
+
+
+def legacy_find_edittext_near_label(ui_text, label):
+    lines = ui_text.split('\n')
+    for line in lines:
+        if label in line and 'EditText' in line and _bounds_center(line):
+            return _bounds_center(line)
+    found = None
+    for i, line in enumerate(lines):
+        if label in line and 'EditText' not in line:
+            found = i
+            continue
+        if found is not None and 'EditText' in line and (i - found) <= 10 and _bounds_center(line):
+            return _bounds_center(line)
+    return None
+
+
+def legacy_find_button_center(ui_text, label):
+    for line in ui_text.split('\n'):
+        if 'Button' in line and label in line and _bounds_center(line):
+            return _bounds_center(line)
+    return None
+
+
+def legacy_find_edittext_by_y(ui_text, target_y, y_tolerance=40):
+    best, min_diff = None, y_tolerance
+    for line in ui_text.split('\n'):
+        if 'EditText' in line and _bounds_center(line):
+            cx, cy = _bounds_center(line)
+            if abs(cy - target_y) < min_diff:
+                min_diff, best = abs(cy - target_y), (cx, cy)
+    return best
+
+
+class TestUISnapshot:
+    def test_elements_and_indexes(self):
+        snap = UISnapshot(DUMP)
+        price = snap.by_class["EditText"][0]
+        assert (price.resource_id, price.text, price.bounds) == ("com.guotai.dazhihui:id/et_price", "3.97", (600, 1505, 1280, 1565))
+        assert price.center == (940, 1535) and price.line_no == 4
+        assert [e.cls for e in snap.with_text("确定")] == ["Button", "TextView"]
+        assert len(snap.elements) == 12 and len(snap.edittexts) == 4
+        assert snap.element_at(950, 1540) is not None and snap.element_at(950, 1540).cls == "FrameLayout"
+        assert "到价买入" in snap and snap.split("\n")[0] == "Current app: com.guotai.dazhihui"
+
+    @pytest.mark.parametrize("label", ["到价买入", "确定", "600279", "et_price", "触发", "卖出数量", "不存在"])
+    def test_finders_match_line_scan(self, label):
+        snap = UISnapshot(DUMP)
+        assert snap.find(label) == legacy_find_element_center(DUMP, label)
+        assert snap.find(label, exclude_edittext=True) == legacy_find_element_center(DUMP, label, True)
+        assert snap.find_button(label) == legacy_find_button_center(DUMP, label)
+        assert snap.find_edittext_near_label(label) == legacy_find_edittext_near_label(DUMP, label)
+
+    def test_edittext_near_label_and_by_y(self):
+        snap = UISnapshot(DUMP)
+        assert snap.find_edittext_near_label("买入数量") == (940, 2610)     # label line without bounds
+        assert snap.find_edittext_near_label("卖出数量") == (700, 340)      # EditText carrying the label
+        for y in (0, 340, 1535, 1560, 1575, 1960, 1990, 2000, 2610, 3000):
+            for tol in (10, 40, 80):
+                assert snap.find_edittext_by_y(y, tol) == legacy_find_edittext_by_y(DUMP, y, tol)
+        assert snap.find_edittext_by_y(1960) == (940, 1965)
+
+    def test_of_reuses_parse(self):
+        first = UISnapshot.of(DUMP)
+        assert UISnapshot.of(DUMP) is first and UISnapshot.of(first) is first
+        assert UISnapshot.of(DUMP + "\n").find("600279") == first.find("600279")
+
+    def test_current_snapshot_invalidation(self, monkeypatch):
+        monkeypatch.setattr(ui_snapshot, "_current", None)
+        snap = ui_snapshot.remember_snapshot(UISnapshot(DUMP))
+        assert ui_snapshot.current_snapshot() is snap
+        ui_snapshot.invalidate_ui_snapshot()
+        assert ui_snapshot.current_snapshot() is None
+        ui_snapshot.remember_snapshot(snap)
+        time.sleep(0.06)
+        assert ui_snapshot.current_snapshot(max_age=0.05) is None
@@ -24,9 +24,11 @@ from trading.adb import get_device_connectivity, check_app_exist
 from utils.gemini_free_api import create_free_llm
 from shared.db.db import DB
 from backtest.utils.trading_calendar import calendar
+from backtest.utils.security_master import clean_name
 from utils.trading_time import get_market_open_times_refresh_interval
 from backtest.utils.logging_config import configure_logger
 from utils.ocr_screenshot import ocr_screenshot2file
+from utils.ui_snapshot import invalidate_ui_snapshot
 
 import logging
 logging.getLogger("google.genai._api_client").setLevel(logging.ERROR)
@@ -88,6 +90,7 @@ def close_app(app_package_name: str = GUOTAI_PACKAGE_NAME) -> None:
     """Force stop the specified app on the connected device. not keep running on background."""
 
     logger.info(f"Force stopping app {app_package_name}...")
+    invalidate_ui_snapshot()
     subprocess.run(f"adb shell am force-stop {app_package_name}", shell=True)
     time.sleep(1)
     logger.info(f"Force stop app {app_package_name} completed.")
@@ -108,6 +111,7 @@ def open_app(app_package_name: str = GUOTAI_PACKAGE_NAME) -> None:
         logger.info(f"App {app_package_name} is already running.")
     else:
         logger.info(f"App {app_package_name} is not running, start now ...")
+        invalidate_ui_snapshot()
         subprocess.run(f"adb shell am start -W -n {app_package_name}/com.gtja.home.InitScreen", shell=True)
         time.sleep(5)
         subprocess.run(f"adb shell pidof {app_package_name} && echo 'App is running' || echo 'App is NOT running'", shell=True)
@@ -116,6 +120,7 @@ def open_app(app_package_name: str = GUOTAI_PACKAGE_NAME) -> None:
 def restart_app(app_package_name: str = GUOTAI_PACKAGE_NAME) -> None:
     """Restart app then at homepage, but need re-login. """
 
+    invalidate_ui_snapshot()
     subprocess.run(f"adb shell am start -S -n {app_package_name}/com.gtja.home.InitScreen --activity-clear-task", shell=True)
 
 
@@ -124,6 +129,7 @@ def goto_homepage(app_package_name: str = GUOTAI_PACKAGE_NAME) -> None:
 
     # close_app, open_app or restart_app will lose session/task, need re-login.
     # Force clear entire task and restart activity (keeps app process/login).
+    invalidate_ui_snapshot()
     subprocess.run(f"""
         adb shell am start -n {app_package_name}/com.gtja.home.InitScreen --activity-clear-task \
         && sleep 1 && \
@@ -290,6 +296,7 @@ def replay_page(description: List[str] = ['行情', '我的持仓']) -> None:
 
     # Temporarily restore the real password
     _toggle_trajectory_password(matched_folder, GUOTAI_PASSWORD, to_real=True)
+    invalidate_ui_snapshot()
     try:
         result = subprocess.run(f'mobilerun macro replay {matched_folder} --state-threshold 0.54', shell=True)
         if result.returncode != 0:
@@ -558,13 +565,7 @@ def normalize_stock_name(name: str) -> str:
 
 def clean_stock_name(name: str) -> str:
     """Clean stock name by removing prefixes/suffixes (e.g., *ST, ST, N, U, W, V)."""
-    if not name:
-        return ""
-    # Strip common prefixes (case-insensitive)
-    name = re.sub(r'^(\*ST|ST|NST|PT|N|C|R|kr|KR|S|XD|XR|DR)\s*', '', name, flags=re.IGNORECASE)
-    # Strip common suffixes in parentheses or at the end
-    name = re.sub(r'\s*(\(U\)|\(W\)|\(V\)|U|W|V)$', '', name, flags=re.IGNORECASE)
-    return name
+    return clean_name(name)
 
 
 def sync_index_quote_data_to_db(quote_data: Optional[str] = None, user_id: int = 1) -> Dict:
@@ -846,18 +847,13 @@ def sync_summary_position_data_to_db(position_data: Optional[str] = None, user_i
 
         # Load code resolution map
         db_codes = {}
-        # 1. From stocks.index.json
-        import json
-        json_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "stocks.index.json")
-        if os.path.exists(json_path):
-            try:
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    for item in data:
-                        if len(item) >= 7 and item[6] == 'CN':
-                            db_codes[normalize_stock_name(item[2])] = item[1]
-            except Exception as e:
-                logger.warning(f"Failed to load stocks.index.json in position sync: {e}")
+        # 1. Security master (stock_basic) for names not seen in the database yet
+        try:
+            from backtest import basic_info_cache
+            master = basic_info_cache.master
+        except Exception as e:
+            logger.warning(f"Security master unavailable in position sync: {e}")
+            master = None
         # 2. From database tables
         for row_tx in cursor.execute("SELECT name, code FROM transactions WHERE code != '000000'").fetchall():
             db_codes[row_tx[0]] = row_tx[1]
@@ -869,6 +865,9 @@ def sync_summary_position_data_to_db(position_data: Optional[str] = None, user_i
         def resolve_code(name_to_lookup: str) -> str:
             if name_to_lookup in db_codes:
                 return db_codes[name_to_lookup]
+            security = master.find_by_name(name_to_lookup) if master is not None else None
+            if security:
+                return str(security['symbol'])
             cleaned_target = clean_stock_name(name_to_lookup)
             for name_key, code_val in db_codes.items():
                 if clean_stock_name(name_key) == cleaned_target:
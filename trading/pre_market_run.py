@@ -59,21 +59,26 @@ def resolve_code(name: str, user_id: int, cursor) -> str:
     return '000000'
 
 
-def get_confirmed_open(code: str) -> float | None:
-    """Return today's confirmed opening (auction) price for a 6-digit code,
-    or None when the market hasn't opened yet (before 09:25 auction confirm)
-    or the quote backend is unavailable. Uses the same realtime-quote path
-    as engine force-sell (Tushare stk_auction/realtime_quote → Tencent).
+def get_confirmed_opens(codes: list[str]) -> dict[str, float]:
+    """Return today's confirmed opening (auction) prices for 6-digit codes,
+    or {} when the market hasn't opened yet (before 09:25 auction confirm)
+    or the quote backend is unavailable. One batched quote request for all
+    codes, the same realtime-quote path as engine force-sell
+    (Tushare stk_auction/realtime_quote, Tencent, EastMoney in parallel).
     """
     from datetime import datetime
-    if datetime.now().strftime('%H%M%S') < '092500':
-        return None  # auction not confirmed yet — no open price to check
+    if not codes or datetime.now().strftime('%H%M%S') < '092500':
+        return {}  # auction not confirmed yet — no open price to check
     try:
-        from utils.tools import get_realtime_quote
-        open_price = get_realtime_quote(code)
-        return float(open_price) if open_price and open_price > 0 else None
+        from utils.tools import get_realtime_quotes
+        return {code: float(price) for code, price in get_realtime_quotes(codes).items() if price and price > 0}
     except Exception:
-        return None
+        return {}
+
+
+def get_confirmed_open(code: str) -> float | None:
+    """Confirmed opening (auction) price of one 6-digit code, or None (see get_confirmed_opens)."""
+    return get_confirmed_opens([code]).get(code)
 
 
 async def main(submit: bool = False):
@@ -135,8 +140,8 @@ async def main(submit: bool = False):
     # ── Invalidate recent OHLCV cache to avoid stale prices ──
     logger.info("═══ Invalidate recent OHLCV cache ═══")
     from backtest import DB_CACHE_FILE
-    from backtest.data.sqlite_cache import SQLiteDataCache
-    cache = SQLiteDataCache(DB_CACHE_FILE)
+    from backtest.data.sqlite_cache import create_data_cache
+    cache = create_data_cache(DB_CACHE_FILE)
     cache.invalidate_recent(data_type='ohlcv_data', days=3)
 
     # ── Step 2: Pick stocks ──
@@ -221,6 +226,7 @@ async def main(submit: bool = False):
         held_codes.add(code)
         held_codes.add(code.split('.')[0])  # strip .SZ/.SH suffix
 
+    confirmed_opens = get_confirmed_opens([o['symbol'].split('.')[0] for o in cli_orders])
     for o in cli_orders:
         sym = o['symbol']
         code_clean = sym.replace('.SZ','').replace('.SH','').replace('.BJ','')
@@ -247,7 +253,7 @@ async def main(submit: bool = False):
         # Regime open-gap risk control: if the auction has confirmed (>=09:25)
         # and the stock opens more than MAX_GAP_<REGIME> above prev close,
         # skip the BUY — don't chase the gap. Pre-09:25 or no quote → pass.
-        confirmed_open = get_confirmed_open(sym.split('.')[0])
+        confirmed_open = confirmed_opens.get(sym.split('.')[0])
         if confirmed_open is not None and prev_close > 0:
             open_gap = (confirmed_open - prev_close) / prev_close
             if open_gap > max_open_gap_pct:
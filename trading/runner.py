@@ -67,7 +67,7 @@ def submit_orders_to_app(smart_orders_file: str, submit: bool = False, market_pa
     """Read smart_orders JSON and submit orders to broker app via ADB."""
     from trading.create_order_tp_sl import create_tp_sl_order
     from trading.create_order_ordinary import create_ordinary_order
-    from utils.tools import get_realtime_quote
+    from utils.tools import get_realtime_quotes
     import time
     from datetime import datetime
 
@@ -105,7 +105,8 @@ def submit_orders_to_app(smart_orders_file: str, submit: bool = False, market_pa
             else:
                 logger.info("[DRY RUN] Skipping actual time.sleep wait.")
 
-    # 3. Submit BUY orders
+    # 3. Submit BUY orders (one batched quote request for all of them)
+    rt_prices = get_realtime_quotes([o['symbol'].split('.')[0] for o in buy_orders if str(o['buy_quantity']) != '0'])
     for order in buy_orders:
         quantity = str(order['buy_quantity'])
         if quantity == '0':
@@ -113,7 +114,7 @@ def submit_orders_to_app(smart_orders_file: str, submit: bool = False, market_pa
         code = order['symbol'].split('.')[0]
         
         # Override the suggested buy_price with the real-time open price if available
-        rt_price = get_realtime_quote(code)
+        rt_price = rt_prices.get(code)
         if rt_price and rt_price > 0:
             price = f"{rt_price:.2f}"
             logger.info(f"Using real-time auction open price {price} for {code} instead of suggested {order['buy_price']}")
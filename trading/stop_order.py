@@ -20,6 +20,7 @@ from utils.tools import (
     run_cmd, device_tap, device_swipe, get_ui_tree,
     find_element_center, find_button_center, goto_cancel_order_page
 )
+from utils.ui_snapshot import UISnapshot
 from trading.guotai import open_app, login, goto_homepage, parse_csv_data
 from trading.sync_app_to_db import (
     get_order_from_app_smart_order_page_structured,
@@ -127,47 +128,40 @@ def stop_smart_orders(codes: list[str], submit: bool):
 
 def find_cancel_button_for_order(ui_text: str, code: str, quantity: str = None) -> tuple[int, int]:
     """Parse the UI tree to locate the '撤单' button belonging to the order."""
-    lines = ui_text.split('\n')
+    snapshot = UISnapshot.of(ui_text)
     code_y = -1
     qty_y = -1
-    
-    for line in lines:
-        if f'"{code}"' in line:
-            m = re.search(r'\((\d+),(\d+),(\d+),(\d+)\)', line)
-            if m:
-                code_y = (int(m.group(2)) + int(m.group(4))) // 2
-        if quantity and f'"{quantity}"' in line and 'entrust_number' in line:
-            m = re.search(r'\((\d+),(\d+),(\d+),(\d+)\)', line)
-            if m:
-                qty_y = (int(m.group(2)) + int(m.group(4))) // 2
-                
+
+    for element in snapshot.elements_with(f'"{code}"'):
+        code_y = element.center[1]
+    if quantity:
+        for element in snapshot.elements_with(f'"{quantity}"'):
+            if 'entrust_number' in element.line:
+                qty_y = element.center[1]
+
+    cancel_buttons = sorted(
+        set(snapshot.elements_with('summary_cancel_btn'))
+        | {e for e in snapshot.elements_with('"撤单"') if 'Button' in e.line},
+        key=lambda e: e.line_no,
+    )
+
     if code_y != -1 and (not quantity or (qty_y != -1 and abs(code_y - qty_y) < 150)):
         target_y = code_y if qty_y == -1 else (code_y + qty_y) // 2
         logger.info(f"Identified target order row for {code} at Y={target_y}")
         
         best_btn_center = None
         min_dist = 999999
-        for line in lines:
-            if 'summary_cancel_btn' in line or ('"撤单"' in line and 'Button' in line):
-                m = re.search(r'\((\d+),(\d+),(\d+),(\d+)\)', line)
-                if m:
-                    cx = (int(m.group(1)) + int(m.group(3))) // 2
-                    cy = (int(m.group(2)) + int(m.group(4))) // 2
-                    dist = abs(cy - target_y)
-                    if dist < min_dist:
-                        min_dist = dist
-                        best_btn_center = (cx, cy)
+        for element in cancel_buttons:
+            dist = abs(element.center[1] - target_y)
+            if dist < min_dist:
+                min_dist = dist
+                best_btn_center = element.center
         if best_btn_center and min_dist < 150:
             return best_btn_center
 
     # Fallback to the first cancel button visible on screen
     logger.warning("Could not associate row coordinates precisely. Falling back to first visible cancel button.")
-    for line in lines:
-        if 'summary_cancel_btn' in line or ('"撤单"' in line and 'Button' in line):
-            m = re.search(r'\((\d+),(\d+),(\d+),(\d+)\)', line)
-            if m:
-                return (int(m.group(1)) + int(m.group(3))) // 2, (int(m.group(2)) + int(m.group(4))) // 2
-    return None
+    return cancel_buttons[0].center if cancel_buttons else None
 
 
 def cancel_ordinary_orders(codes: list[str], quantity: str, submit: bool) -> bool:
@@ -711,41 +711,37 @@ async def get_transactions_from_app_history_page_structured(
 # 2. Database Helpers & Logic
 # ==========================================
 
-_stock_name_to_code_map = {}
+def _security_master():
+    """Shared security-master index (stock_basic), or None when it cannot be loaded."""
+    try:
+        from backtest import basic_info_cache
+        return basic_info_cache.master
+    except Exception as e:
+        logger.warning(f"Security master unavailable, resolving names from the database only: {e}")
+        return None
+
 
 def init_stock_index_map():
-    global _stock_name_to_code_map
-    if _stock_name_to_code_map:
-        return
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    json_path = os.path.join(base_dir, "utils", "daily_stock_analysis", "apps", "dsa-web", "public", "stocks.index.json")
-    if os.path.exists(json_path):
-        try:
-            import json
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                for item in data:
-                    if len(item) >= 7 and item[6] == 'CN':
-                        code = item[1]
-                        name = normalize_stock_name(item[2])
-                        _stock_name_to_code_map[name] = code
-            logger.info(f"Loaded {len(_stock_name_to_code_map)} stock mappings from stocks.index.json")
-        except Exception as e:
-            logger.error(f"Failed to parse stocks.index.json: {e}")
+    """Load the shared security-master index up front (first use loads it otherwise)."""
+    master = _security_master()
+    if master is not None:
+        logger.info(f"Security master ready: {len(master)} stocks")
+
 
 def get_stock_code_by_name(name: str, user_id: int = 1) -> str:
-    """Query database or json index to find stock code for a given stock name."""
-    init_stock_index_map()
+    """Find the 6-digit stock code for a stock name.
 
-    # 1. Exact match in index map
-    if name in _stock_name_to_code_map:
-        return _stock_name_to_code_map[name]
+    Order: security master (exact, then cleaned name), the user's holdings,
+    smart orders and transactions, then a fuzzy n-gram match in the master.
+    """
+    master = _security_master()
 
-    # 2. Cleaned name match in index map
-    cleaned_name = clean_stock_name(name)
-    if cleaned_name in _stock_name_to_code_map:
-        return _stock_name_to_code_map[cleaned_name]
+    # 1-2. Exact / cleaned name in the security master
+    row = master.find_by_name(name) if master is not None else None
+    if row:
+        return str(row['symbol'])
 
+    cleaned_name = clean_stock_name(name)
     with DB.cursor() as cursor:
         # 3. Search in current holdings (exact and cleaned)
         for n in [name, cleaned_name]:
@@ -765,10 +761,11 @@ def get_stock_code_by_name(name: str, user_id: int = 1) -> str:
             if row and row[0] != "000000":
                 return row[0]
 
-        # 6. Check all keys in the index map for a cleaned match
-        for k, v in _stock_name_to_code_map.items():
-            if clean_stock_name(k) == cleaned_name:
-                return v
+    # 6. Unambiguous fuzzy match (e.g. a truncated or re-labelled app name)
+    row = master.find_by_name(name, fuzzy=True) if master is not None else None
+    if row:
+        logger.info(f"Resolved '{name}' to {row['symbol']} ({row['name']}) by fuzzy name match")
+        return str(row['symbol'])
 
     return ""
 
@@ -0,0 +1,230 @@
+"""
+Batched real-time quote service (auction open / latest price) for live trading.
+
+One `get_quotes(codes)` call asks every source for all codes at once and keeps,
+per code, the first valid (> 0) price that arrives:
+
+- tushare:   `stk_auction` (auction match price), then `realtime_quote` for the
+             codes still missing — comma-joined ts_codes, one shared pro client
+- tencent:   qt.gtimg.cn `q=sh600000,sz000001,...` (open, else latest)
+- eastmoney: push2 `ulist.np` with all secids (open, else latest; cents)
+
+Sources run in parallel on a shared thread pool over one pooled HTTP session,
+so a slow or dead source no longer delays the others; the call returns as soon
+as every code has a price or the QUOTE_TIMEOUT deadline passes. Prices are kept
+in memory for QUOTE_CACHE_TTL seconds (sub-second by default), so the same
+codes asked again in the same instant cost no request.
+
+Source URLs are overridable (QUOTE_TENCENT_URL / QUOTE_EASTMONEY_URL) so the
+service can be pointed at a local stub HTTP server.
+
+Usage:
+    from utils.quote_service import get_quote_service
+    prices = get_quote_service().get_quotes(['600000', '000001'])   # {'600000': 7.81, ...}
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import requests
+from loguru import logger
+
+QUOTE_TIMEOUT = float(os.getenv('QUOTE_TIMEOUT', '3'))            # seconds, per request and per batch
+QUOTE_CACHE_TTL = float(os.getenv('QUOTE_CACHE_TTL', '0.5'))      # seconds a fetched price is reused
+QUOTE_TENCENT_URL = os.getenv('QUOTE_TENCENT_URL', 'https://qt.gtimg.cn/q=')
+QUOTE_EASTMONEY_URL = os.getenv('QUOTE_EASTMONEY_URL', 'http://push2.eastmoney.com/api/qt/ulist.np/get')
+QUOTE_SOURCES = ('tushare', 'tencent', 'eastmoney')
+
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                         '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'}
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def _is_sh(code: str) -> bool:
+    return code.startswith(('6', '9'))
+
+
+def to_ts_code(code: str) -> str:
+    return f"{code}.SH" if _is_sh(code) else f"{code}.SZ"
+
+
+def _positive(value) -> float:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return value if value > 0 else 0.0
+
+
+def parse_tencent(text: str) -> Dict[str, float]:
+    """`v_sh600000="1~name~600000~latest~prev_close~open~..."` lines -> {code: open or latest}."""
+    prices = {}
+    for line in text.split(';'):
+        if '=' not in line:
+            continue
+        parts = line.split('=', 1)[1].strip('"\n\r ').split('~')
+        if len(parts) > 5:
+            price = _positive(parts[5]) or _positive(parts[3])
+            if price:
+                prices[parts[2]] = price
+    return prices
+
+
+def parse_eastmoney(payload: dict) -> Dict[str, float]:
+    """ulist.np `data.diff` rows (f12 code, f46 open, f43 latest, in cents) -> {code: price}."""
+    prices = {}
+    diff = ((payload or {}).get('data') or {}).get('diff') or []
+    for row in diff.values() if isinstance(diff, dict) else diff:
+        price = _positive(row.get('f46')) or _positive(row.get('f43'))
+        if price and row.get('f12'):
+            prices[str(row['f12'])] = price / 100.0
+    return prices
+
+
+class QuoteService:
+    """Multi-code quotes from parallel sources, first valid price per code wins."""
+
+    def __init__(self, sources: Sequence[str] = QUOTE_SOURCES,
+                 tencent_url: str = QUOTE_TENCENT_URL,
+                 eastmoney_url: str = QUOTE_EASTMONEY_URL,
+                 timeout: float = QUOTE_TIMEOUT,
+                 cache_ttl: float = QUOTE_CACHE_TTL):
+        self.sources = list(sources)
+        self.tencent_url = tencent_url
+        self.eastmoney_url = eastmoney_url
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update(HEADERS)
+        self._pool = ThreadPoolExecutor(max_workers=max(2, len(self.sources) * 2), thread_name_prefix='quote')
+        self._cache: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._pro = None
+        self._pro_failed = False
+
+    # ── sources ──────────────────────────────────────────────────────────────
+    def _tushare_client(self):
+        if self._pro is None and not self._pro_failed:
+            try:
+                import tushare as ts
+                from dotenv import load_dotenv
+                load_dotenv(os.path.expanduser('~/apps/imobile/.env'))
+                token = os.environ.get('TUSHARE_TOKEN')
+                if token:
+                    self._pro = ts.pro_api(token)
+                else:
+                    self._pro_failed = True
+            except Exception as e:
+                logger.warning(f"Tushare client unavailable for quotes: {e}")
+                self._pro_failed = True
+        return self._pro
+
+    def _fetch_tushare(self, codes: List[str]) -> Dict[str, float]:
+        pro = self._tushare_client()
+        if pro is None:
+            return {}
+        by_ts = {to_ts_code(c): c for c in codes}
+        prices = {}
+        try:
+            # Auction match price first (permission errors fall through)
+            df = pro.stk_auction(ts_code=','.join(by_ts), trade_date=datetime.now().strftime('%Y%m%d'))
+            if df is not None and not df.empty and 'price' in df.columns:
+                for ts_code, price in zip(df['ts_code'], df['price']):
+                    if ts_code in by_ts and _positive(price) and by_ts[ts_code] not in prices:
+                        prices[by_ts[ts_code]] = float(price)
+        except Exception:
+            pass
+        missing = [t for t, c in by_ts.items() if c not in prices]
+        if missing:
+            try:
+                df = pro.realtime_quote(ts_code=','.join(missing))
+                if df is not None and not df.empty and 'OPEN' in df.columns:
+                    latest = df['PRICE'] if 'PRICE' in df.columns else [0.0] * len(df)
+                    for ts_code, open_p, latest_p in zip(df['TS_CODE'], df['OPEN'], latest):
+                        price = _positive(open_p) or _positive(latest_p)
+                        if price and ts_code in by_ts:
+                            prices[by_ts[ts_code]] = price
+            except Exception:
+                pass
+        return prices
+
+    def _fetch_tencent(self, codes: List[str]) -> Dict[str, float]:
+        query = ','.join(f"{'sh' if _is_sh(c) else 'sz'}{c}" for c in codes)
+        res = self.session.get(self.tencent_url + query, timeout=self.timeout)
+        res.raise_for_status()
+        res.encoding = 'gbk'
+        return parse_tencent(res.text)
+
+    def _fetch_eastmoney(self, codes: List[str]) -> Dict[str, float]:
+        secids = ','.join(f"{'1' if _is_sh(c) else '0'}.{c}" for c in codes)
+        res = self.session.get(self.eastmoney_url, params={'secids': secids, 'fields': 'f12,f43,f46'},
+                               timeout=self.timeout)
+        res.raise_for_status()
+        return parse_eastmoney(res.json())
+
+    def _fetcher(self, source: str) -> Callable[[List[str]], Dict[str, float]]:
+        return getattr(self, f'_fetch_{source}')
+
+    # ── public API ───────────────────────────────────────────────────────────
+    def get_quotes(self, codes: Iterable[str]) -> Dict[str, float]:
+        """{code: open or latest price} for the 6-digit codes that any source priced."""
+        codes = list(dict.fromkeys(c.split('.')[0] for c in codes if c))
+        now = time.monotonic()
+        prices = {}
+        with self._lock:
+            for code in codes:
+                hit = self._cache.get(code)
+                if hit and now - hit[1] <= self.cache_ttl:
+                    prices[code] = hit[0]
+        missing = [c for c in codes if c not in prices]
+        if not missing:
+            return prices
+
+        futures = {self._pool.submit(self._fetcher(source), missing): source for source in self.sources}
+        pending, deadline, sources_of = set(futures), now + self.timeout, {}
+        while pending and len(sources_of) < len(missing):
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                source = futures[future]
+                try:
+                    fetched = future.result()
+                except Exception as e:
+                    logger.warning(f"{source} quote fetch failed: {e}")
+                    continue
+                for code in missing:
+                    if code not in sources_of and fetched.get(code):
+                        prices[code] = fetched[code]
+                        sources_of[code] = source
+
+        stamp = time.monotonic()
+        with self._lock:
+            for code in sources_of:
+                self._cache[code] = (prices[code], stamp)
+        unpriced = [c for c in missing if c not in sources_of]
+        logger.info(f"Fetched {len(sources_of)}/{len(missing)} live quotes in {stamp - now:.2f}s "
+                    f"({', '.join(sorted(set(sources_of.values()))) or 'no source'})"
+                    + (f"; no price for {unpriced}" if unpriced else ''))
+        return prices
+
+    def get_quote(self, code: str) -> Optional[float]:
+        return self.get_quotes([code]).get(code.split('.')[0])
+
+
+def get_quote_service() -> QuoteService:
+    """Process-wide service (one session, one Tushare client, one quote cache)."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = QuoteService()
+    return _service
@@ -0,0 +1,186 @@
+"""
+Persistent news/search result store shared by backtest days and processes.
+
+Results are keyed by (provider, normalized query, target date). A stock's news
+for a past date never changes, so results for historical target dates never
+expire; results for today (or an undated "latest" query) expire after
+SEARCH_TODAY_TTL seconds. Items are stored once, deduplicated by URL hash and
+by title hash, and each query keeps its ordered list of item hashes.
+
+The store is one SQLite file in WAL mode (the same expire-column design as
+SearXNG's ExpireCacheSQLite in utils/searxng/searx/cache.py), so concurrent
+pick processes of a backtest read and fill it safely.
+
+Usage:
+    store = get_search_store()
+    items = store.cached('tavily', query, '20260612', lambda: fetch_items(query))
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+SEARCH_CACHE_DB = os.getenv(
+    "SEARCH_CACHE_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shared", "db", "search_results.db"),
+)
+SEARCH_TODAY_TTL = int(os.getenv("SEARCH_TODAY_TTL", "1800"))   # seconds; historical dates never expire
+
+_store = None
+
+
+def normalize_query(query: str) -> str:
+    """Width/case-insensitive query key with collapsed whitespace."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", query or "")).strip().casefold()
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def item_keys(item: Dict[str, Any]) -> List[str]:
+    """Dedup keys of a result item: its URL hash and its normalized title hash."""
+    keys = []
+    url = (item.get("url") or "").strip()
+    if url:
+        keys.append("u:" + _hash(url.rstrip("/")))
+    title = normalize_query(item.get("title") or "")
+    if title:
+        keys.append("t:" + _hash(title))
+    if not keys:
+        keys.append("s:" + _hash(normalize_query(item.get("snippet") or "")))
+    return keys
+
+
+def dedup_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Items in order, dropping any whose URL or title was already seen."""
+    seen, out = set(), []
+    for item in items:
+        keys = item_keys(item)
+        if any(k in seen for k in keys):
+            continue
+        seen.update(keys)
+        out.append(item)
+    return out
+
+
+class SearchResultStore:
+    """(provider, query, target date) -> deduplicated result items."""
+
+    def __init__(self, db_path: str = SEARCH_CACHE_DB, today_ttl: int = SEARCH_TODAY_TTL):
+        self.db_path = db_path
+        self.today_ttl = today_ttl
+        self.stats = {"hits": 0, "misses": 0}
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS search_items (
+                    item_key TEXT PRIMARY KEY,
+                    data TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS search_queries (
+                    provider TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    target_date TEXT NOT NULL,
+                    item_keys TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    expire REAL,
+                    PRIMARY KEY (provider, query, target_date)
+                )
+            """)
+            conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _expire(self, target_date: str) -> Optional[float]:
+        today = datetime.now().strftime("%Y%m%d")
+        if target_date and target_date.replace("-", "") < today:
+            return None
+        return time.time() + self.today_ttl
+
+    def get(self, provider: str, query: str, target_date: str = "") -> Optional[List[Dict[str, Any]]]:
+        """Cached items, or None if the query was never stored or has expired."""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT item_keys, expire FROM search_queries WHERE provider = ? AND query = ? AND target_date = ?",
+                    (provider, normalize_query(query), target_date or ""),
+                ).fetchone()
+                if row is None or (row[1] is not None and row[1] < time.time()):
+                    return None
+                keys = json.loads(row[0])
+                data = {}
+                if keys:
+                    placeholders = ",".join("?" * len(keys))
+                    data = dict(conn.execute(
+                        f"SELECT item_key, data FROM search_items WHERE item_key IN ({placeholders})", keys))
+        except Exception as e:
+            logger.warning(f"Search store read error: {e}")
+            return None
+        return [json.loads(data[k]) for k in keys if k in data]
+
+    def put(self, provider: str, query: str, target_date: str, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Store the deduplicated items of a query; returns them."""
+        items = dedup_items(items)
+        keys = [item_keys(item)[0] for item in items]
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO search_items (item_key, data) VALUES (?, ?)",
+                    [(k, json.dumps(item, ensure_ascii=False, default=str)) for k, item in zip(keys, items)],
+                )
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO search_queries (provider, query, target_date, item_keys, fetched_at, expire)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (provider, normalize_query(query), target_date or "", json.dumps(keys),
+                     time.time(), self._expire(target_date)),
+                )
+                conn.commit()
+        except Exception as e:
+            logger.warning(f"Search store write error: {e}")
+        return items
+
+    def cached(self, provider: str, query: str, target_date: str,
+               fetch: Callable[[], Optional[List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        """Stored items of the query, else `fetch()` stored and returned.
+
+        `fetch` returns None (or raises) for a failed search; failures are not stored.
+        """
+        items = self.get(provider, query, target_date)
+        if items is not None:
+            self.stats["hits"] += 1
+            return items
+        self.stats["misses"] += 1
+        items = fetch()
+        if items is None:
+            return []
+        return self.put(provider, query, target_date, items)
+
+    def purge_expired(self) -> int:
+        """Drop expired queries (items stay: they are shared and small)."""
+        with self._connect() as conn:
+            n = conn.execute("DELETE FROM search_queries WHERE expire IS NOT NULL AND expire < ?", (time.time(),)).rowcount
+            conn.commit()
+        return n
+
+
+def get_search_store() -> SearchResultStore:
+    """Process-wide store on SEARCH_CACHE_DB."""
+    global _store
+    if _store is None:
+        _store = SearchResultStore()
+    return _store
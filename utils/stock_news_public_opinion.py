@@ -1,10 +1,17 @@
 import os
 import sys
 import json
-from typing import Optional, Dict, List
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Optional, Dict, List
 from datetime import datetime, timedelta
 from loguru import logger
 
+_utils_path = os.path.dirname(os.path.abspath(__file__))
+if _utils_path not in sys.path:
+    sys.path.insert(0, _utils_path)
+from search_store import get_search_store
+
 # Add daily_stock_analysis to path so we can import its robust SearchService
 _daily_analysis_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'utils', 'daily_stock_analysis')
 if _daily_analysis_path not in sys.path:
@@ -20,13 +27,19 @@ except ImportError as e:
 
 _search_service_instance = None
 
-# ── Provider capability cache ────────────────────────────────────────────────
-# The cache records which search providers actually return results for historical
-# date queries.  SearXNG's json_engine cannot extract display_time, so it always
-# fails the date-window filter for historical dates.  By testing once and
-# caching the results, the backtest avoids wasting time on broken providers.
+# ── Provider capability matrix ───────────────────────────────────────────────
+# The matrix records which search providers actually return results for historical
+# date queries, plus their measured latency (p50/p95 over the last probes) and
+# error rate.  SearXNG's json_engine cannot extract display_time, so it always
+# fails the date-window filter for historical dates.  Providers are probed
+# concurrently, each bounded by PROVIDER_PROBE_TIMEOUT, and the matrix is reused
+# without probing while younger than PROVIDER_CACHE_TTL_HOURS, so the backtest
+# neither waits on dead providers nor re-tests them on every start.
 
 PROVIDER_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "search_providers_cache.json")
+PROVIDER_CACHE_TTL_HOURS = float(os.getenv("PROVIDER_CACHE_TTL_HOURS", "24"))
+PROVIDER_PROBE_TIMEOUT = float(os.getenv("PROVIDER_PROBE_TIMEOUT", "15"))   # seconds per provider
+PROVIDER_SAMPLE_WINDOW = 20   # probes kept per provider for p50/p95 and error rate
 
 
 def _load_provider_cache() -> Dict:
@@ -149,32 +162,100 @@ def _save_provider_cache(cache: Dict) -> None:
     logger.info(f"Provider capability cache saved to {PROVIDER_CACHE_PATH}")
 
 
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0..100); None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return round(ordered[int(rank) - 1], 3)
+
+
+def _probe_provider(provider, query: str, max_results: int) -> Dict[str, Any]:
+    """One timed search: ok (>= 1 result), dated (>= 1 result with published_date), latency, error."""
+    start = time.monotonic()
+    try:
+        resp = provider.search(query, max_results=max_results, days=30)
+        ok = bool(resp.success and resp.results)
+        dated = ok and any(r.published_date for r in resp.results)
+        error = None if ok else (resp.error_message or "no results")
+    except Exception as e:
+        ok, dated, error = False, False, str(e)
+    return {"ok": ok, "dated": dated, "latency": time.monotonic() - start, "error": error}
+
+
+def _probe_all(providers: list, query: str, max_results: int, timeout: float) -> Dict[str, Dict[str, Any]]:
+    """Probe every provider at once; a provider still running after `timeout` counts as a failed probe."""
+    if not providers:
+        return {}
+    pool = ThreadPoolExecutor(max_workers=len(providers), thread_name_prefix="provider-probe")
+    futures = {pool.submit(_probe_provider, provider, query, max_results): name for name, provider in providers}
+    done, _ = wait(futures, timeout=timeout)
+    pool.shutdown(wait=False, cancel_futures=True)
+    return {
+        name: future.result() if future in done else
+        {"ok": False, "dated": False, "latency": timeout, "error": f"timeout after {timeout:g}s"}
+        for future, name in futures.items()
+    }
+
+
+def _matrix_entry(previous: Dict[str, Any], probe: Optional[Dict[str, Any]], probed_at: str) -> Dict[str, Any]:
+    """Capability row: flags from the latest probe, latency/error stats over the sample window."""
+    samples = list(previous.get("samples") or [])
+    if probe is not None:
+        samples = (samples + [[round(probe["latency"], 3), probe["ok"]]])[-PROVIDER_SAMPLE_WINDOW:]
+    latencies = [latency for latency, ok in samples if ok]
+    return {
+        "can_search": bool(probe and probe["ok"]),
+        "history_date_for_backtest": bool(probe and probe["dated"]),
+        "latency_p50": _percentile(latencies, 50),
+        "latency_p95": _percentile(latencies, 95),
+        "error_rate": round(sum(1 for _, ok in samples if not ok) / len(samples), 3) if samples else None,
+        "samples": samples,
+        "last_error": probe["error"] if probe else "no API key configured",
+        "probed_at": probed_at,
+    }
+
+
+def is_matrix_fresh(cache: Dict, max_age_hours: float = PROVIDER_CACHE_TTL_HOURS) -> bool:
+    """True when every provider row was probed within the freshness window."""
+    if not cache:
+        return False
+    cutoff = datetime.now() - timedelta(hours=max_age_hours)
+    try:
+        return all(datetime.fromisoformat(caps["probed_at"]) >= cutoff for caps in cache.values())
+    except (KeyError, TypeError, ValueError):
+        return False   # rows from before the matrix carried timestamps
+
+
 def test_search_providers(
     test_stock_name: str = "平安银行",
     test_stock_code: str = "000001.SZ",
     test_date: str = "",
     max_results: int = 3,
-) -> Dict[str, Dict[str, bool]]:
+    timeout: float = PROVIDER_PROBE_TIMEOUT,
+) -> Dict[str, Dict[str, Any]]:
     """
-    Test each configured search provider and record Capabilities.
+    Probe every configured search provider concurrently and update the capability matrix.
 
-    Each provider gets two boolean fields:
+    Each provider row has two capability flags from this probe:
 
     - ``can_search``: the provider is reachable and returns >= 1 result.
     - ``history_date_for_backtest``: the provider can return results **with
       published_date** for a historical-date query.  Backtest only uses
       providers where **both** fields are true.
 
-    Example return value (and cache file contents)::
+    and measured stats over its last PROVIDER_SAMPLE_WINDOW probes
+    (``latency_p50``/``latency_p95`` in seconds over successful probes,
+    ``error_rate``), the raw ``samples`` and ``probed_at``.  A provider still
+    running after ``timeout`` seconds is recorded as a failed probe.
+
+    Example row (cache file contents)::
 
-        {
-            "SearXNG":     {"can_search": true,  "history_date_for_backtest": false},
-            "Tavily":      {"can_search": true,  "history_date_for_backtest": true},
-            "SerpAPI":     {"can_search": true,  "history_date_for_backtest": true},
-            "TinyFish":    {"can_search": true,  "history_date_for_backtest": false},
-            "DuckDuckGo":  {"can_search": true,  "history_date_for_backtest": false},
-            "Anspire":     {"can_search": false, "history_date_for_backtest": false},
-        }
+        "SerpAPI": {"can_search": true, "history_date_for_backtest": true,
+                    "latency_p50": 1.42, "latency_p95": 2.9, "error_rate": 0.05,
+                    "samples": [[1.42, true], ...], "last_error": null,
+                    "probed_at": "2026-10-18T09:12:03"}
 
     The result is saved to ``search_providers_cache.json``.
     """
@@ -199,44 +280,26 @@ def test_search_providers(
     date_str = f"{test_date[:4]}年{test_date[4:6]}月{test_date[6:]}"
     query = f"{test_stock_name} {test_stock_code.split('.')[0]} 股票 {date_str} 最新消息 利好 舆情"
 
-    # Default entry for every provider
-    _default = {"can_search": False, "history_date_for_backtest": False}
-    results: Dict[str, Dict[str, bool]] = {}
-
-    logger.info(f"=== Testing search providers (historical date {test_date}) ===")
+    logger.info(f"=== Testing search providers (historical date {test_date}, timeout {timeout:g}s) ===")
 
-    for name, provider in all_providers:
-        results[name] = dict(_default)
+    live = [(name, provider) for name, provider in all_providers if provider is not None and provider.is_available]
+    started = time.monotonic()
+    probes = _probe_all(live, query, max_results, timeout)
 
-        if provider is None or not provider.is_available:
+    previous = _load_provider_cache()
+    probed_at = datetime.now().isoformat(timespec="seconds")
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, _ in all_providers:
+        probe = probes.get(name)
+        results[name] = _matrix_entry(previous.get(name, {}), probe, probed_at)
+        if probe is None:
             logger.info(f"  {name:20s}: SKIPPED (no API key configured)")
-            continue
-
-        # ── Test 1: basic can_search ──────────────────────────────────────
-        try:
-            resp = provider.search(query, max_results=max_results, days=30)
-            if resp.success and resp.results:
-                results[name]["can_search"] = True
-                # ── Test 2: history_date_for_backtest ────────────────────
-                dated = [r for r in resp.results if r.published_date]
-                if dated:
-                    results[name]["history_date_for_backtest"] = True
-                    logger.info(
-                        f"  {name:20s}: can_search=True  history_date=True  "
-                        f"({len(resp.results)} results, {len(dated)} with date)"
-                    )
-                else:
-                    logger.info(
-                        f"  {name:20s}: can_search=True  history_date=False  "
-                        f"({len(resp.results)} results, 0 with date)"
-                    )
-            else:
-                logger.info(
-                    f"  {name:20s}: can_search=False  history_date=False  "
-                    f"({resp.error_message or 'no results'})"
-                )
-        except Exception as e:
-            logger.info(f"  {name:20s}: can_search=False  history_date=False  ERROR: {e}")
+        else:
+            logger.info(
+                f"  {name:20s}: can_search={probe['ok']!s:5s}  history_date={probe['dated']!s:5s}  "
+                f"{probe['latency']:.2f}s  p50={results[name]['latency_p50']}  "
+                f"err={results[name]['error_rate']}" + (f"  ({probe['error']})" if probe["error"] else "")
+            )
 
     # SearXNG-specific hard override:
     # Even if SearXNG returns results (can_search=True), its json_engine
@@ -253,63 +316,77 @@ def test_search_providers(
     _save_provider_cache(results)
 
     # Print summary
-    ok_both = [k for k, v in results.items() if v["can_search"] and v["history_date_for_backtest"]]
+    ok_both = _by_latency([k for k, v in results.items() if v["can_search"] and v["history_date_for_backtest"]], results)
     ok_search_only = [k for k, v in results.items() if v["can_search"] and not v["history_date_for_backtest"]]
     broken = [k for k, v in results.items() if not v["can_search"]]
-    logger.info(f"=== Backtest-usable providers (both true): {ok_both} ===")
+    logger.info(f"=== Probed {len(live)} providers in {time.monotonic() - started:.1f}s ===")
+    logger.info(f"=== Backtest-usable providers (both true, fastest first): {ok_both} ===")
     logger.info(f"=== Search-only providers: {ok_search_only} ===")
     logger.info(f"=== Broken/unavailable providers: {broken} ===")
 
     return results
 
 
+def ensure_provider_matrix(max_age_hours: float = PROVIDER_CACHE_TTL_HOURS) -> Dict[str, Dict[str, Any]]:
+    """The provider matrix, re-probed only when missing or older than `max_age_hours`."""
+    cache = _load_provider_cache()
+    if is_matrix_fresh(cache, max_age_hours):
+        logger.info(f"Search provider matrix is fresh (< {max_age_hours:g}h); skipping provider probes")
+        return cache
+    return test_search_providers() or cache
+
+
+def _by_latency(names: List[str], cache: Dict) -> List[str]:
+    """Provider names ordered by measured p50 latency (unmeasured last, original order kept on ties)."""
+    def key(name):
+        p50 = cache.get(name, {}).get("latency_p50")
+        return (p50 is None, p50 or 0.0)
+    return sorted(names, key=key)
+
+
 def get_backtest_providers() -> List[str]:
     """
-    Return provider names that are usable for backtest.
+    Return provider names that are usable for backtest, fastest first.
 
     A provider is usable when **both** ``can_search`` AND
     ``history_date_for_backtest`` are true in the cache.
     """
     cache = _load_provider_cache()
-    return [
+    return _by_latency([
         name for name, caps in cache.items()
         if caps.get("can_search") and caps.get("history_date_for_backtest")
-    ]
+    ], cache)
 
 
 def get_search_capable_providers() -> List[str]:
     """
-    Return provider names that can perform basic search (can_search=true).
+    Return provider names that can perform basic search (can_search=true), fastest first.
     This includes providers that may not have historical date support.
     """
     cache = _load_provider_cache()
-    return [name for name, caps in cache.items() if caps.get("can_search")]
+    return _by_latency([name for name, caps in cache.items() if caps.get("can_search")], cache)
 
 
 def get_search_service() -> Optional['SearchService']:
     """
     Return a SearchService filtered to only use providers that passed the
-    capability test.
+    capability test, tried in order of measured latency.
 
-    If no cache exists yet, the first call will run the provider test automatically.
+    If the capability matrix is missing or stale, it is re-probed first.
     """
     global _search_service_instance
 
     if not SERVICE_AVAILABLE:
         return None
 
-    cache = _load_provider_cache()
-
-    # If cache is empty, run the test once
+    cache = ensure_provider_matrix()
     if not cache:
-        logger.info("No provider cache found; running provider test...")
-        cache = test_search_providers()
-        if not cache:
-            logger.warning("Provider test returned empty results; using all providers")
+        logger.warning("Provider test returned empty results; using all providers")
 
     # Build env filter from cache: only include backtest-capable providers
     # (both can_search AND history_date_for_backtest are true).
     backtest_providers = get_backtest_providers()
+    order = backtest_providers or get_search_capable_providers()
     if backtest_providers:
         provider_filter = ",".join(p.lower() for p in backtest_providers)
         os.environ["WORKING_SEARCH_PROVIDERS"] = provider_filter
@@ -343,6 +420,7 @@ def get_search_service() -> Optional['SearchService']:
         except Exception as e:
             logger.error(f"Failed to initialize SearchService: {e}")
             return None
+        _order_by_latency(_search_service_instance, order)
 
     # NOTE: We do NOT patch SearXNG to skip time_range.  Instead, we mark
     # SearXNG as "cannot provide historical date info" in the provider cache
@@ -353,6 +431,17 @@ def get_search_service() -> Optional['SearchService']:
 
     return _search_service_instance
 
+
+def _order_by_latency(service, order: List[str]) -> None:
+    """Sort the service's provider list so the fastest measured providers are tried first."""
+    providers = getattr(service, "_providers", None)
+    if not order or not isinstance(providers, list):
+        return
+    rank = {name.lower(): i for i, name in enumerate(order)}
+    providers.sort(key=lambda p: rank.get(str(getattr(p, "name", "")).lower(), len(rank)))
+    logger.info(f"Search provider order (by p50 latency): {order}")
+
+
 def fetch_stock_news_and_opinion(stock_name: str, stock_code: str, target_date: str, max_results: int = 5) -> str:
     """
     Fetch historical news and public opinion for a specific stock on a specific date.
@@ -367,37 +456,44 @@ def fetch_stock_news_and_opinion(stock_name: str, stock_code: str, target_date:
     Returns:
         Formatted string containing news and public opinions
     """
-    service = get_search_service()
-    if not service or not service.is_available:
-        return ""
-        
-    try:
-        # Format date for searching
-        if len(target_date) == 8:
-            date_str = f"{target_date[:4]}年{target_date[4:6]}月{target_date[6:]}日"
-        else:
-            date_str = target_date
-            
-        # Comprehensive query for A-Share
-        query = f"{stock_name} {stock_code.split('.')[0]} 股票 {date_str} 最新消息 利好 舆情"
-        
+    # Format date for searching
+    if len(target_date) == 8:
+        date_str = f"{target_date[:4]}年{target_date[4:6]}月{target_date[6:]}日"
+    else:
+        date_str = target_date
+
+    # Comprehensive query for A-Share
+    query = f"{stock_name} {stock_code.split('.')[0]} 股票 {date_str} 最新消息 利好 舆情"
+
+    def _search() -> Optional[List[Dict]]:
+        service = get_search_service()
+        if not service or not service.is_available:
+            return None
         response = service.search_stock_news(
-            stock_code=stock_code, 
-            stock_name=stock_name, 
-            max_results=max_results, 
+            stock_code=stock_code,
+            stock_name=stock_name,
+            max_results=max_results,
             focus_keywords=[query]
         )
-        
-        if not response or not response.results:
-            return ""
-            
-        results = []
-        for i, item in enumerate(response.results):
-            # Format the output clearly
-            results.append(f"{i+1}. [{item.source}] {item.title}: {item.snippet}")
-            
-        return "\n".join(results)
-        
+        if not response or not getattr(response, 'success', True):
+            return None
+        return [
+            {
+                "title": item.title,
+                "snippet": item.snippet,
+                "source": item.source,
+                "url": getattr(item, "url", ""),
+                "published_date": getattr(item, "published_date", None),
+            }
+            for item in (response.results or [])
+        ]
+
+    try:
+        # Historical news never changes: the store answers dates already seen without
+        # touching the search service (or probing providers)
+        items = get_search_store().cached("search_service", f"{query} #{max_results}", target_date, _search)
+        # Format the output clearly
+        return "\n".join(f"{i+1}. [{item['source']}] {item['title']}: {item['snippet']}" for i, item in enumerate(items))
     except Exception as e:
         logger.error(f"Error fetching news via stock_news_public_opinion: {e}")
-        return ""
\ No newline at end of file
+        return ""
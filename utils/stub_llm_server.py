@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for an OpenAI-compatible chat completions endpoint.
+
+Load-tests the ts_daily analysis pipeline without spending model quota:
+point the analyzer at it with LLM_BASE_URL and every completion returns a
+well-formed decision JSON after a fixed latency. The score is derived from the
+prompt hash, so identical prompts get identical answers.
+
+Usage:
+    python utils/stub_llm_server.py [--port 8765] [--latency 1.5]
+    LLM_BASE_URL=http://127.0.0.1:8765/v1 python backtest/strategies/ts_daily.py 20260612
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _decision(prompt: str) -> str:
+    digest = int(hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8], 16)
+    score = 40 + digest % 55
+    return json.dumps({
+        "score": score,
+        "recommendation": "买入" if score >= 70 else "观望",
+        "summary": "stub completion",
+        "tp_pct": 0.12,
+        "sl_pct": 0.05,
+        "confidence": 0.5,
+    }, ensure_ascii=False)
+
+
+def make_handler(latency: float = 0.0):
+    class StubHandler(BaseHTTPRequestHandler):
+        calls = 0
+        lock = threading.Lock()
+
+        def do_POST(self):
+            if not self.path.rstrip('/').endswith('/chat/completions'):
+                self.send_error(404)
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            prompt = ''.join(m.get('content', '') for m in body.get('messages', []))
+            with StubHandler.lock:
+                StubHandler.calls += 1
+            if latency:
+                time.sleep(latency)
+            payload = json.dumps({
+                "id": "stub-completion",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get('model', 'stub'),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": _decision(prompt)}}],
+                "usage": {"prompt_tokens": len(prompt), "completion_tokens": 0, "total_tokens": len(prompt)},
+            }, ensure_ascii=False).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def serve(port: int = 8765, latency: float = 0.0, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """Start the stub in a daemon thread; server.server_address has the bound port (port=0 picks one)."""
+    server = ThreadingHTTPServer((host, port), make_handler(latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='OpenAI-compatible stub LLM endpoint for load tests')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=1.0, help='Seconds per completion')
+    args = parser.parse_args()
+    server = serve(port=args.port, latency=args.latency)
+    print(f"Stub LLM listening on http://127.0.0.1:{args.port}/v1 (latency {args.latency}s)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -10,6 +10,9 @@ nest_asyncio.apply()
 
 # Add project root to path for imports to work
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.ui_snapshot import UISnapshot, current_snapshot, remember_snapshot, invalidate_ui_snapshot
+
+UI_DUMP_CMD = "mobilerun device ui"
 
 
 PAGE_LABELS = {
@@ -26,6 +29,8 @@ PAGE_LABELS = {
 def run_cmd(cmd: str, check: bool = True) -> subprocess.CompletedProcess:
     """Run a shell command and return the result."""
     logger.debug(f"$ {cmd}")
+    if cmd != UI_DUMP_CMD:
+        invalidate_ui_snapshot()  # any device command may change the screen
     result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
     if check and result.returncode != 0:
         logger.error(f"Command failed: {cmd}\nstderr: {result.stderr}")
@@ -67,78 +72,41 @@ def adb_clear_field(max_chars: int = 20) -> None:
     time.sleep(0.1)
 
 
-def get_ui_tree() -> str:
-    """Get the current UI accessibility tree."""
-    result = run_cmd("mobilerun device ui", check=False)
-    return result.stdout
+def get_ui_tree(refresh: bool = False) -> UISnapshot:
+    """Get the current UI accessibility tree, parsed and indexed.
+
+    The last dump is returned again until an action invalidates it (see
+    utils/ui_snapshot.py); `refresh=True` always re-dumps.
+    """
+    snapshot = None if refresh else current_snapshot()
+    if snapshot is None:
+        result = run_cmd(UI_DUMP_CMD, check=False)
+        snapshot = remember_snapshot(UISnapshot(result.stdout))
+    return snapshot
 
 
 # ---------------------------------------------------------------------------
-# UI element finders
+# UI element finders (accept a get_ui_tree() snapshot or raw dump text)
 # ---------------------------------------------------------------------------
 
 def find_element_center(ui_text: str, label: str, exclude_edittext: bool = False) -> tuple[int, int] | None:
     """Find an element by label text in the UI tree and return its center (x, y)."""
-    for line in ui_text.split('\n'):
-        if label in line:
-            if exclude_edittext and 'EditText' in line:
-                continue
-            match = re.search(r'\((\d+),(\d+),(\d+),(\d+)\)', line)
-            if match:
-                x1, y1, x2, y2 = int(match.group(1)), int(match.group(2)), int(match.group(3)), int(match.group(4))
-                return (x1 + x2) // 2, (y1 + y2) // 2
-    return None
+    return UISnapshot.of(ui_text).find(label, exclude_edittext)
 
 
 def find_edittext_near_label(ui_text: str, label: str) -> tuple[int, int] | None:
     """Find the EditText element that appears near a given label in the UI tree."""
-    lines = ui_text.split('\n')
-    for line in lines:
-        if label in line and 'EditText' in line:
-            match = re.search(r'\((\d+),(\d+),(\d+),(\d+)\)', line)
-            if match:
-                x1, y1, x2, y2 = int(match.group(1)), int(match.group(2)), int(match.group(3)), int(match.group(4))
-                return (x1 + x2) // 2, (y1 + y2) // 2
-
-    found_label_idx = None
-    for i, line in enumerate(lines):
-        if label in line and 'EditText' not in line:
-            found_label_idx = i
-            continue
-        if found_label_idx is not None and 'EditText' in line and (i - found_label_idx) <= 10:
-            match = re.search(r'\((\d+),(\d+),(\d+),(\d+)\)', line)
-            if match:
-                x1, y1, x2, y2 = int(match.group(1)), int(match.group(2)), int(match.group(3)), int(match.group(4))
-                return (x1 + x2) // 2, (y1 + y2) // 2
-    return None
+    return UISnapshot.of(ui_text).find_edittext_near_label(label)
 
 
 def find_button_center(ui_text: str, label: str) -> tuple[int, int] | None:
     """Find a Button element by label text in the UI tree and return its center."""
-    for line in ui_text.split('\n'):
-        if 'Button' in line and label in line:
-            match = re.search(r'\((\d+),(\d+),(\d+),(\d+)\)', line)
-            if match:
-                x1, y1, x2, y2 = int(match.group(1)), int(match.group(2)), int(match.group(3)), int(match.group(4))
-                return (x1 + x2) // 2, (y1 + y2) // 2
-    return None
+    return UISnapshot.of(ui_text).find_button(label)
 
 
 def find_edittext_by_y(ui_text: str, target_y: int, y_tolerance: int = 40) -> tuple[int, int] | None:
     """Find an EditText whose center Y is closest to the target Y coordinate."""
-    best_center = None
-    min_diff = y_tolerance
-    for line in ui_text.split('\n'):
-        if 'EditText' in line:
-            match = re.search(r'\((\d+),(\d+),(\d+),(\d+)\)', line)
-            if match:
-                x1, y1, x2, y2 = int(match.group(1)), int(match.group(2)), int(match.group(3)), int(match.group(4))
-                cy = (y1 + y2) // 2
-                diff = abs(cy - target_y)
-                if diff < min_diff:
-                    min_diff = diff
-                    best_center = ((x1 + x2) // 2, cy)
-    return best_center
+    return UISnapshot.of(ui_text).find_edittext_by_y(target_y, y_tolerance)
 
 
 # ---------------------------------------------------------------------------
@@ -289,6 +257,7 @@ def set_valid_until_today(ui_text: str) -> None:
                         x, y = ui_state.get_element_coords(i)
                         logger.info(f"Found date field '{text[:30]}' at ({x}, {y})")
                         asyncio.get_event_loop().run_until_complete(driver.tap(x, y))
+                        invalidate_ui_snapshot()
                         time.sleep(2.0)
                         # Verify picker opened
                         ui2 = asyncio.get_event_loop().run_until_complete(provider.get_state())
@@ -723,95 +692,15 @@ def get_available_cash_from_homepage() -> float:
 
 
 def get_realtime_quote(code: str) -> float | None:
-    """Fetch the real-time open/auction price from Tushare with Tencent/EastMoney APIs fallback."""
-    import requests
-    import time
-    from datetime import datetime
-    
-    # 0. Format the ts_code
-    ts_code = f"{code}.SH" if code.startswith(('6', '9')) else f"{code}.SZ"
-    
-    # 1. Try Tushare API (Primary)
-    try:
-        import tushare as ts
-        import os
-        from dotenv import load_dotenv
-        
-        load_dotenv(os.path.expanduser('~/apps/imobile/.env'))
-        token = os.environ.get('TUSHARE_TOKEN')
-        if token:
-            ts.set_token(token)
-            pro = ts.pro_api()
-            
-            today_str = datetime.now().strftime('%Y%m%d')
-            
-            # Try stk_auction first for auction open price
-            try:
-                df_auction = pro.stk_auction(ts_code=ts_code, trade_date=today_str)
-                if not df_auction.empty and 'price' in df_auction.columns:
-                    # Get the most recent auction match price
-                    price = float(df_auction.iloc[0]['price'])
-                    if price > 0:
-                        logger.info(f"Fetched live auction price via Tushare (stk_auction) for {code}: {price}")
-                        return price
-            except Exception as e:
-                # E.g. permission error, just silently fall through to next method
-                pass
-                
-            # Try realtime_quote
-            try:
-                df_rt = pro.realtime_quote(ts_code=ts_code)
-                if not df_rt.empty and 'OPEN' in df_rt.columns:
-                    open_p = float(df_rt.iloc[0]['OPEN'])
-                    latest_p = float(df_rt.iloc[0].get('PRICE', 0.0))
-                    price = open_p if open_p > 0 else latest_p
-                    if price > 0:
-                        logger.info(f"Fetched live price via Tushare (realtime_quote) for {code}: {price}")
-                        return price
-            except Exception as e:
-                pass
-    except Exception as e:
-        logger.warning(f"Tushare quote fetch failed for {code}: {e}")
+    """Fetch the real-time open/auction price (Tushare, Tencent and EastMoney queried in parallel)."""
+    from utils.quote_service import get_quote_service
+    return get_quote_service().get_quote(code)
 
-    # 2. Try Tencent API (Highly stable, returns direct float values)
-    prefix = 'sh' if code.startswith(('6', '9')) else 'sz'
-    url_tencent = f"https://qt.gtimg.cn/q={prefix}{code}"
-    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'}
-    try:
-        res = requests.get(url_tencent, headers=headers, timeout=3)
-        if res.status_code == 200 and '=' in res.text:
-            content = res.text.split('=', 1)[1].strip('";\n ')
-            parts = content.split('~')
-            if len(parts) > 5:
-                open_p = float(parts[4]) if parts[4] and parts[4] != '0.00' else 0.0
-                latest_p = float(parts[3]) if parts[3] and parts[3] != '0.00' else 0.0
-                price = open_p if open_p > 0 else latest_p
-                if price > 0:
-                    logger.info(f"Fetched live price via Tencent for {code}: {price}")
-                    return price
-    except Exception as e:
-        logger.warning(f"Tencent quote fetch failed for {code}: {e}")
 
-    # 3. Try EastMoney API (Fallback, returns cents)
-    secid = f"1.{code}" if code.startswith(('6', '9')) else f"0.{code}"
-    url_eastmoney = f"http://push2.eastmoney.com/api/qt/stock/get?secid={secid}&fields=f43,f44,f45,f46"
-    try:
-        time.sleep(0.1)
-        res = requests.get(url_eastmoney, headers=headers, timeout=3)
-        if res.status_code == 200:
-            d = res.json().get('data', {})
-            if d:
-                open_p = d.get('f46')
-                latest_p = d.get('f43')
-                price = open_p if open_p and open_p != '-' else latest_p
-                if price and price != '-':
-                    val = float(price) / 100.0
-                    logger.info(f"Fetched live price via EastMoney fallback for {code}: {val}")
-                    return val
-    except Exception as e:
-        logger.warning(f"EastMoney quote fallback failed for {code}: {e}")
-        
-    return None
+def get_realtime_quotes(codes: list[str]) -> dict[str, float]:
+    """Real-time open/auction prices for many 6-digit codes in one batch ({code: price}, unpriced codes omitted)."""
+    from utils.quote_service import get_quote_service
+    return get_quote_service().get_quotes(codes)
 
 
 def goto_cancel_order_page() -> None:
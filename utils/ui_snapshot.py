@@ -0,0 +1,191 @@
+"""
+Parsed, indexed snapshot of a `mobilerun device ui` dump.
+
+The dump is one line per node, e.g.::
+
+    12. EditText: "com.guotai.dazhihui:id/et_price", "3.97" - (120,840,846,872)
+
+UISnapshot parses it once into UIElement records (class, resource id, text,
+bounds, centre) and keeps indexes for the order-entry helpers in utils/tools.py:
+
+- label lookups (substring over the node line, as the helpers always matched)
+  memoized per label, plus an exact-text index
+- a class index (EditText, Button, ...)
+- EditTexts sorted by centre Y for nearest-row lookups by binary search
+
+UISnapshot is a `str`, so existing callers that test `label in ui` or split
+the dump keep working unchanged. `UISnapshot.of(text)` reuses the parse of the
+most recent dump when given the same text.
+
+`utils.tools.get_ui_tree()` hands out the current snapshot again until a
+device action invalidates it (`invalidate_ui_snapshot()`: every tools
+`run_cmd` other than the dump itself, and the trading.guotai navigation
+helpers) or it is older than UI_SNAPSHOT_MAX_AGE seconds, so screens that
+change on their own (popups, loading lists) are still re-read when polled.
+"""
+
+import os
+import re
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+BOUNDS_RE = re.compile(r'\((\d+),(\d+),(\d+),(\d+)\)')
+NODE_RE = re.compile(r'^\s*\d+\.\s*([\w.$]+):\s*(.*?)\s*-\s*\(\d+,\d+,\d+,\d+\)')
+QUOTED_RE = re.compile(r'"([^"]*)"')
+
+NEAR_LABEL_LINES = 10   # an EditText belongs to a label at most this many lines above it
+UI_SNAPSHOT_MAX_AGE = float(os.getenv('UI_SNAPSHOT_MAX_AGE', '2'))   # seconds
+
+_current = None   # (UISnapshot, time.monotonic() of the dump)
+
+
+@dataclass(frozen=True)
+class UIElement:
+    """One node of the dump that has screen bounds."""
+    line_no: int
+    cls: str
+    resource_id: str
+    text: str
+    bounds: Tuple[int, int, int, int]
+    line: str
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        x1, y1, x2, y2 = self.bounds
+        return (x1 + x2) // 2, (y1 + y2) // 2
+
+    @property
+    def is_edittext(self) -> bool:
+        return 'EditText' in self.line
+
+    def contains(self, x: int, y: int) -> bool:
+        x1, y1, x2, y2 = self.bounds
+        return x1 <= x <= x2 and y1 <= y <= y2
+
+
+def parse_element(line_no: int, line: str) -> Optional[UIElement]:
+    """UIElement for a dump line with bounds, else None."""
+    match = BOUNDS_RE.search(line)
+    if not match:
+        return None
+    cls, resource_id, text = '', '', ''
+    node = NODE_RE.match(line)
+    if node:
+        cls = node.group(1)
+        quoted = QUOTED_RE.findall(node.group(2))
+        if len(quoted) >= 2:
+            resource_id, text = quoted[0], quoted[-1]
+        elif quoted:
+            text = quoted[0]
+    return UIElement(line_no, cls, resource_id, text, tuple(int(g) for g in match.groups()), line)
+
+
+class UISnapshot(str):
+    """A UI dump parsed once, with label, class and Y indexes."""
+
+    _last: Optional['UISnapshot'] = None
+
+    def __new__(cls, text: str = ''):
+        self = super().__new__(cls, text or '')
+        self.lines = self.split('\n')
+        self.elements: List[UIElement] = [e for i, line in enumerate(self.lines) if (e := parse_element(i, line))]
+        self._by_line = {e.line_no: e for e in self.elements}
+        self.by_class: Dict[str, List[UIElement]] = {}
+        self.by_text: Dict[str, List[UIElement]] = {}
+        for element in self.elements:
+            self.by_class.setdefault(element.cls, []).append(element)
+            self.by_text.setdefault(element.text.strip(), []).append(element)
+        self.edittexts = [e for e in self.elements if e.is_edittext]
+        self._edittexts_by_y = sorted(self.edittexts, key=lambda e: (e.center[1], e.line_no))
+        self._edittext_ys = [e.center[1] for e in self._edittexts_by_y]
+        self._label_lines: Dict[str, List[int]] = {}
+        self._label_elements: Dict[str, List[UIElement]] = {}
+        return self
+
+    @classmethod
+    def of(cls, ui_text: str) -> 'UISnapshot':
+        """The snapshot of `ui_text` (itself if already parsed, else the cached parse of the same dump)."""
+        if isinstance(ui_text, UISnapshot):
+            return ui_text
+        last = cls._last
+        if last is None or str.__ne__(last, ui_text):
+            last = cls._last = cls(ui_text)
+        return last
+
+    # ── indexes ──────────────────────────────────────────────────────────────
+    def lines_with(self, label: str) -> List[int]:
+        """Line numbers whose text contains `label` (computed once per label)."""
+        hits = self._label_lines.get(label)
+        if hits is None:
+            hits = self._label_lines[label] = [i for i, line in enumerate(self.lines) if label in line]
+        return hits
+
+    def elements_with(self, label: str) -> List[UIElement]:
+        """Elements (lines with bounds) whose line contains `label`, in dump order."""
+        hits = self._label_elements.get(label)
+        if hits is None:
+            hits = self._label_elements[label] = [self._by_line[i] for i in self.lines_with(label) if i in self._by_line]
+        return hits
+
+    def with_text(self, text: str) -> List[UIElement]:
+        """Elements whose text is exactly `text` (surrounding whitespace ignored)."""
+        return self.by_text.get(text.strip(), [])
+
+    def element_at(self, x: int, y: int) -> Optional[UIElement]:
+        """First element whose bounds contain (x, y)."""
+        return next((e for e in self.elements if e.contains(x, y)), None)
+
+    # ── finders (same matching rules as the utils/tools helpers) ─────────────
+    def find(self, label: str, exclude_edittext: bool = False) -> Optional[Tuple[int, int]]:
+        """Centre of the first element whose line contains `label`."""
+        for element in self.elements_with(label):
+            if not (exclude_edittext and element.is_edittext):
+                return element.center
+        return None
+
+    def find_button(self, label: str) -> Optional[Tuple[int, int]]:
+        """Centre of the first Button whose line contains `label`."""
+        return next((e.center for e in self.elements_with(label) if 'Button' in e.line), None)
+
+    def find_edittext_near_label(self, label: str) -> Optional[Tuple[int, int]]:
+        """An EditText carrying `label`, else the first EditText within NEAR_LABEL_LINES lines below a label line."""
+        for element in self.elements_with(label):
+            if element.is_edittext:
+                return element.center
+        label_lines = [i for i in self.lines_with(label) if 'EditText' not in self.lines[i]]
+        for element in self.edittexts:
+            k = bisect_left(label_lines, element.line_no)
+            if k and element.line_no - label_lines[k - 1] <= NEAR_LABEL_LINES:
+                return element.center
+        return None
+
+    def find_edittext_by_y(self, target_y: int, y_tolerance: int = 40) -> Optional[Tuple[int, int]]:
+        """Centre of the EditText whose centre Y is closest to `target_y` (strictly within the tolerance)."""
+        lo = bisect_right(self._edittext_ys, target_y - y_tolerance)
+        hi = bisect_left(self._edittext_ys, target_y + y_tolerance)
+        candidates = self._edittexts_by_y[lo:hi]
+        if not candidates:
+            return None
+        best = min(candidates, key=lambda e: (abs(e.center[1] - target_y), e.line_no))
+        return best.center
+
+
+def current_snapshot(max_age: float = UI_SNAPSHOT_MAX_AGE) -> Optional[UISnapshot]:
+    """The last dump's snapshot if no action invalidated it and it is younger than `max_age`."""
+    if _current is None or time.monotonic() - _current[1] > max_age:
+        return None
+    return _current[0]
+
+
+def remember_snapshot(snapshot: UISnapshot) -> UISnapshot:
+    global _current
+    _current = (snapshot, time.monotonic())
+    return snapshot
+
+
+def invalidate_ui_snapshot() -> None:
+    """Forget the current snapshot (call after anything that may change the screen)."""
+    global _current
+    _current = None